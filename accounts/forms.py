@@ -0,0 +1,15 @@
+from django.contrib.auth.forms import PasswordResetForm
+from django.template.loader import render_to_string
+
+from shop import outbox
+
+
+class OutboxPasswordResetForm(PasswordResetForm):
+    """Şifre sıfırlama e-postası istekte gönderilmez, kuyruğa yazılır (bkz. shop/outbox.py)."""
+
+    def send_mail(self, subject_template_name, email_template_name, context, from_email, to_email,
+                  html_email_template_name=None):
+        subject = "".join(render_to_string(subject_template_name, context).splitlines())
+        body = render_to_string(email_template_name, context)
+        html = render_to_string(html_email_template_name, context) if html_email_template_name else ''
+        outbox.enqueue_message(subject, body, [to_email], html=html, from_email=from_email or '')
@@ -7,6 +7,8 @@ from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.test import override_settings
 
+from shop import outbox
+
 
 class EmailVerificationTestCase(TestCase):
     def setUp(self):
@@ -79,7 +81,8 @@ class EmailVerificationTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'E-posta Gönderildi')
         
-        # E-posta gönderildiğini kontrol et
+        # E-posta gönderildiğini kontrol et (kuyruk run_mailer ile boşalır)
+        outbox.drain()
         self.assertEqual(len(mail.outbox), 1)
         sent_email = mail.outbox[0]
         self.assertIn('E-posta doğrulama', sent_email.subject)
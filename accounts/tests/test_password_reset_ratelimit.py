@@ -1,7 +1,12 @@
+from django.core.cache import cache
 from django.test import TestCase
 
 
 class PasswordResetRateLimitTests(TestCase):
+    def setUp(self):
+        # Sayaç önbellekte; önceki testlerin istekleri sayılmasın
+        cache.clear()
+
     def test_password_reset_ratelimit(self):
         statuses = []
         for _ in range(6):
@@ -7,6 +7,8 @@ from django.contrib.auth.tokens import default_token_generator
 from django.core import mail
 from django.core.cache import cache
 
+from shop import outbox
+
 
 @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
 class SignupVerifyTests(TestCase):
@@ -76,4 +78,5 @@ class SignupVerifyTests(TestCase):
             username="veli", email="veli@example.com", password="sifre123", is_active=False
         )
         self.client.post(reverse("resend_verification"), {"email": "veli@example.com"})
+        outbox.drain()
         self.assertGreaterEqual(len(mail.outbox), 1)
\ No newline at end of file
@@ -12,11 +12,13 @@ from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.urls import reverse
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 
+from shop import outbox
+from .forms import OutboxPasswordResetForm
+
 
 def register_view(request):
     if request.method == 'POST':
@@ -49,6 +51,7 @@ def logout_view(request):
 
 @method_decorator(ratelimit(key="ip", rate="5/m", block=True), name="dispatch")
 class PasswordResetView(DjangoPasswordResetView):
+    form_class = OutboxPasswordResetForm
     template_name = "registration/password_reset_form.html"
     email_template_name = "registration/password_reset_email.html"
     subject_template_name = "registration/password_reset_subject.txt"
@@ -56,12 +59,9 @@ class PasswordResetView(DjangoPasswordResetView):
 
 
 # --- E-posta Doğrulama Yardımcıları ---
-def _send_verification_email(request, user):
-    uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
-    token = default_token_generator.make_token(user)
-    link = request.build_absolute_uri(
-        reverse('verify_email', args=[uidb64, token])
-    )
+def _render_verification_email(user_id, link):
+    """Doğrulama e-postasının içeriği (gönderici çağırır, bkz. shop/outbox.py)"""
+    user = get_user_model().objects.get(pk=user_id)
     ctx = {
         "user": user,
         "verify_link": link,
@@ -70,14 +70,16 @@ def _send_verification_email(request, user):
     subject = render_to_string("registration/verify_email_subject.txt", ctx).strip()
     html = render_to_string("registration/verify_email_email.html", ctx)
     text = f"Merhaba {getattr(user, 'first_name', '')},\n\nHesabınızı doğrulamak için: {link}\n"
-    send_mail(
-        subject=subject or "E-posta doğrulama",
-        message=text,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        html_message=html,
-        fail_silently=getattr(settings, 'EMAIL_FAIL_SILENTLY', True),
+    return subject or "E-posta doğrulama", text, html
+
+
+def _send_verification_email(request, user):
+    uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+    token = default_token_generator.make_token(user)
+    link = request.build_absolute_uri(
+        reverse('verify_email', args=[uidb64, token])
     )
+    outbox.enqueue('accounts.views._render_verification_email', user.email, user_id=user.pk, link=link)
 
 
 class ResendVerificationView(View):
@@ -74,6 +74,30 @@ def ratelimit_check(app_configs, **kwargs) -> list[CheckMessage]:
     return msgs
 
 
+# Süreçler arasında paylaşılmayan önbellek arka uçları
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def shared_cache_check(app_configs, **kwargs) -> list[CheckMessage]:
+    """Sürüm damgaları ve rate limit sayaçları paylaşılan önbellek ister"""
+    msgs: list[CheckMessage] = []
+    
+    backend = getattr(settings, "CACHES", {}).get("default", {}).get(
+        "BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+    )
+    if _is_prod() and backend in PROCESS_LOCAL_CACHES:
+        msgs.append(Error(
+            "Varsayılan önbellek süreç içi; worker'lar ve yönetim komutları damgaları paylaşamaz. REDIS_URL tanımlayın.",
+            id="core.C001",
+        ))
+    
+    return msgs
+
+
 @register(Tags.security)
 def email_settings_check(app_configs, **kwargs) -> list[CheckMessage]:
     """Email ayarları kontrolü"""
@@ -1,5 +1,6 @@
 from django import template
-from django.utils.html import format_html
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
 
 register = template.Library()
 
@@ -10,4 +11,46 @@ def img_default_attrs(w=300, h=200, decoding="async", loading="lazy"):
     <img {% img_default_attrs 300 200 %} src="..." alt="...">
     -> width/height + decoding/loading özniteliklerini ekler.
     """
-    return format_html('width="{}" height="{}" decoding="{}" loading="{}"', w, h, decoding, loading)
\ No newline at end of file
+    return format_html('width="{}" height="{}" decoding="{}" loading="{}"', w, h, decoding, loading)
+
+
+@register.simple_tag
+def responsive_img(obj, alt="", sizes="(min-width: 768px) 300px, 100vw", w=300, h=200, css_class="", loading="lazy"):
+    """
+    Kullanım:
+    {% responsive_img product alt=product.name sizes="(min-width: 992px) 25vw, 50vw" w=600 h=400 css_class="img-primary" %}
+    -> obj.image_derivatives (shop.images) varsa biçim başına srcset/sizes içeren
+    <picture> ve bulanık yer tutucu; yoksa orijinal görselli düz <img>. Sorgu yapmaz.
+    """
+    image = getattr(obj, "image", None)
+    if not image:
+        return ""
+    meta = getattr(obj, "image_derivatives", None) or {}
+    if not meta.get("hash") or meta.get("source") != image.name:
+        return format_html(
+            '<img {} src="{}" alt="{}" class="{}">',
+            img_default_attrs(w, h, loading=loading), image.url, alt, css_class,
+        )
+
+    from shop.images import derivative_name, mime_type
+
+    sources = format_html_join(
+        "",
+        '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (
+                mime_type(fmt),
+                ", ".join(
+                    f"{default_storage.url(derivative_name(meta['hash'], width, fmt))} {width}w"
+                    for width in meta["widths"]
+                ),
+                sizes,
+            )
+            for fmt in meta["formats"]
+        ),
+    )
+    return format_html(
+        '<picture style="display:contents">{}<img {} src="{}" alt="{}" class="{}" '
+        'style="background:url({}) center/cover no-repeat"></picture>',
+        sources, img_default_attrs(w, h, loading=loading), image.url, alt, css_class, meta["placeholder"],
+    )
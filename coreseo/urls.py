@@ -5,5 +5,6 @@ app_name = 'coreseo'
 
 urlpatterns = [
     path('sitemap.xml', views.sitemap_view, name='sitemap'),
+    path('sitemaps/<str:name>', views.sitemap_shard_view, name='sitemap_shard'),
     path('robots.txt', views.robots_view, name='robots'),
 ]
\ No newline at end of file
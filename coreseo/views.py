@@ -1,22 +1,41 @@
-from django.http import HttpResponse
-from django.template import loader
-from django.utils import timezone
+import os
+
+from django.http import FileResponse, Http404, HttpResponse
 from django.conf import settings
-from .models import SitemapEntry
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from shop import sitemaps
+
+
+def _serve_file(request, path, content_type):
+    """Önceden üretilmiş dosyayı Last-Modified / 304 ile sunar."""
+    try:
+        mtime = int(os.stat(path).st_mtime)
+    except FileNotFoundError:
+        raise Http404
+    response = get_conditional_response(request, last_modified=mtime)
+    if response is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    response['Last-Modified'] = http_date(mtime)
+    return response
+
 
 def sitemap_view(request):
-    """Generate XML sitemap"""
-    entries = SitemapEntry.objects.filter(is_active=True)
-    
-    template = loader.get_template('coreseo/sitemap.xml')
-    context = {
-        'entries': entries,
-        'domain': getattr(settings, 'SITE_DOMAIN', 'localhost:8000'),
-        'protocol': 'https' if getattr(settings, 'USE_HTTPS', False) else 'http',
-    }
-    
-    xml_content = template.render(context, request)
-    return HttpResponse(xml_content, content_type='application/xml')
+    """
+    Site haritası dizini (build_sitemaps ile üretilir). Dosyalar henüz
+    üretilmemişse (kurulum/geliştirme) ilk parça canlı üretilir.
+    """
+    path = sitemaps.index_path()
+    if path.exists():
+        return _serve_file(request, path, 'application/xml')
+    return HttpResponse(''.join(sitemaps.iter_live_urlset()), content_type='application/xml')
+
+
+def sitemap_shard_view(request, name):
+    if not sitemaps.SHARD_NAME.fullmatch(name):
+        raise Http404
+    return _serve_file(request, sitemaps.shard_path(name), 'application/gzip')
 
 def robots_view(request):
     """Generate robots.txt"""
@@ -7,6 +7,9 @@ import json
 from urllib.parse import urlencode
 from django.conf import settings
 
+# İmzası doğrulanmış, sağlayıcının reddettiği ödeme (imza hatasından ayrılır)
+PAYMENT_DECLINED = "Ödeme başarısız"
+
 @dataclass
 class ChargeResult:
     success: bool
@@ -101,7 +104,7 @@ class IyzicoProvider(PaymentProvider):
         if status == 'success':
             return True, payment_id, "İyzico ödeme başarılı", conversation_id
         else:
-            return False, None, "Ödeme başarısız", conversation_id
+            return False, None, PAYMENT_DECLINED, conversation_id
 
 
 def get_provider(settings):
@@ -203,7 +206,7 @@ class PayTRProvider(PaymentProvider):
                 # İmza hatalı ise spesifik bir mesaj döndür
                 if hash_value != calculated_hash:
                     return False, None, "İmza geçersiz", merchant_oid
-                return False, None, "Ödeme başarısız", merchant_oid
+                return False, None, PAYMENT_DECLINED, merchant_oid
         except Exception as e:
             return False, None, f"PayTR callback hatası: {str(e)}", None
     
@@ -6,14 +6,24 @@ from django.views.decorators.http import require_POST
 from django.contrib import messages
 from django.urls import reverse
 from django.db import transaction
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils import timezone
 from django_ratelimit.decorators import ratelimit
 
+from shop import outbox, reservations
 from shop.models import Order
-from .provider import get_provider
+from .provider import PAYMENT_DECLINED, get_provider
+
+
+def _release_declined(message, order_ref):
+    """
+    Sağlayıcı ödemeyi reddetti: siparişe bağlı stok tutmaları süre dolmadan
+    bırakılır. Yalnız imzası doğrulanmış ret bırakır; sahte geri çağrı stok
+    açamaz.
+    """
+    if message == PAYMENT_DECLINED:
+        reservations.release_unpaid(order_ref)
 
 
 def _csrf_post_ratelimited(view):
@@ -29,6 +39,7 @@ def iyzico_callback(request):
     # Callback'i doğrula ve order_ref'i de al
     ok, provider_ref, message, order_ref = provider.verify_callback(request)
     if not ok:
+        _release_declined(message, order_ref)
         failure_url = getattr(settings, 'PAYMENT_FAILURE_URL', '/')
         return HttpResponseRedirect(failure_url)
 
@@ -50,12 +61,8 @@ def iyzico_callback(request):
             order.paid_at = timezone.now()
             order.save()
             
-            # Stok düş
-            for item in order.items.all():
-                product = item.product
-                if product.stock >= item.quantity:
-                    product.stock -= item.quantity
-                    product.save()
+            # Stok düş: ödeme başında ayrılan tutmalar dönüştürülür (tüm ürünler için tek koşullu CASE UPDATE; reservations.decrement)
+            reservations.convert(order)
             
             # E-posta gönder
             _send_order_confirmation_email(order)
@@ -76,6 +83,7 @@ def paytr_callback(request):
     # Callback'i doğrula ve order_ref'i al (merchant_oid)
     ok, provider_ref, message, order_ref = provider.verify_callback(request)
     if not ok:
+        _release_declined(message, order_ref)
         return HttpResponse("FAIL")
 
     try:
@@ -92,12 +100,8 @@ def paytr_callback(request):
             order.paid_at = timezone.now()
             order.save()
             
-            # Stok düş
-            for item in order.items.all():
-                product = item.product
-                if product.stock >= item.quantity:
-                    product.stock -= item.quantity
-                    product.save()
+            # Stok düş: ödeme başında ayrılan tutmalar dönüştürülür (tüm ürünler için tek koşullu CASE UPDATE; reservations.decrement)
+            reservations.convert(order)
             
             # E-posta gönder
             _send_order_confirmation_email(order)
@@ -107,19 +111,19 @@ def paytr_callback(request):
         return HttpResponse("FAIL")
 
 
-def _send_order_confirmation_email(order):
-    """Sipariş onay e-postası gönder"""
-    try:
-        subject = f'Sipariş Onayı - #{order.id}'
-        
-        # HTML e-posta içeriği
-        html_content = render_to_string('shop/emails/order_confirmation.html', {
-            'order': order,
-            'site_name': 'Satış Sitesi'
-        })
-        
-        # Text e-posta içeriği
-        text_content = f"""
+def _render_order_confirmation_email(order_id):
+    """Sipariş onay e-postasının içeriği (gönderici çağırır, bkz. shop/outbox.py)"""
+    order = Order.objects.get(pk=order_id)
+    subject = f'Sipariş Onayı - #{order.id}'
+    
+    # HTML e-posta içeriği
+    html_content = render_to_string('shop/emails/order_confirmation.html', {
+        'order': order,
+        'site_name': 'Satış Sitesi'
+    })
+    
+    # Text e-posta içeriği
+    text_content = f"""
         Merhaba {order.fullname},
         
         Siparişiniz başarıyla alınmıştır.
@@ -129,15 +133,9 @@ def _send_order_confirmation_email(order):
         
         Teşekkürler!
         """
-        
-        send_mail(
-            subject=subject,
-            message=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[order.email],
-            html_message=html_content,
-            fail_silently=True
-        )
-    except Exception as e:
-        # E-posta gönderimi başarısız olsa bile sipariş işlemi devam etsin
-        print(f"E-posta gönderimi hatası: {e}")
\ No newline at end of file
+    return subject, text_content, html_content
+
+
+def _send_order_confirmation_email(order):
+    """Sipariş onay e-postasını kuyruğa yaz; callback transaction'ı ile birlikte commit olur"""
+    outbox.enqueue('payments.views._render_order_confirmation_email', order.email, order_id=order.id)
\ No newline at end of file
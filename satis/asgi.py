@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'satis.settings')
 
 application = get_asgi_application()
+
+# Otomatik tamamlama indeksini işçi açılışında arka planda kur (bkz. shop/autocomplete.py)
+from shop.autocomplete import warm as warm_autocomplete  # noqa: E402
+
+warm_autocomplete()
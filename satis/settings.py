@@ -30,6 +30,8 @@ ALLOWED_HOSTS = [h for h in os.getenv('ALLOWED_HOSTS', '').split(',') if h]
 
 # --- Apps ---
 INSTALLED_APPS = [
+    # registration/password_reset_* şablonları admin'inkilerin önüne geçsin
+    'accounts',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -43,7 +45,6 @@ INSTALLED_APPS = [
     'core',
     'coreseo',
     'shop',
-    'accounts',
     'security',
 ]
 
@@ -108,6 +109,27 @@ else:
         }
     }
 
+# --- Cache ---
+# Katalog sürüm damgaları (shop.versions), fiyat kuralı damgası ve rate limit
+# sayaçları tüm süreçlerin (gunicorn worker'ları ve yönetim
+# komutları) gördüğü TEK bir önbellekte durmalıdır. Üretimde REDIS_URL
+# zorunludur (core.C001); süreç içi LocMem yalnız tek süreçli geliştirme ve
+# testler içindir.
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # --- Auth ---
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -225,6 +247,51 @@ AUTH_PASSWORD_VALIDATORS = [
 SHIPPING_STANDARD = float(os.getenv("SHIPPING_STANDARD", "49.90"))
 SHIPPING_EXPRESS = float(os.getenv("SHIPPING_EXPRESS", "99.90"))
 FREE_SHIPPING_THRESHOLD = float(os.getenv("FREE_SHIPPING_THRESHOLD", "500"))
+# Fiyat kural tabloları (shop/pricing.py): süreç içi kopyanın en uzun ömrü (sn)
+PRICING_TABLES_TTL = int(os.getenv("PRICING_TABLES_TTL", "60"))
+
+# --- Ana sayfa blok önbelleği ---
+HOMEPAGE_BLOCK_TTL = int(os.getenv("HOMEPAGE_BLOCK_TTL", "300"))  # saniye
+HOMEPAGE_BLOCK_ASYNC = os.getenv("HOMEPAGE_BLOCK_ASYNC", "1") == "1"
+
+# Otomatik tamamlama (süreç içi önek indeksi, shop/autocomplete.py)
+AUTOCOMPLETE_WARM_ON_START = os.getenv("AUTOCOMPLETE_WARM_ON_START", "1") == "1"
+AUTOCOMPLETE_MAX_PRODUCTS = int(os.getenv("AUTOCOMPLETE_MAX_PRODUCTS", "200000"))
+AUTOCOMPLETE_TOPK_CACHE_SIZE = int(os.getenv("AUTOCOMPLETE_TOPK_CACHE_SIZE", "5000"))
+
+# Katalog listelerinde imleçli sayfalama: yaklaşık toplam için sayım üst sınırı (shop/pagination.py)
+CATALOG_COUNT_CAP = int(os.getenv("CATALOG_COUNT_CAP", "1000"))
+
+# Birlikte alınanlar önerileri (shop/recommendations.py)
+RELATED_PRODUCTS_TOP_N = int(os.getenv("RELATED_PRODUCTS_TOP_N", "8"))
+RELATED_PRODUCTS_MAX_BASKET = int(os.getenv("RELATED_PRODUCTS_MAX_BASKET", "30"))
+
+# Ürün detay gövdesi önbelleği: öneri kartlarının bayatlama sınırı, saniye (shop/product_page.py)
+PRODUCT_DETAIL_CACHE_TIMEOUT = int(os.getenv("PRODUCT_DETAIL_CACHE_TIMEOUT", "900"))
+
+# Varyant matrisi önbelleği, saniye; ürün sürümüyle anahtarlı (shop/variants.py)
+VARIANT_MATRIX_CACHE_TIMEOUT = int(os.getenv("VARIANT_MATRIX_CACHE_TIMEOUT", "86400"))
+
+# build_sitemaps çıktısı: gzip parçalar + dizin (shop/sitemaps.py)
+SITEMAP_ROOT = os.getenv("SITEMAP_ROOT", str(BASE_DIR / "sitemaps"))
+
+# Ödeme sırasındaki stok tutmalarının süresi, saniye (shop/reservations.py)
+STOCK_RESERVATION_TTL = int(os.getenv("STOCK_RESERVATION_TTL", "900"))
+
+# Görsel türevleri (shop/images.py): genişlikler, biçimler ve süreç havuzu boyutu (0: aynı süreçte)
+IMAGE_DERIVATIVE_WIDTHS = tuple(int(w) for w in os.getenv("IMAGE_DERIVATIVE_WIDTHS", "320,480,800,1200").split(","))
+IMAGE_DERIVATIVE_FORMATS = tuple(os.getenv("IMAGE_DERIVATIVE_FORMATS", "avif,webp").split(","))
+IMAGE_DERIVATIVE_WORKERS = int(os.getenv("IMAGE_DERIVATIVE_WORKERS", "2"))
+
+# Sipariş fişleri (shop/receipts.py): render_receipts süreç sayısı ve sürümlü fiş bağlantısının önbellek süresi (sn)
+RECEIPT_RENDER_WORKERS = int(os.getenv("RECEIPT_RENDER_WORKERS", "2"))
+RECEIPT_CACHE_SECONDS = int(os.getenv("RECEIPT_CACHE_SECONDS", str(60 * 60 * 24 * 365)))
+
+# Satış özetleri (shop/rollups.py): rollup_sales filigrandan bu kadar saniye geriden okur (geç commit olan işlemler için)
+ROLLUP_OVERLAP = int(os.getenv("ROLLUP_OVERLAP", "300"))
+
+# Sipariş arşivi (shop/archive.py): archive_orders bu kadar aydan eski kargolanmış/iptal siparişleri taşır
+ORDER_ARCHIVE_AFTER_MONTHS = int(os.getenv("ORDER_ARCHIVE_AFTER_MONTHS", "12"))
 
 # --- Payment Ayarları ---
 PAYMENT_SUCCESS_URL = os.getenv('PAYMENT_SUCCESS_URL', '/shop/checkout/success/')
@@ -247,6 +314,11 @@ EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', '1') == '1'
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'no-reply@satis.local')
 EMAIL_FAIL_SILENTLY = os.getenv('EMAIL_FAIL_SILENTLY', '1') == '1'
 
+# E-posta kuyruğu (shop/outbox.py, run_mailer): deneme sayısı, ilk bekleme ve kira süresi (sn)
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '6'))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', '60'))
+EMAIL_OUTBOX_LEASE = int(os.getenv('EMAIL_OUTBOX_LEASE', '300'))
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
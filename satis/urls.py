@@ -5,10 +5,8 @@ from accounts.views import PasswordResetView as PasswordResetViewRL
 from django.conf import settings
 from django.conf.urls.static import static
 from django.shortcuts import redirect
-from django.contrib.sitemaps.views import sitemap
 from django.views.generic import TemplateView
 from payments import views as payments_views
-from shop.sitemaps import ProductSitemap
 from core import views as core_views
 from accounts import views as account_views
 from shop.views.order_actions import cancel_order
@@ -16,11 +14,6 @@ from shop.views.order_actions import cancel_order
 def redirect_to_products(request):
     return redirect('shop:product_list', permanent=True)
 
-# Sitemap konfigürasyonu
-sitemaps = {
-    'products': ProductSitemap,
-}
-
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', redirect_to_products, name='home'),
@@ -67,7 +60,6 @@ urlpatterns = [
     ),
     path('account/',  account_views.dashboard, name='account_dashboard'),
     # SEO
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
     path('robots.txt', TemplateView.as_view(template_name='robots.txt', content_type='text/plain'), name='robots_txt'),
 ]
 
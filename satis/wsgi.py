@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'satis.settings')
 
 application = get_wsgi_application()
+
+# Otomatik tamamlama indeksini işçi açılışında arka planda kur (bkz. shop/autocomplete.py)
+from shop.autocomplete import warm as warm_autocomplete  # noqa: E402
+
+warm_autocomplete()
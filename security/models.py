@@ -771,8 +771,7 @@ class DeviceInfo(models.Model):
     def notify_new_device(self):
         """Yeni cihaz bildirimi gönder"""
         try:
-            from django.core.mail import send_mail
-            from django.conf import settings
+            from shop import outbox
             
             subject = 'Yeni Cihaz Girişi Tespit Edildi'
             message = f"""
@@ -790,13 +789,7 @@ class DeviceInfo(models.Model):
             Güvenlik ekibi
             """
             
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [self.user.email],
-                fail_silently=True
-            )
+            outbox.enqueue_message(subject, message, [self.user.email])
         except Exception as e:
             print(f"Yeni cihaz bildirim hatası: {e}")
 
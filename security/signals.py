@@ -3,6 +3,7 @@ from django.contrib.auth.signals import user_logged_in, user_logged_out, user_lo
 from django.contrib.auth.models import User
 from django.dispatch import receiver
 from django.contrib.auth.hashers import make_password
+from shop import dirty
 from .models import SecurityLog, UserSecuritySettings
 from .utils import (
     get_client_ip, get_user_agent, send_login_notification_email,
@@ -107,34 +108,35 @@ def user_login_failed_handler(sender, credentials, request, **kwargs):
     logger.warning(f"Failed login attempt for: {username} from {ip_address}")
 
 
+dirty.track(User, 'password')
+
+
 @receiver(pre_save, sender=User)
 def user_password_change_handler(sender, instance, **kwargs):
     """Kullanıcı şifresi değiştirilmeden önce eski şifreyi kaydet"""
-    if instance.pk:  # Mevcut kullanıcı güncelleniyor
+    # Yüklendiği andaki şifre karması: last_login gibi kayıtlar ek sorgu üretmez
+    if instance.pk and dirty.has_changed(instance, 'password'):
+        old_password = dirty.old_value(instance, 'password')
+        if old_password is None:
+            return
+        # Eski şifreyi güvenlik ayarlarına ekle
         try:
-            old_user = User.objects.get(pk=instance.pk)
-            # Şifre değişti mi kontrol et
-            if old_user.password != instance.password:
-                # Eski şifreyi güvenlik ayarlarına ekle
-                try:
-                    settings = UserSecuritySettings.objects.get(user=instance)
-                    settings.add_password_to_history(old_user.password)
-                except UserSecuritySettings.DoesNotExist:
-                    # Güvenlik ayarları yoksa oluştur
-                    settings = create_user_security_settings(instance)
-                    settings.add_password_to_history(old_user.password)
-                
-                # Şifre değişikliği logu
-                SecurityLog.log_event(
-                    event_type='password_change',
-                    user=instance,
-                    description=f'Şifre değiştirildi: {instance.username}',
-                    risk_level='medium'
-                )
-                
-                logger.info(f"Password changed for user: {instance.username}")
-        except User.DoesNotExist:
-            pass
+            settings = UserSecuritySettings.objects.get(user=instance)
+            settings.add_password_to_history(old_password)
+        except UserSecuritySettings.DoesNotExist:
+            # Güvenlik ayarları yoksa oluştur
+            settings = create_user_security_settings(instance)
+            settings.add_password_to_history(old_password)
+        
+        # Şifre değişikliği logu
+        SecurityLog.log_event(
+            event_type='password_change',
+            user=instance,
+            description=f'Şifre değiştirildi: {instance.username}',
+            risk_level='medium'
+        )
+        
+        logger.info(f"Password changed for user: {instance.username}")
 
 
 # Custom signals for security events
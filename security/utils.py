@@ -1,9 +1,10 @@
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.contrib.auth.models import User
+from shop import outbox
 from .models import EmailVerificationCode, SecurityLog, AccountLockout, UserSecuritySettings
 import random
 import logging
@@ -49,133 +50,107 @@ def generate_captcha():
     return question, answer
 
 
+VERIFICATION_TEMPLATES = {
+    '2fa': ('İki Faktörlü Kimlik Doğrulama Kodu', 'security/emails/2fa_code.html'),
+    'password_reset': ('Şifre Sıfırlama Kodu', 'security/emails/password_reset_code.html'),
+    'email_change': ('E-posta Değişikliği Doğrulama Kodu', 'security/emails/email_change_code.html'),
+}
+
+
+def _render(template, context):
+    html_message = render_to_string(template, context)
+    return strip_tags(html_message), html_message
+
+
+def render_verification_email(user_id, code_type, code, expires_at):
+    """Doğrulama kodu e-postasının içeriği (gönderici çağırır, bkz. shop/outbox.py)"""
+    subject, template = VERIFICATION_TEMPLATES.get(
+        code_type, ('Hesap Doğrulama Kodu', 'security/emails/account_verification_code.html')
+    )
+    plain_message, html_message = _render(template, {
+        'user': User.objects.get(pk=user_id),
+        'verification_code': code,
+        'expires_at': parse_datetime(expires_at),
+        'code_type': code_type,
+        'site_name': 'Satış Sitesi'
+    })
+    return subject, plain_message, html_message
+
+
+def render_security_alert_email(user_id, event_type, description, timestamp, ip_address):
+    """Güvenlik uyarısı e-postasının içeriği"""
+    plain_message, html_message = _render('security/emails/security_alert.html', {
+        'user': User.objects.get(pk=user_id),
+        'event_type': event_type,
+        'description': description,
+        'timestamp': parse_datetime(timestamp),
+        'ip_address': ip_address,
+        'site_name': 'Satış Sitesi'
+    })
+    return 'Güvenlik Uyarısı - Hesabınızda Şüpheli Aktivite', plain_message, html_message
+
+
+def render_login_notification_email(user_id, timestamp, ip_address, user_agent):
+    """Giriş bildirimi e-postasının içeriği"""
+    plain_message, html_message = _render('security/emails/login_notification.html', {
+        'user': User.objects.get(pk=user_id),
+        'timestamp': parse_datetime(timestamp),
+        'ip_address': ip_address,
+        'user_agent': user_agent,
+        'site_name': 'Satış Sitesi'
+    })
+    return 'Hesabınıza Giriş Yapıldı', plain_message, html_message
+
+
 def send_verification_email(user, code_type, verification_code, request=None):
-    """Doğrulama e-postası gönder"""
-    try:
-        # E-posta şablonu seç
-        if code_type == '2fa':
-            subject = 'İki Faktörlü Kimlik Doğrulama Kodu'
-            template = 'security/emails/2fa_code.html'
-        elif code_type == 'password_reset':
-            subject = 'Şifre Sıfırlama Kodu'
-            template = 'security/emails/password_reset_code.html'
-        elif code_type == 'email_change':
-            subject = 'E-posta Değişikliği Doğrulama Kodu'
-            template = 'security/emails/email_change_code.html'
-        else:
-            subject = 'Hesap Doğrulama Kodu'
-            template = 'security/emails/account_verification_code.html'
-        
-        # E-posta içeriği
-        context = {
-            'user': user,
-            'verification_code': verification_code.code,
-            'expires_at': verification_code.expires_at,
-            'code_type': code_type,
-            'site_name': 'Satış Sitesi'
-        }
-        
-        html_message = render_to_string(template, context)
-        plain_message = strip_tags(html_message)
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[verification_code.email],
-            html_message=html_message,
-            fail_silently=False
-        )
-        
-        logger.info(f"Verification email sent to {user.username} ({verification_code.email}) for {code_type}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to send verification email to {user.username}: {str(e)}")
-        return False
+    """Doğrulama e-postasını kuyruğa yaz"""
+    outbox.enqueue(
+        'security.utils.render_verification_email', verification_code.email,
+        user_id=user.pk, code_type=code_type, code=verification_code.code,
+        expires_at=verification_code.expires_at.isoformat(),
+    )
+    logger.info(f"Verification email queued for {user.username} ({verification_code.email}) for {code_type}")
+    return True
 
 
 def send_security_alert_email(user, event_type, description, request=None):
-    """Güvenlik uyarısı e-postası gönder"""
+    """Güvenlik uyarısı e-postasını kuyruğa yaz"""
+    # Kullanıcının güvenlik ayarlarını kontrol et
     try:
-        # Kullanıcının güvenlik ayarlarını kontrol et
-        try:
-            settings_obj = UserSecuritySettings.objects.get(user=user)
-            if not settings_obj.suspicious_activity_alerts:
-                return True  # Kullanıcı uyarı almak istemiyor
-        except UserSecuritySettings.DoesNotExist:
-            pass  # Varsayılan olarak uyarı gönder
-        
-        subject = 'Güvenlik Uyarısı - Hesabınızda Şüpheli Aktivite'
-        
-        context = {
-            'user': user,
-            'event_type': event_type,
-            'description': description,
-            'timestamp': timezone.now(),
-            'ip_address': get_client_ip(request) if request else 'Bilinmiyor',
-            'site_name': 'Satış Sitesi'
-        }
-        
-        html_message = render_to_string('security/emails/security_alert.html', context)
-        plain_message = strip_tags(html_message)
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False
-        )
-        
-        logger.info(f"Security alert email sent to {user.username} for {event_type}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to send security alert email to {user.username}: {str(e)}")
-        return False
+        settings_obj = UserSecuritySettings.objects.get(user=user)
+        if not settings_obj.suspicious_activity_alerts:
+            return True  # Kullanıcı uyarı almak istemiyor
+    except UserSecuritySettings.DoesNotExist:
+        pass  # Varsayılan olarak uyarı gönder
+    
+    outbox.enqueue(
+        'security.utils.render_security_alert_email', user.email,
+        user_id=user.pk, event_type=event_type, description=description,
+        timestamp=timezone.now().isoformat(),
+        ip_address=get_client_ip(request) if request else 'Bilinmiyor',
+    )
+    logger.info(f"Security alert email queued for {user.username} for {event_type}")
+    return True
 
 
 def send_login_notification_email(user, request=None):
-    """Giriş bildirimi e-postası gönder"""
+    """Giriş bildirimi e-postasını kuyruğa yaz"""
+    # Kullanıcının güvenlik ayarlarını kontrol et
     try:
-        # Kullanıcının güvenlik ayarlarını kontrol et
-        try:
-            settings_obj = UserSecuritySettings.objects.get(user=user)
-            if not settings_obj.login_notifications:
-                return True  # Kullanıcı bildirim almak istemiyor
-        except UserSecuritySettings.DoesNotExist:
-            pass  # Varsayılan olarak bildirim gönder
-        
-        subject = 'Hesabınıza Giriş Yapıldı'
-        
-        context = {
-            'user': user,
-            'timestamp': timezone.now(),
-            'ip_address': get_client_ip(request) if request else 'Bilinmiyor',
-            'user_agent': get_user_agent(request) if request else 'Bilinmiyor',
-            'site_name': 'Satış Sitesi'
-        }
-        
-        html_message = render_to_string('security/emails/login_notification.html', context)
-        plain_message = strip_tags(html_message)
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False
-        )
-        
-        logger.info(f"Login notification email sent to {user.username}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to send login notification email to {user.username}: {str(e)}")
-        return False
+        settings_obj = UserSecuritySettings.objects.get(user=user)
+        if not settings_obj.login_notifications:
+            return True  # Kullanıcı bildirim almak istemiyor
+    except UserSecuritySettings.DoesNotExist:
+        pass  # Varsayılan olarak bildirim gönder
+    
+    outbox.enqueue(
+        'security.utils.render_login_notification_email', user.email,
+        user_id=user.pk, timestamp=timezone.now().isoformat(),
+        ip_address=get_client_ip(request) if request else 'Bilinmiyor',
+        user_agent=get_user_agent(request) if request else 'Bilinmiyor',
+    )
+    logger.info(f"Login notification email queued for {user.username}")
+    return True
 
 
 def check_failed_login_attempts(user, request=None):
@@ -3,7 +3,6 @@ from django.contrib.auth import authenticate, login, logout, update_session_auth
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
@@ -27,6 +26,7 @@ import hashlib
 import json
 import re
 from datetime import datetime, timedelta
+from shop import outbox
 from .models import (
     UserSecuritySettings, 
     EmailVerificationCode, 
@@ -106,13 +106,11 @@ def send_verification_email(user, code, request):
     html_message = render_to_string('security/emails/two_factor_code.html', context)
     plain_message = strip_tags(html_message)
     
-    send_mail(
+    outbox.enqueue_message(
         subject='İki Faktörlü Kimlik Doğrulama Kodu',
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        html_message=html_message,
-        fail_silently=False
+        body=plain_message,
+        to=[user.email],
+        html=html_message,
     )
 
 
@@ -135,13 +133,11 @@ def send_login_notification(user, request):
     html_message = render_to_string('security/emails/login_notification.html', context)
     plain_message = strip_tags(html_message)
     
-    send_mail(
+    outbox.enqueue_message(
         subject='Hesabınıza Giriş Yapıldı',
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        html_message=html_message,
-        fail_silently=True
+        body=plain_message,
+        to=[user.email],
+        html=html_message,
     )
 
 
@@ -189,13 +185,11 @@ def send_security_alert(user, alert_type, details=None):
         html_message = render_to_string(alert_info['template'], context)
         plain_message = strip_tags(html_message)
         
-        send_mail(
+        outbox.enqueue_message(
             subject=alert_info['subject'],
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=True
+            body=plain_message,
+            to=[user.email],
+            html=html_message,
         )
         
         # Güvenlik logu
@@ -727,13 +721,11 @@ def password_reset_request(request):
                 html_message = render_to_string('security/emails/password_reset.html', context)
                 plain_message = strip_tags(html_message)
                 
-                send_mail(
+                outbox.enqueue_message(
                     subject='Şifre Sıfırlama',
-                    message=plain_message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[email],
-                    html_message=html_message,
-                    fail_silently=False
+                    body=plain_message,
+                    to=[email],
+                    html=html_message,
                 )
                 
                 # Güvenlik logu
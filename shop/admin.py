@@ -1,7 +1,9 @@
 from django.contrib import admin
 from django.contrib import messages
-from .models import Category, Product, Review, ShippingCompany, PaymentMethod, Order, OrderItem, OrderStatusHistory, Wishlist, Coupon, CouponUsage, StockAlert, ProductAttribute, ProductAttributeValue, ProductVariant, ProductVariantAttribute
+from .models import Category, Product, Review, ShippingCompany, PaymentMethod, Order, OrderItem, OrderStatusHistory, Wishlist, Coupon, CouponUsage, StockAlert, ProductAttribute, ProductAttributeValue, ProductVariant, ProductVariantAttribute, StockReservation, OutboxEmail, ArchivedOrder, ArchivedOrderItem
 from .utils import send_order_status_update_email
+from .outbox import requeue
+from .ratings import set_reviews_approval
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -18,16 +20,19 @@ class ProductVariantInline(admin.TabularInline):
 class ProductAdmin(admin.ModelAdmin):
     list_display = ("name", "category", "price", "stock", "average_rating", "review_count", "variant_count")
     list_filter = ("category",)
-    search_fields = ("name", "description")
+    search_fields = ("name", "sku", "description")
+    readonly_fields = ("rating_avg", "rating_count", "rating_sum", "rating_1", "rating_2", "rating_3", "rating_4", "rating_5")
     inlines = [ProductVariantInline]
     
     def average_rating(self, obj):
         return f"{obj.average_rating:.1f}" if obj.average_rating else "0.0"
     average_rating.short_description = "Ortalama Puan"
+    average_rating.admin_order_field = "rating_avg"
     
     def review_count(self, obj):
         return obj.review_count
     review_count.short_description = "Yorum Sayısı"
+    review_count.admin_order_field = "rating_count"
     
     def variant_count(self, obj):
         return obj.variants.count()
@@ -43,12 +48,12 @@ class ReviewAdmin(admin.ModelAdmin):
     actions = ['approve_reviews', 'disapprove_reviews']
     
     def approve_reviews(self, request, queryset):
-        updated = queryset.update(is_approved=True)
+        updated = set_reviews_approval(queryset, True)
         self.message_user(request, f'{updated} yorum onaylandı.')
     approve_reviews.short_description = 'Seçili yorumları onayla'
     
     def disapprove_reviews(self, request, queryset):
-        updated = queryset.update(is_approved=False)
+        updated = set_reviews_approval(queryset, False)
         self.message_user(request, f'{updated} yorumun onayı kaldırıldı.')
     disapprove_reviews.short_description = 'Seçili yorumların onayını kaldır'
 
@@ -170,6 +175,68 @@ class CouponUsageAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('coupon', 'user', 'order')
 
 
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    """Salt okunur: tutmalar Product.reserved sayacıyla birlikte shop.reservations üzerinden değişir."""
+    list_display = ('product', 'variant', 'quantity', 'status', 'order', 'expires_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('product__name', 'hold_key', 'order__id')
+    list_select_related = ('product', 'variant', 'order')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """Salt okunur: satırlar shop.outbox üzerinden yazılır; kalıcı hatalılar yeniden kuyruğa alınabilir."""
+    list_display = ('subject', 'renderer', 'to', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'renderer', 'to')
+    actions = ['requeue_emails']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def requeue_emails(self, request, queryset):
+        count = requeue(queryset)
+        messages.success(request, f'{count} e-posta yeniden kuyruğa alındı.')
+
+    requeue_emails.short_description = "Seçili e-postaları yeniden kuyruğa al"
+
+
+class ArchivedOrderItemInline(admin.TabularInline):
+    model = ArchivedOrderItem
+    extra = 0
+    can_delete = False
+    readonly_fields = ('product', 'quantity', 'unit_price', 'line_total')
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    """Salt okunur: satırlar archive_orders komutuyla taşınır (shop.archive)."""
+    list_display = ('id', 'number', 'fullname', 'total', 'status', 'payment_provider', 'created_at', 'archived_at')
+    search_fields = ('id', 'fullname', 'email', 'payment_ref')
+    list_filter = ('status', 'payment_provider')
+    inlines = [ArchivedOrderItemInline]
+
+    def number(self, obj):
+        return obj.number
+    number.short_description = 'Sipariş No'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(StockAlert)
 class StockAlertAdmin(admin.ModelAdmin):
     list_display = ('user', 'product', 'email', 'threshold', 'status', 'created_at', 'notified_at')
@@ -0,0 +1,216 @@
+"""
+Soğuk sipariş arşivi.
+
+Kargolanmış ya da iptal edilmiş, N aydan eski siparişler kalemleri, durum
+geçmişi, kupon kullanımları ve fişiyle birlikte arşiv tablolarına taşınır
+(`archive_orders` komutu). Sıcak tablolar (Order, OrderItem, ...) böylece
+yalnız güncel siparişleri taşır; admin listeleri, takip sorguları ve stok
+sorguları arşivin boyutundan etkilenmez.
+
+Taşıma küçük partiler halinde yapılır: her parti kendi transaction'ında
+kopyalar ve siler, kilit süresi parti boyutuyla sınırlıdır. Sipariş partide
+kilitlenip durumu yeniden kontrol edilir; bu arada durumu değişen sipariş
+atlanır. Fişi eksik ya da eski olan siparişin fişi taşımadan önce işlenir.
+
+Okuma tarafı `lookup()`'tır: önce sıcak tabloya, bulamazsa arşive bakar.
+Arşiv modelleri aynı alan ve ilişki adlarını taşıdığından (items,
+status_history, receipt) view ve şablonlar iki tür siparişi aynı işler;
+arşivden gelen siparişte `is_archived` True'dur.
+
+Satış özetleri (shop.rollups) ve satış sıralamasının yeniden kurulması
+(sales_rank.rebuild) arşivi de okur.
+"""
+import calendar
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_STATUSES = ('shipped', 'cancelled')
+
+
+def archive_after_months():
+    return getattr(settings, 'ORDER_ARCHIVE_AFTER_MONTHS', 12)
+
+
+def cutoff(months, now=None):
+    """`now`dan `months` ay önceki an (ay sonu taşmaları ayın son gününe çekilir)."""
+    now = now or timezone.now()
+    index = now.year * 12 + now.month - 1 - months
+    year, month = divmod(index, 12)
+    day = min(now.day, calendar.monthrange(year, month + 1)[1])
+    return now.replace(year=year, month=month + 1, day=day)
+
+
+def candidates(before):
+    """Arşive taşınabilecek siparişler."""
+    from .models import Order
+
+    return Order.objects.filter(status__in=ARCHIVE_STATUSES, created_at__lt=before)
+
+
+def _copy(instance, model):
+    """Satırı aynı alan adlarıyla `model` örneğine kopyalar (arşive özgü alanlar varsayılanını alır)."""
+    return model(**{
+        field.attname: getattr(instance, field.attname)
+        for field in model._meta.concrete_fields
+        if hasattr(instance, field.attname)
+    })
+
+
+def _pairs():
+    from . import models
+
+    return (
+        (models.OrderItem, models.ArchivedOrderItem),
+        (models.OrderStatusHistory, models.ArchivedOrderStatusHistory),
+        (models.CouponUsage, models.ArchivedCouponUsage),
+        (models.OrderReceipt, models.ArchivedOrderReceipt),
+    )
+
+
+def tables():
+    """Arşivlemeden etkilenen (sıcak, arşiv) model çiftleri."""
+    from .models import ArchivedOrder, Order
+
+    return ((Order, ArchivedOrder),) + _pairs()
+
+
+def _ensure_receipts(order_ids):
+    """Fişi eksik ya da sipariş durumundan geri kalmış siparişlerin fişini işler."""
+    from . import receipts
+    from .models import Order
+
+    stale = list(Order.objects.filter(pk__in=order_ids).exclude(receipt__status=F('status')).values_list('pk', flat=True))
+    if stale:
+        receipts.refresh(stale)
+
+
+def archive_batch(order_ids):
+    """
+    Siparişleri çocuklarıyla arşive taşır; tek transaction. Tablo başına
+    taşınan satır sayısını döndürür.
+    """
+    from .models import ArchivedOrder, Order
+
+    _ensure_receipts(order_ids)
+    moved = {}
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update().filter(pk__in=order_ids, status__in=ARCHIVE_STATUSES).order_by('pk')
+        )
+        ids = [order.pk for order in orders]
+        if not ids:
+            return moved
+        ArchivedOrder.objects.bulk_create([_copy(order, ArchivedOrder) for order in orders])
+        moved[Order._meta.db_table] = len(ids)
+        for hot, cold in _pairs():
+            rows = [_copy(row, cold) for row in hot.objects.filter(order_id__in=ids).order_by('pk')]
+            cold.objects.bulk_create(rows, batch_size=500)
+            hot.objects.filter(order_id__in=ids).delete()
+            moved[hot._meta.db_table] = len(rows)
+        Order.objects.filter(pk__in=ids).delete()
+    return moved
+
+
+def run(months=None, batch_size=500, limit=None, before=None):
+    """
+    `months` aydan eski kargolanmış/iptal siparişleri partiler halinde arşive
+    taşır. İstatistik sözlüğü döndürür.
+    """
+    from .models import Order
+
+    months = archive_after_months() if months is None else months
+    before = before or cutoff(months)
+    started = time.monotonic()
+    totals = {}
+    orders = 0
+    last_pk = 0
+    while limit is None or orders < limit:
+        size = batch_size if limit is None else min(batch_size, limit - orders)
+        ids = list(
+            candidates(before).filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:size]
+        )
+        if not ids:
+            break
+        last_pk = ids[-1]
+        try:
+            moved = archive_batch(ids)
+        except Exception:
+            logger.exception('Sipariş arşiv partisi taşınamadı: #%s-#%s', ids[0], ids[-1])
+            raise
+        for table, count in moved.items():
+            totals[table] = totals.get(table, 0) + count
+        orders += len(ids)
+    seconds = time.monotonic() - started
+    rows = sum(totals.values())
+    return {
+        'before': before,
+        'orders': totals.get(Order._meta.db_table, 0),
+        'rows': rows,
+        'tables': totals,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else 0,
+    }
+
+
+def table_size(table):
+    """
+    Tablonun disk boyutu (bayt; indeksler dahil); veritabanı desteklemiyorsa
+    None. PostgreSQL, MySQL ve dbstat'lı SQLite desteklenir.
+    """
+    queries = {
+        'postgresql': ('SELECT pg_total_relation_size(%s)', [table]),
+        'mysql': (
+            'SELECT data_length + index_length FROM information_schema.tables '
+            'WHERE table_schema = DATABASE() AND table_name = %s',
+            [table],
+        ),
+        'sqlite': ('SELECT SUM(pgsize) FROM dbstat WHERE name = %s', [table]),
+    }
+    if connection.vendor not in queries:
+        return None
+    sql, params = queries[connection.vendor]
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except Exception:
+        return None
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def sizes():
+    """{tablo: (satır sayısı, bayt ya da None)}: arşivlemeden etkilenen tüm tablolar."""
+    result = {}
+    for pair in tables():
+        for model in pair:
+            table = model._meta.db_table
+            result[table] = (model.objects.count(), table_size(table))
+    return result
+
+
+def lookup(*, select=(), prefetch=(), only=(), **filters):
+    """
+    Siparişi önce sıcak tabloda, bulamazsa arşivde arar; yoksa None.
+    `select`/`prefetch`/`only` iki tabloya da aynı uygulanır.
+    """
+    from .models import ArchivedOrder, Order
+
+    for model in (Order, ArchivedOrder):
+        queryset = model.objects.filter(**filters)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if only:
+            queryset = queryset.only(*only)
+        order = queryset.first()
+        if order is not None:
+            return order
+    return None
@@ -0,0 +1,329 @@
+"""
+search_autocomplete için süreç içi önek motoru.
+
+Ürün ve kategori adları normalize edilip (bkz. shop.search.normalize_text)
+kelime başlarından itibaren sıralı bir anahtar dizisine yazılır; "mavi gom"
+önek sorgusu "mavi gomlek" anahtarıyla eşleşir. Eşleşen aralık bisect ile
+bulunur, popülerliğe göre en iyi k sonuç seçilir. Kısa önekler (en çok
+SHORT_PREFIX uzunlukta) için sonuçlar sınırlı bir sözlükte saklanır.
+
+Motor her işçide açılışta (satis/wsgi.py) arka planda kurulur ve istek
+sırasında veritabanına dokunmaz:
+- Yazan süreçte Product/Category sinyalleri girdiyi yerinde günceller.
+- Diğer işçiler paylaşılan önbellekteki sürüm damgası değişince arka planda
+  yeniden kurar ve bu sürede eski indeksten cevap verir.
+"""
+import bisect
+import heapq
+import logging
+import sys
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+
+from .search import tokenize
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_LIMIT = 8
+CATEGORY_LIMIT = 5
+SHORT_PREFIX = 3
+MAX_KEY_LENGTH = 64
+
+_VERSION_KEY = 'autocomplete:version'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _keys_for(name):
+    """Adın her kelime başından başlayan normalize edilmiş son ekleri."""
+    norm = ' '.join(tokenize(name))
+    keys = []
+    pos = 0
+    for token in norm.split(' '):
+        if token:
+            keys.append(norm[pos:pos + MAX_KEY_LENGTH])
+        pos += len(token) + 1
+    return keys
+
+
+class PrefixIndex:
+    """
+    Tek tür (ürün veya kategori) için sıralı dizi indeksi.
+
+    keys[i] normalize anahtar, refs[i] ilgili girdi ID'si; entries[id] ise
+    (popülerlik, yanıt sözlüğü). Aynı girdi birden çok anahtarda bulunabilir.
+    """
+
+    def __init__(self, topk_cache_size):
+        self.keys = []
+        self.refs = []
+        self.entries = {}
+        self._topk = {}
+        self._topk_cache_size = topk_cache_size
+
+    def load(self, rows):
+        """rows: (id, ad, popülerlik, yanıt) dizisi; indeksi baştan kurar."""
+        pairs = []
+        entries = {}
+        for pk, name, popularity, payload in rows:
+            entries[pk] = (popularity, payload, tuple(_keys_for(name)))
+            pairs.extend((key, pk) for key in entries[pk][2])
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.refs = [pk for _, pk in pairs]
+        self.entries = entries
+        self._topk = {}
+
+    def _drop_keys(self, pk, keys):
+        for key in keys:
+            lo = bisect.bisect_left(self.keys, key)
+            hi = bisect.bisect_right(self.keys, key, lo)
+            for i in range(lo, hi):
+                if self.refs[i] == pk:
+                    del self.keys[i]
+                    del self.refs[i]
+                    break
+            self._forget_prefixes(key)
+
+    def _forget_prefixes(self, key):
+        for n in range(1, SHORT_PREFIX + 1):
+            self._topk.pop(key[:n], None)
+
+    def upsert(self, pk, name, popularity, payload):
+        old = self.entries.get(pk)
+        if old:
+            self._drop_keys(pk, old[2])
+        keys = tuple(_keys_for(name))
+        self.entries[pk] = (popularity, payload, keys)
+        for key in keys:
+            i = bisect.bisect_left(self.keys, key)
+            self.keys.insert(i, key)
+            self.refs.insert(i, pk)
+            self._forget_prefixes(key)
+
+    def remove(self, pk):
+        old = self.entries.pop(pk, None)
+        if old:
+            self._drop_keys(pk, old[2])
+
+    def _scan(self, prefix, k):
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + '\uffff', lo)
+        seen = set()
+        candidates = []
+        for i in range(lo, hi):
+            pk = self.refs[i]
+            if pk not in seen:
+                seen.add(pk)
+                candidates.append((self.entries[pk][0], -pk, pk))
+        return [pk for _, _, pk in heapq.nlargest(k, candidates)]
+
+    def top(self, prefix, k):
+        """Öneki taşıyan en popüler k girdinin yanıt sözlükleri."""
+        if not prefix:
+            return []
+        if len(prefix) <= SHORT_PREFIX:
+            ids = self._topk.get(prefix)
+            if ids is None or len(ids) < k:
+                ids = self._scan(prefix, k)
+                if len(self._topk) >= self._topk_cache_size:
+                    self._topk.clear()
+                self._topk[prefix] = ids
+        else:
+            ids = self._scan(prefix, k)
+        return [self.entries[pk][1] for pk in ids[:k]]
+
+    def memory_bytes(self):
+        """Yaklaşık bellek kullanımı (anahtar/ref dizileri, girdiler, top-k sözlüğü)."""
+        total = sys.getsizeof(self.keys) + sys.getsizeof(self.refs) + sys.getsizeof(self.entries)
+        total += sum(sys.getsizeof(key) for key in self.keys)
+        for popularity, payload, keys in self.entries.values():
+            total += sys.getsizeof(keys) + sys.getsizeof(payload)
+            total += sum(sys.getsizeof(v) for v in payload.values())
+        total += sys.getsizeof(self._topk) + sum(sys.getsizeof(v) for v in self._topk.values())
+        return total
+
+
+def _product_payload(product):
+    return {
+        'type': 'product',
+        'id': product.id,
+        'name': product.name,
+        'price': float(product.price),
+        'image': product.image.url if product.image else None,
+        'url': f'/shop/product/{product.id}/',
+    }
+
+
+def _category_payload(category):
+    return {
+        'type': 'category',
+        'id': category.id,
+        'name': category.name,
+        'url': f'/shop/products/?category={category.id}',
+    }
+
+
+def _product_popularity(product):
+    return product.rating_count
+
+
+class AutocompleteEngine:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self.version = None
+        self.products = PrefixIndex(_setting('AUTOCOMPLETE_TOPK_CACHE_SIZE', 5000))
+        self.categories = PrefixIndex(_setting('AUTOCOMPLETE_TOPK_CACHE_SIZE', 5000))
+        self.ready = False
+
+    # --- Kurulum ---
+
+    def build(self):
+        """İndeksleri veritabanından kurar (açılışta / sürüm değişince)."""
+        from django.db.models import Count
+        from .models import Category, Product
+
+        version = cache.get(_VERSION_KEY)
+        max_products = _setting('AUTOCOMPLETE_MAX_PRODUCTS', 200000)
+        products = (
+            Product.objects.only('id', 'name', 'price', 'image', 'rating_count')
+            .order_by('-rating_count', 'pk')[:max_products]
+        )
+        product_rows = [
+            (p.id, p.name, _product_popularity(p), _product_payload(p))
+            for p in products.iterator(chunk_size=2000)
+        ]
+        category_rows = [
+            (c.id, c.name, c.product_count, _category_payload(c))
+            for c in Category.objects.annotate(product_count=Count('products')).only('id', 'name')
+        ]
+
+        products_index = PrefixIndex(self.products._topk_cache_size)
+        products_index.load(product_rows)
+        categories_index = PrefixIndex(self.categories._topk_cache_size)
+        categories_index.load(category_rows)
+        with self._lock:
+            self.products = products_index
+            self.categories = categories_index
+            self.version = version
+            self.ready = True
+
+    def _build_in_background(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+
+        def run():
+            close_old_connections()
+            try:
+                self.build()
+            except Exception:
+                logger.exception('Otomatik tamamlama indeksi kurulamadı')
+            finally:
+                self._rebuilding = False
+                connection.close()
+
+        threading.Thread(target=run, name='autocomplete-build', daemon=True).start()
+
+    def warm(self):
+        """İşçi açılışında arka planda kurulum başlatır."""
+        if not self.ready:
+            self._build_in_background()
+
+    def _ensure_current(self):
+        if not self.ready:
+            # Isınma bitmemişse (ya da hiç başlatılmadıysa) ilk istek kurulumu bekler
+            with self._lock:
+                if self.ready:
+                    return
+            self.build()
+            return
+        if cache.get(_VERSION_KEY) != self.version:
+            self._build_in_background()
+
+    def current_version(self):
+        """Bu işçinin sunduğu indeks paylaşılan sürümle aynıysa sürümü, değilse None."""
+        if not self.ready or cache.get(_VERSION_KEY) != self.version:
+            return None
+        return self.version or 0
+
+    # --- Artımlı güncelleme (sinyallerden) ---
+
+    def _bump_version(self):
+        try:
+            version = cache.incr(_VERSION_KEY)
+        except ValueError:
+            version = 1
+            cache.set(_VERSION_KEY, version, None)
+        # Araya başka bir sürecin değişikliği girdiyse yerel indeks eksiktir; yeniden kurulsun
+        if version == (self.version or 0) + 1:
+            self.version = version
+
+    def invalidate(self):
+        """Sinyalsiz toplu değişiklikler sonrası: tüm süreçlerde indeks yeniden kurulur."""
+        try:
+            cache.incr(_VERSION_KEY)
+        except ValueError:
+            cache.set(_VERSION_KEY, 1, None)
+
+    def product_changed(self, product):
+        if self.ready:
+            with self._lock:
+                self.products.upsert(product.id, product.name, _product_popularity(product), _product_payload(product))
+        self._bump_version()
+
+    def product_deleted(self, pk):
+        if self.ready:
+            with self._lock:
+                self.products.remove(pk)
+        self._bump_version()
+
+    def category_changed(self, category):
+        if self.ready:
+            with self._lock:
+                old = self.categories.entries.get(category.id)
+                popularity = old[0] if old else 0
+                self.categories.upsert(category.id, category.name, popularity, _category_payload(category))
+        self._bump_version()
+
+    def category_deleted(self, pk):
+        if self.ready:
+            with self._lock:
+                self.categories.remove(pk)
+        self._bump_version()
+
+    # --- Sorgu ---
+
+    def suggest(self, query):
+        """search_autocomplete yanıtındaki 'suggestions' listesi."""
+        self._ensure_current()
+        prefix = ' '.join(tokenize(query))[:MAX_KEY_LENGTH]
+        with self._lock:
+            products = self.products.top(prefix, PRODUCT_LIMIT)
+            categories = self.categories.top(prefix, CATEGORY_LIMIT)
+        return products + categories
+
+    def stats(self):
+        return {
+            'products': len(self.products.entries),
+            'product_keys': len(self.products.keys),
+            'categories': len(self.categories.entries),
+            'category_keys': len(self.categories.keys),
+            'memory_bytes': self.products.memory_bytes() + self.categories.memory_bytes(),
+        }
+
+
+engine = AutocompleteEngine()
+
+
+def warm():
+    """satis/wsgi.py ve asgi.py tarafından işçi açılışında çağrılır."""
+    if _setting('AUTOCOMPLETE_WARM_ON_START', True):
+        engine.warm()
@@ -1,10 +1,109 @@
+"""
+Alışveriş sepeti.
+
+Misafirlerde sepet oturumda (`session['cart']`) tutulur. Giriş yapmış
+kullanıcılarda her satır bir CartLine kaydıdır: değişiklikler yalnız değişen
+satırı yazar (tek INSERT ... ON CONFLICT DO UPDATE ya da DELETE), oturum
+verisi büyümez. Girişte oturumdaki misafir sepeti kullanıcının sepetine
+birleştirilir (`merge_session_cart`, user_logged_in sinyalinden).
+
+İki durumda da `self.cart` aynı biçimdedir ({anahtar: {'quantity', 'price',
+'variant_id'}}; anahtar "ürün_id" ya da "ürün_id:varyant_id"), böylece
+view'lar hangi deponun kullanıldığını bilmez.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+
+def _load(user):
+    from .models import CartLine
+
+    return {
+        key: {'quantity': quantity, 'price': str(price), 'variant_id': variant_id}
+        for key, quantity, price, variant_id in CartLine.objects.filter(user=user)
+        .order_by('pk').values_list('key', 'quantity', 'price', 'variant_id')
+    }
+
+
+def _write_lines(user, cart, keys):
+    """Verilen anahtarların satırlarını veritabanına yazar (upsert) ya da siler."""
+    from .models import CartLine
+
+    upserts, deletes = [], []
+    now = timezone.now()
+    for key in keys:
+        item = cart.get(key)
+        if item is None:
+            deletes.append(key)
+            continue
+        upserts.append(CartLine(
+            user=user, key=key, product_id=int(key.split(':')[0]), variant_id=item.get('variant_id'),
+            quantity=item['quantity'], price=Decimal(item['price']), updated_at=now,
+        ))
+    if upserts:
+        CartLine.objects.bulk_create(
+            upserts, update_conflicts=True, unique_fields=['user', 'key'],
+            update_fields=['quantity', 'price', 'updated_at'],
+        )
+    if deletes:
+        CartLine.objects.filter(user=user, key__in=deletes).delete()
+
+
+def shell_state(request):
+    """
+    Sayfa kabuğundaki sepet özetini belirleyen değer (koşullu GET ETag'i için;
+    bkz. shop.conditional): misafirde oturumdaki sepet, kullanıcıda satırlardan
+    okunan damga (satır sayısı, toplam adet, son `updated_at`). Damga
+    veritabanından geldiği için her süreç aynı değeri görür; her yazma
+    `updated_at`'i yeniler, silme sayıyı düşürür.
+    """
+    from .models import CartLine
+
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return request.session.get('cart') or {}
+    stamp = CartLine.objects.filter(user=user).aggregate(
+        lines=Count('pk'), units=Sum('quantity'), updated=Max('updated_at'),
+    )
+    return [stamp['lines'], stamp['units'] or 0, stamp['updated']]
+
+
+def merge_session_cart(request, user):
+    """Misafir sepetini kullanıcının kayıtlı sepetine ekler ve oturumdan siler."""
+    session_cart = request.session.get('cart')
+    if not session_cart:
+        return
+    cart = _load(user)
+    for key, item in session_cart.items():
+        if key in cart:
+            cart[key]['quantity'] += item['quantity']
+            cart[key]['price'] = item['price']
+        else:
+            cart[key] = dict(item)
+    _write_lines(user, cart, session_cart.keys())
+    del request.session['cart']
+    request.__dict__.pop('_db_cart', None)
+
+
 class Cart:
     def __init__(self, request):
         self.session = request.session
-        cart = self.session.get('cart')
-        if not cart:
-            cart = self.session['cart'] = {}
+        user = getattr(request, 'user', None)
+        self.user = user if user is not None and user.is_authenticated else None
+        if self.user is not None:
+            # Aynı istekteki Cart nesneleri (bağlam işlemcisi, view) tek yüklemeyi paylaşır
+            cart = getattr(request, '_db_cart', None)
+            if cart is None:
+                cart = request._db_cart = _load(self.user)
+        else:
+            cart = self.session.get('cart')
+            if not cart:
+                cart = self.session['cart'] = {}
         self.cart = cart
+        self._dirty = set()
+        self._lines = None
 
     def add(self, product, quantity=1, variant_id=None):
         # Varyant varsa ürün_id:varyant_id formatında key oluştur
@@ -24,6 +123,7 @@ class Cart:
                 'variant_id': variant_id
             }
         self.cart[cart_key]['quantity'] += quantity
+        self._dirty.add(cart_key)
         self.save()
 
     def decrement(self, product, quantity=1, variant_id=None):
@@ -32,12 +132,14 @@ class Cart:
             self.cart[cart_key]['quantity'] -= quantity
             if self.cart[cart_key]['quantity'] <= 0:
                 del self.cart[cart_key]
+            self._dirty.add(cart_key)
             self.save()
 
     def remove(self, product, variant_id=None):
         cart_key = f"{product.id}:{variant_id}" if variant_id else str(product.id)
         if cart_key in self.cart:
             del self.cart[cart_key]
+            self._dirty.add(cart_key)
             self.save()
 
     def set(self, product, quantity, variant_id=None):
@@ -66,34 +168,84 @@ class Cart:
             self.cart[cart_key]['quantity'] = int(quantity)
             # Fiyat güncelleme (ürün fiyatı değişmiş olabilir)
             self.cart[cart_key]['price'] = str(price)
+        self._dirty.add(cart_key)
         self.save()
 
     def save(self):
-        self.session.modified = True
+        if self.user is not None:
+            if self._dirty:
+                _write_lines(self.user, self.cart, self._dirty)
+        else:
+            self.session.modified = True
+        self._dirty = set()
+        # Sepet değişti: yüklenmiş satırlar yeniden kurulsun
+        self._lines = None
 
-    def __iter__(self):
+    def _hydrate(self):
+        """
+        Satırları ürün ve varyantlarıyla yükler: ürünler ve varyantlar için
+        birer in_bulk sorgusu (satır sayısından bağımsız). Sonuç sepet
+        değişene kadar bu nesnede saklanır. Silinmiş ürün/varyant satırları
+        sessizce sepetten çıkarılır.
+        """
+        if self._lines is not None:
+            return self._lines
         from .models import Product, ProductVariant
+
+        keys = {}
+        for cart_key in self.cart:
+            product_id, _, variant_id = cart_key.partition(':')
+            try:
+                keys[cart_key] = (int(product_id), int(variant_id) if variant_id else None)
+            except ValueError:
+                keys[cart_key] = None
+        product_ids = {ids[0] for ids in keys.values() if ids}
+        variant_ids = {ids[1] for ids in keys.values() if ids and ids[1]}
+        products = Product.objects.select_related('category').in_bulk(product_ids)
+        variants = ProductVariant.objects.in_bulk(variant_ids)
+
+        lines, stale = [], []
         for cart_key, item in self.cart.items():
-            # Cart key formatını kontrol et (product_id veya product_id:variant_id)
+            ids = keys[cart_key]
+            product = products.get(ids[0]) if ids else None
+            variant = variants.get(ids[1]) if ids and ids[1] else None
+            if product is None or (ids[1] and (variant is None or variant.product_id != product.pk)):
+                stale.append(cart_key)
+                continue
             # Session'a kaydedilmemesi için yeni bir dict oluştur
             cart_item = item.copy()
-            
-            if ':' in cart_key:
-                product_id, variant_id = cart_key.split(':')
-                product = Product.objects.get(id=product_id)
-                variant = ProductVariant.objects.get(id=variant_id)
-                cart_item['product'] = product
-                cart_item['variant'] = variant
+            cart_item['product'] = product
+            cart_item['variant'] = variant
+            if variant is not None:
+                # effective_price ürün fiyatına düşebilir; ürün sorgusuz bağlanır
+                variant.product = product
                 cart_item['total_price'] = variant.effective_price * cart_item['quantity']
             else:
-                product = Product.objects.get(id=cart_key)
-                cart_item['product'] = product
-                cart_item['variant'] = None
                 cart_item['total_price'] = product.price * cart_item['quantity']
-            yield cart_item
+            lines.append(cart_item)
+
+        if stale:
+            for cart_key in stale:
+                del self.cart[cart_key]
+            self._dirty.update(stale)
+            self.save()
+        self._lines = lines
+        return lines
+
+    def __iter__(self):
+        for cart_item in self._hydrate():
+            yield cart_item.copy()
+
+    def lines(self):
+        """(ürün ID, varyant ID, miktar) demetleri; sorgu yapmaz (stok rezervasyonu için)."""
+        return [
+            (int(cart_key.split(':')[0]), item.get('variant_id'), item['quantity'])
+            for cart_key, item in self.cart.items()
+        ]
 
     def clear(self):
-        self.session['cart'] = {}
+        self._dirty.update(self.cart)
+        self.cart.clear()
         self.save()
 
     def __len__(self):
@@ -102,7 +254,6 @@ class Cart:
 
     def get_total_price(self):
         # Sepetteki kalemlerin toplam tutarı
-        from decimal import Decimal
         return sum(Decimal(item['price']) * item['quantity'] for item in self.cart.values())
 
     # Yardımcı: bir ürünün sepetteki mevcut miktarı
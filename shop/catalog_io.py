@@ -0,0 +1,476 @@
+"""
+Katalog toplu içe/dışa aktarımı (CSV ve JSONL).
+
+Satır biçimi iki yönde aynıdır; her satır bir varyanttır (varyantsız ürünler
+için varyant sütunları boştur):
+
+    category, product_id, product_sku, name, description, price, stock,
+    variant_sku, variant_price, variant_stock, variant_weight, variant_active,
+    attributes
+
+Ürün `product_sku` ile, yoksa `product_id` ile eşleştirilir; varyant
+`variant_sku` ile. `attributes` CSV'de "Renk=Kırmızı;Beden=M", JSONL'de
+{"Renk": "Kırmızı"} biçimindedir; eksik özellik ve değerler oluşturulur ve
+varyantın özellikleri satırdakilerle eşitlenir.
+
+İçe aktarma dosyayı satır satır okur ve `batch_size` satırlık partileri
+kendi transaction'ında bulk_create/bulk_update ile yazar; bellek dosya
+boyundan bağımsızdır (yalnız kategori ve özellik değeri ID sözlükleri
+tutulur). Geçersiz satırlar satır numarasıyla raporlanıp atlanır.
+
+Toplu yazım sinyal tetiklemez: her parti sonrası ürün damgaları düşürülür
+ve arama indeksi güncellenir; sonunda dokunulan kategorilerin faset
+özetleri yeniden hesaplanır, otomatik tamamlama ve ana sayfa blokları
+bayatlanır ve katalog dönemi (bkz. shop.versions) düşürülür.
+"""
+import csv
+import json
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+FIELDS = (
+    'category', 'product_id', 'product_sku', 'name', 'description', 'price', 'stock',
+    'variant_sku', 'variant_price', 'variant_stock', 'variant_weight', 'variant_active',
+    'attributes',
+)
+FORMATS = ('csv', 'jsonl')
+MAX_REPORTED_ERRORS = 50
+
+_PRODUCT_FIELDS = ['category', 'name', 'sku', 'description', 'price', 'stock', 'updated_at']
+_VARIANT_FIELDS = ['product', 'price', 'stock', 'weight', 'is_active', 'updated_at']
+_TRUE = {'1', 'true', 'yes', 'evet', 'on'}
+_FALSE = {'0', 'false', 'no', 'hayir', 'hayır', 'off'}
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_format(path):
+    return 'jsonl' if str(path).endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+# --- Okuma / doğrulama ---
+
+def read_rows(f, fmt):
+    """(satır no, ham sözlük) üretir; dosya akış olarak okunur."""
+    if fmt == 'csv':
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_no, RowError(f'geçersiz JSON: {e}')
+                continue
+            if not isinstance(row, dict):
+                yield line_no, RowError('satır bir JSON nesnesi olmalı')
+                continue
+            yield line_no, row
+
+
+def _text(row, key):
+    value = row.get(key)
+    return '' if value is None else str(value).strip()
+
+
+def _decimal(row, key, required=False, max_value=Decimal('1e8')):
+    value = _text(row, key)
+    if not value:
+        if required:
+            raise RowError(f'{key} gerekli')
+        return None
+    try:
+        number = Decimal(value.replace(',', '.'))
+    except InvalidOperation:
+        raise RowError(f'{key} sayı değil: {value!r}')
+    if not number.is_finite() or number < 0 or number >= max_value:
+        raise RowError(f'{key} geçersiz: {value!r}')
+    return number.quantize(Decimal('0.01'))
+
+
+def _int(row, key, default=0):
+    value = _text(row, key)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise RowError(f'{key} tam sayı değil: {value!r}')
+    if number < 0:
+        raise RowError(f'{key} negatif olamaz')
+    return number
+
+
+def _bool(row, key, default=True):
+    value = row.get(key)
+    if isinstance(value, bool):
+        return value
+    value = _text(row, key).lower()
+    if not value:
+        return default
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise RowError(f'{key} evet/hayır değil: {value!r}')
+
+
+def _attributes(row):
+    value = row.get('attributes')
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        pairs = value.items()
+    else:
+        pairs = []
+        for part in str(value).split(';'):
+            if not part.strip():
+                continue
+            if '=' not in part:
+                raise RowError(f'özellik "ad=değer" biçiminde olmalı: {part!r}')
+            pairs.append(part.split('=', 1))
+    attributes = {}
+    for name, attr_value in pairs:
+        name, attr_value = str(name).strip(), str(attr_value).strip()
+        if not name or not attr_value:
+            raise RowError('boş özellik adı/değeri')
+        attributes[name] = attr_value
+    return attributes
+
+
+def clean_row(row):
+    """Ham satırı doğrular; içe aktarım sözlüğü döndürür ya da RowError fırlatır."""
+    if isinstance(row, RowError):
+        raise row
+    product_sku = _text(row, 'product_sku')
+    product_id = _int(row, 'product_id', default=None)
+    if not product_sku and product_id is None:
+        raise RowError('product_sku ya da product_id gerekli')
+    name = _text(row, 'name')
+    category = _text(row, 'category')
+    if not name:
+        raise RowError('name gerekli')
+    if not category:
+        raise RowError('category gerekli')
+    if len(name) > 150 or len(category) > 100 or len(product_sku) > 100:
+        raise RowError('alan uzunluğu sınırı aşıldı')
+
+    cleaned = {
+        'product_key': ('sku', product_sku) if product_sku else ('id', product_id),
+        'product': {
+            'category': category,
+            'name': name,
+            'id': product_id,
+            'sku': product_sku or None,
+            'description': _text(row, 'description'),
+            'price': _decimal(row, 'price', required=True),
+            'stock': _int(row, 'stock'),
+        },
+        'variant': None,
+    }
+    variant_sku = _text(row, 'variant_sku')
+    attributes = _attributes(row)
+    if variant_sku:
+        if len(variant_sku) > 100:
+            raise RowError('variant_sku çok uzun')
+        cleaned['variant'] = {
+            'sku': variant_sku,
+            'price': _decimal(row, 'variant_price'),
+            'stock': _int(row, 'variant_stock'),
+            'weight': _decimal(row, 'variant_weight', max_value=Decimal('1e6')),
+            'is_active': _bool(row, 'variant_active'),
+            'attributes': attributes,
+        }
+    elif attributes:
+        raise RowError('özellikler için variant_sku gerekli')
+    return cleaned
+
+
+# --- Yazma ---
+
+class _Importer:
+    def __init__(self, batch_size):
+        from .models import Category
+
+        self.batch_size = batch_size
+        # Kategori adı -> ID (ilk eşleşen); kategori sayısı küçüktür
+        self.categories = {}
+        for pk, name in Category.objects.order_by('-pk').values_list('pk', 'name'):
+            self.categories[name] = pk
+        self.attribute_values = {}
+        self.touched_categories = set()
+        self.stats = {
+            'rows': 0, 'invalid': 0, 'errors': [],
+            'products_created': 0, 'products_updated': 0,
+            'variants_created': 0, 'variants_updated': 0,
+            'attributes_linked': 0, 'attributes_unlinked': 0,
+        }
+
+    def error(self, line_no, message):
+        self.stats['invalid'] += 1
+        if len(self.stats['errors']) < MAX_REPORTED_ERRORS:
+            self.stats['errors'].append((line_no, message))
+
+    def category_id(self, name):
+        from .models import Category
+
+        if name not in self.categories:
+            # Sinyaller çalışsın diye tek tek: faset satırı, otomatik tamamlama, kategori listesi
+            self.categories[name] = Category.objects.create(name=name).pk
+        return self.categories[name]
+
+    def attribute_value_id(self, name, value):
+        from .models import ProductAttribute, ProductAttributeValue
+
+        key = (name, value)
+        if key not in self.attribute_values:
+            attribute = ProductAttribute.objects.filter(name=name).first()
+            if attribute is None:
+                attribute = ProductAttribute.objects.create(name=name, display_name=name)
+            attribute_value, _ = ProductAttributeValue.objects.get_or_create(
+                attribute=attribute, value=value, defaults={'display_value': value}
+            )
+            self.attribute_values[key] = attribute_value.pk
+        return self.attribute_values[key]
+
+    def apply(self, batch):
+        from . import search, versions
+        from .models import Product
+
+        snapshot = (dict(self.categories), dict(self.attribute_values), set(self.touched_categories), dict(self.stats))
+        try:
+            with transaction.atomic():
+                product_ids = self._upsert_products(batch)
+                self._upsert_variants(batch, product_ids)
+        except Exception:
+            # Geri alınan partide oluşturulan kategori/değer ID'leri ve sayaçlar da unutulur
+            self.categories, self.attribute_values, self.touched_categories, self.stats = snapshot
+            raise
+        versions.bump_products(product_ids.values())
+        search.index_products(
+            Product.objects.filter(pk__in=product_ids.values()).select_related('category')
+            .only('id', 'name', 'description', 'category__name')
+        )
+        self.stats['rows'] += len(batch)
+
+    def _upsert_products(self, batch):
+        from .models import Product
+
+        # Aynı ürünün birden çok satırı varsa son satır geçerlidir
+        rows = {}
+        for row in batch:
+            rows[row['product_key']] = row['product']
+        by_sku = Product.objects.in_bulk([value for kind, value in rows if kind == 'sku'], field_name='sku')
+        # SKU'su henüz kayıtlı olmayan ürün ID ile de eşleşebilir (ilk SKU atanması)
+        by_id = Product.objects.in_bulk([
+            data['id'] for (kind, value), data in rows.items()
+            if data['id'] is not None and (kind == 'id' or value not in by_sku)
+        ])
+
+        now = timezone.now()
+        products, to_create, to_update = {}, [], []
+        for key, data in rows.items():
+            product = by_sku.get(key[1]) if key[0] == 'sku' else None
+            if product is None and data['id'] is not None:
+                product = by_id.get(data['id'])
+            if product is None:
+                if not data['sku']:
+                    # Bilinmeyen ID ile ürün oluşturulmaz; yeni ürün SKU taşımalıdır
+                    raise RowError(f"product_id={data['id']} bulunamadı")
+                product = Product()
+                to_create.append(product)
+            else:
+                self.touched_categories.add(product.category_id)
+                to_update.append(product)
+            product.category_id = self.category_id(data['category'])
+            product.name = data['name']
+            if data['sku']:
+                product.sku = data['sku']
+            product.description = data['description']
+            product.price = data['price']
+            product.stock = data['stock']
+            product.updated_at = now
+            self.touched_categories.add(product.category_id)
+            products[key] = product
+
+        Product.objects.bulk_update(to_update, _PRODUCT_FIELDS)
+        Product.objects.bulk_create(to_create)
+        self.stats['products_created'] += len(to_create)
+        self.stats['products_updated'] += len(to_update)
+
+        if any(p.pk is None for p in to_create):
+            # bulk_create ID döndürmeyen veritabanlarında ID'ler SKU'dan okunur
+            created = dict(Product.objects.filter(sku__in=[p.sku for p in to_create]).values_list('sku', 'pk'))
+            for product in to_create:
+                product.pk = created[product.sku]
+        return {key: product.pk for key, product in products.items()}
+
+    def _upsert_variants(self, batch, product_ids):
+        from .models import ProductVariant, ProductVariantAttribute
+
+        rows = {}
+        for row in batch:
+            if row['variant']:
+                rows[row['variant']['sku']] = (product_ids[row['product_key']], row['variant'])
+        if not rows:
+            return
+        existing = {v.sku: v for v in ProductVariant.objects.filter(sku__in=rows)}
+        now = timezone.now()
+        to_create, to_update = [], []
+        for sku, (product_id, data) in rows.items():
+            variant = existing.get(sku)
+            if variant is None:
+                variant = ProductVariant(sku=sku)
+                to_create.append(variant)
+            else:
+                to_update.append(variant)
+            variant.product_id = product_id
+            variant.price = data['price']
+            variant.stock = data['stock']
+            variant.weight = data['weight']
+            variant.is_active = data['is_active']
+            variant.updated_at = now
+        ProductVariant.objects.bulk_update(to_update, _VARIANT_FIELDS)
+        ProductVariant.objects.bulk_create(to_create)
+        self.stats['variants_created'] += len(to_create)
+        self.stats['variants_updated'] += len(to_update)
+
+        variant_ids = dict(ProductVariant.objects.filter(sku__in=rows).values_list('sku', 'pk'))
+        wanted = {
+            (variant_ids[sku], self.attribute_value_id(name, value))
+            for sku, (_, data) in rows.items()
+            for name, value in data['attributes'].items()
+        }
+        current = {
+            (variant_id, value_id): pk
+            for pk, variant_id, value_id in ProductVariantAttribute.objects.filter(
+                variant_id__in=variant_ids.values()
+            ).values_list('pk', 'variant_id', 'attribute_value_id')
+        }
+        stale = [pk for pair, pk in current.items() if pair not in wanted]
+        if stale:
+            ProductVariantAttribute.objects.filter(pk__in=stale).delete()
+        missing = wanted - set(current)
+        ProductVariantAttribute.objects.bulk_create(
+            [ProductVariantAttribute(variant_id=v, attribute_value_id=a) for v, a in missing]
+        )
+        self.stats['attributes_linked'] += len(missing)
+        self.stats['attributes_unlinked'] += len(stale)
+
+    def apply_or_split(self, batch):
+        """
+        Partiyi yazar. Veritabanı bir satırı reddederse (ör. çakışan SKU) parti
+        satır satır yeniden denenir; yalnız hatalı satırlar atlanır.
+        """
+        try:
+            self.apply([row for _, row in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                self.error(batch[0][0], str(e) or type(e).__name__)
+                return
+            for item in batch:
+                self.apply_or_split([item])
+
+    def finish(self):
+        from . import facets, homepage, versions
+        from .autocomplete import engine
+
+        facets.rebuild(category_ids=self.touched_categories)
+        engine.invalidate()
+        homepage.invalidate()
+        versions.bump_categories(self.touched_categories)
+        versions.bump_epoch()
+
+
+def import_catalog(f, fmt='csv', batch_size=1000):
+    """Açık dosyadan katalog satırlarını içe aktarır; istatistik sözlüğü döndürür."""
+    started = time.monotonic()
+    importer = _Importer(batch_size)
+    batch = []
+    for line_no, raw in read_rows(f, fmt):
+        try:
+            batch.append((line_no, clean_row(raw)))
+        except RowError as e:
+            importer.error(line_no, str(e))
+            continue
+        if len(batch) >= batch_size:
+            importer.apply_or_split(batch)
+            batch = []
+    if batch:
+        importer.apply_or_split(batch)
+    importer.finish()
+    stats = importer.stats
+    stats['seconds'] = time.monotonic() - started
+    return stats
+
+
+# --- Dışa aktarma ---
+
+def export_rows(chunk_size=2000):
+    """Katalog satırlarını ürün ID sırasıyla üretir (parça başına üç sorgu)."""
+    from .models import Product, ProductVariant, ProductVariantAttribute
+
+    links = ProductVariantAttribute.objects.select_related('attribute_value__attribute')
+    variants = ProductVariant.objects.order_by('sku').prefetch_related(Prefetch('attribute_values', queryset=links))
+    products = (
+        Product.objects.select_related('category').order_by('pk')
+        .prefetch_related(Prefetch('variants', queryset=variants))
+    )
+    for product in products.iterator(chunk_size=chunk_size):
+        base = {
+            'category': product.category.name,
+            'product_id': product.pk,
+            'product_sku': product.sku or '',
+            'name': product.name,
+            'description': product.description,
+            'price': str(product.price),
+            'stock': product.stock,
+        }
+        product_variants = list(product.variants.all())
+        if not product_variants:
+            yield dict(base, variant_sku='', variant_price='', variant_stock='', variant_weight='',
+                       variant_active='', attributes={})
+            continue
+        for variant in product_variants:
+            yield dict(
+                base,
+                variant_sku=variant.sku,
+                variant_price='' if variant.price is None else str(variant.price),
+                variant_stock=variant.stock,
+                variant_weight='' if variant.weight is None else str(variant.weight),
+                variant_active=variant.is_active,
+                attributes={
+                    link.attribute_value.attribute.name: link.attribute_value.value
+                    for link in variant.attribute_values.all()
+                },
+            )
+
+
+def export_catalog(f, fmt='csv', chunk_size=2000):
+    """Kataloğu açık dosyaya yazar; istatistik sözlüğü döndürür."""
+    started = time.monotonic()
+    rows = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in export_rows(chunk_size):
+            row['attributes'] = ';'.join(f'{k}={v}' for k, v in row['attributes'].items())
+            if isinstance(row['variant_active'], bool):
+                row['variant_active'] = 'true' if row['variant_active'] else 'false'
+            writer.writerow(row)
+            rows += 1
+    else:
+        for row in export_rows(chunk_size):
+            f.write(json.dumps(row, ensure_ascii=False))
+            f.write('\n')
+            rows += 1
+    return {'rows': rows, 'seconds': time.monotonic() - started}
@@ -0,0 +1,89 @@
+"""
+Katalog sayfaları ve JSON uçları için koşullu GET.
+
+`conditional_get(version_func)` view'ı Django'nun condition dekoratörüyle
+sarar: ETag, view çalışmadan önce yalnızca sürüm damgalarından (bkz.
+shop.versions; önbellek okumaları) hesaplanır ve If-None-Match eşleşirse
+304 veritabanına hiç gitmeden döner.
+
+Kullanıcıya özel kabuk (üst menü, sepet, CSRF alanı) içeren HTML
+sayfalarında (`per_user=True`) ETag kullanıcıyı, sepetin durumunu ve CSRF
+çerezini de kapsar ve yanıt private işaretlenir. Bekleyen flash mesajı
+varsa ETag üretilmez; 304 mesajı göstermeden yutardı.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from . import versions
+from .cart import shell_state
+
+
+def weak_etag(parts):
+    digest = hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _shell_parts(request):
+    if len(get_messages(request)):
+        return None
+    return [
+        request.user.pk if request.user.is_authenticated else 0,
+        shell_state(request),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ]
+
+
+def conditional_get(version_func, per_user=False):
+    """
+    version_func(request, *args, **kwargs): yanıtı belirleyen sürüm
+    değerleri (JSON'a dökülebilir) ya da ETag istenmiyorsa None.
+    """
+    def etag_func(request, *args, **kwargs):
+        parts = version_func(request, *args, **kwargs)
+        if parts is None:
+            return None
+        if per_user:
+            shell = _shell_parts(request)
+            if shell is None:
+                return None
+            parts = [parts, shell]
+        return weak_etag([versions.catalog_epoch(), parts])
+
+    def decorator(view):
+        view = condition(etag_func=etag_func)(view)
+        if per_user:
+            return cache_control(private=True, no_cache=True)(view)
+        return cache_control(public=True, no_cache=True)(view)
+
+    return decorator
+
+
+# --- Görünüm başına sürüm fonksiyonları ---
+
+def catalog_versions(request, *args, **kwargs):
+    """Listeler ve site haritası: tüm katalog + sorgu dizgesi."""
+    return [versions.catalog_version(), request.GET.urlencode()]
+
+
+def product_versions(request, pk, *args, **kwargs):
+    from .product_page import TEMPLATE_REVISION
+
+    return [TEMPLATE_REVISION, pk, versions.product_version(pk)]
+
+
+def autocomplete_versions(request):
+    """
+    Önek motoru işçide arka planda güncellenir; ETag motorun gerçekten
+    sunduğu indeks sürümünden üretilir (güncel değilse ETag yok).
+    """
+    from .autocomplete import engine
+
+    version = engine.current_version()
+    if version is None:
+        return None
+    return ['autocomplete', version, request.GET.get('q', '').strip()]
@@ -0,0 +1,89 @@
+"""
+Yüklenen alan değerlerinin anlık görüntüsü (dirty-field takibi).
+
+pre_save sinyallerinde "eski değer ne idi?" sorusu için satırı yeniden okumak
+yerine, satır veritabanından yüklenirken (`from_db`) seçilen alanların
+değerleri örneğe not edilir:
+
+    dirty.track(Order, 'status')
+    ...
+    dirty.has_changed(order, 'status')
+    dirty.old_value(order, 'status')
+
+Kayıttan sonra (post_save) ve refresh_from_db'de görüntü yenilenir; aynı
+örnek tekrar kaydedilirse karşılaştırma son kaydedilen değere göre yapılır.
+Kendi modellerimiz için olduğu gibi User gibi dış modeller için de çalışır
+(sınıfın from_db/refresh_from_db'si sarılır).
+
+Görüntüde olmayan alan (`.only()`/`.defer()` ile ertelenmiş ya da elle pk
+verilerek kurulmuş örnek) için tek sorguyla veritabanına bakılır.
+"""
+from django.db.models.signals import post_save
+
+SNAPSHOT_ATTR = '_loaded_values'
+
+_tracked = {}
+_missing = object()
+
+
+def _attnames(model):
+    return {name: model._meta.get_field(name).attname for name in _tracked.get(model, ())}
+
+
+def _snapshot(instance, only=None):
+    """Takip edilen (yüklü) alanların şimdiki değerlerini görüntüye yazar."""
+    values = instance.__dict__
+    snapshot = values.setdefault(SNAPSHOT_ATTR, {})
+    for name, attname in _attnames(type(instance)).items():
+        if attname in values and (only is None or name in only or attname in only):
+            snapshot[name] = values[attname]
+
+
+def _reset_after_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _snapshot(instance)
+
+
+def track(model, *fields):
+    """`model` örnekleri için `fields` alanlarının yüklendiği andaki değerlerini tut."""
+    if model in _tracked:
+        _tracked[model] = tuple(dict.fromkeys(_tracked[model] + fields))
+        return
+    _tracked[model] = tuple(fields)
+
+    base_from_db = model.from_db.__func__
+    base_refresh = model.refresh_from_db
+
+    def from_db(cls, db, field_names, values):
+        instance = base_from_db(cls, db, field_names, values)
+        _snapshot(instance)
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        base_refresh(self, using=using, fields=fields, **kwargs)
+        _snapshot(self, only=set(fields) if fields is not None else None)
+
+    model.from_db = classmethod(from_db)
+    model.refresh_from_db = refresh_from_db
+    post_save.connect(_reset_after_save, sender=model, weak=False, dispatch_uid=f'dirty:{model._meta.label}')
+
+
+def old_value(instance, field, default=None):
+    """
+    Alanın yüklendiği (ya da son kaydedildiği) andaki değeri. Henüz
+    kaydedilmemiş örnek için `default`.
+    """
+    value = instance.__dict__.get(SNAPSHOT_ATTR, {}).get(field, _missing)
+    if value is not _missing:
+        return value
+    if instance.pk is None:
+        return default
+    value = type(instance)._base_manager.filter(pk=instance.pk).values_list(field, flat=True).first()
+    return default if value is None else value
+
+
+def has_changed(instance, field):
+    """Alan yüklendiğinden (ya da son kayıttan) beri değişti mi? Yeni örnekte True."""
+    if instance.pk is None:
+        return True
+    return old_value(instance, field, _missing) != getattr(instance, field)
@@ -1,104 +1,93 @@
-from django.core.mail import send_mail
+"""
+Sipariş e-postaları.
+
+`send_*` fonksiyonları e-postayı kuyruğa yazar (bkz. shop/outbox.py);
+`render_*` fonksiyonları gönderici tarafından çağrılır ve içeriği o anki
+sipariş verisiyle oluşturur.
+"""
 from django.template.loader import render_to_string
-from django.conf import settings
 from django.utils.html import strip_tags
 
+from . import outbox
+
+STATUS_MESSAGES = {
+    'received': 'Siparişiniz alındı',
+    'paid': 'Ödemeniz onaylandı',
+    'shipped': 'Siparişiniz kargoya verildi',
+    'cancelled': 'Siparişiniz iptal edildi'
+}
+
+
+def _order(order_id):
+    from .models import Order
+
+    return Order.objects.get(pk=order_id)
+
+
+def render_order_confirmation(order_id):
+    order = _order(order_id)
+    html_message = render_to_string('shop/emails/order_confirmation.html', {
+        'order': order,
+        'items': order.items.all()
+    })
+    return f'Sipariş Onayı - #{order.number}', strip_tags(html_message), html_message
+
+
+def render_order_status(order_id, status):
+    order = _order(order_id)
+    # Durum, kuyruğa yazıldığı andaki haliyle bildirilir
+    order.status = status
+    status_message = STATUS_MESSAGES.get(status, 'Sipariş durumu güncellendi')
+    html_message = render_to_string('shop/emails/order_status.html', {
+        'order': order,
+        'status_message': status_message
+    })
+    return f'{status_message} - #{order.number}', strip_tags(html_message), html_message
+
+
+def render_shipping_notification(order_id):
+    order = _order(order_id)
+    html_message = render_to_string('shop/emails/shipping_notification.html', {
+        'order': order
+    })
+    return f'Siparişiniz Kargoya Verildi - #{order.number}', strip_tags(html_message), html_message
+
+
+def render_stock_alert(alert_id):
+    from .models import StockAlert
+
+    alert = StockAlert.objects.select_related('user', 'product').get(pk=alert_id)
+    message = f"""
+        Merhaba {alert.user.get_full_name() or alert.user.username},
+
+        Takip ettiğiniz ürün tekrar stokta!
+
+        Ürün: {alert.product.name}
+        Mevcut Stok: {alert.product.stock}
+        Fiyat: {alert.product.price} TL
+
+        Ürünü satın almak için sitemizi ziyaret edebilirsiniz.
+
+        İyi alışverişler!
+        """
+    return f"Stok Uyarısı: {alert.product.name}", message, ''
+
 
 def send_order_confirmation_email(order):
-    """Sipariş onay e-postası gönder"""
-    try:
-        subject = f'Sipariş Onayı - #{order.number}'
-        
-        # HTML e-posta içeriği
-        html_message = render_to_string('shop/emails/order_confirmation.html', {
-            'order': order,
-            'items': order.items.all()
-        })
-        
-        # Düz metin versiyonu
-        plain_message = strip_tags(html_message)
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[order.email],
-            html_message=html_message,
-            fail_silently=False
-        )
-        
-        return True
-        
-    except Exception as e:
-        print(f'E-posta gönderme hatası: {e}')
-        return False
+    """Sipariş onay e-postasını kuyruğa yaz"""
+    outbox.enqueue('shop.email_utils.render_order_confirmation', order.email, order_id=order.pk)
+    return True
 
 
 def send_order_status_email(order, status_changed: bool = False):
-    """Sipariş durum değişikliği e-postası gönder
+    """Sipariş durum değişikliği e-postasını kuyruğa yaz
     status_changed parametresi sinyal çağrısından gelir; şu anda sadece imza uyumluluğu için kullanılır.
     """
-    try:
-        # Durum mesajları
-        status_messages = {
-            'received': 'Siparişiniz alındı',
-            'paid': 'Ödemeniz onaylandı',
-            'shipped': 'Siparişiniz kargoya verildi',
-            'cancelled': 'Siparişiniz iptal edildi'
-        }
-        
-        status_message = status_messages.get(order.status, 'Sipariş durumu güncellendi')
-        subject = f'{status_message} - #{order.number}'
-        
-        # HTML e-posta içeriği
-        html_message = render_to_string('shop/emails/order_status.html', {
-            'order': order,
-            'status_message': status_message
-        })
-        
-        # Düz metin versiyonu
-        plain_message = strip_tags(html_message)
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[order.email],
-            html_message=html_message,
-            fail_silently=False
-        )
-        
-        return True
-        
-    except Exception as e:
-        print(f'E-posta gönderme hatası: {e}')
-        return False
+    outbox.enqueue('shop.email_utils.render_order_status', order.email, order_id=order.pk, status=order.status)
+    return True
 
 
 def send_shipping_notification_email(order):
-    """Kargo bildirim e-postası gönder"""
-    try:
-        subject = f'Siparişiniz Kargoya Verildi - #{order.number}'
-        
-        # HTML e-posta içeriği
-        html_message = render_to_string('shop/emails/shipping_notification.html', {
-            'order': order
-        })
-        
-        # Düz metin versiyonu
-        plain_message = strip_tags(html_message)
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[order.email],
-            html_message=html_message,
-            fail_silently=False
-        )
-        
-        return True
-        
-    except Exception as e:
-        print(f'E-posta gönderme hatası: {e}')
-        return False
\ No newline at end of file
+    """Kargo bildirim e-postasını kuyruğa yaz"""
+    outbox.enqueue('shop.email_utils.render_shipping_notification', order.email, order_id=order.pk)
+    return True
@@ -0,0 +1,310 @@
+"""
+Katalog filtre kenar çubuğu için faset (kategori sayıları, fiyat histogramı,
+stok ve puan kovaları) motoru.
+
+Tüm fasetler kategori başına aynı biçimde bir satırdan türetilir:
+ürün sayısı, stoktaki ürün sayısı, fiyat kovası sayıları (price_0..price_7),
+puan kovası sayıları (rating_0 puansız, rating_1..rating_5 ortalamanın tam
+kısmı) ve fiyat alt/üst sınırı.
+
+- Sadece kategori filtresi varsa satırlar CategoryFacetSummary tablosundan
+  tek sorguyla okunur. Tablo Product/puan değişikliklerinde artımlı
+  güncellenir; `rebuild_facets` komutu baştan hesaplar.
+- Arama veya fiyat/stok/puan filtresi varsa aynı satırlar filtreli ürünler
+  üzerinde tek bir GROUP BY sorgusuyla hesaplanır.
+
+Her faset kendi filtresini yok sayar (kategori sayıları kategori seçiminden,
+fiyat histogramı fiyat aralığından bağımsızdır); böylece kullanıcı diğer
+seçenekleri kaç sonuçla göreceğini bilir.
+"""
+import bisect
+from decimal import Decimal
+
+from django.db.models import Count, F, Max, Min, OuterRef, Q, Subquery
+
+# Fiyat kovalarının alt sınırları (TL); son kova açık uçlu
+PRICE_EDGES = (100, 250, 500, 1000, 2500, 5000, 10000)
+PRICE_BUCKETS = range(len(PRICE_EDGES) + 1)
+RATING_BUCKETS = range(0, 6)
+
+COUNT_FIELDS = (
+    ('product_count', 'in_stock_count')
+    + tuple(f'price_{i}' for i in PRICE_BUCKETS)
+    + tuple(f'rating_{r}' for r in RATING_BUCKETS)
+)
+
+
+def price_bucket(price):
+    return bisect.bisect_right(PRICE_EDGES, Decimal(price))
+
+
+def rating_bucket(rating_avg, rating_count):
+    """0: puansız; 1..5: ortalamanın tam kısmı."""
+    if not rating_count:
+        return 0
+    return min(5, max(1, int(rating_avg)))
+
+
+def _price_bucket_q(i):
+    q = Q()
+    if i > 0:
+        q &= Q(price__gte=PRICE_EDGES[i - 1])
+    if i < len(PRICE_EDGES):
+        q &= Q(price__lt=PRICE_EDGES[i])
+    return q
+
+
+def _rating_bucket_q(r):
+    if r == 0:
+        return Q(rating_count=0)
+    q = Q(rating_count__gt=0, rating_avg__gte=r)
+    if r < 5:
+        q &= Q(rating_avg__lt=r + 1)
+    return q
+
+
+def _and(*qs):
+    result = Q()
+    for q in qs:
+        if q is not None:
+            result &= q
+    return result
+
+
+def _count(condition):
+    return Count('id', filter=condition) if condition else Count('id')
+
+
+# --- Satır hesaplama ---
+
+def _grouped_rows(queryset, price_q=None, stock_q=None, rating_q=None):
+    """
+    Kategori başına faset satırları (tek GROUP BY sorgusu). Fiyat/stok/puan
+    filtreleri WHERE yerine koşullu sayımlara girer; her faset kendi
+    filtresini hariç tutar.
+    """
+    aggregates = {
+        'product_count': _count(_and(price_q, stock_q, rating_q)),
+        # Stok faseti kendi filtresini yok sayar: stokta olan / toplam
+        'stock_base': _count(_and(price_q, rating_q)),
+        'in_stock_count': _count(_and(price_q, rating_q, Q(stock__gt=0))),
+        'min_price': Min('price', filter=_and(stock_q, rating_q) or None),
+        'max_price': Max('price', filter=_and(stock_q, rating_q) or None),
+    }
+    for i in PRICE_BUCKETS:
+        aggregates[f'price_{i}'] = _count(_and(stock_q, rating_q, _price_bucket_q(i)))
+    for r in RATING_BUCKETS:
+        aggregates[f'rating_{r}'] = _count(_and(price_q, stock_q, _rating_bucket_q(r)))
+    return {
+        row.pop('category_id'): row
+        for row in queryset.order_by().values('category_id').annotate(**aggregates)
+    }
+
+
+def _summary_row(summary):
+    row = {field: getattr(summary, field) for field in COUNT_FIELDS}
+    row['stock_base'] = summary.product_count
+    row['min_price'] = summary.min_price
+    row['max_price'] = summary.max_price
+    return row
+
+
+# --- Genel API ---
+
+def get_facets(queryset=None, category=None, min_price=None, max_price=None, in_stock=None, min_rating=None):
+    """
+    Geçerli filtre kümesi için fasetleri döndürür.
+
+    Args:
+        queryset: Arama uygulanmış ürün queryset'i (arama yoksa None);
+            kategori/fiyat/stok/puan filtreleri burada uygulanmamış olmalı
+        category: Seçili kategori ID'si
+        min_price, max_price: Fiyat aralığı (sayı)
+        in_stock: True (stokta), False (stok yok) ya da None
+        min_rating: 1-5 arası en düşük puan ya da None
+
+    Returns:
+        {'categories', 'total', 'in_stock', 'out_of_stock', 'price_buckets',
+         'ratings', 'price_range'}
+    """
+    from .models import Category
+
+    price_q = None
+    if min_price is not None or max_price is not None:
+        price_q = Q()
+        if min_price is not None:
+            price_q &= Q(price__gte=min_price)
+        if max_price is not None:
+            price_q &= Q(price__lte=max_price)
+    stock_q = None if in_stock is None else (Q(stock__gt=0) if in_stock else Q(stock=0))
+    rating_q = Q(rating_count__gt=0, rating_avg__gte=min_rating) if min_rating else None
+
+    if queryset is None and price_q is None and stock_q is None and rating_q is None:
+        # Ön hesaplanmış özet: kategoriler ve satırları tek sorguda
+        categories = list(Category.objects.select_related('facet_summary').order_by('name'))
+        rows = {}
+        for c in categories:
+            summary = getattr(c, 'facet_summary', None)
+            if summary is not None:
+                rows[c.pk] = _summary_row(summary)
+    else:
+        if queryset is None:
+            from .models import Product
+            queryset = Product.objects.all()
+        rows = _grouped_rows(queryset, price_q, stock_q, rating_q)
+        categories = list(Category.objects.order_by('name'))
+
+    for c in categories:
+        c.facet_count = rows[c.pk]['product_count'] if c.pk in rows else 0
+
+    selected = [row for pk, row in rows.items() if category is None or pk == category]
+
+    def total(field):
+        return sum(row[field] for row in selected)
+
+    mins = [row['min_price'] for row in selected if row['min_price'] is not None]
+    maxs = [row['max_price'] for row in selected if row['max_price'] is not None]
+    cumulative = 0
+    ratings = []
+    for r in range(5, 0, -1):
+        cumulative += total(f'rating_{r}')
+        ratings.append({'stars': r, 'count': cumulative})
+
+    in_stock_count = total('in_stock_count')
+    return {
+        'categories': categories,
+        'total': total('product_count'),
+        'in_stock': in_stock_count,
+        'out_of_stock': total('stock_base') - in_stock_count,
+        'price_buckets': [
+            {
+                'min': PRICE_EDGES[i - 1] if i > 0 else 0,
+                'max': PRICE_EDGES[i] if i < len(PRICE_EDGES) else None,
+                'count': total(f'price_{i}'),
+            }
+            for i in PRICE_BUCKETS
+        ],
+        'ratings': ratings,
+        'price_range': {
+            'min_price': min(mins) if mins else None,
+            'max_price': max(maxs) if maxs else None,
+        },
+    }
+
+
+# --- Özet tablosunun bakımı ---
+
+def product_state(category_id, price, stock, rating_avg, rating_count):
+    """Bir ürünün özetteki katkısı: (kategori, fiyat kovası, stokta mı, puan kovası)."""
+    return (category_id, price_bucket(price), stock > 0, rating_bucket(rating_avg, rating_count))
+
+
+def state_of(product):
+    return product_state(product.category_id, product.price, product.stock, product.rating_avg, product.rating_count)
+
+
+def _contribution(state, sign, deltas):
+    category_id, price_i, in_stock, rating_r = state
+    row = deltas.setdefault(category_id, {})
+    for field in ('product_count', f'price_{price_i}', f'rating_{rating_r}'):
+        row[field] = row.get(field, 0) + sign
+    if in_stock:
+        row['in_stock_count'] = row.get('in_stock_count', 0) + sign
+
+
+def apply_state_change(old_state, new_state, bounds_changed=False):
+    """
+    Bir ürünün eski ve yeni katkısının farkını kategori satırlarına uygular.
+    Kategori başına tek UPDATE; fiyat sınırları değiştiyse aynı UPDATE içinde
+    alt sorguyla yeniden hesaplanır. Satır yoksa kategori baştan hesaplanır.
+    """
+    if old_state == new_state and not bounds_changed:
+        return
+    deltas = {}
+    if old_state is not None:
+        _contribution(old_state, -1, deltas)
+    if new_state is not None:
+        _contribution(new_state, 1, deltas)
+
+    from .models import CategoryFacetSummary
+
+    # Ürün kategoriye girdi/çıktı ya da fiyatı değişti: min/max yeniden hesaplanır
+    recompute_bounds = bounds_changed or old_state is None or new_state is None or old_state[0] != new_state[0]
+    for category_id, row in deltas.items():
+        fields = {field: F(field) + n for field, n in row.items() if n}
+        if recompute_bounds:
+            fields.update(_bounds_subqueries())
+        if not fields:
+            continue
+        if not CategoryFacetSummary.objects.filter(category_id=category_id).update(**fields):
+            rebuild(category_ids=[category_id])
+
+
+def _bounds_subqueries():
+    from .models import Product
+
+    products = Product.objects.filter(category_id=OuterRef('category_id')).order_by().values('category_id')
+    return {
+        'min_price': Subquery(products.annotate(m=Min('price')).values('m')[:1]),
+        'max_price': Subquery(products.annotate(m=Max('price')).values('m')[:1]),
+    }
+
+
+def stock_changed(product, old_stock):
+    """Sinyal tetiklemeyen stok güncellemelerinden (queryset.update) sonra çağrılır."""
+    old_state = product_state(product.category_id, product.price, old_stock, product.rating_avg, product.rating_count)
+    apply_state_change(old_state, state_of(product))
+
+
+def rating_changed(product_id, d_sum, d_count):
+    """
+    ratings.apply_rating_deltas sonrası: puan kovası değiştiyse özeti güncelle.
+    Yeni toplamlardan eski ortalama geri hesaplanır (tek okuma).
+    """
+    from .models import Product
+
+    row = Product.objects.filter(pk=product_id).values_list(
+        'category_id', 'price', 'stock', 'rating_sum', 'rating_count'
+    ).first()
+    if row is None:
+        return
+    category_id, price, stock, rating_sum, rating_count = row
+    old_sum, old_count = rating_sum - d_sum, rating_count - d_count
+    old_avg = old_sum / old_count if old_count else 0
+    new_avg = rating_sum / rating_count if rating_count else 0
+    apply_state_change(
+        product_state(category_id, price, stock, old_avg, old_count),
+        product_state(category_id, price, stock, new_avg, rating_count),
+    )
+
+
+def rebuild(category_ids=None):
+    """
+    Özet satırlarını ürün tablosundan baştan hesaplar (backfill / onarım).
+    Ürünü kalmayan kategorilerin satırları sıfırlanır. Yazılan satır sayısını döndürür.
+    """
+    from .models import Category, CategoryFacetSummary, Product
+
+    products = Product.objects.all()
+    categories = Category.objects.all()
+    if category_ids is not None:
+        products = products.filter(category_id__in=category_ids)
+        categories = categories.filter(pk__in=category_ids)
+    rows = _grouped_rows(products)
+
+    summaries = []
+    for category_id in categories.values_list('pk', flat=True):
+        row = rows.get(category_id, {})
+        summaries.append(CategoryFacetSummary(
+            category_id=category_id,
+            min_price=row.get('min_price'),
+            max_price=row.get('max_price'),
+            **{field: row.get(field, 0) for field in COUNT_FIELDS},
+        ))
+    CategoryFacetSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=['category'],
+        update_fields=list(COUNT_FIELDS) + ['min_price', 'max_price'],
+    )
+    return len(summaries)
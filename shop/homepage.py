@@ -0,0 +1,187 @@
+"""
+Ana sayfa blokları (öne çıkanlar, çok satanlar, yeni ürünler, kategoriler) için önbellek.
+
+Her blok için sadece ürün/kategori ID listesi saklanır; istek başına tek bir
+PK sorgusu ile ürünler yüklenir. İki anahtar kullanılır:
+
+- veri anahtarı: uzun ömürlü, son hesaplanan ID listesi
+- taze anahtarı: HOMEPAGE_BLOCK_TTL süreli; silinmesi/düşmesi bloğu "bayat" yapar
+
+Bayat blok istekte bekletilmeden sunulur ve arka planda tek bir iş parçacığı
+(cache.add kilidi ile) yeniden hesaplar; böylece süre dolduğunda veritabanına
+eşzamanlı yığılma olmaz. Model sinyalleri ilgili blokların taze anahtarını siler;
+çok satanlar bloğunu satış sıralaması güncellendiğinde shop.sales_rank bayatlatır.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+from django.db.models import Count, Q
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 6
+CATEGORY_BLOCK_SIZE = 8
+
+PRODUCT_FIELDS = ('id', 'name', 'price', 'stock', 'image', 'category__name', 'rating_avg', 'rating_count')
+
+_KEY_PREFIX = 'homepage:block'
+
+
+def _ttl():
+    return getattr(settings, 'HOMEPAGE_BLOCK_TTL', 300)
+
+
+def _data_key(name):
+    return f'{_KEY_PREFIX}:{name}:data'
+
+
+def _fresh_key(name):
+    return f'{_KEY_PREFIX}:{name}:fresh'
+
+
+def _lock_key(name):
+    return f'{_KEY_PREFIX}:{name}:lock'
+
+
+# --- Blok hesaplayıcıları (ağır sorgular; sadece ID döndürür) ---
+
+def _featured_ids():
+    from .models import Product
+    return list(
+        Product.objects.filter(stock__gt=0, rating_count__gt=0, rating_avg__gte=4.0)
+        .order_by('-rating_avg', '-rating_count')
+        .values_list('id', flat=True)[:BLOCK_SIZE]
+    )
+
+
+def _bestseller_ids():
+    # Ön hesaplanmış satış sıralamasından (iptal/ödenmemiş siparişler sayılmaz)
+    from .sales_rank import bestseller_ids
+    return bestseller_ids(BLOCK_SIZE)
+
+
+def _new_ids():
+    from .models import Product
+    return list(
+        Product.objects.filter(stock__gt=0).order_by('-id').values_list('id', flat=True)[:BLOCK_SIZE]
+    )
+
+
+def _category_counts():
+    from .models import Category
+    return list(
+        Category.objects.annotate(product_count=Count('products', filter=Q(products__stock__gt=0)))
+        .filter(product_count__gt=0)
+        .order_by('-product_count')
+        .values_list('id', 'product_count')[:CATEGORY_BLOCK_SIZE]
+    )
+
+
+BLOCKS = {
+    'featured_products': _featured_ids,
+    'bestsellers': _bestseller_ids,
+    'new_products': _new_ids,
+    'categories_with_count': _category_counts,
+}
+
+# Hangi modelin değişikliği hangi blokları bayatlatır
+INVALIDATES = {
+    'Product': ('featured_products', 'bestsellers', 'new_products', 'categories_with_count'),
+    'Review': ('featured_products',),
+    'Category': ('categories_with_count',),
+}
+
+
+def rebuild_block(name):
+    """Bloğu hesaplayıp önbelleğe yazar ve yeni değeri döndürür."""
+    value = BLOCKS[name]()
+    cache.set(_data_key(name), value, None)
+    cache.set(_fresh_key(name), True, _ttl())
+    return value
+
+
+def _rebuild_in_background(name):
+    """HOMEPAGE_BLOCK_ASYNC kapalıysa (testler) senkron hesaplar ve sonucu döndürür."""
+    def run():
+        close_old_connections()
+        try:
+            rebuild_block(name)
+        except Exception:
+            logger.exception('Ana sayfa bloğu yeniden hesaplanamadı: %s', name)
+        finally:
+            cache.delete(_lock_key(name))
+            connection.close()
+
+    if getattr(settings, 'HOMEPAGE_BLOCK_ASYNC', True):
+        threading.Thread(target=run, name=f'homepage-{name}', daemon=True).start()
+        return None
+    try:
+        return rebuild_block(name)
+    finally:
+        cache.delete(_lock_key(name))
+
+
+def get_block_ids(name):
+    """
+    Bloğun ID listesini döndürür. Soğuk önbellekte senkron hesaplar; bayat
+    değeri ise hemen döndürüp yenilemeyi tek bir arka plan işine bırakır.
+    """
+    value = cache.get(_data_key(name))
+    if value is None:
+        return rebuild_block(name)
+    if cache.get(_fresh_key(name)) is None and cache.add(_lock_key(name), time.time(), 60):
+        rebuilt = _rebuild_in_background(name)
+        if rebuilt is not None:
+            return rebuilt
+    return value
+
+
+def invalidate(*names):
+    """Blokları bayat olarak işaretler (veri korunur, bir sonraki okumada yenilenir)."""
+    cache.delete_many([_fresh_key(name) for name in (names or BLOCKS)])
+
+
+def invalidate_for_model(model_name):
+    names = INVALIDATES.get(model_name)
+    if names:
+        invalidate(*names)
+
+
+def get_homepage_blocks():
+    """
+    Ana sayfa şablonu için blokları döndürür. Önbellek sıcakken toplam iki
+    PK sorgusu çalışır: bütün ürün blokları için bir, kategoriler için bir.
+    """
+    from .models import Category, Product
+
+    product_blocks = ('featured_products', 'bestsellers', 'new_products')
+    ids = {name: get_block_ids(name) for name in product_blocks}
+    category_counts = get_block_ids('categories_with_count')
+
+    all_ids = {pk for block in ids.values() for pk in block}
+    products = {}
+    if all_ids:
+        # Önbellek bayat olabilir; stok bitmiş/silinmiş ürünler burada elenir
+        products = Product.objects.select_related('category').only(*PRODUCT_FIELDS).filter(
+            pk__in=all_ids, stock__gt=0
+        ).in_bulk()
+
+    blocks = {
+        name: [products[pk] for pk in block if pk in products]
+        for name, block in ids.items()
+    }
+
+    categories = []
+    if category_counts:
+        by_id = Category.objects.in_bulk([pk for pk, _ in category_counts])
+        for pk, count in category_counts:
+            category = by_id.get(pk)
+            if category is not None:
+                category.product_count = count
+                categories.append(category)
+    blocks['categories_with_count'] = categories
+    return blocks
@@ -0,0 +1,272 @@
+"""
+Ürün ve varyant görselleri için türev (thumbnail) hattı.
+
+Yüklenen orijinal görselden sabit genişliklerde (IMAGE_DERIVATIVE_WIDTHS)
+modern biçimlerde (IMAGE_DERIVATIVE_FORMATS; Pillow destekliyorsa AVIF,
+WebP) türevler ve küçük bulanık bir yer tutucu üretilir.
+
+Türev dosya adları kaynak içeriğin özetinden türetilir
+(derivatives/ab/<özet>-<genişlik>.<biçim>): aynı içerik aynı adı alır, görsel
+değişince ad da değişir. Bu yüzden MEDIA_URL altındaki derivatives/ yolu web
+sunucusunda `Cache-Control: public, max-age=31536000, immutable` ile
+sunulabilir.
+
+Üretim sonucu (özet, boyutlar, genişlikler, biçimler, yer tutucu) modeldeki
+`image_derivatives` JSON alanına yazılır; şablon etiketi (core img_extras
+`responsive_img`) srcset'i sorgusuz bu alandan kurar.
+
+İş, süreç havuzunda yapılır: yüklemede kayıt commit edildikten sonra havuza
+gönderilir (IMAGE_DERIVATIVE_WORKERS=0 ise aynı süreçte), toplu üretim için
+`generate_thumbnails` komutu kullanılır. Süreçlere yalnız dosya adı ve
+parametreler gider; sonuçlar ana süreçte veritabanına yazılır.
+"""
+import base64
+import hashlib
+import io
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Kodlama ayarları değiştiğinde artırın: tüm türevler yeni adlarla yeniden üretilir
+REVISION = 1
+DERIVATIVE_DIR = 'derivatives'
+PLACEHOLDER_WIDTH = 16
+
+_MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+_SAVE_OPTIONS = {
+    'avif': {'quality': 55},
+    'webp': {'quality': 78, 'method': 4},
+}
+
+_pool = None
+
+
+def widths():
+    return tuple(sorted(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', (320, 480, 800, 1200))))
+
+
+def formats():
+    """İstenen biçimlerden bu Pillow kurulumunun yazabildikleri (tercih sırasıyla)."""
+    from PIL import features
+
+    wanted = getattr(settings, 'IMAGE_DERIVATIVE_FORMATS', ('avif', 'webp'))
+    return tuple(fmt for fmt in wanted if fmt in _MIME_TYPES and features.check(fmt))
+
+
+def mime_type(fmt):
+    return _MIME_TYPES[fmt]
+
+
+def derivative_name(digest, width, fmt):
+    return f'{DERIVATIVE_DIR}/{digest[:2]}/{digest}-{width}.{fmt}'
+
+
+def _digest(data, target_widths, target_formats):
+    h = hashlib.sha256()
+    h.update(f'{REVISION}:{",".join(map(str, target_widths))}:{",".join(target_formats)}:'.encode())
+    h.update(data)
+    return h.hexdigest()[:32]
+
+
+def _placeholder(image):
+    from PIL import ImageFilter
+
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    tiny = image.resize((PLACEHOLDER_WIDTH, height)).filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    tiny.convert('RGB').save(buffer, 'WEBP', quality=30)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def process(source_name, target_widths, target_formats):
+    """
+    Tek görselin türevlerini üretir (süreç havuzunda çalışır).
+    Zaten var olan türevler yeniden kodlanmaz. Üst bilgi sözlüğü döndürür.
+    """
+    from PIL import Image, ImageOps
+
+    with default_storage.open(source_name, 'rb') as f:
+        data = f.read()
+    digest = _digest(data, target_widths, target_formats)
+
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+    # Orijinalden geniş türev üretilmez; orijinal en büyük genişlikten darsa kendi genişliği eklenir
+    sizes = [w for w in target_widths if w < image.width]
+    if image.width <= target_widths[-1]:
+        sizes.append(image.width)
+
+    for width in sizes:
+        resized = None
+        for fmt in target_formats:
+            name = derivative_name(digest, width, fmt)
+            if default_storage.exists(name):
+                continue
+            if resized is None:
+                height = max(1, round(image.height * width / image.width))
+                resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt.upper(), **_SAVE_OPTIONS[fmt])
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    return {
+        'source': source_name,
+        'hash': digest,
+        'width': image.width,
+        'height': image.height,
+        'widths': sizes,
+        'targets': list(target_widths),
+        'formats': list(target_formats),
+        'placeholder': _placeholder(image),
+    }
+
+
+def _is_current(source_name, meta):
+    meta = meta or {}
+    return bool(
+        source_name
+        and meta.get('source') == source_name
+        and meta.get('revision') == REVISION
+        and meta.get('targets') == list(widths())
+        and meta.get('formats') == list(formats())
+    )
+
+
+def is_current(instance):
+    """Kayıttaki türevler geçerli görsel ve ayarlarla mı üretilmiş?"""
+    return _is_current(instance.image.name if instance.image else None, instance.image_derivatives)
+
+
+def store(model, pk, meta):
+    """
+    Sonucu kaydeder. Görsel bu arada değiştiyse yazılmaz (yeni yükleme kendi
+    türevlerini üretir). Sinyal tetiklememek için update() kullanılır.
+    """
+    from . import versions
+
+    meta = dict(meta, revision=REVISION)
+    updated = model.objects.filter(pk=pk, image=meta['source']).update(image_derivatives=meta)
+    if updated:
+        product_id = pk if model._meta.model_name == 'product' else (
+            model.objects.filter(pk=pk).values_list('product_id', flat=True).first()
+        )
+        # Detay gövdesi ve kartlar srcset'i yeni üst bilgiden kursun
+        versions.bump_products([product_id])
+    return bool(updated)
+
+
+def workers():
+    return getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', min(4, os.cpu_count() or 1))
+
+
+def pool(max_workers=None):
+    """Yüklemeler için süreç havuzu (ilk kullanımda kurulur)."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=max_workers or workers())
+    return _pool
+
+
+def _store_result(model, pk, future):
+    # Havuzun sonuç iş parçacığında çalışır; bağlantı bu iş parçacığına aittir
+    try:
+        store(model, pk, future.result())
+    except Exception:
+        logger.exception('Görsel türevleri üretilemedi: %s #%s', model._meta.label, pk)
+    finally:
+        connection.close()
+
+
+def generate(instance):
+    """
+    Kaydın görseli için türev üretimini başlatır. Havuz varsa arka planda,
+    IMAGE_DERIVATIVE_WORKERS=0 ise hemen. Görsel kaldırıldıysa üst bilgiyi temizler.
+    """
+    model = type(instance)
+    if not instance.image:
+        if instance.image_derivatives:
+            model.objects.filter(pk=instance.pk).update(image_derivatives={})
+        return
+    args = (instance.image.name, widths(), formats())
+    if not workers():
+        try:
+            store(model, instance.pk, process(*args))
+        except Exception:
+            logger.exception('Görsel türevleri üretilemedi: %s #%s', model._meta.label, instance.pk)
+        return
+    future = pool().submit(process, *args)
+    future.add_done_callback(lambda f: _store_result(model, instance.pk, f))
+
+
+def schedule(instance):
+    """post_save'den çağrılır: görsel değiştiyse commit sonrası üretimi başlatır."""
+    if instance.image and is_current(instance):
+        return
+    if not instance.image and not instance.image_derivatives:
+        return
+    transaction.on_commit(lambda: generate(instance))
+
+
+def backfill(force=False, max_workers=None, chunk_size=500):
+    """
+    Türevi eksik ya da eski ayarlarla üretilmiş tüm ürün/varyant görsellerini
+    süreç havuzunda işler. Havuzda aynı anda en çok 4 × işçi iş bekler.
+    İstatistik sözlüğü döndürür.
+    """
+    from .models import Product, ProductVariant
+
+    started = time.monotonic()
+    max_workers = workers() if max_workers is None else max_workers
+    target_widths, target_formats = widths(), formats()
+    stats = {'processed': 0, 'skipped': 0, 'failed': 0}
+
+    def jobs():
+        # Listeler önce okunur: okuma imleci açıkken aynı tabloya yazılmaz
+        todo = []
+        for model in (Product, ProductVariant):
+            rows = (
+                model.objects.exclude(image='').exclude(image__isnull=True)
+                .order_by('pk').values_list('pk', 'image', 'image_derivatives')
+            )
+            for pk, name, meta in rows.iterator(chunk_size=chunk_size):
+                if not force and _is_current(name, meta):
+                    stats['skipped'] += 1
+                    continue
+                todo.append((model, pk, name))
+        return todo
+
+    def finish(model, pk, get_result):
+        try:
+            store(model, pk, get_result())
+            stats['processed'] += 1
+        except Exception:
+            logger.exception('Görsel türevleri üretilemedi: %s #%s', model._meta.label, pk)
+            stats['failed'] += 1
+
+    if not max_workers:
+        for model, pk, name in jobs():
+            finish(model, pk, lambda: process(name, target_widths, target_formats))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+            for model, pk, name in jobs():
+                pending[executor.submit(process, name, target_widths, target_formats)] = (model, pk)
+                if len(pending) >= max_workers * 4:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finish(*pending.pop(future), future.result)
+            for future in wait(pending).done:
+                finish(*pending.pop(future), future.result)
+
+    stats['seconds'] = time.monotonic() - started
+    return stats
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from shop import archive
+
+
+def _size(value):
+    if value is None:
+        return "?"
+    sign, value = ("-" if value < 0 else ""), abs(value)
+    for unit in ("B", "KB", "MB"):
+        if value < 1024:
+            return f"{sign}{value:.0f} {unit}" if unit == "B" else f"{sign}{value:.1f} {unit}"
+        value /= 1024
+    return f"{sign}{value:.1f} GB"
+
+
+class Command(BaseCommand):
+    help = "Eski kargolanmış/iptal siparişleri çocuklarıyla birlikte partiler halinde arşiv tablolarına taşır."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=None,
+            help="Bu kadar aydan eski siparişleri taşı (default: ORDER_ARCHIVE_AFTER_MONTHS).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Transaction başına sipariş sayısı (default: 500).")
+        parser.add_argument("--limit", type=int, default=None, help="En çok bu kadar sipariş taşı.")
+        parser.add_argument("--dry-run", action="store_true", help="Taşımadan yalnız aday sayısını göster.")
+
+    def handle(self, *args, **options):
+        months = archive.archive_after_months() if options["months"] is None else max(1, options["months"])
+        before = archive.cutoff(months)
+        if options["dry_run"]:
+            count = archive.candidates(before).count()
+            self.stdout.write(f"{before:%Y-%m-%d} öncesi {count} sipariş arşivlenebilir.")
+            return
+
+        sizes_before = archive.sizes()
+        stats = archive.run(before=before, batch_size=max(1, options["batch_size"]), limit=options["limit"])
+        sizes_after = archive.sizes()
+
+        for table, (rows_after, bytes_after) in sizes_after.items():
+            rows_before, bytes_before = sizes_before[table]
+            delta = bytes_after - bytes_before if None not in (bytes_after, bytes_before) else None
+            self.stdout.write(
+                f"  {table}: {rows_before} → {rows_after} satır ({rows_after - rows_before:+d}), "
+                f"{_size(bytes_before)} → {_size(bytes_after)}"
+                + (f" ({'+' if delta >= 0 else ''}{_size(delta)})" if delta is not None else "")
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ {stats['orders']} sipariş arşivlendi ({before:%Y-%m-%d} öncesi), {stats['rows']} satır "
+                f"({stats['seconds']:.2f} sn, {stats['rows_per_second']:.0f} satır/sn)."
+            )
+        )
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.autocomplete import AutocompleteEngine
+
+
+class Command(BaseCommand):
+    help = "Otomatik tamamlama indeksini kurar; girdi/anahtar sayısı ve yaklaşık bellek kullanımını raporlar."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--query", action="append", default=[], help="Örnek sorgu (birden çok kez verilebilir).")
+
+    def handle(self, *args, **options):
+        engine = AutocompleteEngine()
+        started = time.monotonic()
+        engine.build()
+        elapsed = time.monotonic() - started
+
+        stats = engine.stats()
+        self.stdout.write(f"Kurulum süresi: {elapsed:.2f} sn")
+        self.stdout.write(f"Ürün: {stats['products']}  anahtar: {stats['product_keys']}")
+        self.stdout.write(f"Kategori: {stats['categories']}  anahtar: {stats['category_keys']}")
+        self.stdout.write(f"Yaklaşık bellek: {stats['memory_bytes'] / (1024 * 1024):.2f} MB")
+
+        for query in options["query"]:
+            started = time.perf_counter()
+            suggestions = engine.suggest(query)
+            took = (time.perf_counter() - started) * 1000
+            self.stdout.write(f"  {query!r}: {len(suggestions)} öneri, {took:.3f} ms")
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from shop.models import CartLine, Category, Order, Product
+
+CHECKOUT_DATA = {
+    "email": "bench@example.com", "fullname": "Bench Kullanıcı", "phone": "05550000000",
+    "address": "Bench Mah. 1", "city": "İstanbul", "district": "", "postal_code": "",
+    "shipping_method": "standard", "billing": {},
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Ödeme adımının (checkout_pay, mock sağlayıcı) gecikmesini ve sorgu sayısını farklı sepet boyutlarında ölçer."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, nargs="+", default=[1, 10, 50], help="Sepet satır sayıları (default: 1 10 50).")
+        parser.add_argument("--repeat", type=int, default=20, help="Ölçüm tekrarı (default: 20).")
+
+    def handle(self, *args, **options):
+        sizes = sorted(set(options["lines"]))
+        if not sizes or sizes[0] < 1:
+            raise CommandError("Satır sayıları pozitif olmalı.")
+        settings_override = override_settings(
+            PAYMENT_PROVIDER="mock",
+            ALLOWED_HOSTS=["testserver"],
+            EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+        )
+        try:
+            with settings_override, transaction.atomic():
+                self._run(sizes, max(1, options["repeat"]))
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write("Sentetik veriler geri alındı.")
+
+    def _run(self, sizes, repeat):
+        user = User.objects.create_user("bench-checkout", email=CHECKOUT_DATA["email"])
+        category = Category.objects.create(name="Bench Ödeme")
+        products = Product.objects.bulk_create([
+            Product(name=f"Bench ödeme ürünü {i}", price=10 + i, stock=10 ** 6, category=category)
+            for i in range(max(sizes))
+        ])
+        client = Client()
+        client.force_login(user)
+        url = reverse("shop:checkout_pay")
+
+        self.stdout.write(f"{'satır':>6}{'sorgu':>8}{'medyan ms':>12}{'maks ms':>10}")
+        for size in sizes:
+            timings, queries = [], 0
+            for _ in range(repeat):
+                CartLine.objects.bulk_create([
+                    CartLine(user=user, key=str(p.pk), product=p, quantity=1, price=p.price)
+                    for p in products[:size]
+                ])
+                session = client.session
+                session["checkout_data"] = CHECKOUT_DATA
+                session.save()
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    response = client.post(url)
+                    timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 302 or not response["Location"].endswith(reverse("shop:checkout_success")):
+                    raise CommandError(f"{size} satırlı ödeme başarısız: {response.status_code}")
+                queries = len(ctx.captured_queries)
+            self.stdout.write(f"{size:>6}{queries:>8}{statistics.median(timings):>12.2f}{max(timings):>10.2f}")
+        self.stdout.write(f"Oluşturulan sipariş: {Order.objects.filter(user=user).count()}")
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from shop import homepage
+from shop.models import Category, Product
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _legacy_blocks():
+    """Önbellek öncesi ana sayfa: dört ağır sorgu her istekte."""
+    fields = homepage.PRODUCT_FIELDS
+    base = Product.objects.select_related('category').only(*fields).filter(stock__gt=0)
+    return {
+        'featured_products': list(
+            base.filter(rating_count__gt=0, rating_avg__gte=4.0).order_by('-rating_avg', '-rating_count')[:6]
+        ),
+        'bestsellers': list(base.annotate(order_count=Count('orderitem')).order_by('-order_count')[:6]),
+        'new_products': list(base.order_by('-id')[:6]),
+        'categories_with_count': list(
+            Category.objects.annotate(product_count=Count('products', filter=Q(products__stock__gt=0)))
+            .filter(product_count__gt=0).order_by('-product_count')[:8]
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = "Ana sayfa bloklarının önbelleksiz ve önbellekli sorgu sayısı/süresini ölçer."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50, help="Ölçüm tekrarı (default: 50).")
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Geçici olarak N sentetik ürün oluşturur; ölçümden sonra geri alınır.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options["seed"]:
+                    self._seed(options["seed"])
+                self._run(max(1, options["repeat"]))
+                if options["seed"]:
+                    raise _Rollback
+        except _Rollback:
+            self.stdout.write("Sentetik veriler geri alındı.")
+
+    def _seed(self, count):
+        categories = Category.objects.bulk_create([Category(name=f"Bench {i}") for i in range(20)])
+        rnd = random.Random(42)
+        Product.objects.bulk_create(
+            [
+                Product(
+                    category=rnd.choice(categories),
+                    name=f"Bench ürün {i}",
+                    price=Decimal(rnd.randint(10, 5000)),
+                    stock=rnd.randint(0, 50),
+                    rating_avg=rnd.uniform(1, 5),
+                    rating_count=rnd.randint(0, 200),
+                )
+                for i in range(count)
+            ],
+            batch_size=1000,
+        )
+
+    def _measure(self, fn, repeat):
+        timings = []
+        queries = 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                fn()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = len(ctx.captured_queries)
+        return queries, statistics.median(timings), max(timings)
+
+    def _run(self, repeat):
+        with override_settings(HOMEPAGE_BLOCK_ASYNC=False):
+            homepage.invalidate()
+            for name in homepage.BLOCKS:
+                homepage.rebuild_block(name)
+            rows = [
+                ("önbelleksiz", *self._measure(_legacy_blocks, repeat)),
+                ("önbellekli", *self._measure(homepage.get_homepage_blocks, repeat)),
+            ]
+
+        self.stdout.write(f"Ürün sayısı: {Product.objects.count()}  tekrar: {repeat}")
+        self.stdout.write(f"{'mod':<14}{'sorgu':>8}{'medyan ms':>12}{'maks ms':>10}")
+        for label, queries, median, worst in rows:
+            self.stdout.write(f"{label:<14}{queries:>8}{median:>12.2f}{worst:>10.2f}")
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from shop import pagination
+from shop.models import Category, Product
+
+PER_PAGE = 12
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Katalog listesinde OFFSET (Paginator) ve imleçli sayfalamayı 1. ve derin sayfada karşılaştırır."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=200000, help="Geçici sentetik ürün sayısı (default: 200000, 0: mevcut veri).")
+        parser.add_argument("--page", type=int, default=500, help="Derin sayfa numarası (default: 500).")
+        parser.add_argument("--sort", default="price_asc", choices=sorted(pagination.SORTS), help="Sıralama (default: price_asc).")
+        parser.add_argument("--repeat", type=int, default=20, help="Ölçüm tekrarı (default: 20).")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options["seed"]:
+                    self._seed(options["seed"])
+                self._run(options["sort"], max(2, options["page"]), max(1, options["repeat"]))
+                if options["seed"]:
+                    raise _Rollback
+        except _Rollback:
+            self.stdout.write("Sentetik veriler geri alındı.")
+
+    def _seed(self, count):
+        started = time.monotonic()
+        categories = Category.objects.bulk_create([Category(name=f"Bench {i}") for i in range(50)])
+        rnd = random.Random(42)
+        now = timezone.now()
+        batch = []
+        for i in range(count):
+            batch.append(
+                Product(
+                    category=rnd.choice(categories),
+                    name=f"Bench ürün {rnd.randint(0, count)}",
+                    price=Decimal(rnd.randint(10, 5000)),
+                    stock=rnd.randint(0, 50),
+                    rating_avg=round(rnd.uniform(1, 5), 1),
+                    rating_count=rnd.randint(0, 200),
+                )
+            )
+            if len(batch) >= 5000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        Product.objects.bulk_create(batch)
+        # created_at auto_now_add; sıralamanın anlamlı olması için dağıt
+        Product.objects.update(created_at=now)
+        for offset in range(1, 30):
+            Product.objects.filter(id__gt=offset * count // 30).update(created_at=now + timedelta(days=offset))
+        self.stdout.write(f"{count} ürün oluşturuldu ({time.monotonic() - started:.1f} sn).")
+
+    def _measure(self, fn, repeat):
+        timings = []
+        queries = 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                fn()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = len(ctx.captured_queries)
+        return queries, statistics.median(timings), max(timings)
+
+    def _run(self, sort, page, repeat):
+        queryset = Product.objects.select_related("category").only(
+            "id", "name", "price", "stock", "image", "category__name", "created_at", "rating_avg", "rating_count"
+        )
+        ordered = queryset.order_by(*pagination.ordering_for(sort))
+        last_of_previous = ordered[(page - 1) * PER_PAGE - 1: (page - 1) * PER_PAGE].first()
+        if last_of_previous is None:
+            raise CommandError(f"{page}. sayfa için yeterli ürün yok.")
+
+        factory = RequestFactory()
+        first_request = factory.get("/shop/products/", {"sort": sort})
+        deep_request = factory.get(
+            "/shop/products/", {"sort": sort, "cursor": pagination.cursor_for(last_of_previous, sort)}
+        )
+
+        def offset_page(number):
+            page_obj = Paginator(ordered, PER_PAGE).page(number)
+            return list(page_obj)
+
+        def cursor_page(request):
+            return list(pagination.paginate(request, queryset, sort, per_page=PER_PAGE))
+
+        # Her iki yöntem aynı satırları döndürmeli
+        if [p.pk for p in offset_page(page)] != [p.pk for p in cursor_page(deep_request)]:
+            raise CommandError("OFFSET ve imleç sonuçları farklı.")
+
+        rows = [
+            ("offset s.1", *self._measure(lambda: offset_page(1), repeat)),
+            (f"offset s.{page}", *self._measure(lambda: offset_page(page), repeat)),
+            ("imleç s.1", *self._measure(lambda: cursor_page(first_request), repeat)),
+            (f"imleç s.{page}", *self._measure(lambda: cursor_page(deep_request), repeat)),
+        ]
+
+        self.stdout.write(f"Ürün sayısı: {Product.objects.count()}  sıralama: {sort}  tekrar: {repeat}")
+        self.stdout.write(f"{'mod':<16}{'sorgu':>8}{'medyan ms':>12}{'maks ms':>10}")
+        for label, queries, median, worst in rows:
+            self.stdout.write(f"{label:<16}{queries:>8}{median:>12.2f}{worst:>10.2f}")
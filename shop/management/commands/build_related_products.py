@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from shop.recommendations import rebuild
+
+
+class Command(BaseCommand):
+    help = "Satılmış siparişlerden 'birlikte alınanlar' önerilerini hesaplayıp RelatedProduct tablosunu yeniden yazar."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-n", type=int, default=None, help="Ürün başına öneri sayısı (default: RELATED_PRODUCTS_TOP_N).")
+        parser.add_argument(
+            "--max-basket",
+            type=int,
+            default=None,
+            help="Bundan büyük sepetler atlanır (default: RELATED_PRODUCTS_MAX_BASKET).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Sipariş kalemi okuma parti boyutu (default: 2000).")
+
+    def handle(self, *args, **options):
+        stats = rebuild(
+            top_n=options["top_n"],
+            max_basket=options["max_basket"],
+            chunk_size=max(1, options["chunk_size"]),
+        )
+        self.stdout.write(
+            f"Sipariş: {stats['orders']} (atlanan büyük sepet: {stats['skipped_orders']})  çift: {stats['pairs']}"
+        )
+        self.stdout.write(f"En yüksek aday sayısı: {stats['peak_candidates']}  budanan: {stats['pruned']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ {stats['products']} ürün için {stats['rows']} öneri yazıldı ({stats['seconds']:.2f} sn)."
+            )
+        )
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from shop.sitemaps import build, sitemap_root
+
+
+class Command(BaseCommand):
+    help = "Ürün, kategori ve SitemapEntry URL'lerinden gzip'li site haritası parçalarını ve dizinini üretir (yalnız kirli parçalar)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Değişmemiş parçaları da yeniden yaz.")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Veritabanı okuma parti boyutu (default: 2000).")
+
+    def handle(self, *args, **options):
+        stats = build(force=options["force"], chunk_size=max(1, options["chunk_size"]))
+        for name in stats["written"]:
+            self.stdout.write(f"  yazıldı: {name}")
+        for name in stats["removed"]:
+            self.stdout.write(f"  silindi: {name}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ {stats['urls']} URL; {len(stats['written'])} parça yazıldı, {stats['skipped']} parça değişmemiş "
+                f"({stats['seconds']:.2f} sn) → {sitemap_root()}"
+            )
+        )
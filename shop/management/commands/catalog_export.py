@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.catalog_io import FORMATS, detect_format, export_catalog
+
+
+class Command(BaseCommand):
+    help = "Kataloğu (ürün × varyant satırları) catalog_import ile geri yüklenebilir CSV/JSONL olarak dışa aktarır."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Hedef dosya ('-' ise standart çıktı).")
+        parser.add_argument("--format", choices=FORMATS, default=None, help="Dosya biçimi (default: uzantıdan).")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Veritabanı okuma parti boyutu (default: 2000).")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or detect_format(path)
+        chunk_size = max(1, options["chunk_size"])
+        if path == "-":
+            stats = export_catalog(sys.stdout, fmt, chunk_size)
+            # Özet stderr'e: stdout dosya olarak yönlendirilmiş olabilir
+            out = self.stderr
+        else:
+            try:
+                f = open(path, "w", newline="", encoding="utf-8")
+            except OSError as e:
+                raise CommandError(f"Dosya açılamadı: {e}")
+            with f:
+                stats = export_catalog(f, fmt, chunk_size)
+            out = self.stdout
+        rate = stats["rows"] / stats["seconds"] if stats["seconds"] else 0
+        out.write(f"✓ {stats['rows']} satır dışa aktarıldı ({stats['seconds']:.2f} sn, {rate:.0f} satır/sn).")
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.catalog_io import FORMATS, detect_format, import_catalog
+
+
+class Command(BaseCommand):
+    help = "CSV/JSONL katalog dosyasından kategori, ürün, varyant ve özellik değerlerini toplu olarak ekler/günceller."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="İçe aktarılacak dosya ('-' ise standart girdi).")
+        parser.add_argument("--format", choices=FORMATS, default=None, help="Dosya biçimi (default: uzantıdan).")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Transaction başına satır sayısı (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or detect_format(path)
+        batch_size = max(1, options["batch_size"])
+        if path == "-":
+            stats = import_catalog(sys.stdin, fmt, batch_size)
+        else:
+            try:
+                f = open(path, newline="", encoding="utf-8-sig")
+            except OSError as e:
+                raise CommandError(f"Dosya açılamadı: {e}")
+            with f:
+                stats = import_catalog(f, fmt, batch_size)
+
+        for line_no, message in stats["errors"]:
+            self.stderr.write(f"  satır {line_no}: {message}")
+        if stats["invalid"] > len(stats["errors"]):
+            self.stderr.write(f"  ... ve {stats['invalid'] - len(stats['errors'])} hatalı satır daha")
+        self.stdout.write(
+            f"Ürün: {stats['products_created']} yeni, {stats['products_updated']} güncellendi  "
+            f"varyant: {stats['variants_created']} yeni, {stats['variants_updated']} güncellendi  "
+            f"özellik bağı: +{stats['attributes_linked']} / -{stats['attributes_unlinked']}"
+        )
+        rate = stats["rows"] / stats["seconds"] if stats["seconds"] else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ {stats['rows']} satır içe aktarıldı, {stats['invalid']} hatalı satır atlandı "
+                f"({stats['seconds']:.2f} sn, {rate:.0f} satır/sn)."
+            )
+        )
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from shop.images import backfill, formats, widths
+
+
+class Command(BaseCommand):
+    help = "Ürün ve varyant görsellerinin eksik türevlerini (genişlik × AVIF/WebP) süreç havuzunda üretir."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Güncel görünen kayıtları da yeniden işle.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Süreç sayısı; 0 aynı süreçte çalışır (default: IMAGE_DERIVATIVE_WORKERS).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=500, help="Veritabanı okuma parti boyutu (default: 500).")
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"Genişlikler: {', '.join(map(str, widths()))}  biçimler: {', '.join(formats()) or '-'}"
+        )
+        stats = backfill(
+            force=options["force"],
+            max_workers=options["workers"],
+            chunk_size=max(1, options["chunk_size"]),
+        )
+        rate = stats["processed"] / stats["seconds"] if stats["seconds"] else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ {stats['processed']} görsel işlendi, {stats['skipped']} güncel, {stats['failed']} hatalı "
+                f"({stats['seconds']:.2f} sn, {rate:.1f} görsel/sn)."
+            )
+        )
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.facets import rebuild
+
+
+class Command(BaseCommand):
+    help = "Kategori faset özetlerini (ürün/stok sayıları, fiyat ve puan kovaları) ürün tablosundan yeniden hesaplar."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--category",
+            type=int,
+            action="append",
+            dest="category_ids",
+            help="Sadece bu kategori ID'si (birden çok kez verilebilir).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = rebuild(category_ids=options["category_ids"])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"✓ {written} kategorinin faset özeti güncellendi ({elapsed:.2f} sn)."))
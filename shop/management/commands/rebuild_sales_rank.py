@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.sales_rank import rebuild, refresh_windows
+
+
+class Command(BaseCommand):
+    help = "Çok satanlar sıralamasını (7/30 gün ve tüm zamanlar adet/ciro) sipariş kalemlerinden yeniden hesaplar."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--windows",
+            action="store_true",
+            help="Sadece 7/30 günlük pencereleri günlük defterden yenile (günlük cron için).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options["windows"]:
+            updated = refresh_windows()
+            label = "ürünün kayan pencereleri"
+        else:
+            updated = rebuild()
+            label = "ürünün satış sıralaması"
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"✓ {updated} {label} güncellendi ({elapsed:.2f} sn)."))
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.search import get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Ürün arama indeksini (SQLite FTS5 / PostgreSQL tsvector) baştan oluşturur."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Parti başına indekslenecek ürün sayısı (default: 500).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = rebuild_index(batch_size=max(1, options["batch_size"]))
+        elapsed = time.monotonic() - started
+        backend = type(get_backend()).__name__
+        self.stdout.write(self.style.SUCCESS(f"✓ {total} ürün indekslendi ({backend}, {elapsed:.2f} sn)."))
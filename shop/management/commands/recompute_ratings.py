@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.ratings import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = "Ürün puan özetlerini (ortalama, yorum sayısı, yıldız dağılımı) yorumlardan yeniden hesaplar."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--product",
+            type=int,
+            action="append",
+            dest="product_ids",
+            help="Sadece bu ürün ID'si (birden çok kez verilebilir).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Parti başına güncellenecek ürün sayısı (default: 500).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = recompute_ratings(
+            product_ids=options["product_ids"],
+            batch_size=max(1, options["batch_size"]),
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"✓ {updated} ürünün puan özeti güncellendi ({elapsed:.2f} sn)."))
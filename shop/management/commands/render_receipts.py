@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from shop.receipts import backfill
+
+
+class Command(BaseCommand):
+    help = "Fişi eksik ya da sipariş durumundan geri kalmış siparişlerin fişlerini süreç havuzunda işler."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Güncel görünen fişleri de yeniden işle.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Süreç sayısı; 0 aynı süreçte çalışır (default: RECEIPT_RENDER_WORKERS).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=200, help="Veritabanı okuma/yazma parti boyutu (default: 200).")
+
+    def handle(self, *args, **options):
+        stats = backfill(
+            force=options["force"],
+            max_workers=options["workers"],
+            chunk_size=max(1, options["chunk_size"]),
+        )
+        rate = (stats["rendered"] + stats["unchanged"]) / stats["seconds"] if stats["seconds"] else 0
+        ratio = stats["compressed"] / stats["bytes"] if stats["bytes"] else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ {stats['rendered']} fiş işlendi, {stats['unchanged']} değişmedi, {stats['failed']} hatalı "
+                f"({stats['seconds']:.2f} sn, {rate:.1f} fiş/sn, sıkıştırma oranı {ratio:.0%})."
+            )
+        )
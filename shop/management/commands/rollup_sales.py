@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from shop.rollups import run
+
+
+class Command(BaseCommand):
+    help = "Son çalıştırmadan bu yana değişen siparişlerin günlerini satış özetlerinde yeniden hesaplar."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Filigranı yok say, tüm özetleri baştan kur.")
+        parser.add_argument("--chunk-days", type=int, default=31, help="Bir transaction'da yazılan gün sayısı (default: 31).")
+
+    def handle(self, *args, **options):
+        stats = run(full=options["full"], chunk_days=max(1, options["chunk_days"]))
+        since = "baştan" if stats["since"] is None else f"{stats['since']:%Y-%m-%d %H:%M:%S} sonrası"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ {stats['days']} gün yeniden hesaplandı ({since}), {stats['rows']} özet satırı "
+                f"({stats['seconds']:.2f} sn)."
+            )
+        )
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.outbox import drain
+
+
+class Command(BaseCommand):
+    help = "Kuyruktaki işlemsel e-postaları tek SMTP bağlantısı üzerinden toplu gönderir (bkz. shop/outbox.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Bağlantı başına e-posta sayısı (default: 100).")
+        parser.add_argument(
+            "--loop",
+            type=int,
+            default=0,
+            metavar="SANIYE",
+            help="Verilirse komut çıkmaz; bu aralıkla kuyruğu tekrar boşaltır.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        while True:
+            started = time.monotonic()
+            sent, retry, dead = drain(batch_size=batch_size)
+            elapsed = time.monotonic() - started
+            if sent or retry or dead or not options["loop"]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"✓ {sent} e-posta gönderildi, {retry} yeniden denenecek, {dead} kalıcı hata ({elapsed:.2f} sn)."
+                ))
+            if not options["loop"]:
+                return
+            time.sleep(options["loop"])
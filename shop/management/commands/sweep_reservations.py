@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.reservations import sweep
+
+
+class Command(BaseCommand):
+    help = "Süresi dolan stok rezervasyonlarını toplu olarak serbest bırakır (cron ile sık çalıştırın)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Transaction başına tutma sayısı (default: 1000).")
+        parser.add_argument(
+            "--loop",
+            type=int,
+            default=0,
+            metavar="SANIYE",
+            help="Verilirse komut çıkmaz; bu aralıkla tekrar süpürür.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        while True:
+            started = time.monotonic()
+            released = sweep(batch_size=batch_size)
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(f"✓ {released} tutma serbest bırakıldı ({elapsed:.2f} sn)."))
+            if not options["loop"]:
+                return
+            time.sleep(options["loop"])
@@ -0,0 +1,84 @@
+import unicodedata
+
+from django.db import migrations
+
+# Göç anındaki normalizasyon (shop.search.normalize_text); göç çalışma zamanı koduna bağlanmaz
+_TR_LOWER = str.maketrans({'I': 'ı', 'İ': 'i'})
+_TR_FOLD = str.maketrans({'ç': 'c', 'ğ': 'g', 'ı': 'i', 'ö': 'o', 'ş': 's', 'ü': 'u', 'â': 'a', 'î': 'i', 'û': 'u'})
+
+_INSERT_SQL = {
+    'sqlite': 'INSERT INTO shop_product_search (rowid, name, category, description) VALUES (%s, %s, %s, %s)',
+    'postgresql': (
+        "INSERT INTO shop_product_search (product_id, document) VALUES (%s, "
+        "setweight(to_tsvector('simple', %s), 'A') || "
+        "setweight(to_tsvector('simple', %s), 'B') || "
+        "setweight(to_tsvector('simple', %s), 'C')) "
+        "ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document"
+    ),
+}
+
+
+def _normalize(text):
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text.translate(_TR_LOWER).lower().translate(_TR_FOLD))
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pragma_compile_options WHERE compile_options = 'ENABLE_FTS5'")
+            if cursor.fetchone() is None:
+                return
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS shop_product_search "
+            "USING fts5(name, category, description, tokenize = 'unicode61')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE IF NOT EXISTS shop_product_search ("
+            "product_id bigint PRIMARY KEY REFERENCES shop_product(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS shop_product_search_document_gin "
+            "ON shop_product_search USING GIN (document)"
+        )
+    else:
+        return
+
+    # Mevcut ürünleri indeksle
+    Product = apps.get_model('shop', 'Product')
+    sql = _INSERT_SQL[vendor]
+    batch = []
+    with schema_editor.connection.cursor() as cursor:
+        for product in Product.objects.select_related('category').order_by('pk').iterator(chunk_size=500):
+            batch.append((
+                product.pk,
+                _normalize(product.name),
+                _normalize(product.category.name if product.category_id else ''),
+                _normalize(product.description),
+            ))
+            if len(batch) >= 500:
+                cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute("DROP TABLE IF EXISTS shop_product_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0018_product_rating_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_facet_summary(apps, schema_editor):
+    from shop.facets import COUNT_FIELDS, _grouped_rows
+
+    Category = apps.get_model('shop', 'Category')
+    Product = apps.get_model('shop', 'Product')
+    CategoryFacetSummary = apps.get_model('shop', 'CategoryFacetSummary')
+    rows = _grouped_rows(Product.objects.all())
+    CategoryFacetSummary.objects.bulk_create([
+        CategoryFacetSummary(
+            category_id=pk,
+            min_price=rows.get(pk, {}).get('min_price'),
+            max_price=rows.get(pk, {}).get('max_price'),
+            **{field: rows.get(pk, {}).get(field, 0) for field in COUNT_FIELDS},
+        )
+        for pk in Category.objects.values_list('pk', flat=True)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0020_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryFacetSummary',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='facet_summary', serialize=False, to='shop.category')),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('in_stock_count', models.PositiveIntegerField(default=0)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('price_0', models.PositiveIntegerField(default=0)),
+                ('price_1', models.PositiveIntegerField(default=0)),
+                ('price_2', models.PositiveIntegerField(default=0)),
+                ('price_3', models.PositiveIntegerField(default=0)),
+                ('price_4', models.PositiveIntegerField(default=0)),
+                ('price_5', models.PositiveIntegerField(default=0)),
+                ('price_6', models.PositiveIntegerField(default=0)),
+                ('price_7', models.PositiveIntegerField(default=0)),
+                ('rating_0', models.PositiveIntegerField(default=0)),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_facet_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0021_category_facet_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesRank',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales_rank', serialize=False, to='shop.product')),
+                ('units_7d', models.PositiveIntegerField(default=0)),
+                ('units_30d', models.PositiveIntegerField(default=0)),
+                ('units_total', models.PositiveIntegerField(default=0)),
+                ('revenue_7d', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('revenue_30d', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('revenue_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-units_30d', '-units_total'], name='shop_produc_units_3_e4340a_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSalesDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_days', to='shop.product')),
+            ],
+            options={
+                'unique_together': {('product', 'day')},
+            },
+        ),
+    ]
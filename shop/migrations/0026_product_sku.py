@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0025_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sku',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True, verbose_name='Stok Kodu'),
+        ),
+    ]
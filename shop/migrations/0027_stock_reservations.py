@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0026_product_sku'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='reserved',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hold_key', models.CharField(db_index=True, max_length=64, verbose_name='Tutma Anahtarı')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Miktar')),
+                ('status', models.CharField(choices=[('active', 'Aktif'), ('converted', 'Siparişe Dönüştü'), ('released', 'Serbest Bırakıldı')], default='active', max_length=10, verbose_name='Durum')),
+                ('expires_at', models.DateTimeField(verbose_name='Bitiş')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_reservations', to='shop.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='shop.product')),
+                ('variant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='shop.productvariant')),
+            ],
+            options={
+                'verbose_name': 'Stok Rezervasyonu',
+                'verbose_name_plural': 'Stok Rezervasyonları',
+                'indexes': [models.Index(fields=['product', 'status', 'expires_at'], name='shop_stockr_product_b89c43_idx'), models.Index(fields=['status', 'expires_at'], name='shop_stockr_status_84d08f_idx')],
+            },
+        ),
+    ]
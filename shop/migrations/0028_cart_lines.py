@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0027_stock_reservations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CartLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=32, verbose_name='Sepet Anahtarı')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Miktar')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Fiyat')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_lines', to='shop.product')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_lines', to=settings.AUTH_USER_MODEL)),
+                ('variant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='shop.productvariant')),
+            ],
+            options={
+                'verbose_name': 'Sepet Satırı',
+                'verbose_name_plural': 'Sepet Satırları',
+                'unique_together': {('user', 'key')},
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-17 05:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0029_order_discount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('renderer', models.CharField(blank=True, max_length=200, verbose_name='Oluşturucu')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Parametreler')),
+                ('to', models.JSONField(default=list, verbose_name='Alıcılar')),
+                ('from_email', models.CharField(blank=True, max_length=254, verbose_name='Gönderen')),
+                ('subject', models.CharField(blank=True, max_length=255, verbose_name='Konu')),
+                ('body', models.TextField(blank=True, verbose_name='Metin')),
+                ('html', models.TextField(blank=True, verbose_name='HTML')),
+                ('status', models.CharField(choices=[('pending', 'Bekliyor'), ('sent', 'Gönderildi'), ('dead', 'Kalıcı Hata')], default='pending', max_length=10, verbose_name='Durum')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Deneme')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Sonraki Deneme')),
+                ('last_error', models.TextField(blank=True, verbose_name='Son Hata')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Gönderim Tarihi')),
+            ],
+            options={
+                'verbose_name': 'Giden E-posta',
+                'verbose_name_plural': 'Giden E-postalar',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='shop_outbox_status_ded11b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-17 05:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0031_order_history_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderReceipt',
+            fields=[
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='receipt', serialize=False, to='shop.order')),
+                ('content', models.BinaryField(verbose_name='İçerik (gzip)')),
+                ('digest', models.CharField(max_length=64, verbose_name='İçerik Özeti')),
+                ('status', models.CharField(max_length=16, verbose_name='İşlendiği Durum')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='Boyut')),
+                ('rendered_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Sipariş Fişi',
+                'verbose_name_plural': 'Sipariş Fişleri',
+            },
+        ),
+    ]
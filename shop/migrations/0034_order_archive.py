@@ -0,0 +1,115 @@
+# Generated by Django 5.2.5 on 2026-10-17 05:25
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0033_sales_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('fullname', models.CharField(max_length=120)),
+                ('phone', models.CharField(max_length=30)),
+                ('address', models.TextField()),
+                ('city', models.CharField(max_length=60)),
+                ('district', models.CharField(blank=True, max_length=60)),
+                ('postal_code', models.CharField(blank=True, max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('shipping_method', models.CharField(choices=[('standard', 'Standart Kargo'), ('express', 'Hızlı Kargo')], default='standard', max_length=20)),
+                ('shipping_fee', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('status', models.CharField(choices=[('received', 'Alındı'), ('paid', 'Ödendi'), ('shipped', 'Kargolandı'), ('cancelled', 'İptal')], default='received', max_length=16)),
+                ('payment_provider', models.CharField(blank=True, default='', max_length=20)),
+                ('payment_ref', models.CharField(blank=True, max_length=128, null=True, unique=True)),
+                ('paid_at', models.DateTimeField(blank=True, null=True)),
+                ('invoice_type', models.CharField(choices=[('bireysel', 'Bireysel'), ('kurumsal', 'Kurumsal')], default='bireysel', max_length=10, verbose_name='Fatura Tipi')),
+                ('billing_fullname', models.CharField(blank=True, max_length=255, verbose_name='Fatura Ad Soyad/Ünvan')),
+                ('tax_office', models.CharField(blank=True, max_length=128, verbose_name='Vergi Dairesi')),
+                ('tckn', models.CharField(blank=True, max_length=11, validators=[django.core.validators.RegexValidator('^\\d{11}$', 'TCKN 11 haneli rakam olmalıdır.')], verbose_name='TCKN')),
+                ('vkn', models.CharField(blank=True, max_length=10, validators=[django.core.validators.RegexValidator('^\\d{10}$', 'VKN 10 haneli rakam olmalıdır.')], verbose_name='VKN')),
+                ('e_archive_email', models.EmailField(blank=True, max_length=254, verbose_name='E-Arşiv E-posta')),
+                ('billing_address', models.CharField(blank=True, max_length=500, verbose_name='Fatura Adresi')),
+                ('billing_city', models.CharField(blank=True, max_length=64, verbose_name='İl')),
+                ('billing_district', models.CharField(blank=True, max_length=64, verbose_name='İlçe')),
+                ('billing_postcode', models.CharField(blank=True, max_length=10, verbose_name='Posta Kodu')),
+                ('kvkk_approved', models.BooleanField(default=False, verbose_name='KVKK Aydınlatma Onayı')),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('coupon', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)ss', to='shop.coupon')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Arşiv Sipariş',
+                'verbose_name_plural': 'Arşiv Siparişler',
+            },
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='coupon',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)ss', to='shop.coupon'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderReceipt',
+            fields=[
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='receipt', serialize=False, to='shop.archivedorder')),
+                ('content', models.BinaryField(verbose_name='İçerik (gzip)')),
+                ('digest', models.CharField(max_length=64, verbose_name='İçerik Özeti')),
+                ('status', models.CharField(max_length=16, verbose_name='İşlendiği Durum')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='Boyut')),
+                ('rendered_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedCouponUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('discount_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('used_at', models.DateTimeField()),
+                ('coupon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='shop.coupon')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coupon_usage', to='shop.archivedorder')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('line_total', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='shop.archivedorder')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='shop.product')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=32, null=True)),
+                ('to_status', models.CharField(max_length=32)),
+                ('note', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField()),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='shop.archivedorder')),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['user', '-created_at'], name='archived_order_user_idx'),
+        ),
+    ]
@@ -17,11 +17,37 @@ class Category(models.Model):
 class Product(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products')
     name = models.CharField(max_length=150)
+    # Tedarikçi beslemelerinde ürün anahtarı (catalog_import / catalog_export)
+    sku = models.CharField(max_length=100, unique=True, null=True, blank=True, verbose_name='Stok Kodu')
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField(default=0)
+    # Aktif stok rezervasyonlarının toplamı (shop.reservations; koşullu UPDATE ile korunur)
+    reserved = models.PositiveIntegerField(default=0, editable=False)
     image = models.ImageField(upload_to='products/', blank=True, null=True)
+    # Görsel türevlerinin üst bilgisi (shop.images tarafından doldurulur)
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Site haritası lastmod'u ve kirli parça tespiti (shop.sitemaps)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Onaylı yorumlardan türetilen puan özeti (shop.ratings tarafından güncel tutulur)
+    rating_avg = models.FloatField(default=0, db_index=True, verbose_name='Ortalama Puan')
+    rating_count = models.PositiveIntegerField(default=0, verbose_name='Yorum Sayısı')
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Katalog listelerinde imleçli sayfalama (shop.pagination) için sıralama + ID indeksleri
+        indexes = [
+            models.Index(fields=['price', 'id']),
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['name', 'id']),
+            models.Index(fields=['-rating_avg', 'name', 'id']),
+        ]
 
     def __str__(self):
         return self.name
@@ -32,29 +58,46 @@ class Product(models.Model):
     
     @property
     def average_rating(self):
-        """Ürünün ortalama puanını hesaplar"""
-        reviews = self.reviews.filter(is_approved=True)
-        if reviews.exists():
-            return reviews.aggregate(models.Avg('rating'))['rating__avg']
-        return 0
+        """Ürünün ortalama puanını döndürür (saklanan özetten, sorgusuz)"""
+        return self.rating_avg if self.rating_count else 0
     
     @property
     def review_count(self):
         """Onaylanmış yorum sayısını döndürür"""
-        return self.reviews.filter(is_approved=True).count()
+        return self.rating_count
     
     @property
     def rating_distribution(self):
-        """Yıldız dağılımını hesaplar"""
-        from django.db.models import Count
-        reviews = self.reviews.filter(is_approved=True)
-        distribution = {i: 0 for i in range(1, 6)}
-        
-        rating_counts = reviews.values('rating').annotate(count=Count('rating'))
-        for item in rating_counts:
-            distribution[item['rating']] = item['count']
-        
-        return distribution
+        """Yıldız dağılımını döndürür"""
+        return {i: getattr(self, f'rating_{i}') for i in range(1, 6)}
+
+
+class CategoryFacetSummary(models.Model):
+    """Kategori başına faset sayıları (shop.facets tarafından artımlı güncel tutulur)."""
+    category = models.OneToOneField(Category, on_delete=models.CASCADE, primary_key=True, related_name='facet_summary')
+    product_count = models.PositiveIntegerField(default=0)
+    in_stock_count = models.PositiveIntegerField(default=0)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    # Fiyat kovaları (sınırlar: shop.facets.PRICE_EDGES)
+    price_0 = models.PositiveIntegerField(default=0)
+    price_1 = models.PositiveIntegerField(default=0)
+    price_2 = models.PositiveIntegerField(default=0)
+    price_3 = models.PositiveIntegerField(default=0)
+    price_4 = models.PositiveIntegerField(default=0)
+    price_5 = models.PositiveIntegerField(default=0)
+    price_6 = models.PositiveIntegerField(default=0)
+    price_7 = models.PositiveIntegerField(default=0)
+    # Puan kovaları: 0 puansız, 1-5 ortalamanın tam kısmı
+    rating_0 = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.category} ({self.product_count})"
 
 
 class ShippingCompany(models.Model):
@@ -106,7 +149,8 @@ class PaymentMethod(models.Model):
         verbose_name_plural = "Payment Methods"
 
 
-class Order(models.Model):
+class BaseOrder(models.Model):
+    """Sipariş alanları; sıcak tablo (Order) ve arşiv (ArchivedOrder) aynı sütunları taşır."""
     STATUS_CHOICES = [('received','Alındı'),('paid','Ödendi'),('shipped','Kargolandı'),('cancelled','İptal')]
     SHIPPING_CHOICES = [('standard', 'Standart Kargo'), ('express', 'Hızlı Kargo')]
     
@@ -125,8 +169,12 @@ class Order(models.Model):
     total = models.DecimalField(max_digits=10, decimal_places=2)
     shipping_method = models.CharField(max_length=20, choices=SHIPPING_CHOICES, default='standard')
     shipping_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    coupon = models.ForeignKey('Coupon', null=True, blank=True, on_delete=models.SET_NULL, related_name='%(class)ss')
     status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='received')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Satış özetleri bu alanla değişen siparişleri bulur (shop.rollups)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     # Payment fields
     payment_provider = models.CharField(max_length=20, blank=True, default='')
     payment_ref = models.CharField(max_length=128, blank=True, null=True, unique=True)
@@ -156,6 +204,12 @@ class Order(models.Model):
     billing_postcode = models.CharField('Posta Kodu', max_length=10, blank=True)
     kvkk_approved = models.BooleanField('KVKK Aydınlatma Onayı', default=False)
 
+    # Arşivden okunan sipariş değiştirilmez (bkz. shop/archive.py)
+    is_archived = False
+
+    class Meta:
+        abstract = True
+
     @property
     def number(self):
         return f"ORD{self.created_at:%Y%m%d}{self.id}"
@@ -164,6 +218,14 @@ class Order(models.Model):
         return self.number
 
 
+class Order(BaseOrder):
+    class Meta:
+        indexes = [
+            # Sipariş geçmişi: kullanıcının siparişleri yeniden eskiye, imleçli (bkz. views.order.my_orders)
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+        ]
+
+
 class OrderStatusHistory(models.Model):
     """
     Sipariş durum geçişleri için izleme kaydı.
@@ -197,6 +259,99 @@ class OrderItem(models.Model):
     line_total = models.DecimalField(max_digits=10, decimal_places=2)
 
 
+class ProductSalesRank(models.Model):
+    """Ürün başına satış özeti (shop.sales_rank tarafından sipariş durum geçişlerinde güncellenir)."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='sales_rank')
+    units_7d = models.PositiveIntegerField(default=0)
+    units_30d = models.PositiveIntegerField(default=0)
+    units_total = models.PositiveIntegerField(default=0)
+    revenue_7d = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    revenue_30d = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    revenue_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-units_30d', '-units_total']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.units_30d}/{self.units_total}"
+
+
+class ProductSalesDay(models.Model):
+    """Kayan 7/30 günlük pencereler için günlük satış defteri (30 günden eskisi budanır)."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='sales_days')
+    day = models.DateField()
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('product', 'day')
+
+
+class SalesDay(models.Model):
+    """Günlük satış özeti: gün × ödeme sağlayıcısı × kargo yöntemi (shop.rollups)."""
+    day = models.DateField()
+    payment_provider = models.CharField(max_length=20, blank=True, default='')
+    shipping_method = models.CharField(max_length=20, default='standard')
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    discount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    shipping = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('day', 'payment_provider', 'shipping_method')
+        verbose_name = 'Günlük Satış Özeti'
+        verbose_name_plural = 'Günlük Satış Özetleri'
+
+    @property
+    def average_order_value(self):
+        return self.revenue / self.orders if self.orders else 0
+
+
+class SalesProductDay(models.Model):
+    """Günlük ürün satış özeti: gün × ürün × kategori × ödeme sağlayıcısı × kargo yöntemi (shop.rollups)."""
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    payment_provider = models.CharField(max_length=20, blank=True, default='')
+    shipping_method = models.CharField(max_length=20, default='standard')
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('day', 'product', 'category', 'payment_provider', 'shipping_method')
+        verbose_name = 'Günlük Ürün Satış Özeti'
+        verbose_name_plural = 'Günlük Ürün Satış Özetleri'
+
+
+class RollupWatermark(models.Model):
+    """Bir özetin en son işlendiği an; sonraki çalıştırma bu andan sonra değişen siparişlere bakar."""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class RelatedProduct(models.Model):
+    """Birlikte satın alınma skoruna göre ürün başına en iyi N öneri (shop.recommendations)."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='recommendations')
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    co_count = models.PositiveIntegerField(default=0)
+    score = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ('product', 'related')
+        indexes = [
+            models.Index(fields=['product', '-score']),
+        ]
+
+
 class Review(models.Model):
     RATING_CHOICES = [
         (1, '1 Yıldız'),
@@ -344,47 +499,17 @@ class StockAlert(models.Model):
         return f"{self.user.username} - {self.product.name} - {self.get_status_display()}"
     
     def send_notification(self):
-        """Stok uyarısı bildirimi gönder"""
-        from django.core.mail import send_mail
-        from django.conf import settings
-        from django.utils import timezone
+        """Stok uyarısı bildirimini kuyruğa yaz (bkz. shop/outbox.py)"""
+        from . import outbox
         
         if self.status != 'active':
             return False
         
-        subject = f"Stok Uyarısı: {self.product.name}"
-        message = f"""
-        Merhaba {self.user.get_full_name() or self.user.username},
-        
-        Takip ettiğiniz ürün tekrar stokta!
-        
-        Ürün: {self.product.name}
-        Mevcut Stok: {self.product.stock}
-        Fiyat: {self.product.price} TL
-        
-        Ürünü satın almak için sitemizi ziyaret edebilirsiniz.
-        
-        İyi alışverişler!
-        """
-        
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [self.email],
-                fail_silently=False,
-            )
-            
-            # Durumu güncelle
-            self.status = 'notified'
-            self.notified_at = timezone.now()
-            self.save()
-            
-            return True
-        except Exception as e:
-            print(f"Stok uyarısı e-postası gönderilemedi: {e}")
-            return False
+        outbox.enqueue('shop.email_utils.render_stock_alert', self.email, alert_id=self.pk)
+        self.status = 'notified'
+        self.notified_at = timezone.now()
+        self.save(update_fields=['status', 'notified_at'])
+        return True
 
 
 class ProductAttribute(models.Model):
@@ -437,6 +562,7 @@ class ProductVariant(models.Model):
     stock = models.PositiveIntegerField(default=0, verbose_name='Stok')
     weight = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True, verbose_name='Ağırlık (kg)')
     image = models.ImageField(upload_to='product_variants/', blank=True, null=True, verbose_name='Varyant Resmi')
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True, verbose_name='Aktif')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -485,3 +611,172 @@ class ProductVariantAttribute(models.Model):
     
     def __str__(self):
         return f"{self.variant.sku} - {self.attribute_value}"
+
+
+class StockReservation(models.Model):
+    """
+    Ödeme sürerken ayrılan stok (bkz. shop/reservations.py)
+    """
+    STATUS_CHOICES = [
+        ('active', 'Aktif'),
+        ('converted', 'Siparişe Dönüştü'),
+        ('released', 'Serbest Bırakıldı'),
+    ]
+
+    hold_key = models.CharField(max_length=64, db_index=True, verbose_name='Tutma Anahtarı')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    variant = models.ForeignKey(ProductVariant, on_delete=models.SET_NULL, null=True, blank=True)
+    quantity = models.PositiveIntegerField(verbose_name='Miktar')
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_reservations')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active', verbose_name='Durum')
+    expires_at = models.DateTimeField(verbose_name='Bitiş')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Stok Rezervasyonu'
+        verbose_name_plural = 'Stok Rezervasyonları'
+        indexes = [
+            # Müsait stok = stok - aktif tutmalar (ürün başına indeksli toplam)
+            models.Index(fields=['product', 'status', 'expires_at']),
+            # Süpürücü: süresi dolan aktif tutmalar
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} × {self.quantity} ({self.get_status_display()})"
+
+
+class CartLine(models.Model):
+    """
+    Giriş yapmış kullanıcının sepet satırı (bkz. shop/cart.py)
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cart_lines')
+    key = models.CharField(max_length=32, verbose_name='Sepet Anahtarı')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='cart_lines')
+    variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, null=True, blank=True)
+    quantity = models.PositiveIntegerField(verbose_name='Miktar')
+    price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Fiyat')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Sepet Satırı'
+        verbose_name_plural = 'Sepet Satırları'
+        unique_together = ('user', 'key')
+
+    def __str__(self):
+        return f"{self.user_id} - {self.key} × {self.quantity}"
+
+
+class OutboxEmail(models.Model):
+    """
+    Gönderilmeyi bekleyen işlemsel e-posta (bkz. shop/outbox.py)
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Bekliyor'),
+        ('sent', 'Gönderildi'),
+        ('dead', 'Kalıcı Hata'),
+    ]
+
+    renderer = models.CharField(max_length=200, blank=True, verbose_name='Oluşturucu')
+    params = models.JSONField(default=dict, blank=True, verbose_name='Parametreler')
+    to = models.JSONField(default=list, verbose_name='Alıcılar')
+    from_email = models.CharField(max_length=254, blank=True, verbose_name='Gönderen')
+    subject = models.CharField(max_length=255, blank=True, verbose_name='Konu')
+    body = models.TextField(blank=True, verbose_name='Metin')
+    html = models.TextField(blank=True, verbose_name='HTML')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name='Durum')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Deneme')
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name='Sonraki Deneme')
+    last_error = models.TextField(blank=True, verbose_name='Son Hata')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Gönderim Tarihi')
+
+    class Meta:
+        verbose_name = 'Giden E-posta'
+        verbose_name_plural = 'Giden E-postalar'
+        indexes = [
+            # Gönderici: sırası gelmiş bekleyen e-postalar
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject or self.renderer} → {', '.join(self.to)} ({self.get_status_display()})"
+
+
+class OrderReceipt(models.Model):
+    """
+    Ödeme anında işlenmiş, gzip'li sipariş fişi (bkz. shop/receipts.py)
+    """
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, primary_key=True, related_name='receipt')
+    content = models.BinaryField(verbose_name='İçerik (gzip)')
+    digest = models.CharField(max_length=64, verbose_name='İçerik Özeti')
+    status = models.CharField(max_length=16, verbose_name='İşlendiği Durum')
+    size = models.PositiveIntegerField(default=0, verbose_name='Boyut')
+    rendered_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Sipariş Fişi'
+        verbose_name_plural = 'Sipariş Fişleri'
+
+    def __str__(self):
+        return f"{self.order_id} ({self.status})"
+
+
+# --- Sipariş arşivi (shop/archive.py) ---
+# Kargolanmış ya da iptal edilmiş eski siparişler çocuklarıyla birlikte buraya
+# taşınır. Alan adları sıcak tablolarla aynıdır; satırlar olduğu gibi kopyalanır.
+
+class ArchivedOrder(BaseOrder):
+    """Arşivlenmiş sipariş (salt okunur)"""
+    # Kopyalanan değerler korunur (auto_now/auto_now_add yok)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    is_archived = True
+
+    class Meta:
+        verbose_name = 'Arşiv Sipariş'
+        verbose_name_plural = 'Arşiv Siparişler'
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='archived_order_user_idx'),
+        ]
+
+
+class ArchivedOrderItem(models.Model):
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name='+')
+    quantity = models.PositiveIntegerField()
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    line_total = models.DecimalField(max_digits=10, decimal_places=2)
+
+
+class ArchivedOrderStatusHistory(models.Model):
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='status_history')
+    from_status = models.CharField(max_length=32, null=True, blank=True)
+    to_status = models.CharField(max_length=32)
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    note = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+
+
+class ArchivedCouponUsage(models.Model):
+    coupon = models.ForeignKey(Coupon, on_delete=models.CASCADE, related_name='+')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='coupon_usage')
+    discount_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    used_at = models.DateTimeField()
+
+
+class ArchivedOrderReceipt(models.Model):
+    order = models.OneToOneField(ArchivedOrder, on_delete=models.CASCADE, primary_key=True, related_name='receipt')
+    content = models.BinaryField(verbose_name='İçerik (gzip)')
+    digest = models.CharField(max_length=64, verbose_name='İçerik Özeti')
+    status = models.CharField(max_length=16, verbose_name='İşlendiği Durum')
+    size = models.PositiveIntegerField(default=0, verbose_name='Boyut')
+    rendered_at = models.DateTimeField()
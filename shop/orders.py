@@ -0,0 +1,120 @@
+"""
+Ödeme adımındaki sipariş yazma yolu.
+
+`place()` siparişi sepet boyutundan bağımsız sayıda sorguyla yazar:
+- sipariş satırı (fatura bilgileri dahil tek INSERT),
+- kalemler tek bulk_create,
+- kupon kullanımı (bkz. pricing.redeem),
+- stok tutmalarının siparişe bağlanması; sipariş ödenmiş olarak yazılıyorsa
+  (mock sağlayıcı) kalemler tek koşullu çok satırlı UPDATE ile stoktan düşülür
+  (bkz. reservations.convert).
+
+Mock ve yönlendirmeli sağlayıcılar aynı yolu kullanır; yönlendirmede sipariş
+'received' durumuyla yazılır ve stok ödeme geri çağrısında düşülür. Bir adım
+başarısız olursa PlacementError yükselir ve çağıranın işlemi geri alınır.
+"""
+from collections import defaultdict
+
+from . import pricing, recommendations, reservations, sales_rank
+
+INVOICE_FIELDS = (
+    'invoice_type', 'billing_fullname', 'tckn', 'vkn', 'tax_office', 'e_archive_email',
+    'billing_address', 'billing_city', 'billing_district', 'billing_postcode', 'kvkk_approved',
+)
+
+
+class PlacementError(Exception):
+    """Sipariş yazılamadı; mesaj kullanıcıya gösterilir."""
+
+
+def _customer_fields(user, checkout_data):
+    authenticated = user is not None and user.is_authenticated
+    fields = {
+        'user': user if authenticated else None,
+        'email': checkout_data.get('email', user.email if authenticated else 'test@example.com'),
+        'fullname': checkout_data.get('fullname', 'Test Kullanıcı'),
+    }
+    for name in ('phone', 'address', 'city', 'district', 'postal_code'):
+        fields[name] = checkout_data.get(name, '')
+    return fields
+
+
+def _invoice_fields(checkout_data, fullname):
+    billing = checkout_data.get('billing') or {}
+    if not billing.get('want_invoice'):
+        return {}
+    fields = {name: billing.get(name, '') for name in INVOICE_FIELDS}
+    fields['invoice_type'] = billing.get('invoice_type') or 'bireysel'
+    fields['billing_fullname'] = billing.get('billing_fullname', '') or fullname
+    fields['kvkk_approved'] = bool(billing.get('kvkk_approved'))
+    return fields
+
+
+def _save_address(user, checkout_data):
+    from accounts.models import Address
+
+    if (user is not None and user.is_authenticated and checkout_data.get('save_new_address')
+            and not checkout_data.get('selected_address_id')):
+        Address.objects.create(
+            user=user,
+            title='Yeni Adres',
+            fullname=checkout_data.get('fullname', ''),
+            phone=checkout_data.get('phone', ''),
+            address=checkout_data.get('address', ''),
+            city=checkout_data.get('city', ''),
+            district=checkout_data.get('district', ''),
+            postal_code=checkout_data.get('postal_code', ''),
+            is_default=False,
+        )
+
+
+def place(user, checkout_data, breakdown, hold_key, status='received'):
+    """
+    Siparişi, kalemlerini ve kupon kullanımını yazar; tutmaları siparişe
+    bağlar. status='paid' ise stok da düşülür. Çağıranın atomic bloğu içinde
+    çalışmalıdır. Siparişi döndürür ya da PlacementError yükseltir.
+    """
+    from .models import Order, OrderItem, Product
+
+    customer = _customer_fields(user, checkout_data)
+    _save_address(user, checkout_data)
+    order = Order.objects.create(
+        status=status,
+        shipping_method=breakdown.shipping_method,
+        shipping_fee=pricing.to_tl(breakdown.shipping),
+        discount_amount=pricing.to_tl(breakdown.discount),
+        coupon_id=breakdown.coupon.id if breakdown.coupon else None,
+        total=pricing.to_tl(breakdown.total),
+        **customer,
+        **_invoice_fields(checkout_data, customer['fullname']),
+    )
+
+    OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order,
+            product_id=line.product_id,
+            quantity=line.quantity,
+            unit_price=pricing.to_tl(line.unit_price),
+            line_total=pricing.to_tl(line.total),
+        )
+        for line in breakdown.lines
+    ])
+    if status in sales_rank.SOLD_STATUSES:
+        # bulk_create post_save göndermez: ödenmiş siparişin satış özetleri toplu güncellenir
+        sales_rank.order_status_changed(order, None, status)
+        recommendations.order_sold(order)
+
+    if not pricing.redeem(breakdown, order, user):
+        raise PlacementError('Kupon artık geçerli değil ya da kullanım limiti dolmuş')
+
+    reservations.attach(hold_key, order)
+    if status == 'paid':
+        needed = defaultdict(int)
+        for line in breakdown.lines:
+            needed[line.product_id] += line.quantity
+        failed = reservations.convert(order, needed)
+        if failed:
+            names = Product.objects.filter(pk__in=failed).values_list('name', flat=True)
+            raise PlacementError(f'Stok yetersiz: {", ".join(names)}')
+    return order
+
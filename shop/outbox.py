@@ -0,0 +1,180 @@
+"""
+İşlemsel e-posta kuyruğu (outbox).
+
+İstek içinde SMTP'ye gidilmez: gönderim noktaları `enqueue()` ile bir
+OutboxEmail satırı yazar. Satır çağıranın transaction'ı içinde oluşur; işlem
+geri alınırsa e-posta da hiç gönderilmez, commit olursa kaybolmaz.
+
+İki tür satır vardır:
+- `enqueue(renderer, to, **params)`: içerik gönderimde oluşturulur.
+  `renderer` noktalı yoldur ('shop.email_utils.render_order_status' gibi);
+  JSON parametrelerle çağrılır ve (konu, metin, html) döndürür. Sipariş ve
+  kullanıcı gibi satırlara bağlı e-postalar bu yolu kullanır; şablon da istek
+  dışında işlenir.
+- `enqueue_message(subject, body, to, html='')`: içeriği hazır e-posta.
+
+`deliver()` sırası gelmiş satırları toplu alır, oluşturur ve tek SMTP
+bağlantısı üzerinden (`get_connection().send_messages`) gönderir. Başarısız
+satır üstel bekleme ile yeniden denenir; EMAIL_OUTBOX_MAX_ATTEMPTS denemeden
+sonra 'dead' olur ve admin'den yeniden kuyruğa alınabilir. Gönderici
+`run_mailer` komutudur.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def _max_attempts():
+    return getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+
+
+def _retry_delay():
+    return getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+
+
+def _lease():
+    return getattr(settings, 'EMAIL_OUTBOX_LEASE', 300)
+
+
+def _recipients(to):
+    return [to] if isinstance(to, str) else list(to)
+
+
+def enqueue(renderer, to, **params):
+    """İçeriği gönderimde `renderer(**params)` ile oluşturulacak e-postayı kuyruğa yazar."""
+    from .models import OutboxEmail
+
+    return OutboxEmail.objects.create(renderer=renderer, params=params, to=_recipients(to))
+
+
+def enqueue_message(subject, body, to, html='', from_email=''):
+    """İçeriği hazır e-postayı kuyruğa yazar."""
+    from .models import OutboxEmail
+
+    return OutboxEmail.objects.create(
+        subject=subject[:255], body=body, html=html or '', to=_recipients(to), from_email=from_email or '',
+    )
+
+
+def backoff(attempts):
+    """`attempts` başarısız denemeden sonraki bekleme (sn): 1, 2, 4, ... × gecikme; en çok bir gün."""
+    return min(_retry_delay() * 2 ** max(0, attempts - 1), 86400)
+
+
+def _claim(batch_size, now):
+    """
+    Sırası gelmiş satırları alır ve kira süresi kadar ileri atar: paralel bir
+    gönderici aynı satırları almaz, çöken göndericinin satırları kira bitince
+    yeniden denenir.
+    """
+    from .models import OutboxEmail
+
+    with transaction.atomic():
+        ids = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if ids:
+            OutboxEmail.objects.filter(pk__in=ids).update(next_attempt_at=now + timedelta(seconds=_lease()))
+    return list(OutboxEmail.objects.filter(pk__in=ids).order_by('pk'))
+
+
+def _message(row):
+    if row.renderer:
+        row.subject, row.body, row.html = import_string(row.renderer)(**row.params)
+    message = EmailMultiAlternatives(
+        row.subject, row.body, row.from_email or settings.DEFAULT_FROM_EMAIL, row.to,
+    )
+    if row.html:
+        message.attach_alternative(row.html, 'text/html')
+    return message
+
+
+def _fail(row, error, now):
+    row.attempts += 1
+    row.last_error = f'{type(error).__name__}: {error}'[:2000]
+    if row.attempts >= _max_attempts():
+        row.status = 'dead'
+        logger.error('E-posta kalıcı olarak gönderilemedi (#%s): %s', row.pk, row.last_error)
+    else:
+        row.next_attempt_at = now + timedelta(seconds=backoff(row.attempts))
+
+
+def deliver(batch_size=100):
+    """
+    Bir parti e-postayı gönderir. (gönderilen, yeniden denenecek, kalıcı hata)
+    sayılarını döndürür.
+    """
+    from .models import OutboxEmail
+
+    now = timezone.now()
+    rows = _claim(batch_size, now)
+    if not rows:
+        return 0, 0, 0
+
+    sent, failed, messages = [], [], []
+    for row in rows:
+        try:
+            messages.append((row, _message(row)))
+        except Exception as exc:
+            _fail(row, exc, now)
+            failed.append(row)
+
+    if messages:
+        pending = list(messages)
+        try:
+            with get_connection(fail_silently=False) as connection:
+                while pending:
+                    row, message = pending.pop(0)
+                    # Aynı açık bağlantı; mesaj başına çağrı hatayı doğru satıra yazar
+                    try:
+                        connection.send_messages([message])
+                        sent.append(row)
+                    except Exception as exc:
+                        _fail(row, exc, now)
+                        failed.append(row)
+        except Exception as exc:
+            # Bağlantı açılamadı ya da koptu: kalanlar yeniden denenir
+            for row, _ in pending:
+                _fail(row, exc, now)
+                failed.append(row)
+
+    if sent:
+        OutboxEmail.objects.filter(pk__in=[row.pk for row in sent]).update(
+            status='sent', sent_at=timezone.now(), attempts=F('attempts') + 1, last_error='',
+        )
+    if failed:
+        OutboxEmail.objects.bulk_update(
+            failed, ['status', 'attempts', 'next_attempt_at', 'last_error', 'subject', 'body', 'html'],
+        )
+    dead = sum(row.status == 'dead' for row in failed)
+    return len(sent), len(failed) - dead, dead
+
+
+def drain(batch_size=100):
+    """Sırası gelmiş tüm e-postaları gönderir; toplam sayıları döndürür."""
+    totals = [0, 0, 0]
+    while True:
+        counts = deliver(batch_size)
+        if not any(counts):
+            return tuple(totals)
+        totals = [a + b for a, b in zip(totals, counts)]
+        if counts[0] + counts[1] + counts[2] < batch_size:
+            return tuple(totals)
+
+
+def requeue(queryset):
+    """Kalıcı hatalı (ya da bekleyen) e-postaları hemen denenmek üzere sıfırlar."""
+    return queryset.exclude(status='sent').update(
+        status='pending', attempts=0, next_attempt_at=timezone.now(), last_error='',
+    )
@@ -0,0 +1,224 @@
+"""
+Katalog listeleri için anahtar kümesi (keyset / seek) sayfalama.
+
+Paginator her sayfada COUNT(*) ve giderek yavaşlayan bir OFFSET çalıştırır.
+Burada sayfa, bir önceki sayfanın son satırındaki sıralama değerlerinden
+sonra gelen ilk N satırdır:
+
+    WHERE (price > %s) OR (price = %s AND id > %s) ORDER BY price, id LIMIT N+1
+
+Eşit değerlerde sıra ID ile sabitlenir. İmleç (cursor) bu değerleri taşıyan
+imzalı, opak bir belirteçtir; kurcalanmış ya da başka sıralamaya ait bir
+imleç ilk sayfaya düşer. Yaklaşık toplam ilk sayfada üst sınırlı bir sayımla
+bulunur ve imleçte taşınır; derin sayfalar yeniden saymaz.
+
+Katalog dışındaki listeler de (örn. sipariş geçmişi, 'new' sıralaması)
+aynı imleçleri kullanır; değerler queryset'in modeline göre çözülür.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+
+from .models import Product
+
+_SALT = 'shop.pagination.cursor'
+
+# Desteklenen sıralamalar; son alan olarak ID eklenir (bkz. ordering_for)
+SORTS = {
+    'price_asc': ('price',),
+    'price_desc': ('-price',),
+    'new': ('-created_at',),
+    'newest': ('-id',),
+    'oldest': ('id',),
+    'name': ('name',),
+    'rating': ('-rating_avg', 'name'),
+    # queryset shop.sales_rank.order_by_bestseller ile annotate edilmiş olmalı
+    'bestseller': ('-bestseller_units',),
+}
+
+
+def _count_cap():
+    return getattr(settings, 'CATALOG_COUNT_CAP', 1000)
+
+
+def ordering_for(sort):
+    """Sıralama anahtarının ID ile sabitlenmiş alan listesi."""
+    fields = SORTS[sort]
+    if fields[-1].lstrip('-') == 'id':
+        return fields
+    return fields + ('-id' if fields[0].startswith('-') else 'id',)
+
+
+def use_cursor(request, sort):
+    """Eski ?page= bağlantıları ve desteklenmeyen sıralamalar Paginator ile sunulur."""
+    return sort in SORTS and 'page' not in request.GET
+
+
+def _reverse(fields):
+    return tuple(f[1:] if f.startswith('-') else f'-{f}' for f in fields)
+
+
+def _dump_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _row_values(obj, fields):
+    return [_dump_value(getattr(obj, f.lstrip('-'))) for f in fields]
+
+
+def encode_cursor(sort, values, backwards=False, total=None):
+    payload = {'s': sort, 'v': values}
+    if backwards:
+        payload['b'] = 1
+    if total is not None:
+        payload['t'] = total
+    return signing.dumps(payload, salt=_SALT, compress=True)
+
+
+def cursor_for(obj, sort, total=None):
+    """obj satırından sonraki sayfayı açan imleç (örn. karşılaştırma komutu için)."""
+    return encode_cursor(sort, _row_values(obj, ordering_for(sort)), total=total)
+
+
+def _to_python(name, raw, model=Product):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # Annotasyon (örn. bestseller_units): tamsayı sayaç
+        return int(raw)
+    return field.to_python(raw)
+
+
+def decode_cursor(token, sort, model=Product):
+    """(değerler, geri_mi, toplam) ya da geçersiz imleçte None."""
+    try:
+        payload = signing.loads(token, salt=_SALT)
+    except signing.BadSignature:
+        return None
+    fields = ordering_for(sort)
+    if not isinstance(payload, dict) or payload.get('s') != sort or len(payload.get('v') or ()) != len(fields):
+        return None
+    try:
+        values = [_to_python(f.lstrip('-'), raw, model) for f, raw in zip(fields, payload['v'])]
+    except Exception:
+        return None
+    return values, bool(payload.get('b')), payload.get('t')
+
+
+def seek_filter(fields, values, backwards=False):
+    """Sıralamada verilen değerlerden sonra (geri ise önce) gelen satırlar."""
+    condition = Q()
+    equal = {}
+    for field, value in zip(fields, values):
+        name = field.lstrip('-')
+        ascending = not field.startswith('-')
+        lookup = 'gt' if ascending != backwards else 'lt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    # İlk alan için kapsayıcı sınır: planlayıcı OR zincirine rağmen indekste aralık taraması yapar
+    first = fields[0]
+    first_lookup = 'gte' if (not first.startswith('-')) != backwards else 'lte'
+    return Q(**{f'{first.lstrip("-")}__{first_lookup}': values[0]}) & condition
+
+
+def approximate_count(queryset):
+    """Üst sınırlı sayım: (adet, sınır_aşıldı_mı). Büyük sonuçlarda tüm tabloyu saymaz."""
+    cap = _count_cap()
+    count = queryset.order_by()[:cap + 1].count()
+    return min(count, cap), count > cap
+
+
+class CursorPage:
+    """Paginator Page ile şablonda aynı biçimde dolaşılabilen imleçli sayfa."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, total=None, total_capped=False):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.total = total
+        self.total_capped = total_capped
+        self.next_query = ''
+        self.previous_query = ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def _query_with_cursor(request, cursor):
+    params = request.GET.copy()
+    params.pop('page', None)
+    params.pop('cursor', None)
+    if cursor:
+        params['cursor'] = cursor
+    return params.urlencode()
+
+
+def paginate(request, queryset, sort, per_page=12, with_total=True):
+    """
+    queryset'i `sort` sıralamasıyla ?cursor= imlecinden itibaren sayfalar.
+    Sorgu LIMIT per_page+1 ile tek seferde çalışır; fazladan satır sonraki
+    sayfanın varlığını gösterir.
+    """
+    fields = ordering_for(sort)
+    cursor = request.GET.get('cursor')
+    decoded = decode_cursor(cursor, sort, queryset.model) if cursor else None
+
+    backwards = False
+    total = None
+    if decoded:
+        values, backwards, total = decoded
+        queryset = queryset.filter(seek_filter(fields, values, backwards))
+    rows = list(queryset.order_by(*(_reverse(fields) if backwards else fields))[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    total_capped = False
+    if total is None and with_total and not decoded:
+        # Tek sayfaya sığan sonuç için ayrıca saymaya gerek yok
+        total, total_capped = approximate_count(queryset) if has_more else (len(rows), False)
+    elif total is not None:
+        total, total_capped = abs(total), total < 0
+    # İmleçte sınır aşımı negatif sayı olarak taşınır
+    carried = None if total is None else (-total if total_capped else total)
+
+    has_next = has_more if not backwards else True
+    has_previous = bool(decoded) and (has_more if backwards else True)
+    next_cursor = previous_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor(sort, _row_values(rows[-1], fields), total=carried)
+    if rows and has_previous:
+        previous_cursor = encode_cursor(sort, _row_values(rows[0], fields), backwards=True, total=carried)
+
+    page = CursorPage(rows, next_cursor, previous_cursor, total, total_capped)
+    if next_cursor:
+        page.next_query = _query_with_cursor(request, next_cursor)
+    if previous_cursor:
+        page.previous_query = _query_with_cursor(request, previous_cursor)
+    return page
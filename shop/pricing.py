@@ -0,0 +1,446 @@
+"""
+Birleşik fiyat motoru: sepet, ödeme, AJAX toplamları ve kuponlar.
+
+`price(lines, shipping_method, coupon_code, payment_method_id, user)` yüklenmiş
+sepet satırlarından (Cart üzerinde gezinince gelen sözlükler) kalem kalem bir
+döküm (`Breakdown`) döndürür. Tüm tutarlar tamsayı kuruştur; TL'ye yalnızca
+gösterim ve kayıt sırasında `to_tl()` ile çevrilir. Yuvarlama her adımda
+yarımı yukarı (ROUND_HALF_UP) yapılır.
+
+Hesap sırası:
+1. Ara toplam: satır başına güncel birim fiyat (varyantta effective_price) × adet.
+2. Kupon indirimi: geçerli kategorilerdeki satırların toplamı üzerinden;
+   yüzde indirim en çok max_discount_amount, sabit indirim en çok o toplam.
+3. Kargo: indirimli ara toplam ücretsiz kargo eşiğini geçmiyorsa taban ücret
+   + kg ücreti (varyant ağırlığı, yoksa adet başına 1 kg). free_shipping
+   kuponu kargoyu sıfırlar.
+4. Ödeme yöntemi işlem ücreti: ödenecek tutarın (ürün + kargo) yüzdesi.
+
+Kural tabloları (kargo yöntemleri, ödeme ücretleri, aktif kuponlar) süreç
+içinde tutulur ve paylaşılan önbellekteki (REDIS_URL, bkz. core.C001) bir
+sürüm damgasıyla doğrulanır; admin düzenlemeleri (bkz. shop/signals.py) ve
+kupon kullanımı damgayı düşürür. Böylece toplamların yeniden hesaplanması
+veritabanına gitmez. Damga bir sebeple görülmese de tablo en geç
+PRICING_TABLES_TTL saniye sonra yeniden yüklenir. Kuponun son sözü yine de
+veritabanınındır: `redeem()` aktiflik, geçerlilik aralığı ve kullanım limitini
+koşullu UPDATE içinde yeniden kontrol eder.
+
+Kargo yöntemleri ayarlardaki standart/hızlı kargodan (SHIPPING_STANDARD,
+SHIPPING_EXPRESS, FREE_SHIPPING_THRESHOLD) başlar; aynı kodlu aktif bir
+ShippingCompany varsa onun ücretleri geçerlidir, diğer aktif firmalar kendi
+kodlarıyla eklenir.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+_VERSION_KEY = 'pricing:version'
+SESSION_COUPON_KEY = 'coupon_code'
+
+_lock = threading.Lock()
+_tables = None
+
+
+# --- Para birimi ---
+
+def to_kurus(amount):
+    """TL tutarı (Decimal, str, float, int) → tamsayı kuruş."""
+    return int((Decimal(str(amount)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def to_tl(kurus):
+    """Tamsayı kuruş → iki haneli Decimal TL."""
+    return (Decimal(kurus) / 100).quantize(Decimal('0.01'))
+
+
+def _rate(percentage):
+    """Yüzde değeri (12.50) → on binde bir birimi (1250)."""
+    return to_kurus(percentage)
+
+
+def _apply_rate(amount, rate):
+    # amount × rate / 10000, yarımı yukarı yuvarlanır
+    return (amount * rate + 5000) // 10000
+
+
+# --- Kural tabloları ---
+
+@dataclass(frozen=True)
+class ShippingRule:
+    code: str
+    name: str
+    base: int
+    per_kg: int = 0
+    free_threshold: int | None = None
+    estimated_days: int | None = None
+    company_id: int | None = None
+
+    def cost(self, amount, grams):
+        if self.free_threshold is not None and amount >= self.free_threshold:
+            return 0
+        return self.base + (self.per_kg * grams + 500) // 1000
+
+
+@dataclass(frozen=True)
+class PaymentRule:
+    id: int
+    name: str
+    rate: int
+    min_amount: int | None = None
+    max_amount: int | None = None
+
+    def accepts(self, amount):
+        return (self.min_amount is None or amount >= self.min_amount) and (
+            self.max_amount is None or amount <= self.max_amount
+        )
+
+
+@dataclass(frozen=True)
+class CouponRule:
+    id: int
+    code: str
+    discount_type: str
+    value: int
+    valid_from: object
+    valid_until: object
+    min_order: int | None = None
+    max_discount: int | None = None
+    limit: int | None = None
+    used: int = 0
+    category_ids: frozenset = frozenset()
+    user_ids: frozenset = frozenset()
+
+    def check(self, amount, user_id=None, now=None):
+        """Geçersizse Türkçe nedenini, geçerliyse None döndürür."""
+        now = now or timezone.now()
+        if now < self.valid_from:
+            return 'Kupon henüz geçerli değil'
+        if now > self.valid_until:
+            return 'Kuponun süresi dolmuş'
+        if self.limit is not None and self.used >= self.limit:
+            return 'Kupon kullanım limiti dolmuş'
+        if self.user_ids and user_id not in self.user_ids:
+            return 'Bu kupon hesabınız için geçerli değil'
+        if self.min_order is not None and amount < self.min_order:
+            return f'Kupon en az {to_tl(self.min_order)} TL tutarındaki siparişlerde geçerli'
+        return None
+
+    def discount(self, eligible):
+        if self.discount_type == 'percentage':
+            amount = _apply_rate(eligible, self.value)
+            if self.max_discount is not None:
+                amount = min(amount, self.max_discount)
+        elif self.discount_type == 'fixed':
+            amount = self.value
+        else:
+            return 0
+        return min(amount, eligible)
+
+
+@dataclass(frozen=True)
+class Tables:
+    version: int
+    shipping: dict
+    payment: dict
+    coupons: dict
+    # time.monotonic() ile yükleme anı (PRICING_TABLES_TTL)
+    loaded_at: float = 0.0
+
+
+def _default_shipping():
+    threshold = to_kurus(settings.FREE_SHIPPING_THRESHOLD)
+    return {
+        'standard': ShippingRule('standard', 'Standart Kargo', to_kurus(settings.SHIPPING_STANDARD), free_threshold=threshold),
+        'express': ShippingRule('express', 'Hızlı Kargo', to_kurus(settings.SHIPPING_EXPRESS), free_threshold=threshold),
+    }
+
+
+def _optional(amount):
+    return None if amount is None else to_kurus(amount)
+
+
+def _coupon_limit(usage_type, usage_limit):
+    if usage_type == 'single':
+        return 1
+    if usage_type == 'multiple':
+        return usage_limit
+    return None
+
+
+def _load(version):
+    from .models import Coupon, PaymentMethod, ShippingCompany
+
+    shipping = _default_shipping()
+    for company in ShippingCompany.objects.filter(is_active=True).order_by('pk'):
+        shipping[company.code] = ShippingRule(
+            company.code, company.name,
+            to_kurus(company.base_price), to_kurus(company.price_per_kg),
+            _optional(company.free_shipping_threshold), company.estimated_delivery_days, company.pk,
+        )
+
+    payment = {
+        method.pk: PaymentRule(
+            method.pk, method.name, _rate(method.processing_fee_percentage),
+            _optional(method.min_amount), _optional(method.max_amount),
+        )
+        for method in PaymentMethod.objects.filter(is_active=True)
+    }
+
+    rows = list(Coupon.objects.filter(is_active=True, valid_until__gte=timezone.now()))
+    ids = [coupon.pk for coupon in rows]
+    categories, users = {}, {}
+    for coupon_id, category_id in Coupon.valid_categories.through.objects.filter(
+        coupon_id__in=ids
+    ).values_list('coupon_id', 'category_id'):
+        categories.setdefault(coupon_id, set()).add(category_id)
+    for coupon_id, user_id in Coupon.valid_users.through.objects.filter(
+        coupon_id__in=ids
+    ).values_list('coupon_id', 'user_id'):
+        users.setdefault(coupon_id, set()).add(user_id)
+    coupons = {
+        coupon.code.upper(): CouponRule(
+            coupon.pk, coupon.code.upper(), coupon.discount_type,
+            _rate(coupon.discount_value) if coupon.discount_type == 'percentage' else to_kurus(coupon.discount_value),
+            coupon.valid_from, coupon.valid_until,
+            _optional(coupon.min_order_amount), _optional(coupon.max_discount_amount),
+            _coupon_limit(coupon.usage_type, coupon.usage_limit), coupon.used_count,
+            frozenset(categories.get(coupon.pk, ())), frozenset(users.get(coupon.pk, ())),
+        )
+        for coupon in rows
+    }
+    return Tables(version, shipping, payment, coupons, time.monotonic())
+
+
+def version():
+    value = cache.get(_VERSION_KEY)
+    if value is None:
+        cache.add(_VERSION_KEY, time.time_ns(), None)
+        value = cache.get(_VERSION_KEY)
+    return value
+
+
+def invalidate():
+    """
+    Kural tabloları değişti: tüm süreçler bir sonraki hesapta yeniden yükler.
+    Damga commit sonrasında bir kez daha düşürülür; işlem sürerken eski
+    veriyle yüklenen tablo yeni damgayla kalmasın.
+    """
+    cache.delete(_VERSION_KEY)
+    transaction.on_commit(lambda: cache.delete(_VERSION_KEY))
+
+
+def _ttl():
+    return getattr(settings, 'PRICING_TABLES_TTL', 60)
+
+
+def _fresh(loaded, current):
+    return loaded is not None and loaded.version == current and time.monotonic() - loaded.loaded_at < _ttl()
+
+
+def tables():
+    """Geçerli kural tabloları; damga değişmedikçe ve süre dolmadıkça sorgu yapılmaz."""
+    global _tables
+    current = version()
+    loaded = _tables
+    if _fresh(loaded, current):
+        return loaded
+    with _lock:
+        if not _fresh(_tables, current):
+            _tables = _load(current)
+        return _tables
+
+
+def shipping_methods():
+    """Seçilebilir kargo yöntemleri (ucuzdan pahalıya)."""
+    return sorted(tables().shipping.values(), key=lambda rule: (rule.base, rule.code))
+
+
+def payment_methods(amount=None):
+    """Tutar sınırlarına uyan aktif ödeme yöntemleri."""
+    rules = tables().payment.values()
+    return [rule for rule in rules if amount is None or rule.accepts(amount)]
+
+
+def shipping_code(company_id):
+    """ShippingCompany ID'sinin kargo kodu (yoksa None)."""
+    for rule in tables().shipping.values():
+        if rule.company_id == company_id:
+            return rule.code
+    return None
+
+
+def find_coupon(code):
+    return tables().coupons.get((code or '').strip().upper())
+
+
+# --- Hesap ---
+
+@dataclass(frozen=True)
+class Line:
+    key: str
+    product_id: int
+    variant_id: int | None
+    category_id: int | None
+    quantity: int
+    unit_price: int
+    total: int
+    grams: int
+
+
+@dataclass(frozen=True)
+class Breakdown:
+    lines: tuple
+    subtotal: int
+    discount: int
+    shipping: int
+    payment_fee: int
+    total: int
+    shipping_method: str | None
+    coupon: CouponRule | None = None
+    coupon_error: str | None = None
+    free_shipping: bool = False
+    payment_method_id: int | None = None
+
+    def as_dict(self):
+        """JSON yanıtları için kuruş cinsinden özet."""
+        return {
+            'subtotal': self.subtotal,
+            'discount': self.discount,
+            'shipping': self.shipping,
+            'payment_fee': self.payment_fee,
+            'total': self.total,
+            'shipping_method': self.shipping_method,
+            'coupon': self.coupon.code if self.coupon else None,
+            'coupon_error': self.coupon_error,
+            'lines': [
+                {'key': line.key, 'quantity': line.quantity, 'unit_price': line.unit_price, 'total': line.total}
+                for line in self.lines
+            ],
+        }
+
+    def as_tl(self):
+        """Şablonlar için TL (Decimal) tutarlar."""
+        return {
+            'subtotal': to_tl(self.subtotal),
+            'discount': to_tl(self.discount),
+            'shipping_fee': to_tl(self.shipping),
+            'payment_fee': to_tl(self.payment_fee),
+            'total': to_tl(self.total),
+        }
+
+
+def _line(item):
+    product, variant = item['product'], item.get('variant')
+    unit = to_kurus(variant.effective_price if variant is not None else product.price)
+    quantity = item['quantity']
+    weight = getattr(variant, 'weight', None) if variant is not None else None
+    grams = to_kurus(weight) * 10 if weight else 1000
+    return Line(
+        key=f'{product.pk}:{variant.pk}' if variant is not None else str(product.pk),
+        product_id=product.pk,
+        variant_id=variant.pk if variant is not None else None,
+        category_id=product.category_id,
+        quantity=quantity,
+        unit_price=unit,
+        total=unit * quantity,
+        grams=grams * quantity,
+    )
+
+
+def price(items, shipping_method='standard', coupon_code=None, payment_method_id=None, user=None, now=None):
+    """
+    Yüklenmiş sepet satırlarının (Cart üzerinde gezinince gelen sözlükler;
+    product/variant nesneleri dolu) kalem kalem dökümü. Kural tabloları
+    geçerliyse sorgu yapmaz. Bilinmeyen kargo kodu standart kargoya düşer,
+    None kargosuz hesaplar. Geçersiz kupon hesaba katılmaz, nedeni
+    `coupon_error`'dadır.
+    """
+    rules = tables()
+    lines = tuple(_line(item) for item in items)
+    subtotal = sum(line.total for line in lines)
+    user_id = user.pk if user is not None and user.is_authenticated else None
+
+    coupon, coupon_error, discount, free_shipping = None, None, 0, False
+    if coupon_code:
+        coupon = rules.coupons.get(coupon_code.strip().upper())
+        coupon_error = 'Geçersiz kupon kodu' if coupon is None else coupon.check(subtotal, user_id, now)
+        if coupon_error is None:
+            eligible = sum(
+                line.total for line in lines
+                if not coupon.category_ids or line.category_id in coupon.category_ids
+            )
+            if coupon.category_ids and not eligible:
+                coupon_error = 'Kupon sepetteki ürünler için geçerli değil'
+            else:
+                discount = coupon.discount(eligible)
+                free_shipping = coupon.discount_type == 'free_shipping'
+        if coupon_error is not None:
+            coupon = None
+
+    merchandise = subtotal - discount
+    rule = None
+    if shipping_method is not None:
+        rule = rules.shipping.get(shipping_method) or rules.shipping['standard']
+    shipping = 0
+    if rule is not None and lines and not free_shipping:
+        shipping = rule.cost(merchandise, sum(line.grams for line in lines))
+
+    payment_fee = 0
+    payment = rules.payment.get(int(payment_method_id)) if payment_method_id else None
+    if payment is not None:
+        payment_fee = _apply_rate(merchandise + shipping, payment.rate)
+
+    return Breakdown(
+        lines=lines,
+        subtotal=subtotal,
+        discount=discount,
+        shipping=shipping,
+        payment_fee=payment_fee,
+        total=merchandise + shipping + payment_fee,
+        shipping_method=rule.code if rule is not None else None,
+        coupon=coupon,
+        coupon_error=coupon_error,
+        free_shipping=free_shipping,
+        payment_method_id=payment.id if payment is not None else None,
+    )
+
+
+def price_cart(request, cart, shipping_method='standard', payment_method_id=None):
+    """Oturumdaki kupon koduyla sepetin dökümü."""
+    return price(
+        cart, shipping_method, request.session.get(SESSION_COUPON_KEY), payment_method_id,
+        getattr(request, 'user', None),
+    )
+
+
+def redeem(breakdown, order, user=None):
+    """
+    Siparişteki kupon kullanımını kaydeder. Kullanım sayacı, kupon hâlâ
+    aktif, geçerlilik aralığında ve limitin altındaysa koşullu olarak
+    artırılır; süreçteki tablo eski olsa da pasifleştirilmiş ya da süresi
+    dolmuş kupon kullanılamaz. Koşul tutmazsa False döndürür. Çağıran bir
+    işlem (atomic) içinde olmalıdır.
+    """
+    from .models import Coupon, CouponUsage
+
+    coupon = breakdown.coupon
+    if coupon is None:
+        return True
+    now = timezone.now()
+    used = Coupon.objects.filter(pk=coupon.id, is_active=True, valid_from__lte=now, valid_until__gte=now)
+    if coupon.limit is not None:
+        used = used.filter(used_count__lt=coupon.limit)
+    if not used.update(used_count=F('used_count') + 1):
+        return False
+    if user is not None and user.is_authenticated:
+        CouponUsage.objects.create(coupon_id=coupon.id, user=user, order=order, discount_amount=to_tl(breakdown.discount))
+    # Sayaç tablodadır: diğer süreçler güncel kullanım sayısını görsün
+    invalidate()
+    return True
@@ -0,0 +1,92 @@
+"""
+Ürün detay sayfasının önbelleğe alınabilir gövdesi.
+
+Sayfa iki parçadır:
+- Gövde (görseller, fiyat, varyantlar, açıklama, öneriler) herkes için
+  aynıdır; ürün ID'si ve sürüm damgasıyla (bkz. shop.versions) anahtarlanmış
+  HTML olarak önbellekten gelir. CSRF belirteci içermez; formlardaki boş
+  belirteç alanları kabuk şablonundaki satır içi betikle doldurulur.
+- Kullanıcıya özel bayraklar (yorumu, satın aldı mı, istek listesi, stok
+  uyarısı) sayfada render edilmez; sayfa yüklendikten sonra
+  product_viewer_state JSON ucundan tek sorguyla alınır.
+
+Öneri kartları ilgili ürünlerin adını/fiyatını gösterdiğinden gövde ayrıca
+PRODUCT_DETAIL_CACHE_TIMEOUT ile sınırlı tutulur. Sayfanın ETag'i
+shop.conditional içinde üretilir.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Subquery
+from django.template.loader import render_to_string
+
+from . import recommendations, versions
+
+# Gövde şablonu değiştiğinde artırın: eski gövdeler ve ETag'ler geçersizleşir
+TEMPLATE_REVISION = 1
+
+
+def _timeout():
+    return getattr(settings, 'PRODUCT_DETAIL_CACHE_TIMEOUT', 900)
+
+
+def _body_key(pk, version):
+    return f'product_detail:body:{TEMPLATE_REVISION}:{pk}:{version}'
+
+
+def render_body(product):
+    return render_to_string('shop/partials/_product_detail_body.html', {
+        'product': product,
+        'related_products': recommendations.related_products(product, limit=4),
+    })
+
+
+def body(product, version):
+    """
+    Gövde HTML'i. `version` ürün yüklenmeden önce okunmalıdır: arada gelen bir
+    değişiklik eski gövdeyi yeni damgayla önbelleğe yazdıramaz.
+    """
+    key = _body_key(product.pk, version)
+    html = cache.get(key)
+    if html is None:
+        html = render_body(product)
+        cache.set(key, html, _timeout())
+    return html
+
+
+def viewer_state(product_id, user):
+    """
+    Kullanıcıya özel ürün bayrakları; tek sorgu (EXISTS/alt sorgu
+    annotasyonları). Ürün yoksa None.
+    """
+    from .models import OrderItem, Product, Review, StockAlert, Wishlist
+
+    reviews = Review.objects.filter(product=OuterRef('pk'), user=user, is_approved=True).order_by('-created_at')
+    row = (
+        Product.objects.filter(pk=product_id)
+        .annotate(
+            has_purchased=Exists(OrderItem.objects.filter(
+                order__user=user, product=OuterRef('pk'), order__status='paid'
+            )),
+            is_in_wishlist=Exists(Wishlist.objects.filter(user=user, product=OuterRef('pk'))),
+            has_active_stock_alert=Exists(StockAlert.objects.filter(
+                user=user, product=OuterRef('pk'), status='active'
+            )),
+            review_id=Subquery(reviews.values('pk')[:1]),
+            review_rating=Subquery(reviews.values('rating')[:1]),
+        )
+        .values('has_purchased', 'is_in_wishlist', 'has_active_stock_alert', 'review_id', 'review_rating')
+        .first()
+    )
+    if row is None:
+        return None
+    user_review = None
+    if row['review_id'] is not None:
+        user_review = {'id': row['review_id'], 'rating': row['review_rating']}
+    return {
+        'authenticated': True,
+        'user_review': user_review,
+        'has_purchased': row['has_purchased'],
+        'can_review': row['has_purchased'] and user_review is None,
+        'is_in_wishlist': row['is_in_wishlist'],
+        'has_active_stock_alert': row['has_active_stock_alert'],
+    }
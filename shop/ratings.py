@@ -0,0 +1,158 @@
+"""
+Ürün puan özetlerinin (ortalama, yorum sayısı, yıldız dağılımı) bakımı.
+
+Product üzerindeki rating_* kolonları sadece onaylı yorumları yansıtır.
+Yorum eklendiğinde/düzenlendiğinde/silindiğinde veya onay durumu değiştiğinde
+tek bir UPDATE ile artımlı olarak güncellenir; listeler yorum tablosuna dokunmaz.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from . import facets, versions
+
+STARS = range(1, 6)
+
+
+def apply_rating_deltas(product_id, deltas):
+    """
+    Bir ürünün puan özetine yıldız bazlı farkları uygular.
+
+    Args:
+        product_id: Ürün ID'si
+        deltas: {puan: adet farkı} (örn. {5: 1, 3: -1})
+    """
+    from .models import Product
+
+    deltas = {int(r): n for r, n in deltas.items() if n and int(r) in STARS}
+    if not deltas:
+        return
+
+    d_count = sum(deltas.values())
+    d_sum = sum(r * n for r, n in deltas.items())
+
+    fields = {f'rating_{r}': F(f'rating_{r}') + n for r, n in deltas.items()}
+    fields['rating_count'] = F('rating_count') + d_count
+    fields['rating_sum'] = F('rating_sum') + d_sum
+    # UPDATE sağ tarafı eski değerleri görür; ortalama yeni toplamlardan hesaplanır
+    fields['rating_avg'] = Coalesce(
+        Cast(F('rating_sum') + d_sum, FloatField()) / NullIf(F('rating_count') + d_count, 0),
+        0.0,
+        output_field=FloatField(),
+    )
+    if Product.objects.filter(pk=product_id).update(**fields):
+        # Ortalama kova değiştirdiyse faset özeti de güncellenir
+        facets.rating_changed(product_id, d_sum, d_count)
+
+
+def _apply_signed_rows(rows):
+    """(product_id, rating, ±1) satırlarını ürün başına tek UPDATE ile uygular."""
+    grouped = defaultdict(lambda: defaultdict(int))
+    for product_id, rating, sign in rows:
+        grouped[product_id][rating] += sign
+    for product_id, deltas in grouped.items():
+        apply_rating_deltas(product_id, deltas)
+
+
+def apply_review_rows(rows, sign):
+    """
+    (product_id, rating) satırlarını özetlere ekler (sign=1) veya çıkarır (sign=-1).
+    """
+    _apply_signed_rows((product_id, rating, sign) for product_id, rating in rows)
+
+
+def review_changed(old_state, review):
+    """
+    Kaydedilen bir yorumun eski ve yeni halinden özet farkını uygular.
+
+    Args:
+        old_state: (product_id, rating, is_approved) ya da yeni kayıt için None
+        review: Kaydedilmiş Review örneği
+    """
+    rows = []
+    if old_state and old_state[2]:
+        rows.append((old_state[0], old_state[1], -1))
+    if review.is_approved:
+        rows.append((review.product_id, review.rating, 1))
+    _apply_signed_rows(rows)
+
+
+def set_reviews_approval(queryset, approved):
+    """
+    Toplu onay/onay kaldırma. queryset.update sinyal tetiklemediği için
+    gerçekten durumu değişen yorumların farkı burada uygulanır.
+
+    Returns:
+        Durumu değişen yorum sayısı
+    """
+    from .models import Review
+
+    with transaction.atomic():
+        changed = list(
+            queryset.filter(is_approved=not approved)
+            .select_for_update()
+            .values_list('pk', 'product_id', 'rating')
+        )
+        if not changed:
+            return 0
+        Review.objects.filter(pk__in=[pk for pk, _, _ in changed]).update(is_approved=approved)
+        apply_review_rows([(product_id, rating) for _, product_id, rating in changed], 1 if approved else -1)
+    return len(changed)
+
+
+def recompute_ratings(product_ids=None, batch_size=500):
+    """
+    Puan özetlerini yorum tablosundan baştan hesaplar (backfill / tutarlılık onarımı).
+
+    Args:
+        product_ids: Sadece bu ürünler (None ise tümü)
+        batch_size: bulk_update parti boyutu
+
+    Returns:
+        Güncellenen ürün sayısı
+    """
+    from .models import Product, Review
+
+    products = Product.objects.order_by('pk').only('pk')
+    if product_ids:
+        products = products.filter(pk__in=product_ids)
+
+    updated = 0
+    fields = ['rating_avg', 'rating_count', 'rating_sum'] + [f'rating_{r}' for r in STARS]
+    batch = []
+
+    def flush():
+        nonlocal updated
+        if not batch:
+            return
+        ids = [p.pk for p in batch]
+        counts = defaultdict(dict)
+        for row in (
+            Review.objects.filter(product_id__in=ids, is_approved=True)
+            .order_by()
+            .values('product_id', 'rating')
+            .annotate(n=Count('id'))
+        ):
+            counts[row['product_id']][row['rating']] = row['n']
+        for p in batch:
+            dist = counts.get(p.pk, {})
+            for r in STARS:
+                setattr(p, f'rating_{r}', dist.get(r, 0))
+            p.rating_count = sum(dist.get(r, 0) for r in STARS)
+            p.rating_sum = sum(r * dist.get(r, 0) for r in STARS)
+            p.rating_avg = p.rating_sum / p.rating_count if p.rating_count else 0
+        with transaction.atomic():
+            Product.objects.bulk_update(batch, fields)
+        updated += len(batch)
+        batch.clear()
+
+    for product in products.iterator(chunk_size=batch_size):
+        batch.append(product)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    # bulk_update sinyal tetiklemez: katalog ETag'leri dönemle geçersizleşir
+    versions.bump_epoch()
+    return updated
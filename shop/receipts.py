@@ -0,0 +1,246 @@
+"""
+Önceden işlenmiş, sıkıştırılmış sipariş fişleri.
+
+Fiş ödeme anında (sipariş 'paid' olunca, commit sonrası) bir kez işlenir ve
+OrderReceipt satırına gzip'li olarak yazılır; yanında düz HTML'in SHA-256
+özeti ve işlendiği sipariş durumu tutulur. `order_receipt` view'ı şablon
+çalıştırmaz: saklanan baytları güçlü ETag (özet) ile, gzip kabul eden
+istemciye olduğu gibi sunar; açılmış gövdenin ETag'i "<özet>-id"dir.
+
+Fiş yalnız sipariş değiştiğinde (ör. iptal, kargolama, admin düzenlemesi)
+yeniden işlenir; özet aynı çıkarsa satır yazılmaz. Özetin ilk 16 karakteri
+bağlantıda (?v=) taşınır: sürümlü bağlantı uzun süre önbelleklenir, eski
+sürüm ETag ile yeniden doğrulanır.
+
+Şablon kullanıcıya özel site kabuğu içermeyen bağımsız bir belgedir. Toplu
+üretim `render_receipts` komutuyla süreç havuzunda yapılır: süreçlere yalnız
+düz bağlam sözlükleri gider, okuma ve yazma ana süreçtedir.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE = 'shop/order_receipt.html'
+# Fişi olan durumlar; 'received' siparişin fişi yoktur
+RECEIPT_STATUSES = ('paid', 'shipped', 'cancelled')
+
+
+def workers():
+    return getattr(settings, 'RECEIPT_RENDER_WORKERS', min(4, os.cpu_count() or 1))
+
+
+def _order_data(order):
+    return {
+        'id': order.id,
+        'status': order.status,
+        'get_status_display': order.get_status_display(),
+        'paid_at': order.paid_at,
+        'created_at': order.created_at,
+        'fullname': order.fullname,
+        'email': order.email,
+        'address': order.address,
+    }
+
+
+def contexts(order_ids):
+    """Siparişlerin şablon bağlamları (düz veri): iki sorgu, sipariş sayısından bağımsız."""
+    from .models import Order, OrderItem
+
+    lines = {}
+    rows = (
+        OrderItem.objects.filter(order_id__in=order_ids).order_by('pk')
+        .values_list('order_id', 'product__name', 'quantity', 'unit_price', 'line_total')
+    )
+    for order_id, name, quantity, unit_price, line_total in rows:
+        lines.setdefault(order_id, []).append(
+            {'name': name or 'Ürün', 'qty': quantity, 'unit_price': unit_price, 'line_total': line_total}
+        )
+    result = {}
+    for order in Order.objects.filter(pk__in=order_ids):
+        items = lines.get(order.pk, [])
+        result[order.pk] = {
+            'order': _order_data(order),
+            'items': items,
+            'subtotal': sum(item['line_total'] for item in items),
+            'shipping_fee': order.shipping_fee,
+            'discount': order.discount_amount,
+            'grand_total': order.total,
+        }
+    return result
+
+
+def render(context):
+    """(özet, gzip içerik, düz boyut). Süreç havuzunda da çalışır."""
+    raw = render_to_string(TEMPLATE, context).encode()
+    # mtime=0: aynı HTML aynı baytları üretir
+    return hashlib.sha256(raw).hexdigest(), gzip.compress(raw, mtime=0), len(raw)
+
+
+def store(results):
+    """{order_id: (durum, (özet, içerik, boyut))} sonuçlarını yazar; değişmeyenleri atlar."""
+    from .models import OrderReceipt
+
+    if not results:
+        return 0
+    current = {
+        order_id: (digest, status)
+        for order_id, digest, status in OrderReceipt.objects.filter(order_id__in=results).values_list(
+            'order_id', 'digest', 'status'
+        )
+    }
+    rows = [
+        OrderReceipt(order_id=order_id, status=status, digest=digest, content=content, size=size)
+        for order_id, (status, (digest, content, size)) in results.items()
+        if current.get(order_id) != (digest, status)
+    ]
+    if not rows:
+        return 0
+    OrderReceipt.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=['order'],
+        update_fields=['status', 'digest', 'content', 'size', 'rendered_at'],
+    )
+    return len(rows)
+
+
+def refresh(order_ids):
+    """Siparişlerin fişlerini aynı süreçte işler ve yazar."""
+    results = {
+        order_id: (context['order']['status'], render(context))
+        for order_id, context in contexts(order_ids).items()
+        if context['order']['status'] in RECEIPT_STATUSES
+    }
+    return store(results)
+
+
+def schedule(order):
+    """post_save'den çağrılır: fişi olan durumdaki sipariş commit sonrası yeniden işlenir."""
+    if order.status in RECEIPT_STATUSES:
+        order_id = order.pk
+        transaction.on_commit(lambda: _refresh_safely(order_id))
+
+
+def _refresh_safely(order_id):
+    try:
+        refresh([order_id])
+    except Exception:
+        # View eksik ya da eski fişi ilk istekte yeniden işler
+        logger.exception('Sipariş fişi işlenemedi: #%s', order_id)
+
+
+def current(order):
+    """
+    Siparişin güncel fişi. Eksikse ya da sipariş durumu değişmiş ama fiş henüz
+    yeniden işlenmemişse (ör. commit sonrası işlem başarısız) burada işlenir.
+    Fişi olmayan durumda None. Arşivlenmiş siparişin fişi arşivden okunur.
+    """
+    from .models import ArchivedOrderReceipt, OrderReceipt
+
+    if order.status not in RECEIPT_STATUSES:
+        return None
+    if order.is_archived:
+        # Arşivde fiş taşınırken yanında gelir; yeniden işlenmez
+        return ArchivedOrderReceipt.objects.filter(order_id=order.pk).first()
+    receipt = OrderReceipt.objects.filter(order_id=order.pk).first()
+    if receipt is None or receipt.status != order.status:
+        refresh([order.pk])
+        receipt = OrderReceipt.objects.get(order_id=order.pk)
+    return receipt
+
+
+def version(receipt):
+    return receipt.digest[:16]
+
+
+def url(order, receipt=None):
+    """Fiş bağlantısı; fiş varsa sürümlü (?v=), uzun süre önbelleklenebilir."""
+    base = reverse('shop:order_receipt', args=[order.pk])
+    return f'{base}?v={version(receipt)}' if receipt is not None else base
+
+
+def link(order):
+    """Sipariş detayındaki fiş bağlantısı; fişi olmayan durumda None."""
+    from .models import ArchivedOrderReceipt, OrderReceipt
+
+    if order.status not in RECEIPT_STATUSES:
+        return None
+    model = ArchivedOrderReceipt if order.is_archived else OrderReceipt
+    return url(order, model.objects.filter(order_id=order.pk).only('digest').first())
+
+
+def backfill(force=False, max_workers=None, chunk_size=200):
+    """
+    Fişi eksik ya da sipariş durumundan geri kalmış siparişleri süreç
+    havuzunda işler. Havuzda aynı anda en çok 4 × işçi iş bekler.
+    İstatistik sözlüğü döndürür.
+    """
+    from .models import Order
+
+    started = time.monotonic()
+    max_workers = workers() if max_workers is None else max_workers
+    stats = {'rendered': 0, 'unchanged': 0, 'failed': 0, 'bytes': 0, 'compressed': 0}
+
+    todo = Order.objects.filter(status__in=RECEIPT_STATUSES)
+    if not force:
+        todo = todo.exclude(receipt__status=F('status'))
+    # Liste önce okunur: okuma imleci açıkken fiş tablosuna yazılmaz
+    order_ids = list(todo.order_by('pk').values_list('pk', flat=True))
+
+    def write(results):
+        written = store(results)
+        stats['rendered'] += written
+        stats['unchanged'] += len(results) - written
+        for _, (digest, content, size) in results.values():
+            stats['bytes'] += size
+            stats['compressed'] += len(content)
+
+    def chunks():
+        for start in range(0, len(order_ids), chunk_size):
+            yield contexts(order_ids[start:start + chunk_size])
+
+    if not max_workers:
+        for batch in chunks():
+            results = {}
+            for order_id, context in batch.items():
+                try:
+                    results[order_id] = (context['order']['status'], render(context))
+                except Exception:
+                    logger.exception('Sipariş fişi işlenemedi: #%s', order_id)
+                    stats['failed'] += 1
+            write(results)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pending, results = {}, {}
+
+            def collect(done):
+                for future in done:
+                    order_id, status = pending.pop(future)
+                    try:
+                        results[order_id] = (status, future.result())
+                    except Exception:
+                        logger.exception('Sipariş fişi işlenemedi: #%s', order_id)
+                        stats['failed'] += 1
+
+            for batch in chunks():
+                for order_id, context in batch.items():
+                    pending[executor.submit(render, context)] = (order_id, context['order']['status'])
+                    if len(pending) >= max_workers * 4:
+                        collect(wait(pending, return_when=FIRST_COMPLETED).done)
+                if len(results) >= chunk_size:
+                    write(results)
+                    results = {}
+            collect(wait(pending).done)
+            write(results)
+
+    stats['seconds'] = time.monotonic() - started
+    return stats
@@ -0,0 +1,245 @@
+"""
+"Birlikte alınanlar" önerileri.
+
+Skor, iki ürünün aynı satılmış siparişte bulunma sayısının kosinüs
+normalizasyonudur:
+
+    score(a, b) = birlikte(a, b) / sqrt(sipariş(a) * sipariş(b))
+
+Böylece her sepette görünen çok satanlar her ürünün önerisine yerleşmez.
+
+- `build_related_products` komutu OrderItem satırlarını sipariş sırasıyla
+  akıtır ve seyrek sayım yapar. Bellek, ürün başına aday sayısı sınırıyla
+  tutulur: aday sözlüğü taşınca en düşük sayımlar budanır. Sonuçta ürün
+  başına en iyi N satır RelatedProduct tablosuna yazılır.
+- Yeni satılan siparişler listeleri artımlı günceller. Tabloda olmayan
+  çiftin geçmiş sayımı bilinmediği için 1'den başlar; gece çalışan tam
+  kurulum bu yaklaşıklığı düzeltir.
+
+product_detail önerileri (product, -score) indeksinden tek sorguyla okur.
+"""
+import math
+import time
+from collections import defaultdict
+from itertools import combinations
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .sales_rank import SOLD_STATUSES
+
+
+def _top_n():
+    return getattr(settings, 'RELATED_PRODUCTS_TOP_N', 8)
+
+
+def _max_basket():
+    # Çok büyük sepetler (toplu alımlar) gürültü ve O(n²) çift üretir
+    return getattr(settings, 'RELATED_PRODUCTS_MAX_BASKET', 30)
+
+
+def _score(co_count, freq_a, freq_b):
+    if not freq_a or not freq_b:
+        return 0.0
+    return co_count / math.sqrt(freq_a * freq_b)
+
+
+def _baskets(chunk_size):
+    """Satılmış siparişlerin (sipariş_id, {ürün_id}) sepetlerini akıtır."""
+    from .models import OrderItem
+
+    rows = (
+        OrderItem.objects.filter(order__status__in=SOLD_STATUSES)
+        .order_by('order_id')
+        .values_list('order_id', 'product_id')
+        .iterator(chunk_size=chunk_size)
+    )
+    current, basket = None, set()
+    for order_id, product_id in rows:
+        if order_id != current:
+            if basket:
+                yield current, basket
+            current, basket = order_id, set()
+        basket.add(product_id)
+    if basket:
+        yield current, basket
+
+
+def compute(top_n=None, max_basket=None, chunk_size=2000, candidate_factor=4):
+    """
+    Tüm satılmış siparişlerden ürün başına en iyi N öneriyi hesaplar.
+
+    Returns:
+        ({ürün: [(ilgili, birlikte, skor), ...]}, istatistik sözlüğü)
+    """
+    top_n = top_n or _top_n()
+    max_basket = max_basket or _max_basket()
+    cap = top_n * candidate_factor
+
+    freq = defaultdict(int)
+    co = defaultdict(dict)
+    stats = {'orders': 0, 'skipped_orders': 0, 'pairs': 0, 'pruned': 0, 'peak_candidates': 0}
+    live = 0
+    for _, basket in _baskets(chunk_size):
+        if len(basket) > max_basket:
+            stats['skipped_orders'] += 1
+            continue
+        stats['orders'] += 1
+        for product_id in basket:
+            freq[product_id] += 1
+        for a, b in combinations(sorted(basket), 2):
+            stats['pairs'] += 1
+            for x, y in ((a, b), (b, a)):
+                candidates = co[x]
+                if y not in candidates:
+                    live += 1
+                candidates[y] = candidates.get(y, 0) + 1
+                if len(candidates) > cap:
+                    # Aday sınırı: en düşük sayımlı yarıyı buda
+                    keep = sorted(candidates.items(), key=lambda kv: (-kv[1], kv[0]))[:cap // 2]
+                    stats['pruned'] += len(candidates) - len(keep)
+                    live -= len(candidates) - len(keep)
+                    co[x] = dict(keep)
+        stats['peak_candidates'] = max(stats['peak_candidates'], live)
+
+    result = {}
+    for product_id, candidates in co.items():
+        scored = [
+            (related_id, count, _score(count, freq[product_id], freq[related_id]))
+            for related_id, count in candidates.items()
+        ]
+        scored.sort(key=lambda row: (-row[2], -row[1], row[0]))
+        result[product_id] = scored[:top_n]
+    return result, stats
+
+
+def rebuild(top_n=None, max_basket=None, chunk_size=2000):
+    """Öneri tablosunu baştan yazar; istatistikleri döndürür."""
+    from .models import Product, RelatedProduct
+
+    started = time.monotonic()
+    result, stats = compute(top_n, max_basket, chunk_size)
+    existing = set(Product.objects.filter(pk__in=result.keys()).values_list('pk', flat=True))
+    rows = [
+        RelatedProduct(product_id=product_id, related_id=related_id, co_count=count, score=score)
+        for product_id, entries in result.items() if product_id in existing
+        for related_id, count, score in entries if related_id in existing
+    ]
+    with transaction.atomic():
+        RelatedProduct.objects.all().delete()
+        RelatedProduct.objects.bulk_create(rows, batch_size=1000)
+    stats.update(products=len(result), rows=len(rows), seconds=time.monotonic() - started)
+    return stats
+
+
+def _order_counts(product_ids):
+    from .models import OrderItem
+
+    return dict(
+        OrderItem.objects.filter(product_id__in=product_ids, order__status__in=SOLD_STATUSES)
+        .order_by()
+        .values('product_id')
+        .annotate(n=Count('order_id', distinct=True))
+        .values_list('product_id', 'n')
+    )
+
+
+def add_pairs(new_ids, existing_ids=(), top_n=None):
+    """
+    Satılmış bir sepete eklenen ürünler için çift sayımlarını artırır.
+    new_ids yeni ürünler, existing_ids sepette zaten sayılmış ürünlerdir;
+    çiftler yeni×yeni ve yeni×mevcut olarak üretilir.
+    """
+    from .models import RelatedProduct
+
+    new_ids = set(new_ids)
+    existing_ids = set(existing_ids) - new_ids
+    basket = new_ids | existing_ids
+    if len(basket) < 2 or len(basket) > _max_basket():
+        return
+    top_n = top_n or _top_n()
+
+    pairs = set()
+    for a in new_ids:
+        for b in basket:
+            if a != b:
+                pairs.add((a, b))
+                pairs.add((b, a))
+
+    # Sepetteki ürünlerin sipariş sayısı değişti: onlara dokunan tüm satırlar yeniden skorlanır
+    loaded = list(RelatedProduct.objects.filter(Q(product_id__in=basket) | Q(related_id__in=basket)))
+    freq = _order_counts(basket | {r.product_id for r in loaded} | {r.related_id for r in loaded})
+    rows = defaultdict(dict)
+    for row in loaded:
+        if row.product_id in basket:
+            rows[row.product_id][row.related_id] = row
+
+    missing = []
+    for product_id, related_id in sorted(pairs):
+        row = rows[product_id].get(related_id)
+        if row is None:
+            missing.append((product_id, related_id))
+        else:
+            row.co_count += 1
+    for row in loaded:
+        row.score = _score(row.co_count, freq.get(row.product_id), freq.get(row.related_id))
+
+    to_create, to_delete = [], []
+    for product_id, related_id in missing:
+        current = rows[product_id]
+        score = _score(1, freq.get(product_id), freq.get(related_id))
+        if len(current) >= top_n:
+            # Liste dolu: yeni çift ancak en zayıf öneriden iyiyse girer
+            weakest = min(current.values(), key=lambda r: (r.score, -r.related_id))
+            if weakest.score >= score:
+                continue
+            del current[weakest.related_id]
+            if weakest.pk:
+                to_delete.append(weakest.pk)
+            else:
+                to_create.remove(weakest)
+        row = RelatedProduct(product_id=product_id, related_id=related_id, co_count=1, score=score)
+        current[related_id] = row
+        to_create.append(row)
+    to_update = [row for row in loaded if row.pk not in to_delete]
+
+    with transaction.atomic():
+        if to_delete:
+            RelatedProduct.objects.filter(pk__in=to_delete).delete()
+        RelatedProduct.objects.bulk_update(to_update, ['co_count', 'score'], batch_size=500)
+        RelatedProduct.objects.bulk_create(to_create, ignore_conflicts=True)
+
+
+def order_sold(order):
+    """Sipariş satılmış duruma geçti: tüm sepet yeni sayılır."""
+    add_pairs(order.items.values_list('product_id', flat=True))
+
+
+def item_added(item):
+    """Ödenmiş olarak oluşturulan siparişe kalem eklendi: sepetteki diğer ürünlerle eşle."""
+    if item.order.status not in SOLD_STATUSES:
+        return
+    others = item.order.items.exclude(pk=item.pk).values_list('product_id', flat=True)
+    add_pairs([item.product_id], others)
+
+
+def related_products(product, limit=4):
+    """
+    Ürün detay sayfası önerileri: önce tek indeksli sorguyla ön hesaplanmış
+    liste, veri yoksa aynı kategoriden ürünler.
+    """
+    from .models import Product, RelatedProduct
+
+    related = [
+        row.related for row in RelatedProduct.objects.filter(product=product)
+        .select_related('related__category')
+        .order_by('-score')[:limit]
+    ]
+    if related:
+        return related
+    return list(
+        Product.objects.filter(category_id=product.category_id)
+        .exclude(pk=product.pk)
+        .select_related('category')[:limit]
+    )
@@ -0,0 +1,325 @@
+"""
+Ödeme sırasında süreli stok rezervasyonları.
+
+Ödeme adımı başlarken sepetteki ürünler için stok ayrılır (tutma). Ayırma
+tek bir koşullu UPDATE'tir:
+
+    UPDATE product SET reserved = reserved + q
+     WHERE id = ? AND stock >= reserved + q
+
+Güncellenen satır yoksa stok yetmiyordur; yarışan iki ödeme aynı son ürünü
+alamaz. Her tutma bir StockReservation satırıdır (ürün/varyant, miktar,
+bitiş zamanı) ve Product.reserved bu satırların aktif olanlarının toplamıdır.
+
+- Ödeme onaylanınca `convert(order)` tutmaları stoktan düşer (stock ve
+  reserved birlikte azalır). Tutması olmayan kalemler (süresi dolmuş ve
+  süpürülmüş) başkalarının tutmalarına dokunmadan düşülür. Düşüm sepet
+  boyutundan bağımsız olarak tek koşullu çok satırlı UPDATE'tir (`decrement`).
+- Ödeme başarısız olursa (imzalı ret geri çağrısı, başarısız sayfası ya da
+  sipariş iptali) `release(...)` tutmaları bırakır.
+- Süresi dolan tutmaları `sweep()` toplu olarak geri alır
+  (`sweep_reservations` komutu). Ayırma başarısız olursa o ürün için
+  süpürme yapılıp bir kez daha denenir.
+
+Müsait stok (`available_stock`) = stok − süresi dolmamış aktif tutmalar;
+(product, status, expires_at) indeksinden tek gruplu sorguyla okunur.
+"""
+import logging
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY = 'stock_hold'
+# Yönlendirmeli ödemede geri çağrı beklenen sipariş (başarısız sayfası bırakır)
+PENDING_ORDER_KEY = 'pending_payment_order'
+
+
+def _ttl():
+    return getattr(settings, 'STOCK_RESERVATION_TTL', 900)
+
+
+def hold_key(request):
+    """Oturumun tutma anahtarı (yoksa oluşturulur)."""
+    key = request.session.get(SESSION_KEY)
+    if not key:
+        key = request.session[SESSION_KEY] = uuid.uuid4().hex
+    return key
+
+
+def _take(product_id, quantity):
+    from .models import Product
+
+    return Product.objects.filter(
+        pk=product_id, stock__gte=F('reserved') + quantity
+    ).update(reserved=F('reserved') + quantity) == 1
+
+
+def reserve(key, lines, ttl=None):
+    """
+    lines: (product_id, variant_id, quantity) demetleri. Anahtarın önceki
+    tutmaları bırakılıp sepetin güncel hali ayrılır (tekrar çağrılabilir;
+    süreyi de uzatır). Stoğu yetmeyen ürün ID'lerini döndürür; liste boş
+    değilse hiçbir şey ayrılmamıştır.
+    """
+    from .models import StockReservation
+
+    totals = defaultdict(int)
+    for product_id, _, quantity in lines:
+        totals[int(product_id)] += quantity
+    expires_at = timezone.now() + timedelta(seconds=ttl or _ttl())
+
+    with transaction.atomic():
+        release(key)
+        failed = []
+        # Sabit sıra: aynı ürünleri ayıran eşzamanlı ödemeler kilitlenmez
+        for product_id in sorted(totals):
+            if _take(product_id, totals[product_id]):
+                continue
+            # Süresi dolmuş ama süpürülmemiş tutmalar yer kaplıyor olabilir
+            if sweep(product_ids=[product_id]) and _take(product_id, totals[product_id]):
+                continue
+            failed.append(product_id)
+        if failed:
+            transaction.set_rollback(True)
+            return failed
+        StockReservation.objects.bulk_create([
+            StockReservation(
+                hold_key=key, product_id=int(product_id), variant_id=variant_id,
+                quantity=quantity, expires_at=expires_at,
+            )
+            for product_id, variant_id, quantity in lines
+        ])
+    return []
+
+
+def _per_product(mapping):
+    """{ürün ID: sayı} → UPDATE içinde satıra göre değer seçen CASE ifadesi."""
+    return Case(
+        *[When(pk=pk, then=Value(n)) for pk, n in mapping.items()],
+        default=Value(0), output_field=IntegerField(),
+    )
+
+
+def decrement(needed, own=None):
+    """
+    {ürün ID: miktar} stoktan tek koşullu çok satırlı UPDATE ile düşülür:
+
+        UPDATE product SET stock = stock - CASE id ... END,
+                           reserved = reserved - CASE id ... END
+         WHERE id IN (...) AND stock >= reserved - own + qty
+
+    `own`: {ürün ID: bu siparişin tutması}; bu kadarı zaten ayrılmıştır ve
+    reserved'dan da düşülür. Hepsi ya da hiçbiri: bir ürün bile yetmezse
+    hiçbir şey değişmez ve yetmeyen ürün ID'leri döner (yalnız bu durumda
+    ikinci bir okuma yapılır).
+    """
+    from .models import Product
+
+    if not needed:
+        return []
+    own = {pk: min(own.get(pk, 0), quantity) for pk, quantity in needed.items()} if own else {}
+    quantities, held = _per_product(needed), _per_product(own)
+    with transaction.atomic():
+        updated = Product.objects.filter(
+            pk__in=list(needed), reserved__gte=held, stock__gte=F('reserved') - held + quantities,
+        ).update(stock=F('stock') - quantities, reserved=F('reserved') - held)
+        if updated == len(needed):
+            return []
+        transaction.set_rollback(True)
+
+    rows = Product.objects.filter(pk__in=list(needed)).values_list('pk', 'stock', 'reserved')
+    enough = {
+        pk for pk, stock, reserved in rows
+        if reserved >= own.get(pk, 0) and stock >= reserved - own.get(pk, 0) + needed[pk]
+    }
+    # Okuma ile UPDATE arasında durum değiştiyse hepsi yetmemiş sayılır
+    return sorted(set(needed) - enough) or sorted(needed)
+
+
+def _close(holds, status):
+    """
+    Aktif tutmaları kilitleyip kapatır; ayrılmış sayaçları geri alır.
+    {ürün ID: miktar} döndürür.
+    """
+    from .models import Product, StockReservation
+
+    with transaction.atomic():
+        rows = list(holds.filter(status='active').select_for_update().values_list('pk', 'product_id', 'quantity'))
+        if not rows:
+            return {}
+        per_product = defaultdict(int)
+        for _, product_id, quantity in rows:
+            per_product[product_id] += quantity
+        for product_id in sorted(per_product):
+            Product.objects.filter(pk=product_id).update(
+                reserved=Greatest(F('reserved') - per_product[product_id], Value(0))
+            )
+        StockReservation.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(status=status)
+    return dict(per_product)
+
+
+def release(key=None, order=None):
+    """
+    Ödeme başarısız / sepet değişti: siparişin ya da anahtarın tutmalarını
+    bırakır. Anahtarla bırakmada siparişe bağlanmış (geri çağrı bekleyen)
+    tutmalara dokunulmaz.
+    """
+    from .models import StockReservation
+
+    if order is not None:
+        holds = StockReservation.objects.filter(order=order)
+    elif key is not None:
+        holds = StockReservation.objects.filter(hold_key=key, order__isnull=True)
+    else:
+        return {}
+    return _close(holds, 'released')
+
+
+def release_unpaid(order_id):
+    """
+    Ödemesi alınamayan siparişin tutmalarını bırakır; sipariş ödenmiş ya da
+    ilerlemişse (yalnız 'received' bırakılır) dokunulmaz.
+    """
+    from .models import Order
+
+    if not str(order_id or '').isdigit():
+        return {}
+    order = Order.objects.filter(pk=order_id, status='received').first()
+    return release(order=order) if order is not None else {}
+
+
+def attach(key, order, ttl=None):
+    """
+    Yönlendirmeli ödeme başladı: tutmalar siparişe bağlanır ve süresi ödeme
+    sayfası için uzatılır; geri çağrı geldiğinde `convert(order)` bunları bulur.
+    """
+    from .models import StockReservation
+
+    return StockReservation.objects.filter(hold_key=key, status='active', order__isnull=True).update(
+        order=order, expires_at=timezone.now() + timedelta(seconds=ttl or _ttl()),
+    )
+
+
+def convert(order, needed=None):
+    """
+    Ödeme onaylandı: sipariş kalemleri stoktan düşülür. Siparişe bağlı
+    tutmaların miktarı zaten ayrılmıştır; kalan miktar yalnız başkalarının
+    tutmalarına dokunmuyorsa düşülür. `needed` ({ürün ID: miktar}) verilmezse
+    kalemlerden okunur. Düşülemeyen ürün ID'lerini döndürür; ödeme alınmış
+    olduğundan yeten ürünler yine de düşülür.
+    """
+    from . import facets, versions
+    from .models import OrderItem, Product, StockReservation
+
+    if needed is None:
+        needed = defaultdict(int)
+        for product_id, quantity in OrderItem.objects.filter(order=order).values_list('product_id', 'quantity'):
+            needed[product_id] += quantity
+    needed = dict(needed)
+
+    with transaction.atomic():
+        holds = StockReservation.objects.filter(order=order, status='active')
+        held = defaultdict(int)
+        hold_ids = []
+        for pk, product_id, quantity in holds.select_for_update().values_list('pk', 'product_id', 'quantity'):
+            held[product_id] += quantity
+            hold_ids.append(pk)
+
+        failed = decrement(needed, held)
+        if failed:
+            # Yetmeyenler dışarıda bırakılıp kalanlar bir kez daha düşülür
+            if decrement({pk: q for pk, q in needed.items() if pk not in failed}, held):
+                failed = sorted(needed)
+        changed = {pk: q for pk, q in needed.items() if pk not in failed}
+
+        # Düşümde kullanılmayan tutmalar (kalem azaldı ya da düşüm başarısız) serbest kalır
+        extra = {
+            product_id: quantity - (min(quantity, needed[product_id]) if product_id in changed else 0)
+            for product_id, quantity in held.items()
+        }
+        extra = {pk: n for pk, n in extra.items() if n}
+        if extra:
+            Product.objects.filter(pk__in=list(extra)).update(
+                reserved=Greatest(F('reserved') - _per_product(extra), Value(0))
+            )
+        if hold_ids:
+            StockReservation.objects.filter(pk__in=hold_ids).update(status='converted')
+
+        # Sinyalsiz stok güncellemesi: faset özeti ve katalog damgaları elle
+        products = list(Product.objects.filter(pk__in=list(changed)))
+        for product in products:
+            facets.stock_changed(product, product.stock + changed[product.pk])
+        versions.bump_products([product.pk for product in products])
+        versions.bump_categories({product.category_id for product in products})
+
+    if failed:
+        logger.warning('Sipariş #%s için stok düşülemedi: ürünler %s', order.pk, failed)
+    return failed
+
+
+def restock_quantities(order):
+    """
+    İptal edilen siparişte stoğa geri eklenecek miktarlar ({ürün ID: miktar}).
+    Tutması olan siparişte yalnız `convert` ile düşülen (dönüşmüş) miktar
+    döner; ödeme bekleyen siparişin stoğu hiç düşülmemiştir. Tutması hiç
+    olmayan (rezervasyon öncesi) siparişlerde stok sipariş anında
+    düşüldüğünden kalemlerin tamamı döner.
+    """
+    from .models import OrderItem, StockReservation
+
+    items = defaultdict(int)
+    for product_id, quantity in OrderItem.objects.filter(order=order).values_list('product_id', 'quantity'):
+        items[product_id] += quantity
+    holds = StockReservation.objects.filter(order=order)
+    if not holds.exists():
+        return dict(items)
+    converted = defaultdict(int)
+    for product_id, quantity in holds.filter(status='converted').values_list('product_id', 'quantity'):
+        converted[product_id] += quantity
+    return {pk: min(quantity, items[pk]) for pk, quantity in converted.items() if items.get(pk)}
+
+
+def sweep(now=None, batch_size=1000, product_ids=None):
+    """Süresi dolan aktif tutmaları partiler halinde bırakır; bırakılan tutma sayısını döndürür."""
+    from .models import StockReservation
+
+    now = now or timezone.now()
+    expired = StockReservation.objects.filter(status='active', expires_at__lte=now)
+    if product_ids is not None:
+        expired = expired.filter(product_id__in=product_ids)
+    released = 0
+    while True:
+        ids = list(expired.order_by('expires_at').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return released
+        _close(StockReservation.objects.filter(pk__in=ids, expires_at__lte=now), 'released')
+        released += len(ids)
+        if len(ids) < batch_size:
+            return released
+
+
+def available_stock(product_ids, exclude_key=None):
+    """
+    {ürün ID: stok − süresi dolmamış aktif tutmalar}. `exclude_key` verilirse
+    o anahtarın (kullanıcının kendi) tutmaları sayılmaz. Tek sorgu.
+    """
+    from .models import Product, StockReservation
+
+    holds = StockReservation.objects.filter(
+        product=OuterRef('pk'), status='active', expires_at__gt=timezone.now()
+    )
+    if exclude_key:
+        holds = holds.exclude(hold_key=exclude_key)
+    held = holds.order_by().values('product').annotate(total=Sum('quantity')).values('total')
+    rows = Product.objects.filter(pk__in=product_ids).annotate(
+        held=Coalesce(Subquery(held, output_field=IntegerField()), Value(0))
+    ).values_list('pk', 'stock', 'held')
+    return {pk: max(0, stock - held) for pk, stock, held in rows}
@@ -0,0 +1,208 @@
+"""
+Günlük satış özetleri (rollup).
+
+Raporlar Order/OrderItem üzerinde toplama yapmaz; `rollup_sales` komutunun
+doldurduğu iki özet tablosunu okur:
+
+- SalesDay: gün × ödeme sağlayıcısı × kargo yöntemi; sipariş sayısı, adet,
+  ciro (sipariş toplamı), indirim ve kargo. Ortalama sepet = ciro / sipariş.
+- SalesProductDay: gün × ürün × kategori × ödeme sağlayıcısı × kargo yöntemi;
+  sipariş sayısı, adet ve satır cirosu. İndirim ve kargo sipariş düzeyinde
+  olduğundan ürün satırlarına bölüştürülmez.
+
+Gün, siparişin oluşturulduğu yerel tarihtir; satış sayılan durumlar
+sales_rank.SOLD_STATUSES'tur. Arşive taşınmış siparişler (shop.archive) de
+sayılır; bir gün yeniden hesaplanırken arşivdeki payı kaybolmaz.
+
+Her çalıştırma, saklanan filigrandan (watermark) sonra değişen
+(`Order.updated_at`) siparişlerin günlerini bulur ve yalnız o günleri
+kaynaktan baştan hesaplar: gün silinip yeniden yazılır. Bu yüzden
+işlem tekrarlanabilir (idempotent); aynı sipariş iki kez işlense de sonuç
+değişmez. Filigran, çalıştırmanın başladığı andır ve okuma ROLLUP_OVERLAP
+saniye geriden başlar: filigrandan önce başlayıp sonra commit olan işlemler
+de yakalanır.
+
+`queryset.update()` ve sipariş silme `updated_at`'i değiştirmez; bu tür toplu
+düzeltmelerden sonra `rollup_sales --full` çalıştırılır.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .sales_rank import SOLD_STATUSES
+
+WATERMARK = 'sales'
+
+
+def _overlap():
+    return getattr(settings, 'ROLLUP_OVERLAP', 300)
+
+
+def _sources():
+    """(sipariş, kalem) model çiftleri: sıcak tablolar ve arşiv (shop.archive)."""
+    from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+    return ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem))
+
+
+def changed_days(since=None):
+    """`since` anından sonra değişen siparişlerin günleri; None ise tüm günler (arşiv dahil)."""
+    from .models import Order
+
+    sources = [Order] if since is not None else [order_model for order_model, _ in _sources()]
+    days = set()
+    for order_model in sources:
+        orders = order_model.objects.all()
+        if since is not None:
+            orders = orders.filter(updated_at__gte=since)
+        days.update(
+            orders.annotate(day=TruncDate('created_at')).order_by().values_list('day', flat=True).distinct()
+        )
+    return days
+
+
+def _merge(rows, group, measures, into):
+    """Gruplanmış satırları anahtar başına toplar (iki kaynağın sonuçları tek satır olur)."""
+    for row in rows:
+        totals = into.setdefault(tuple(row[name] for name in group), {})
+        for name in measures:
+            totals[name] = totals.get(name, 0) + (row[name] or 0)
+
+
+def _day_rows(days):
+    from .models import SalesDay
+
+    group = ('day', 'payment_provider', 'shipping_method')
+    measures = ('orders', 'units', 'revenue', 'discount', 'shipping')
+    merged = {}
+    for order_model, item_model in _sources():
+        sold = order_model.objects.filter(status__in=SOLD_STATUSES, created_at__date__in=days)
+        _merge(
+            sold.annotate(day=TruncDate('created_at')).order_by().values(*group).annotate(
+                orders=Count('id'), revenue=Sum('total'), discount=Sum('discount_amount'), shipping=Sum('shipping_fee'),
+            ),
+            group, ('orders', 'revenue', 'discount', 'shipping'), merged,
+        )
+        _merge(
+            item_model.objects.filter(order__in=sold).annotate(
+                day=TruncDate('order__created_at'),
+                payment_provider=F('order__payment_provider'),
+                shipping_method=F('order__shipping_method'),
+            ).order_by().values(*group).annotate(units=Sum('quantity')),
+            group, ('units',), merged,
+        )
+    return [
+        SalesDay(**dict(zip(group, key)), **{name: values.get(name, 0) for name in measures})
+        for key, values in merged.items()
+    ]
+
+
+def _product_rows(days):
+    from .models import SalesProductDay
+
+    group = ('day', 'product_id', 'category_id', 'payment_provider', 'shipping_method')
+    measures = ('orders', 'units', 'revenue')
+    merged = {}
+    for _, item_model in _sources():
+        _merge(
+            item_model.objects.filter(
+                order__status__in=SOLD_STATUSES, order__created_at__date__in=days,
+            ).annotate(
+                day=TruncDate('order__created_at'),
+                category_id=F('product__category_id'),
+                payment_provider=F('order__payment_provider'),
+                shipping_method=F('order__shipping_method'),
+            ).order_by().values(*group).annotate(
+                orders=Count('order_id', distinct=True), units=Sum('quantity'), revenue=Sum('line_total'),
+            ),
+            group, measures, merged,
+        )
+    return [SalesProductDay(**dict(zip(group, key)), **values) for key, values in merged.items()]
+
+
+def rebuild(days):
+    """Verilen günlerin özetlerini kaynaktan baştan yazar. Yazılan satır sayısını döndürür."""
+    from .models import SalesDay, SalesProductDay
+
+    days = sorted(days)
+    if not days:
+        return 0
+    day_rows, product_rows = _day_rows(days), _product_rows(days)
+    with transaction.atomic():
+        SalesDay.objects.filter(day__in=days).delete()
+        SalesProductDay.objects.filter(day__in=days).delete()
+        SalesDay.objects.bulk_create(day_rows, batch_size=500)
+        SalesProductDay.objects.bulk_create(product_rows, batch_size=500)
+    return len(day_rows) + len(product_rows)
+
+
+def run(full=False, chunk_days=31):
+    """
+    Filigrandan sonra değişen siparişlerin günlerini yeniden hesaplar ve
+    filigranı ilerletir. `full` tüm özetleri baştan kurar. İstatistik
+    sözlüğü döndürür.
+    """
+    from .models import RollupWatermark, SalesDay, SalesProductDay
+
+    started = time.monotonic()
+    now = timezone.now()
+    state, _ = RollupWatermark.objects.get_or_create(name=WATERMARK)
+    since = None if full or state.value is None else state.value - timedelta(seconds=_overlap())
+
+    days = sorted(changed_days(since))
+    if since is None:
+        # Siparişi kalmamış günlerin eski özetleri de gider
+        SalesDay.objects.exclude(day__in=days).delete()
+        SalesProductDay.objects.exclude(day__in=days).delete()
+    rows = 0
+    for start in range(0, len(days), chunk_days):
+        rows += rebuild(days[start:start + chunk_days])
+
+    state.value = now
+    state.save(update_fields=['value', 'updated_at'])
+    return {'days': len(days), 'rows': rows, 'since': since, 'seconds': time.monotonic() - started}
+
+
+def report(start, end):
+    """
+    [start, end] günleri için pano verisi; yalnız özet tablolarını okur.
+    """
+    from .models import SalesDay, SalesProductDay
+
+    days = SalesDay.objects.filter(day__range=(start, end))
+    measures = {
+        'orders': Sum('orders'), 'units': Sum('units'), 'revenue': Sum('revenue'),
+        'discount': Sum('discount'), 'shipping': Sum('shipping'),
+    }
+
+    def with_aov(row):
+        row = {key: value or 0 for key, value in row.items()}
+        row['aov'] = row['revenue'] / row['orders'] if row['orders'] else 0
+        return row
+
+    products = SalesProductDay.objects.filter(day__range=(start, end)).order_by()
+    return {
+        'start': start,
+        'end': end,
+        'totals': with_aov(days.aggregate(**measures)),
+        'daily': [with_aov(row) for row in days.order_by('day').values('day').annotate(**measures)],
+        'providers': [
+            with_aov(row) for row in days.order_by().values('payment_provider').annotate(**measures).order_by('-revenue')
+        ],
+        'shipping_methods': [
+            with_aov(row) for row in days.order_by().values('shipping_method').annotate(**measures).order_by('-revenue')
+        ],
+        'categories': list(
+            products.values('category_id', 'category__name')
+            .annotate(units=Sum('units'), revenue=Sum('revenue')).order_by('-revenue')[:10]
+        ),
+        'products': list(
+            products.values('product_id', 'product__name')
+            .annotate(orders=Sum('orders'), units=Sum('units'), revenue=Sum('revenue')).order_by('-revenue')[:20]
+        ),
+    }
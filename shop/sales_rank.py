@@ -0,0 +1,211 @@
+"""
+Çok satanlar için ürün satış sıralaması.
+
+ProductSalesRank ürün başına son 7 gün, son 30 gün ve tüm zamanlar için
+satılan adet ve ciroyu tutar. Sipariş satılmış sayılan bir duruma
+(ödendi/kargolandı) geçtiğinde kalemleri eklenir, satılmışken iptal
+edildiğinde düşülür. Geçişler Order sinyaliyle yakalanır (shop/signals.py);
+ödeme callback'leri (payments/views.py) ve cancel_order order.save() ile
+buraya ulaşır.
+
+Kayan pencereler ProductSalesDay günlük defterinden türetilir: artımlı
+güncellemeler satışın gününe göre 7/30 günlük toplamlara da eklenir,
+`rebuild_sales_rank --windows` (günlük) ise pencereden çıkan günleri düşer.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from . import homepage, versions
+
+# Satılmış sayılan sipariş durumları
+SOLD_STATUSES = ('paid', 'shipped')
+WINDOWS = (7, 30)
+
+
+def sale_day(order):
+    """Satışın defterdeki günü; iptalde de aynı gün kullanılır."""
+    return timezone.localdate(order.paid_at or order.created_at or timezone.now())
+
+
+def _increment(model, lookup, values):
+    """Satırı F() ile artırır; yoksa oluşturur (eşzamanlı oluşturmada tekrar artırır)."""
+    updates = {field: F(field) + value for field, value in values.items()}
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **values)
+    except IntegrityError:
+        model.objects.filter(**lookup).update(**updates)
+
+
+def _increment_many(model, field, deltas, **fixed):
+    """
+    {anahtar: {alan: artış}} satırlarını sepet boyutundan bağımsız sayıda
+    sorguyla artırır: var olanlar tek UPDATE (alan başına CASE), olmayanlar
+    tek bulk_create. Eşzamanlı oluşturma çakışırsa satır satır `_increment`.
+    """
+    existing = set(model.objects.filter(**fixed, **{f'{field}__in': list(deltas)}).values_list(field, flat=True))
+    if existing:
+        names = {name for key in existing for name in deltas[key]}
+        model.objects.filter(**fixed, **{f'{field}__in': list(existing)}).update(**{
+            name: F(name) + Case(
+                *[When(**{field: key}, then=Value(deltas[key].get(name, 0))) for key in existing],
+                default=Value(0), output_field=model._meta.get_field(name),
+            )
+            for name in names
+        })
+    missing = [key for key in deltas if key not in existing]
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create([model(**fixed, **{field: key}, **deltas[key]) for key in missing])
+    except IntegrityError:
+        for key in missing:
+            _increment(model, {**fixed, field: key}, deltas[key])
+
+
+def apply_sales(rows, day, sign=1):
+    """
+    (product_id, adet, tutar) satırlarını `day` gününe ve sıralama özetine
+    ekler (sign=1) veya düşer (sign=-1).
+    """
+    from .models import Product, ProductSalesDay, ProductSalesRank
+
+    grouped = defaultdict(lambda: [0, Decimal('0')])
+    for product_id, units, revenue in rows:
+        grouped[product_id][0] += units
+        grouped[product_id][1] += revenue
+    if not grouped:
+        return
+
+    age = (timezone.localdate() - day).days
+    rank_deltas, day_deltas = {}, {}
+    for product_id, (units, revenue) in grouped.items():
+        units, revenue = sign * units, sign * revenue
+        values = {'units_total': units, 'revenue_total': revenue}
+        for window in WINDOWS:
+            if 0 <= age < window:
+                values[f'units_{window}d'] = units
+                values[f'revenue_{window}d'] = revenue
+        rank_deltas[product_id] = values
+        day_deltas[product_id] = {'units': units, 'revenue': revenue}
+    _increment_many(ProductSalesRank, 'product_id', rank_deltas)
+    if age < max(WINDOWS):
+        _increment_many(ProductSalesDay, 'product_id', day_deltas, day=day)
+    homepage.invalidate('bestsellers')
+    # Çok satan sıralaması listelerde görünür
+    versions.bump_categories(set(
+        Product.objects.filter(pk__in=grouped).values_list('category_id', flat=True)
+    ))
+
+
+def order_status_changed(order, old_status, new_status):
+    """Sipariş satılmış duruma girdiyse kalemleri ekle, çıktıysa düş."""
+    was_sold, is_sold = old_status in SOLD_STATUSES, new_status in SOLD_STATUSES
+    if was_sold == is_sold:
+        return
+    rows = order.items.values_list('product_id', 'quantity', 'line_total')
+    apply_sales(rows, sale_day(order), 1 if is_sold else -1)
+
+
+def item_added(item):
+    """Zaten ödenmiş olarak oluşturulan siparişe eklenen kalem (örn. test ödeme akışı)."""
+    if item.order.status in SOLD_STATUSES:
+        apply_sales([(item.product_id, item.quantity, item.line_total)], sale_day(item.order))
+
+
+def refresh_windows(today=None):
+    """
+    7/30 günlük toplamları günlük defterden yeniden hesaplar ve 30 günden eski
+    defter satırlarını budar. Günlük çalıştırılır; güncellenen ürün sayısını döndürür.
+    """
+    from .models import ProductSalesDay, ProductSalesRank
+
+    today = today or timezone.localdate()
+    since = {window: today - timedelta(days=window - 1) for window in WINDOWS}
+    with transaction.atomic():
+        ProductSalesDay.objects.filter(day__lt=since[max(WINDOWS)]).delete()
+        aggregates = {}
+        for window in WINDOWS:
+            in_window = Q(day__gte=since[window])
+            aggregates[f'units_{window}d'] = Coalesce(Sum('units', filter=in_window), 0)
+            aggregates[f'revenue_{window}d'] = Coalesce(Sum('revenue', filter=in_window), Decimal('0'))
+        windows = {
+            row.pop('product_id'): row
+            for row in ProductSalesDay.objects.order_by().values('product_id').annotate(**aggregates)
+        }
+        zero = {f'{kind}_{window}d': 0 for kind in ('units', 'revenue') for window in WINDOWS}
+        ProductSalesRank.objects.exclude(product_id__in=windows).update(**zero)
+        ranks = list(ProductSalesRank.objects.filter(product_id__in=windows))
+        for rank in ranks:
+            for field, value in windows[rank.product_id].items():
+                setattr(rank, field, value)
+        ProductSalesRank.objects.bulk_update(ranks, list(zero), batch_size=500)
+    homepage.invalidate('bestsellers')
+    versions.bump_epoch()
+    return len(ranks)
+
+
+def rebuild():
+    """
+    Sıralama özetini ve günlük defteri sipariş kalemlerinden baştan kurar
+    (backfill / tutarlılık onarımı). Yazılan ürün sayısını döndürür.
+    """
+    from .models import ArchivedOrderItem, OrderItem, ProductSalesDay, ProductSalesRank
+
+    sold = OrderItem.objects.filter(order__status__in=SOLD_STATUSES).order_by()
+    oldest = timezone.localdate() - timedelta(days=max(WINDOWS) - 1)
+    with transaction.atomic():
+        ProductSalesDay.objects.all().delete()
+        ProductSalesRank.objects.all().delete()
+        days = (
+            sold.annotate(day=TruncDate(Coalesce('order__paid_at', 'order__created_at')))
+            .filter(day__gte=oldest)
+            .values('product_id', 'day')
+            .annotate(units=Sum('quantity'), revenue=Sum('line_total'))
+        )
+        ProductSalesDay.objects.bulk_create(
+            [ProductSalesDay(**row) for row in days.iterator(chunk_size=2000)], batch_size=1000
+        )
+        # Toplamlara arşive taşınmış siparişler de girer (shop.archive)
+        totals = {}
+        for items in (sold, ArchivedOrderItem.objects.filter(order__status__in=SOLD_STATUSES).order_by()):
+            rows = items.values('product_id').annotate(units=Sum('quantity'), revenue=Sum('line_total'))
+            for row in rows.iterator(chunk_size=2000):
+                units, revenue = totals.get(row['product_id'], (0, 0))
+                totals[row['product_id']] = (units + row['units'], revenue + row['revenue'])
+        ProductSalesRank.objects.bulk_create(
+            [
+                ProductSalesRank(product_id=product_id, units_total=units, revenue_total=revenue)
+                for product_id, (units, revenue) in totals.items()
+            ],
+            batch_size=1000,
+        )
+    refresh_windows()
+    return ProductSalesRank.objects.count()
+
+
+def order_by_bestseller(queryset):
+    """Ürünleri son 30 günde satılan adede göre sıralar (satışı olmayanlar sonda)."""
+    return queryset.annotate(
+        bestseller_units=Coalesce(F('sales_rank__units_30d'), 0)
+    ).order_by('-bestseller_units', '-id')
+
+
+def bestseller_ids(limit, in_stock=True):
+    from .models import ProductSalesRank
+
+    ranks = ProductSalesRank.objects.filter(units_total__gt=0)
+    if in_stock:
+        ranks = ranks.filter(product__stock__gt=0)
+    return list(
+        ranks.order_by('-units_30d', '-units_total', 'product_id').values_list('product_id', flat=True)[:limit]
+    )
@@ -0,0 +1,344 @@
+"""
+Ürün arama indeksi.
+
+product_list, advanced_search ve search_autocomplete aynı API'yi kullanır:
+sorgu Türkçe kurallara göre normalize edilir, indekste token önekleriyle
+aranır ve eşleşen ürün ID'leri alaka sırasıyla döner (ad > kategori > açıklama).
+Listeler (`filter_products`) ID listesi taşımaz: eşleşme bir alt sorgu, alaka
+da arka ucun puan ifadesidir; sonuç sayısı sınırlanmaz.
+
+Arka uçlar veritabanı türüne göre seçilir:
+- SQLite: FTS5 sanal tablosu (shop_product_search), bm25 sıralaması
+- PostgreSQL: tsvector kolonu + GIN indeksi, ts_rank sıralaması
+- Diğerleri / FTS5 yoksa: normalize edilmiş icontains (yedek)
+
+İndeks Product kaydet/sil sinyalleriyle artımlı güncellenir;
+tam yeniden oluşturma için `rebuild_search_index` komutu kullanılır.
+"""
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+INDEX_TABLE = 'shop_product_search'
+
+# Türkçe büyük/küçük harf: I → ı, İ → i (str.lower() bunu yanlış yapar)
+_TR_LOWER = str.maketrans({'I': 'ı', 'İ': 'i'})
+# Aksan katlama: kullanıcılar çoğu zaman "gomlek" yazar
+_TR_FOLD = str.maketrans({'ç': 'c', 'ğ': 'g', 'ı': 'i', 'ö': 'o', 'ş': 's', 'ü': 'u', 'â': 'a', 'î': 'i', 'û': 'u'})
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize_text(text):
+    """
+    Metni aranabilir biçime getirir: Türkçe küçük harf, aksan katlama,
+    kalan birleşik işaretlerin atılması.
+
+    >>> normalize_text('IŞIK İğne Gömlek')
+    'isik igne gomlek'
+    """
+    if not text:
+        return ''
+    text = text.translate(_TR_LOWER).lower().translate(_TR_FOLD)
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    """Normalize edilmiş token listesi."""
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+def _result_limit():
+    return getattr(settings, 'SEARCH_RESULT_LIMIT', 1000)
+
+
+def _document(product, category_name=None):
+    if category_name is None:
+        category = getattr(product, 'category', None)
+        category_name = getattr(category, 'name', '') if category else ''
+    return (
+        product.pk,
+        normalize_text(product.name),
+        normalize_text(category_name),
+        normalize_text(product.description),
+    )
+
+
+class SearchBackend:
+    def index(self, documents):
+        """(id, ad, kategori, açıklama) belgelerini ekler/günceller."""
+        raise NotImplementedError
+
+    def remove(self, product_ids):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, tokens, limit):
+        """Alaka sırasına göre ürün ID listesi döndürür."""
+        raise NotImplementedError
+
+    def filter(self, queryset, tokens):
+        """Eşleşen ürünlere daraltılmış queryset (alt sorgu; ID listesi yok)."""
+        raise NotImplementedError
+
+    def rank(self, queryset, tokens):
+        """Alaka puanı ifadesi; küçük değer daha alakalı."""
+        raise NotImplementedError
+
+
+class SqliteFTSBackend(SearchBackend):
+    # bm25 ağırlıkları: ad, kategori, açıklama
+    WEIGHTS = (10.0, 3.0, 1.0)
+
+    def index(self, documents):
+        documents = list(documents)
+        if not documents:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {INDEX_TABLE} WHERE rowid = %s', [(d[0],) for d in documents])
+            cursor.executemany(
+                f'INSERT INTO {INDEX_TABLE} (rowid, name, category, description) VALUES (%s, %s, %s, %s)',
+                documents,
+            )
+
+    def remove(self, product_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {INDEX_TABLE} WHERE rowid = %s', [(pk,) for pk in product_ids])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {INDEX_TABLE}')
+
+    @staticmethod
+    def _match(tokens):
+        return ' '.join(f'"{t}"*' for t in tokens)
+
+    def _weights(self):
+        return ', '.join(str(w) for w in self.WEIGHTS)
+
+    def search(self, tokens, limit):
+        match = self._match(tokens)
+        weights = self._weights()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s '
+                f'ORDER BY bm25({INDEX_TABLE}, {weights}), rowid LIMIT %s',
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def filter(self, queryset, tokens):
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s', [self._match(tokens)])
+        )
+
+    def rank(self, queryset, tokens):
+        outer = f'{queryset.model._meta.db_table}.{queryset.model._meta.pk.column}'
+        return RawSQL(
+            f'SELECT bm25({INDEX_TABLE}, {self._weights()}) FROM {INDEX_TABLE} '
+            f'WHERE {INDEX_TABLE} MATCH %s AND rowid = {outer}',
+            [self._match(tokens)],
+        )
+
+
+class PostgresSearchBackend(SearchBackend):
+    _DOCUMENT_SQL = (
+        "setweight(to_tsvector('simple', %s), 'A') || "
+        "setweight(to_tsvector('simple', %s), 'B') || "
+        "setweight(to_tsvector('simple', %s), 'C')"
+    )
+
+    def index(self, documents):
+        documents = list(documents)
+        if not documents:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {INDEX_TABLE} (product_id, document) VALUES (%s, {self._DOCUMENT_SQL}) '
+                f'ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document',
+                documents,
+            )
+
+    def remove(self, product_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE product_id = ANY(%s)', [list(product_ids)])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {INDEX_TABLE}')
+
+    @staticmethod
+    def _tsquery(tokens):
+        return ' & '.join(f'{t}:*' for t in tokens)
+
+    def search(self, tokens, limit):
+        tsquery = self._tsquery(tokens)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT product_id FROM {INDEX_TABLE}, to_tsquery('simple', %s) q "
+                f"WHERE document @@ q ORDER BY ts_rank(document, q) DESC, product_id LIMIT %s",
+                [tsquery, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def filter(self, queryset, tokens):
+        return queryset.filter(pk__in=RawSQL(
+            f"SELECT product_id FROM {INDEX_TABLE} WHERE document @@ to_tsquery('simple', %s)",
+            [self._tsquery(tokens)],
+        ))
+
+    def rank(self, queryset, tokens):
+        outer = f'{queryset.model._meta.db_table}.{queryset.model._meta.pk.column}'
+        return RawSQL(
+            f"SELECT -ts_rank(document, to_tsquery('simple', %s)) FROM {INDEX_TABLE} WHERE product_id = {outer}",
+            [self._tsquery(tokens)],
+        )
+
+
+class FallbackSearchBackend(SearchBackend):
+    """İndeks tablosu olmayan veritabanları için icontains tabanlı yedek."""
+
+    def index(self, documents):
+        pass
+
+    def remove(self, product_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, tokens, limit):
+        from .models import Product
+
+        products = self.filter(Product.objects.all(), tokens)
+        return list(products.order_by('name', 'pk').values_list('pk', flat=True)[:limit])
+
+    def filter(self, queryset, tokens):
+        for token in tokens:
+            queryset = queryset.filter(
+                Q(name__icontains=token) | Q(description__icontains=token) | Q(category__name__icontains=token)
+            )
+        return queryset
+
+    def rank(self, queryset, tokens):
+        # Puan yok: ada göre
+        return F('name')
+
+
+def _has_fts5():
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pragma_compile_options WHERE compile_options = 'ENABLE_FTS5'")
+            return cursor.fetchone() is not None
+    except Exception:
+        return False
+
+
+_backend_cache = {}
+
+
+def get_backend():
+    """Aktif veritabanına uygun arama arka ucunu döndürür."""
+    vendor = connection.vendor
+    if vendor not in _backend_cache:
+        if vendor == 'postgresql':
+            backend = PostgresSearchBackend()
+        elif vendor == 'sqlite' and _has_fts5():
+            backend = SqliteFTSBackend()
+        else:
+            backend = FallbackSearchBackend()
+        _backend_cache[vendor] = backend
+    return _backend_cache[vendor]
+
+
+# --- Genel API ---
+
+def product_ids(query, limit=None):
+    """Sorguyla eşleşen ürün ID'leri, alaka sırasına göre."""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    return get_backend().search(tokens, limit or _result_limit())
+
+
+def filter_products(queryset, query, order_by_rank=True, limit=None):
+    """
+    Ürün queryset'ini arama sonucuna göre filtreler. order_by_rank ise
+    alaka sırası uygulanır (search_rank annotasyonu, arka ucun puanı);
+    değilse çağıran sıralar. limit verilirse sadece en alakalı ilk N eşleşme
+    dikkate alınır; verilmezse tüm eşleşmeler döner.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset.none()
+    backend = get_backend()
+    if limit is not None:
+        queryset = queryset.filter(pk__in=backend.search(tokens, limit))
+    else:
+        queryset = backend.filter(queryset, tokens)
+    if order_by_rank:
+        queryset = queryset.annotate(search_rank=backend.rank(queryset, tokens)).order_by('search_rank', 'pk')
+    return queryset
+
+
+def match_categories(query, limit=5):
+    """Kategori adlarında normalize edilmiş öneki/parçayı arar (küçük tablo)."""
+    from .models import Category
+
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    matches = []
+    for category in Category.objects.only('id', 'name').order_by('name'):
+        name = normalize_text(category.name)
+        if all(token in name for token in tokens):
+            matches.append(category)
+            if len(matches) >= limit:
+                break
+    return matches
+
+
+def index_products(products):
+    """Ürünleri (category select_related önerilir) indekse yazar."""
+    get_backend().index(_document(p) for p in products)
+
+
+def remove_products(ids):
+    ids = list(ids)
+    if ids:
+        get_backend().remove(ids)
+
+
+def reindex_category(category):
+    """Kategori adı değişince o kategorideki ürünlerin belgelerini günceller."""
+    from .models import Product
+
+    products = Product.objects.filter(category=category).only('id', 'name', 'description')
+    get_backend().index(_document(p, category.name) for p in products.iterator(chunk_size=500))
+
+
+def rebuild_index(batch_size=500):
+    """İndeksi baştan oluşturur; indekslenen ürün sayısını döndürür."""
+    from .models import Product
+
+    backend = get_backend()
+    backend.clear()
+    total = 0
+    batch = []
+    products = Product.objects.select_related('category').only(
+        'id', 'name', 'description', 'category__name'
+    ).order_by('pk')
+    for product in products.iterator(chunk_size=batch_size):
+        batch.append(_document(product))
+        if len(batch) >= batch_size:
+            backend.index(batch)
+            total += len(batch)
+            batch = []
+    backend.index(batch)
+    return total + len(batch)
@@ -1,4 +1,8 @@
-from django.conf import settings
+"""
+Kargo ücreti yardımcıları. Hesap shop/pricing.py'deki fiyat motorundadır;
+buradaki float arayüz eski çağıranlar içindir.
+"""
+from . import pricing
 
 
 def calc_shipping(subtotal: float, method: str) -> float:
@@ -12,13 +16,9 @@ def calc_shipping(subtotal: float, method: str) -> float:
     Returns:
         Kargo ücreti (float)
     """
-    if subtotal >= settings.FREE_SHIPPING_THRESHOLD:
-        return 0.0
-    
-    if method == "express":
-        return settings.SHIPPING_EXPRESS
-    else:
-        return settings.SHIPPING_STANDARD
+    rules = pricing.tables().shipping
+    rule = rules.get(method) or rules['standard']
+    return float(pricing.to_tl(rule.cost(pricing.to_kurus(subtotal), 0)))
 
 
 def get_shipping_methods():
@@ -29,6 +29,6 @@ def get_shipping_methods():
         List of tuples: (method_code, method_name, price)
     """
     return [
-        ('standard', 'Standart Kargo', settings.SHIPPING_STANDARD),
-        ('express', 'Hızlı Kargo', settings.SHIPPING_EXPRESS),
-    ]
\ No newline at end of file
+        (rule.code, rule.name, float(pricing.to_tl(rule.base)))
+        for rule in pricing.shipping_methods()
+    ]
@@ -1,25 +1,24 @@
-from django.db.models.signals import post_save, pre_save
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .models import Order, OrderStatusHistory
+from .models import (
+    Category, CategoryFacetSummary, Coupon, Order, OrderItem, OrderStatusHistory, PaymentMethod, Product,
+    ProductAttribute, ProductAttributeValue, ProductVariant, ProductVariantAttribute, Review, ShippingCompany,
+)
+from . import autocomplete, cart, dirty, facets, homepage, images, pricing, ratings, receipts, recommendations, sales_rank, search, variants, versions
 from .email_utils import send_order_status_email, send_shipping_notification_email
 from .utils.audit import get_current_user
 
 
+dirty.track(Order, 'status')
+
+
 @receiver(pre_save, sender=Order)
 def _capture_old_status(sender, instance, **kwargs):
     """
-    Güncelleme öncesi eski durumu yakala.
+    Güncelleme öncesi eski durumu yakala (yüklendiği andaki değer; sorgu yok).
     """
-    if not instance.pk:
-        instance.__old_status = None
-        return
-    
-    try:
-        old = Order.objects.only('status').get(pk=instance.pk)
-        instance.__old_status = getattr(old, 'status', None)
-    except Order.DoesNotExist:
-        instance.__old_status = None
-
+    instance.__old_status = dirty.old_value(instance, 'status')
 
 
 @receiver(post_save, sender=Order)
@@ -58,7 +57,8 @@ def _log_status_transition(sender, instance, created, **kwargs):
 @receiver(post_save, sender=Order)
 def order_post_save(sender, instance, created, **kwargs):
     """
-    Sipariş kaydedildikten sonra e-posta bildirimleri gönderir
+    Sipariş kaydedildikten sonra e-posta bildirimlerini kuyruğa yazar
+    (checkout transaction'ı ile birlikte commit olur; gönderim run_mailer'da)
     """
     if created:
         # Yeni sipariş oluşturuldu
@@ -69,4 +69,333 @@ def order_post_save(sender, instance, created, **kwargs):
         
         # Sipariş durumu değiştiyse e-posta gönder
         if status_changed:
-            send_order_status_email(instance, status_changed=True)
\ No newline at end of file
+            send_order_status_email(instance, status_changed=True)
+
+
+@receiver(post_save, sender=Order)
+def _sync_sales_rank_on_status_change(sender, instance, created, **kwargs):
+    """
+    Sipariş ödendi/kargolandı durumuna girdi ya da bu durumdan iptal edildi:
+    satış sıralamasını (ve birlikte alınan önerilerini) güncelle.
+    """
+    old_status = None if created else getattr(instance, '__old_status', None)
+    sales_rank.order_status_changed(instance, old_status, instance.status)
+    if old_status not in sales_rank.SOLD_STATUSES and instance.status in sales_rank.SOLD_STATUSES:
+        # Birlikte alınanlar: yeni satılan sepetin çiftleri (iptaller gece kurulumunda düşer)
+        recommendations.order_sold(instance)
+
+
+@receiver(post_save, sender=Order)
+def _refresh_receipt(sender, instance, raw=False, **kwargs):
+    """
+    Ödenmiş/kargolanmış/iptal siparişin fişi commit sonrası yeniden işlenir
+    (içerik özeti değişmediyse yazılmaz).
+    """
+    if not raw:
+        receipts.schedule(instance)
+
+
+@receiver(post_save, sender=OrderItem)
+def _sync_sales_rank_on_item_create(sender, instance, created, **kwargs):
+    """
+    Ödenmiş olarak oluşturulan siparişin kalemleri (durum geçişi yaşanmaz).
+    """
+    if created:
+        sales_rank.item_added(instance)
+        recommendations.item_added(instance)
+
+
+_RATING_FIELDS = ('product', 'rating', 'is_approved')
+dirty.track(Review, *_RATING_FIELDS)
+
+
+@receiver(pre_save, sender=Review)
+def _capture_old_review_rating(sender, instance, **kwargs):
+    """
+    Puan özetinden düşülecek eski (ürün, puan, onay) üçlüsünü yakala
+    (yüklendiği andaki değerler; sorgu yok).
+    """
+    if instance._state.adding:
+        instance._old_rating_state = None
+        return
+    
+    instance._old_rating_state = tuple(dirty.old_value(instance, field) for field in _RATING_FIELDS)
+
+
+@receiver(post_save, sender=Review)
+def _sync_rating_on_review_save(sender, instance, **kwargs):
+    """
+    Yorum eklendi/düzenlendi/onay durumu değişti: ürün puan özetini güncelle.
+    """
+    ratings.review_changed(getattr(instance, '_old_rating_state', None), instance)
+    instance._old_rating_state = None
+
+
+@receiver(post_delete, sender=Review)
+def _sync_rating_on_review_delete(sender, instance, **kwargs):
+    """
+    Onaylı yorum silindi: puanı ürün özetinden düş.
+    """
+    if instance.is_approved:
+        ratings.apply_review_rows([(instance.product_id, instance.rating)], -1)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def _invalidate_homepage_blocks(sender, **kwargs):
+    """
+    İlgili ana sayfa bloklarını bayat işaretle; yenileme ilk okumada arka planda yapılır.
+    """
+    homepage.invalidate_for_model(sender.__name__)
+
+
+_SEARCH_FIELDS = {'name', 'description', 'category', 'category_id'}
+
+
+@receiver(post_save, sender=Product)
+def _index_product_for_search(sender, instance, update_fields=None, **kwargs):
+    """
+    Ürün adı/açıklaması/kategorisi değiştiyse arama indeksini güncelle.
+    """
+    if update_fields is not None and not _SEARCH_FIELDS.intersection(update_fields):
+        return
+    search.index_products([instance])
+
+
+@receiver(post_delete, sender=Product)
+def _remove_product_from_search(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def _reindex_category_products(sender, instance, created, **kwargs):
+    """
+    Kategori adı ürün belgelerinde yer aldığı için kategori ürünlerini yeniden indeksle.
+    """
+    if not created:
+        search.reindex_category(instance)
+
+
+_AUTOCOMPLETE_FIELDS = {'name', 'price', 'image'}
+
+
+@receiver(post_save, sender=Product)
+def _refresh_autocomplete_product(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not _AUTOCOMPLETE_FIELDS.intersection(update_fields):
+        return
+    autocomplete.engine.product_changed(instance)
+
+
+@receiver(post_delete, sender=Product)
+def _remove_autocomplete_product(sender, instance, **kwargs):
+    autocomplete.engine.product_deleted(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def _refresh_autocomplete_category(sender, instance, **kwargs):
+    autocomplete.engine.category_changed(instance)
+
+
+@receiver(post_delete, sender=Category)
+def _remove_autocomplete_category(sender, instance, **kwargs):
+    autocomplete.engine.category_deleted(instance.pk)
+
+
+_FACET_STATE = ('category', 'price', 'stock', 'rating_avg', 'rating_count')
+_FACET_FIELDS = {'category', 'category_id', 'price', 'stock', 'rating_avg', 'rating_count'}
+dirty.track(Product, *_FACET_STATE)
+
+
+@receiver(pre_save, sender=Product)
+def _capture_old_facet_state(sender, instance, update_fields=None, **kwargs):
+    """
+    Faset özetinden düşülecek eski katkıyı (kategori, fiyat, stok, puan) yakala
+    (yüklendiği andaki değerler; sorgu yok).
+    """
+    instance._old_facet_row = None
+    if instance._state.adding or (update_fields is not None and not _FACET_FIELDS.intersection(update_fields)):
+        return
+    instance._old_facet_row = tuple(dirty.old_value(instance, field) for field in _FACET_STATE)
+
+
+@receiver(post_save, sender=Product)
+def _sync_facets_on_product_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Ürün eklendi/güncellendi: kategori faset satırlarına farkı uygula.
+    """
+    if not created and update_fields is not None and not _FACET_FIELDS.intersection(update_fields):
+        return
+    old_row = getattr(instance, '_old_facet_row', None)
+    if not created and old_row is None:
+        return
+    old_state = facets.product_state(*old_row) if old_row else None
+    price_changed = old_row is not None and old_row[1] != instance.price
+    facets.apply_state_change(old_state, facets.state_of(instance), bounds_changed=price_changed)
+
+
+@receiver(post_delete, sender=Product)
+def _sync_facets_on_product_delete(sender, instance, **kwargs):
+    facets.apply_state_change(facets.state_of(instance), None)
+
+
+@receiver(post_save, sender=Category)
+def _create_facet_summary(sender, instance, created, **kwargs):
+    if created:
+        CategoryFacetSummary.objects.get_or_create(category=instance)
+
+
+# --- Katalog sürüm damgaları (bkz. shop/versions.py) ---
+
+@receiver(post_save, sender=Product)
+def _bump_product_version(sender, instance, **kwargs):
+    """
+    Ürün ve kategorisinin damgasını düşür; kategori değiştiyse eskisininkini de
+    (eski kategori faset sinyalinin yakaladığı satırdan okunur).
+    """
+    old_row = getattr(instance, '_old_facet_row', None)
+    instance._old_facet_row = None
+    versions.bump_products([instance.pk])
+    versions.bump_categories({instance.category_id, old_row[0] if old_row else None})
+
+
+@receiver(post_delete, sender=Product)
+def _bump_product_version_on_delete(sender, instance, **kwargs):
+    versions.product_changed(instance.pk, [instance.category_id])
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def _bump_product_version_on_review_change(sender, instance, **kwargs):
+    # Puan ortalaması detay sayfasında ve listelerde görünür
+    category_id = Product.objects.filter(pk=instance.product_id).values_list('category_id', flat=True).first()
+    versions.product_changed(instance.product_id, [category_id])
+
+
+# Matriste ve detay gövdesinde görünen varyant alanları
+_VARIANT_FIELDS = ('product_id', 'sku', 'price', 'stock', 'is_active')
+
+
+@receiver(pre_save, sender=ProductVariant)
+def _capture_old_variant_row(sender, instance, update_fields=None, **kwargs):
+    """
+    Yalnız stoğun değişip değişmediğini anlamak için eski satırı yakala.
+    """
+    instance._old_variant_row = None
+    if not instance.pk or (update_fields is not None and set(update_fields) <= {'stock', 'updated_at'}):
+        return
+    instance._old_variant_row = ProductVariant.objects.filter(pk=instance.pk).values_list(*_VARIANT_FIELDS).first()
+
+
+@receiver(post_save, sender=ProductVariant)
+def _sync_variant_matrix_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Yalnız stok değiştiyse önbellekteki varyant matrisini yama; aksi halde
+    ürün sürümünü düşür (matris ve detay gövdesi yeniden kurulur).
+    """
+    old_row = getattr(instance, '_old_variant_row', None)
+    instance._old_variant_row = None
+    stock_only = update_fields is not None and set(update_fields) <= {'stock', 'updated_at'}
+    if not created and old_row is not None:
+        new_row = tuple(getattr(instance, field) for field in _VARIANT_FIELDS)
+        stock_index = _VARIANT_FIELDS.index('stock')
+        stock_only = all(
+            a == b for i, (a, b) in enumerate(zip(old_row, new_row)) if i != stock_index
+        )
+    if stock_only and not created:
+        variants.stock_changed(instance.product_id, instance.pk, instance.stock)
+    else:
+        versions.bump_products([instance.product_id])
+
+
+@receiver(post_delete, sender=ProductVariant)
+def _bump_product_version_on_variant_delete(sender, instance, **kwargs):
+    versions.bump_products([instance.product_id])
+
+
+@receiver(post_save, sender=ProductVariantAttribute)
+@receiver(post_delete, sender=ProductVariantAttribute)
+def _bump_product_version_on_variant_attribute_change(sender, instance, **kwargs):
+    # Varyantla birlikte silinirken varyant satırı gitmiş olabilir; o durumda varyant sinyali düşürür
+    product_id = ProductVariant.objects.filter(pk=instance.variant_id).values_list('product_id', flat=True).first()
+    if product_id is not None:
+        versions.bump_products([product_id])
+
+
+@receiver(post_save, sender=ProductAttributeValue)
+@receiver(post_delete, sender=ProductAttributeValue)
+def _bump_product_versions_on_attribute_value_change(sender, instance, **kwargs):
+    versions.bump_products(
+        ProductVariant.objects.filter(attribute_values__attribute_value_id=instance.pk)
+        .values_list('product_id', flat=True).distinct()
+    )
+
+
+@receiver(post_save, sender=ProductAttribute)
+def _bump_product_versions_on_attribute_change(sender, instance, created, **kwargs):
+    if not created:
+        versions.bump_products(
+            ProductVariant.objects.filter(attribute_values__attribute_value__attribute_id=instance.pk)
+            .values_list('product_id', flat=True).distinct()
+        )
+
+
+@receiver(post_save, sender=Category)
+def _bump_category_versions(sender, instance, created, **kwargs):
+    """Kategori adı ürün gövdesinde görünür."""
+    versions.bump_categories([instance.pk])
+    if created:
+        versions.forget_category_ids()
+    else:
+        versions.bump_products(instance.products.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def _forget_deleted_category(sender, instance, **kwargs):
+    versions.bump_categories([instance.pk])
+    versions.forget_category_ids()
+
+
+# --- Görsel türevleri (bkz. shop/images.py) ---
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductVariant)
+def _schedule_image_derivatives(sender, instance, update_fields=None, **kwargs):
+    """
+    Görsel yüklendi/değişti/kaldırıldı: commit sonrası türevleri üret.
+    """
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    images.schedule(instance)
+
+
+# --- Kalıcı sepet (bkz. shop/cart.py) ---
+
+@receiver(user_logged_in)
+def _merge_session_cart(sender, request, user, **kwargs):
+    """Girişte misafir sepetini kullanıcının kayıtlı sepetine birleştir."""
+    if request is not None:
+        cart.merge_session_cart(request, user)
+
+
+# --- Fiyat kuralları (bkz. shop/pricing.py) ---
+
+@receiver(post_save, sender=ShippingCompany)
+@receiver(post_delete, sender=ShippingCompany)
+@receiver(post_save, sender=PaymentMethod)
+@receiver(post_delete, sender=PaymentMethod)
+@receiver(post_save, sender=Coupon)
+@receiver(post_delete, sender=Coupon)
+def _invalidate_pricing_tables(sender, **kwargs):
+    """Kargo, ödeme ücreti ya da kupon düzenlendi: süreç içi kural tabloları yenilensin."""
+    pricing.invalidate()
+
+
+@receiver(m2m_changed, sender=Coupon.valid_categories.through)
+@receiver(m2m_changed, sender=Coupon.valid_users.through)
+def _invalidate_coupon_targets(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        pricing.invalidate()
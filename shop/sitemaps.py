@@ -1,22 +1,261 @@
-from django.contrib.sitemaps import Sitemap
+"""
+Önceden üretilmiş, parçalı site haritası dosyaları.
+
+`build_sitemaps` komutu ürünleri (stokta olanlar), kategorileri ve aktif
+SitemapEntry kayıtlarını parça parça okuyup gzip'li parça dosyalarına
+(en çok SHARD_SIZE URL) ve bunları listeleyen bir site haritası dizinine
+yazar. Dosyalar SITEMAP_ROOT altındadır ve coreseo görünümleri tarafından
+doğrudan sunulur.
+
+Parçalar ID aralığına göre sabittir (products-3 = ID 150000..199999);
+yeni kayıt yalnızca kendi aralığının parçasını kirletir. Her parçanın
+parmak izi (URL sayısı, ID toplamı, en yeni değişiklik zamanı) tek bir
+GROUP BY sorgusuyla okunur ve manifest.json'dakiyle aynıysa parça yeniden
+yazılmaz.
+
+lastmod gerçek değişiklik zamanıdır: ürünlerde Product.updated_at,
+kategorilerde içindeki ürünlerin en yenisi, sayfalarda SitemapEntry.lastmod.
+"""
+import gzip
+import json
+import os
+import re
+import time
+from datetime import timezone as dt_timezone
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count, F, Max, Sum
 from django.urls import reverse
-from .models import Product
-
-
-class ProductSitemap(Sitemap):
-    """Ürünler için sitemap"""
-    changefreq = 'daily'
-    priority = 0.8
-    
-    def items(self):
-        """Aktif ürünleri döndür"""
-        return Product.objects.filter(stock__gt=0).select_related('category')
-    
-    def lastmod(self, obj):
-        """Son değişiklik tarihi"""
-        # created_at varsa onu kullan, yoksa None döndür
-        return getattr(obj, 'updated_at', getattr(obj, 'created_at', None))
-    
-    def location(self, obj):
-        """Ürün detay URL'i"""
-        return reverse('shop:product_detail', args=[obj.pk])
\ No newline at end of file
+from django.utils import timezone
+
+SHARD_SIZE = 50000
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+INDEX_NAME = 'sitemap.xml'
+MANIFEST_NAME = 'manifest.json'
+SHARD_NAME = re.compile(r'(?P<section>[a-z]+)-(?P<shard>\d+)\.xml\.gz')
+
+_MARK = 987654321
+
+
+def sitemap_root():
+    return Path(getattr(settings, 'SITEMAP_ROOT', Path(settings.BASE_DIR) / 'sitemaps'))
+
+
+def index_path():
+    return sitemap_root() / INDEX_NAME
+
+
+def shard_path(name):
+    return sitemap_root() / name
+
+
+def base_url():
+    domain = getattr(settings, 'SITE_DOMAIN', 'localhost:8000')
+    protocol = 'https' if getattr(settings, 'USE_HTTPS', False) else 'http'
+    return f'{protocol}://{domain}'
+
+
+def _url_pattern(name):
+    # reverse() satır başına çağrılmaz: ID yerine işaret konup biçim dizgesi çıkarılır
+    return reverse(name, args=[_MARK]).replace(str(_MARK), '{}')
+
+
+def _lastmod(value):
+    if value is None:
+        return None
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%S+00:00')
+
+
+# --- Bölümler ---
+
+class Section:
+    """Site haritasının bir bölümü: satırları ID sırasıyla üretir."""
+
+    name = None
+    lastmod_field = None
+
+    def queryset(self):
+        raise NotImplementedError
+
+    def rows(self, queryset, chunk_size=2000):
+        """(id, loc, lastmod, changefreq, priority) demetleri."""
+        raise NotImplementedError
+
+    def shard_stats(self):
+        """{parça: parmak izi}; tek GROUP BY sorgusu."""
+        stats = (
+            self.queryset().order_by()
+            .annotate(shard=F('id') / SHARD_SIZE)
+            .values('shard')
+            .annotate(n=Count('id', distinct=True), id_sum=Sum('id', distinct=True), latest=Max(self.lastmod_field))
+        )
+        return {
+            row['shard']: {'n': row['n'], 'id_sum': row['id_sum'], 'latest': _lastmod(row['latest'])}
+            for row in stats
+        }
+
+    def shard_rows(self, shard, chunk_size=2000):
+        queryset = self.queryset().filter(id__gte=shard * SHARD_SIZE, id__lt=(shard + 1) * SHARD_SIZE)
+        return self.rows(queryset.order_by('id'), chunk_size)
+
+
+class ProductSection(Section):
+    name = 'products'
+    lastmod_field = 'updated_at'
+
+    def queryset(self):
+        from .models import Product
+
+        return Product.objects.filter(stock__gt=0)
+
+    def rows(self, queryset, chunk_size=2000):
+        pattern = base_url() + _url_pattern('shop:product_detail')
+        for pk, updated_at in queryset.values_list('id', 'updated_at').iterator(chunk_size=chunk_size):
+            yield pk, pattern.format(pk), _lastmod(updated_at), 'daily', '0.8'
+
+
+class CategorySection(Section):
+    name = 'categories'
+    lastmod_field = 'products__updated_at'
+
+    def queryset(self):
+        from .models import Category
+
+        return Category.objects.all()
+
+    def rows(self, queryset, chunk_size=2000):
+        pattern = base_url() + reverse('shop:product_list') + '?category={}'
+        rows = queryset.annotate(lastmod=Max('products__updated_at')).values_list('id', 'lastmod')
+        for pk, lastmod in rows.iterator(chunk_size=chunk_size):
+            yield pk, pattern.format(pk), _lastmod(lastmod), 'daily', '0.6'
+
+
+class PageSection(Section):
+    name = 'pages'
+    lastmod_field = 'lastmod'
+
+    def queryset(self):
+        from coreseo.models import SitemapEntry
+
+        return SitemapEntry.objects.filter(is_active=True)
+
+    def rows(self, queryset, chunk_size=2000):
+        base = base_url()
+        rows = queryset.values_list('id', 'url', 'lastmod', 'changefreq', 'priority')
+        for pk, url, lastmod, changefreq, priority in rows.iterator(chunk_size=chunk_size):
+            loc = url if url.startswith(('http://', 'https://')) else base + url
+            yield pk, loc, _lastmod(lastmod), changefreq, str(priority)
+
+
+SECTIONS = (ProductSection(), CategorySection(), PageSection())
+
+
+# --- XML ---
+
+def _url_element(loc, lastmod, changefreq, priority):
+    parts = [f'<url><loc>{escape(loc)}</loc>']
+    if lastmod:
+        parts.append(f'<lastmod>{lastmod}</lastmod>')
+    parts.append(f'<changefreq>{changefreq}</changefreq><priority>{priority}</priority></url>\n')
+    return ''.join(parts)
+
+
+def iter_urlset(rows):
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{XMLNS}">\n'
+    for _, loc, lastmod, changefreq, priority in rows:
+        yield _url_element(loc, lastmod, changefreq, priority)
+    yield '</urlset>\n'
+
+
+def iter_live_urlset(limit=SHARD_SIZE):
+    """Dosyalar henüz üretilmemişse sunulan canlı tek parça (ilk `limit` URL)."""
+    def rows():
+        remaining = limit
+        for section in SECTIONS:
+            for row in section.rows(section.queryset().order_by('id')[:remaining]):
+                yield row
+                remaining -= 1
+            if remaining <= 0:
+                return
+    return iter_urlset(rows())
+
+
+def _write_atomic(path, chunks, compress):
+    tmp = path.with_name(path.name + '.tmp')
+    opener = gzip.open if compress else open
+    with opener(tmp, 'wt', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp, path)
+
+
+def _index_xml(entries):
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{XMLNS}">\n'
+    for loc, lastmod in entries:
+        yield f'<sitemap><loc>{escape(loc)}</loc>'
+        if lastmod:
+            yield f'<lastmod>{lastmod}</lastmod>'
+        yield '</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def _load_manifest(root):
+    try:
+        return json.loads((root / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+# --- Kurulum ---
+
+def build(force=False, chunk_size=2000):
+    """
+    Kirli parçaları yeniden yazar, artık olmayanları siler ve dizini günceller.
+    İstatistik sözlüğü döndürür.
+    """
+    started = time.monotonic()
+    root = sitemap_root()
+    root.mkdir(parents=True, exist_ok=True)
+    old_manifest = _load_manifest(root)
+    manifest = {}
+    stats = {'written': [], 'skipped': 0, 'removed': [], 'urls': 0}
+
+    for section in SECTIONS:
+        for shard, fingerprint in sorted(section.shard_stats().items()):
+            name = f'{section.name}-{shard}.xml.gz'
+            manifest[name] = fingerprint
+            stats['urls'] += fingerprint['n']
+            if not force and old_manifest.get(name) == fingerprint and shard_path(name).exists():
+                stats['skipped'] += 1
+                continue
+            _write_atomic(shard_path(name), iter_urlset(section.shard_rows(shard, chunk_size)), compress=True)
+            stats['written'].append(name)
+
+    for name in old_manifest:
+        if name not in manifest:
+            try:
+                shard_path(name).unlink()
+            except FileNotFoundError:
+                pass
+            stats['removed'].append(name)
+
+    base = base_url()
+    entries = [
+        (base + reverse('coreseo:sitemap_shard', args=[name]), fingerprint['latest'])
+        for name, fingerprint in manifest.items()
+    ]
+    index = ''.join(_index_xml(entries))
+    try:
+        unchanged = index_path().read_text(encoding='utf-8') == index
+    except OSError:
+        unchanged = False
+    if not unchanged:
+        # Dizin yalnız değişince yazılır: Last-Modified tarayıcılar için anlamlı kalır
+        _write_atomic(index_path(), [index], compress=False)
+    _write_atomic(root / MANIFEST_NAME, [json.dumps(manifest, indent=1, sort_keys=True)], compress=False)
+    stats['seconds'] = time.monotonic() - started
+    return stats
@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from shop import autocomplete
+from shop.models import Category, Product
+
+
+class AutocompleteEngineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Gömlekler")
+        self.shirt = Product.objects.create(
+            name="Mavi Gömlek", price=100, stock=5, category=self.category, rating_count=3
+        )
+        self.popular = Product.objects.create(
+            name="Beyaz Gömlek", price=120, stock=5, category=self.category, rating_count=50
+        )
+        self.lamp = Product.objects.create(name="IŞIK Lamba", price=80, stock=5, category=self.category)
+        autocomplete.engine.build()
+
+    def tearDown(self):
+        cache.clear()
+
+    def _names(self, query):
+        return [s["name"] for s in autocomplete.engine.suggest(query) if s["type"] == "product"]
+
+    def test_prefix_matches_word_starts_with_turkish_folding(self):
+        self.assertEqual(self._names("gomle"), ["Beyaz Gömlek", "Mavi Gömlek"])
+        self.assertEqual(self._names("mavi göm"), ["Mavi Gömlek"])
+        self.assertEqual(self._names("ışı"), ["IŞIK Lamba"])
+        self.assertEqual(self._names("ömlek"), [])
+
+    def test_warm_engine_does_not_query_database(self):
+        autocomplete.engine.suggest("gom")
+        with self.assertNumQueries(0):
+            suggestions = autocomplete.engine.suggest("gom")
+        self.assertEqual(suggestions[-1]["type"], "category")
+
+    def test_signals_update_index_incrementally(self):
+        Product.objects.filter(pk=self.shirt.pk).update(rating_count=100)
+        self.shirt.refresh_from_db()
+        self.shirt.name = "Mavi Gömlek Slim"
+        self.shirt.save()
+        self.assertEqual(self._names("gom")[0], "Mavi Gömlek Slim")
+
+        self.popular.delete()
+        self.assertEqual(self._names("gom"), ["Mavi Gömlek Slim"])
+
+    def test_endpoint_keeps_json_shape(self):
+        response = self.client.get(reverse("shop:search_autocomplete"), {"q": "mavi"})
+        self.assertEqual(
+            response.json(),
+            {
+                "suggestions": [
+                    {
+                        "type": "product",
+                        "id": self.shirt.pk,
+                        "name": "Mavi Gömlek",
+                        "price": 100.0,
+                        "image": None,
+                        "url": f"/shop/product/{self.shirt.pk}/",
+                    }
+                ]
+            },
+        )
+
+    def test_stats_command_reports_memory(self):
+        out = StringIO()
+        call_command("autocomplete_stats", query=["gom"], stdout=out)
+        self.assertIn("Ürün: 3", out.getvalue())
+        self.assertIn("MB", out.getvalue())
@@ -0,0 +1,56 @@
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from shop.cart import Cart
+from shop.models import Category, Product, ProductVariant
+
+
+class CartHydrationTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Vazo")
+        self.request = RequestFactory().get("/")
+        self.request.session = SessionStore()
+
+    def _fill(self, lines):
+        cart = Cart(self.request)
+        for i in range(lines):
+            product = Product.objects.create(name=f"Ürün {i}", price=10 + i, stock=5, category=self.category)
+            if i % 2:
+                variant = ProductVariant.objects.create(product=product, sku=f"SKU-{i}", stock=5)
+                cart.add(product, 2, variant_id=variant.pk)
+            else:
+                cart.add(product, 1)
+        return Cart(self.request)
+
+    def test_query_count_is_independent_of_line_count(self):
+        for lines in (1, 10, 30):
+            Product.objects.all().delete()
+            self.request.session["cart"] = {}
+            cart = self._fill(lines)
+            with CaptureQueriesContext(connection) as queries:
+                items = list(cart)
+                # Tekrar gezinmek ve fiyat/kategori okumak sorgu yapmaz
+                list(cart)
+                for item in items:
+                    item["product"].category.name
+                    if item["variant"]:
+                        item["variant"].effective_price
+            # Ürünler için bir, varyantlar için bir in_bulk sorgusu
+            self.assertLessEqual(len(queries), 2)
+            self.assertEqual(len(items), lines)
+
+    def test_mutation_invalidates_memo(self):
+        cart = self._fill(2)
+        product = list(cart)[0]["product"]
+        cart.add(product, 1)
+        with self.assertNumQueries(2):
+            self.assertEqual(list(cart)[0]["quantity"], 2)
+
+    def test_deleted_products_are_dropped(self):
+        cart = self._fill(3)
+        Product.objects.filter(name="Ürün 1").delete()
+        items = list(Cart(self.request))
+        self.assertEqual([item["product"].name for item in items], ["Ürün 0", "Ürün 2"])
+        self.assertEqual(len(Cart(self.request)), 2)
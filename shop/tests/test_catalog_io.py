@@ -0,0 +1,94 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from shop.models import (
+    Category, CategoryFacetSummary, Product, ProductAttribute, ProductAttributeValue, ProductVariant,
+    ProductVariantAttribute,
+)
+
+CSV_HEADER = "category,product_sku,name,description,price,stock,variant_sku,variant_price,variant_stock,attributes\n"
+
+
+class CatalogImportExportTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _file(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def _import(self, path, **options):
+        out, err = io.StringIO(), io.StringIO()
+        call_command("catalog_import", path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_import_upserts_in_batches_and_reports_bad_rows(self):
+        path = self._file("feed.csv", CSV_HEADER + (
+            "Vazo,VZ-1,Beton Vazo,,100,0,VZ-1-K,,3,Renk=Kırmızı\n"
+            "Vazo,VZ-1,Beton Vazo,,100,0,VZ-1-M,110,2,Renk=Mavi\n"
+            "Saksı,SK-1,Saksı,,abc,1,,,,\n"
+            "Saksı,SK-2,Küçük Saksı,,40,7,,,,\n"
+        ))
+        out, err = self._import(path, batch_size=2)
+        self.assertIn("satır 4: price sayı değil", err)
+        self.assertIn("3 satır içe aktarıldı, 1 hatalı", out)
+        self.assertIn("satır/sn", out)
+
+        product = Product.objects.get(sku="VZ-1")
+        self.assertEqual(product.category.name, "Vazo")
+        self.assertEqual(
+            dict(ProductVariant.objects.filter(product=product).values_list("sku", "stock")),
+            {"VZ-1-K": 3, "VZ-1-M": 2},
+        )
+        self.assertEqual(CategoryFacetSummary.objects.get(category__name="Saksı").in_stock_count, 1)
+
+        # İkinci besleme: güncelleme, özellik değişimi; yeni kayıt oluşturulmaz
+        path = self._file("feed2.csv", CSV_HEADER + "Vazo,VZ-1,Beton Vazo XL,,120,0,VZ-1-K,,5,Renk=Mavi\n")
+        self._import(path)
+        product.refresh_from_db()
+        self.assertEqual((product.name, str(product.price)), ("Beton Vazo XL", "120.00"))
+        self.assertEqual(Product.objects.count(), 2)
+        self.assertEqual(
+            list(ProductVariantAttribute.objects.filter(variant__sku="VZ-1-K")
+                 .values_list("attribute_value__value", flat=True)),
+            ["Mavi"],
+        )
+
+    def test_export_round_trips_through_jsonl(self):
+        category = Category.objects.create(name="Mum")
+        product = Product.objects.create(name="Mumluk", sku="MM-1", price=50, stock=4, category=category)
+        variant = ProductVariant.objects.create(product=product, sku="MM-1-S", stock=2)
+        color = ProductAttribute.objects.create(name="Renk", display_name="Renk")
+        ProductVariantAttribute.objects.create(
+            variant=variant, attribute_value=ProductAttributeValue.objects.create(attribute=color, value="Sarı", display_value="Sarı")
+        )
+        Product.objects.create(name="Tekli", price=10, stock=1, category=category)
+
+        path = os.path.join(self.tmpdir.name, "catalog.jsonl")
+        out = io.StringIO()
+        with self.assertNumQueries(3):
+            call_command("catalog_export", path, chunk_size=100, stdout=out)
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([r["variant_sku"] for r in rows], ["MM-1-S", ""])
+        self.assertEqual(rows[0]["attributes"], {"Renk": "Sarı"})
+        self.assertIn("2 satır dışa aktarıldı", out.getvalue())
+
+        # Dışa aktarılan dosya geri yüklendiğinde hiçbir şey çoğalmaz; SKU'suz ürün ID ile eşleşir
+        rows[0]["price"] = "55.00"
+        path = self._file("catalog2.jsonl", "".join(json.dumps(r) + "\n" for r in rows))
+        self._import(path)
+        self.assertEqual(Product.objects.count(), 2)
+        self.assertEqual(ProductVariant.objects.count(), 1)
+        self.assertEqual(ProductVariantAttribute.objects.count(), 1)
+        self.assertEqual(str(Product.objects.get(sku="MM-1").price), "55.00")
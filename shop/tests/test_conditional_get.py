@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import TestCase
+from django.urls import reverse
+
+from core.checks import shared_cache_check
+from shop import versions
+from shop.autocomplete import engine
+from shop.models import Category, Product
+
+
+def _fresh_response(*args, **kwargs):
+    return HttpResponse()
+
+
+@mock.patch("shop.views.product.render", side_effect=_fresh_response)
+class CatalogConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Vazo")
+        self.other = Category.objects.create(name="Saksı")
+        self.product = Product.objects.create(name="Beton Vazo", price=100, stock=5, category=self.category)
+        self.list_url = reverse("shop:product_list") + "?category=%d" % self.category.pk
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_product_list_answers_304_before_view_queries(self, render):
+        etag = self.client.get(self.list_url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(render.call_count, 1)
+
+    def test_product_write_in_any_category_changes_list_etag(self, render):
+        etag = self.client.get(self.list_url)["ETag"]
+        # Faset kenar çubuğu tüm kategorileri saydığı için başka kategori de etkiler
+        Product.objects.create(name="Saksı", price=50, stock=1, category=self.other)
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_category_changes_list_etag(self, render):
+        etag = self.client.get(self.list_url)["ETag"]
+        Category.objects.create(name="Mum")
+        self.assertNotEqual(self.client.get(self.list_url)["ETag"], etag)
+
+    def test_signalless_stock_update_changes_detail_etag(self, render):
+        url = reverse("shop:product_detail", kwargs={"pk": self.product.pk})
+        etag = self.client.get(url)["ETag"]
+        Product.objects.filter(pk=self.product.pk).update(stock=0)
+        versions.product_changed(self.product.pk, [self.category.pk])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_epoch_bump_invalidates_every_etag(self, render):
+        url = reverse("shop:product_detail", kwargs={"pk": self.product.pk})
+        detail_etag = self.client.get(url)["ETag"]
+        list_etag = self.client.get(self.list_url)["ETag"]
+        versions.bump_epoch()
+        self.assertNotEqual(self.client.get(url)["ETag"], detail_etag)
+        self.assertNotEqual(self.client.get(self.list_url)["ETag"], list_etag)
+
+
+class AutocompleteConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Vazo")
+        Product.objects.create(name="Beton Vazo", price=100, stock=5, category=self.category)
+        engine.build()
+        self.url = reverse("shop:search_autocomplete") + "?q=bet"
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_unchanged_index_returns_304(self):
+        response = self.client.get(self.url)
+        self.assertIn("public", response["Cache-Control"])
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_index_change_changes_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        Product.objects.create(name="Beton Saksı", price=80, stock=5, category=self.category)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Beton Saksı", [s["name"] for s in response.json()["suggestions"]])
+
+
+class SharedCacheCheckTests(TestCase):
+    """Damgalar süreçler arası paylaşılmalı: üretimde süreç içi önbellek reddedilir."""
+
+    def test_process_local_cache_is_an_error_in_production(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        redis = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://x"}}
+        with self.settings(DEBUG=False, CACHES=locmem):
+            self.assertEqual([m.id for m in shared_cache_check(None)], ["core.C001"])
+        with self.settings(DEBUG=False, CACHES=redis):
+            self.assertEqual(shared_cache_check(None), [])
+        with self.settings(DEBUG=True, CACHES=locmem):
+            self.assertEqual(shared_cache_check(None), [])
@@ -0,0 +1,96 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.utils import timezone
+
+from security.models import UserSecuritySettings
+from shop import dirty
+from shop.models import Category, CategoryFacetSummary, Order, OrderStatusHistory, Product, Review
+
+
+class DirtyFieldTests(TestCase):
+    def _order(self):
+        return Order.objects.create(
+            email="ali@example.com", fullname="Ali Veli", phone="1", address="x", city="y", total=10,
+        )
+
+    def test_loaded_value_is_remembered(self):
+        order = Order.objects.get(pk=self._order().pk)
+        self.assertFalse(dirty.has_changed(order, "status"))
+        order.status = "cancelled"
+        self.assertTrue(dirty.has_changed(order, "status"))
+        self.assertEqual(dirty.old_value(order, "status"), "received")
+
+        order.save()
+        self.assertFalse(dirty.has_changed(order, "status"))
+        self.assertEqual(dirty.old_value(order, "status"), "cancelled")
+
+    def test_refresh_and_deferred_fields(self):
+        order = Order.objects.get(pk=self._order().pk)
+        Order.objects.filter(pk=order.pk).update(status="paid")
+        order.refresh_from_db()
+        self.assertEqual(dirty.old_value(order, "status"), "paid")
+
+        deferred = Order.objects.only("email").get(pk=order.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(dirty.old_value(deferred, "status"), "paid")
+
+    def test_order_status_update_does_not_reread_order(self):
+        order = Order.objects.get(pk=self._order().pk)
+        order.status = "cancelled"
+        with CaptureQueriesContext(connection) as queries:
+            order.save()
+        reads = [q["sql"] for q in queries if q["sql"].startswith("SELECT") and 'FROM "shop_order"' in q["sql"]]
+        self.assertEqual(reads, [])
+        history = OrderStatusHistory.objects.filter(order=order).order_by("pk").last()
+        self.assertEqual((history.from_status, history.to_status), ("received", "cancelled"))
+
+    def test_review_update_does_not_reread_review(self):
+        product = Product.objects.create(name="Vazo", price=100, stock=5, category=Category.objects.create(name="Ev"))
+        user = User.objects.create_user("ali", password="Gizli-Parola-42")
+        review = Review.objects.create(product=product, user=user, rating=4, is_approved=True)
+        review = Review.objects.get(pk=review.pk)
+        review.rating = 2
+        with CaptureQueriesContext(connection) as queries:
+            review.save()
+        reads = [q["sql"] for q in queries if q["sql"].startswith("SELECT") and 'FROM "shop_review"' in q["sql"]]
+        self.assertEqual(reads, [])
+        product.refresh_from_db()
+        self.assertEqual((product.rating_count, product.rating_avg), (1, 2))
+
+    def test_product_update_does_not_reread_product(self):
+        category = Category.objects.create(name="Ev")
+        product = Product.objects.get(pk=Product.objects.create(name="Vazo", price=100, stock=5, category=category).pk)
+        product.stock = 0
+        with CaptureQueriesContext(connection) as queries:
+            product.save()
+        reads = [
+            q["sql"] for q in queries
+            if q["sql"].startswith("SELECT") and q["sql"].split(" FROM ")[1].startswith('"shop_product" ')
+        ]
+        self.assertEqual(reads, [])
+        self.assertEqual(CategoryFacetSummary.objects.get(category=category).in_stock_count, 0)
+
+    def test_login_update_adds_no_queries(self):
+        User.objects.create_user("ali", password="Gizli-Parola-42")
+        user = User.objects.get(username="ali")
+        user.last_login = timezone.now()
+        with self.assertNumQueries(1):
+            user.save(update_fields=["last_login"])
+
+    def test_password_change_is_still_recorded(self):
+        User.objects.create_user("ali", password="Gizli-Parola-42")
+        user = User.objects.get(username="ali")
+        old_hash = user.password
+        user.set_password("Yeni-Parola-43")
+        user.save()
+        self.assertIn(old_hash, UserSecuritySettings.objects.get(user=user).password_history)
+
+    def test_login_reads_user_row_once(self):
+        User.objects.create_user("ali", password="Gizli-Parola-42")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(self.client.login(username="ali", password="Gizli-Parola-42"))
+        reads = [q["sql"] for q in queries if q["sql"].startswith("SELECT") and 'FROM "auth_user"' in q["sql"]]
+        # Yalnızca kimlik doğrulamadaki okuma; last_login kaydı kullanıcıyı yeniden okumaz
+        self.assertEqual(len(reads), 1, reads)
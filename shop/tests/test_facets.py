@@ -0,0 +1,88 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import TestCase
+from django.urls import reverse
+
+from shop import facets
+from shop.models import Category, CategoryFacetSummary, Product, Review
+
+User = get_user_model()
+
+
+def _summary(category):
+    row = CategoryFacetSummary.objects.get(category=category)
+    return {field: getattr(row, field) for field in facets.COUNT_FIELDS + ("min_price", "max_price")}
+
+
+class FacetSummaryTests(TestCase):
+    def setUp(self):
+        self.giyim = Category.objects.create(name="Giyim")
+        self.ev = Category.objects.create(name="Ev")
+        self.shirt = Product.objects.create(name="Gömlek", price=Decimal("80"), stock=3, category=self.giyim)
+        self.coat = Product.objects.create(name="Mont", price=Decimal("1200"), stock=0, category=self.giyim)
+        self.lamp = Product.objects.create(name="Lamba", price=Decimal("300"), stock=1, category=self.ev)
+
+    def assertMatchesRebuild(self):
+        incremental = {c.pk: _summary(c) for c in (self.giyim, self.ev)}
+        facets.rebuild()
+        self.assertEqual(incremental, {c.pk: _summary(c) for c in (self.giyim, self.ev)})
+
+    def test_incremental_updates_match_full_rebuild(self):
+        summary = _summary(self.giyim)
+        self.assertEqual((summary["product_count"], summary["in_stock_count"]), (2, 1))
+        self.assertEqual((summary["price_0"], summary["price_4"]), (1, 1))
+        self.assertEqual((summary["min_price"], summary["max_price"]), (Decimal("80"), Decimal("1200")))
+
+        self.shirt.price = Decimal("260")
+        self.shirt.stock = 0
+        self.shirt.save()
+        self.coat.category = self.ev
+        self.coat.save()
+        self.lamp.delete()
+        self.assertEqual(_summary(self.giyim)["min_price"], Decimal("260"))
+        self.assertMatchesRebuild()
+
+    def test_review_moves_rating_bucket(self):
+        user = User.objects.create_user(username="u1", password="pw")
+        review = Review.objects.create(product=self.shirt, user=user, rating=4, comment="iyi")
+        summary = _summary(self.giyim)
+        self.assertEqual((summary["rating_0"], summary["rating_4"]), (1, 1))
+        review.rating = 2
+        review.save()
+        self.assertEqual(_summary(self.giyim)["rating_2"], 1)
+        self.assertMatchesRebuild()
+
+    def test_unfiltered_facets_read_summary_in_one_query(self):
+        with self.assertNumQueries(1):
+            data = facets.get_facets(category=self.giyim.pk)
+        self.assertEqual({c.name: c.facet_count for c in data["categories"]}, {"Giyim": 2, "Ev": 1})
+        self.assertEqual((data["total"], data["in_stock"], data["out_of_stock"]), (2, 1, 1))
+        self.assertEqual(data["price_range"]["max_price"], Decimal("1200"))
+
+    def test_filtered_facets_ignore_their_own_filter(self):
+        with self.assertNumQueries(2):
+            data = facets.get_facets(min_price=100, in_stock=True)
+        # Kategori sayıları tüm filtreleri uygular
+        self.assertEqual({c.name: c.facet_count for c in data["categories"]}, {"Giyim": 0, "Ev": 1})
+        # Stok faseti stok filtresini, fiyat histogramı fiyat filtresini yok sayar
+        self.assertEqual((data["in_stock"], data["out_of_stock"]), (1, 1))
+        self.assertEqual(sum(b["count"] for b in data["price_buckets"]), 2)
+
+    def test_advanced_search_uses_facets(self):
+        with mock.patch("shop.views.product.render", return_value=HttpResponse()) as render:
+            self.client.get(reverse("shop:advanced_search"), {"category": self.ev.pk, "in_stock": "true"})
+        context = render.call_args.args[2]
+        self.assertEqual(context["facets"]["total"], 1)
+        self.assertEqual(context["price_range"]["min_price"], Decimal("300"))
+        self.assertEqual({c.name: c.facet_count for c in context["categories"]}, {"Giyim": 1, "Ev": 1})
+
+    def test_search_results_are_grouped_without_rank_annotation(self):
+        from shop import search
+
+        products = search.filter_products(Product.objects.select_related("category"), "lamba")
+        data = facets.get_facets(products, min_rating=None)
+        self.assertEqual({c.name: c.facet_count for c in data["categories"]}, {"Giyim": 0, "Ev": 1})
+        self.assertEqual(data["total"], 1)
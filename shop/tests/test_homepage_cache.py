@@ -0,0 +1,46 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from shop import homepage
+from shop.models import Category, Product
+
+
+@override_settings(HOMEPAGE_BLOCK_ASYNC=False)
+class HomepageBlockCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Kategori")
+        self.p1 = Product.objects.create(name="P1", price=10, stock=5, category=self.category)
+        self.p2 = Product.objects.create(name="P2", price=20, stock=5, category=self.category)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_warm_cache_uses_two_pk_queries(self):
+        homepage.get_homepage_blocks()
+        with self.assertNumQueries(2):
+            blocks = homepage.get_homepage_blocks()
+        self.assertEqual([p.pk for p in blocks["new_products"]], [self.p2.pk, self.p1.pk])
+        self.assertEqual(blocks["categories_with_count"][0].product_count, 2)
+
+    def test_product_save_marks_blocks_stale_and_rebuilds(self):
+        homepage.get_homepage_blocks()
+        p3 = Product.objects.create(name="P3", price=30, stock=5, category=self.category)
+        blocks = homepage.get_homepage_blocks()
+        self.assertEqual(blocks["new_products"][0].pk, p3.pk)
+
+    def test_stale_ids_are_filtered_on_hydration(self):
+        homepage.get_homepage_blocks()
+        # Sinyalsiz güncelleme: önbellek bayatlamaz, ama stoksuz ürün gösterilmez
+        Product.objects.filter(pk=self.p2.pk).update(stock=0)
+        blocks = homepage.get_homepage_blocks()
+        self.assertEqual([p.pk for p in blocks["new_products"]], [self.p1.pk])
+
+    @override_settings(HOMEPAGE_BLOCK_ASYNC=True)
+    def test_stale_block_served_while_single_rebuild_is_locked(self):
+        homepage.get_homepage_blocks()
+        homepage.invalidate("new_products")
+        # Kilit başka bir işçide tutuluyor: bayat veri sunulur, yeni iş başlatılmaz
+        cache.add(homepage._lock_key("new_products"), 1, 60)
+        with self.assertNumQueries(2):
+            homepage.get_homepage_blocks()
@@ -0,0 +1,85 @@
+import io
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core.templatetags.img_extras import responsive_img
+from shop import images
+from shop.models import Category, Product
+
+
+def _png(width, height, color=(200, 120, 40)):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, "PNG")
+    return SimpleUploadedFile("vazo.png", buffer.getvalue(), content_type="image/png")
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            IMAGE_DERIVATIVE_WIDTHS=(320, 800),
+            IMAGE_DERIVATIVE_FORMATS=("webp",),
+            IMAGE_DERIVATIVE_WORKERS=0,
+        )
+        self.settings_override.enable()
+        self.category = Category.objects.create(name="Vazo")
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _product(self, upload):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(name="Beton Vazo", price=100, stock=5, category=self.category, image=upload)
+        product.refresh_from_db()
+        return product
+
+    def test_upload_generates_content_addressed_derivatives(self):
+        product = self._product(_png(1000, 500))
+        meta = product.image_derivatives
+        self.assertEqual(meta["widths"], [320, 800])
+        self.assertEqual(meta["formats"], ["webp"])
+        self.assertTrue(meta["placeholder"].startswith("data:image/webp;base64,"))
+        for width in meta["widths"]:
+            path = Path(self.media_root) / images.derivative_name(meta["hash"], width, "webp")
+            with Image.open(path) as derivative:
+                self.assertEqual(derivative.size, (width, width // 2))
+        self.assertTrue(images.is_current(product))
+
+        # Aynı içerik başka bir yüklemede aynı adları alır
+        other = self._product(_png(1000, 500))
+        self.assertEqual(other.image_derivatives["hash"], meta["hash"])
+
+    def test_small_original_is_not_upscaled(self):
+        product = self._product(_png(400, 300))
+        self.assertEqual(product.image_derivatives["widths"], [320, 400])
+
+    def test_tag_emits_srcset_and_placeholder_without_queries(self):
+        product = self._product(_png(1000, 500))
+        with self.assertNumQueries(0):
+            html = responsive_img(product, alt="Vazo", sizes="50vw", w=600, h=300)
+        self.assertIn('type="image/webp"', html)
+        self.assertIn(" 320w, ", html)
+        self.assertIn('sizes="50vw"', html)
+        self.assertIn("background:url(data:image/webp;base64,", html)
+
+        product.image_derivatives = {}
+        self.assertNotIn("<picture", responsive_img(product))
+
+    def test_backfill_command_processes_only_stale_rows(self):
+        product = self._product(_png(1000, 500))
+        Product.objects.filter(pk=product.pk).update(image_derivatives={})
+        call_command("generate_thumbnails", workers=0, stdout=io.StringIO())
+        product.refresh_from_db()
+        self.assertTrue(images.is_current(product))
+
+        out = io.StringIO()
+        call_command("generate_thumbnails", workers=0, stdout=out)
+        self.assertIn("0 görsel işlendi, 1 güncel", out.getvalue())
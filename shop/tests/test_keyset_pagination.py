@@ -0,0 +1,101 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.http import HttpResponse
+
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from shop import pagination, sales_rank
+from shop.models import Category, Product
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        category = Category.objects.create(name="Kategori")
+        # Aynı fiyat/puan değerleri: eşitlikte sıra ID ile sabitlenmeli
+        self.products = [
+            Product.objects.create(
+                name=f"Ürün {i % 4}", price=Decimal(10 + i % 3), stock=1, category=category, rating_avg=i % 5
+            )
+            for i in range(11)
+        ]
+
+    def _queryset(self):
+        # 'bestseller' sıralaması satış annotasyonu ister
+        return sales_rank.order_by_bestseller(Product.objects.all())
+
+    def _walk(self, sort, per_page=3):
+        params = {"sort": sort}
+        seen = []
+        pages = 0
+        while True:
+            page = pagination.paginate(self.factory.get("/", params), self._queryset(), sort, per_page=per_page)
+            seen.extend(p.pk for p in page)
+            pages += 1
+            if not page.has_next():
+                return seen, pages, page
+            params = {"sort": sort, "cursor": page.next_cursor}
+
+    def test_forward_walk_matches_full_ordering_for_every_sort(self):
+        for sort in pagination.SORTS:
+            expected = list(
+                self._queryset().order_by(*pagination.ordering_for(sort)).values_list("pk", flat=True)
+            )
+            seen, pages, _ = self._walk(sort)
+            self.assertEqual(seen, expected, sort)
+            self.assertEqual(pages, 4)
+
+    def test_previous_cursor_returns_same_page(self):
+        first = pagination.paginate(self.factory.get("/"), Product.objects.all(), "price_asc", per_page=3)
+        second = pagination.paginate(
+            self.factory.get("/", {"cursor": first.next_cursor}), Product.objects.all(), "price_asc", per_page=3
+        )
+        back = pagination.paginate(
+            self.factory.get("/", {"cursor": second.previous_cursor}), Product.objects.all(), "price_asc", per_page=3
+        )
+        self.assertEqual([p.pk for p in back], [p.pk for p in first])
+        self.assertFalse(back.has_previous())
+        self.assertTrue(second.has_previous())
+
+    def test_deep_page_uses_single_query_and_carries_total(self):
+        first = pagination.paginate(self.factory.get("/"), Product.objects.all(), "new", per_page=3)
+        self.assertEqual((first.total, first.total_capped), (11, False))
+        with self.assertNumQueries(1):
+            second = pagination.paginate(
+                self.factory.get("/", {"cursor": first.next_cursor}), Product.objects.all(), "new", per_page=3
+            )
+        self.assertEqual(second.total, 11)
+
+    def test_total_is_capped(self):
+        with self.settings(CATALOG_COUNT_CAP=5):
+            page = pagination.paginate(self.factory.get("/"), Product.objects.all(), "name", per_page=3)
+        self.assertEqual((page.total, page.total_capped), (5, True))
+
+    def test_tampered_or_foreign_cursor_falls_back_to_first_page(self):
+        first = pagination.paginate(self.factory.get("/"), Product.objects.all(), "price_asc", per_page=3)
+        for cursor in (first.next_cursor + "x", first.next_cursor):
+            page = pagination.paginate(
+                self.factory.get("/", {"cursor": cursor}), Product.objects.all(), "price_desc", per_page=3
+            )
+            self.assertFalse(page.has_previous())
+
+    def test_legacy_page_parameter_uses_paginator(self):
+        self.assertFalse(pagination.use_cursor(self.factory.get("/", {"page": "2"}), "new"))
+        self.assertFalse(pagination.use_cursor(self.factory.get("/"), None))
+        self.assertTrue(pagination.use_cursor(self.factory.get("/"), "rating"))
+
+    def test_advanced_search_serves_cursor_and_legacy_pages(self):
+        url = reverse("shop:advanced_search")
+        category = self.products[0].category
+        for i in range(3):
+            Product.objects.create(name=f"Ek {i}", price=Decimal(20), stock=1, category=category)
+        with mock.patch("shop.views.product.render", return_value=HttpResponse()) as render:
+            self.client.get(url, {"sort": "price_asc"})
+            page = render.call_args.args[2]["page_obj"]
+            self.assertTrue(page.is_cursor)
+            self.assertIn("cursor=", page.next_query)
+
+            self.client.get(url, {"sort": "price_asc", "page": "2"})
+            self.assertEqual(render.call_args.args[2]["page_obj"].number, 2)
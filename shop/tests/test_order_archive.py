@@ -0,0 +1,125 @@
+import io
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from shop import archive, rollups, sales_rank
+from shop.models import (
+    ArchivedCouponUsage, ArchivedOrder, ArchivedOrderItem, ArchivedOrderReceipt, ArchivedOrderStatusHistory,
+    Category, Coupon, CouponUsage, Order, OrderItem, OrderReceipt, OrderStatusHistory, Product, ProductSalesRank,
+    SalesDay,
+)
+
+
+class OrderArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("ali", email="ali@example.com", password="Gizli-Parola-42")
+        category = Category.objects.create(name="Vazo")
+        self.product = Product.objects.create(name="Beton Vazo", price=100, stock=50, category=category)
+        self.coupon = Coupon.objects.create(
+            code="YAZ10", name="Yaz", discount_type="fixed", discount_value=10,
+            valid_from=timezone.now() - timedelta(days=800), valid_until=timezone.now() + timedelta(days=30),
+        )
+
+    def _order(self, status="shipped", months_ago=13, quantity=2):
+        order = Order.objects.create(
+            user=self.user, email="ali@example.com", fullname="Ali Veli", phone="1", address="Adres", city="İstanbul",
+            total=100 * quantity, payment_provider="iyzico",
+        )
+        OrderItem.objects.create(
+            order=order, product=self.product, quantity=quantity, unit_price=100, line_total=100 * quantity,
+        )
+        CouponUsage.objects.create(coupon=self.coupon, user=self.user, order=order, discount_amount=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = status
+            order.save()
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=31 * months_ago))
+        order.refresh_from_db()
+        return order
+
+    def test_moves_old_closed_orders_with_children(self):
+        old = self._order()
+        cancelled = self._order(status="cancelled")
+        recent = self._order(months_ago=1)
+        unshipped = self._order(status="paid")
+        history = OrderStatusHistory.objects.filter(order=old).count()
+
+        stats = archive.run(months=12, batch_size=1)
+        self.assertEqual(stats["orders"], 2)
+        self.assertEqual(set(Order.objects.values_list("pk", flat=True)), {recent.pk, unshipped.pk})
+
+        archived = ArchivedOrder.objects.get(pk=old.pk)
+        self.assertEqual((archived.created_at, archived.updated_at), (old.created_at, old.updated_at))
+        self.assertEqual((archived.number, archived.status, archived.total), (old.number, "shipped", old.total))
+        self.assertEqual(ArchivedOrderItem.objects.get(order=archived).quantity, 2)
+        self.assertEqual(ArchivedOrderStatusHistory.objects.filter(order=archived).count(), history)
+        self.assertEqual(ArchivedCouponUsage.objects.filter(order__in=[old.pk, cancelled.pk]).count(), 2)
+        self.assertEqual(ArchivedOrderReceipt.objects.get(order=archived).status, "shipped")
+        self.assertFalse(OrderItem.objects.filter(order_id__in=[old.pk, cancelled.pk]).exists())
+        self.assertFalse(OrderReceipt.objects.filter(order_id__in=[old.pk, cancelled.pk]).exists())
+
+        # Tekrar çalıştırmak bir şey taşımaz
+        self.assertEqual(archive.run(months=12)["orders"], 0)
+
+    def test_read_through_views(self):
+        order = self._order()
+        archive.run(months=12)
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("shop:order_detail", args=[order.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["order"].is_archived)
+        self.assertContains(response, "Beton Vazo")
+
+        response = self.client.get(response.context["receipt_url"])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Beton Vazo", response.content)
+        self.assertEqual(
+            response["ETag"], f'"{ArchivedOrderReceipt.objects.get(order_id=order.pk).digest}-id"',
+        )
+
+        response = self.client.post(reverse("shop:track_order"), {"order_id": order.pk, "email": "ali@example.com"})
+        self.assertEqual(response.context["order"].pk, order.pk)
+        response = self.client.post(reverse("shop:track_order"), {"order_id": order.pk, "email": "veli@example.com"})
+        self.assertIsNone(response.context["order"])
+
+        # Üretimdeki gibi templates/404.html işlenir
+        with override_settings(DEBUG=False):
+            response = self.client.get(reverse("shop:order_detail", args=[order.pk + 100]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_reports_include_archived_orders(self):
+        self._order(quantity=2)
+        self._order(months_ago=0, quantity=3)
+        archive.run(months=12)
+
+        rollups.run(full=True)
+        self.assertEqual(sum(SalesDay.objects.values_list("units", flat=True)), 5)
+        self.assertEqual(sum(SalesDay.objects.values_list("revenue", flat=True)), Decimal("500"))
+
+        sales_rank.rebuild()
+        self.assertEqual(ProductSalesRank.objects.get(product=self.product).units_total, 5)
+
+    def test_command_reports_rate_and_sizes(self):
+        self._order()
+        out = io.StringIO()
+        call_command("archive_orders", "--dry-run", stdout=out)
+        self.assertIn("1 sipariş arşivlenebilir", out.getvalue())
+
+        out = io.StringIO()
+        call_command("archive_orders", "--months", "12", "--batch-size", "10", stdout=out)
+        output = out.getvalue()
+        self.assertIn("1 sipariş arşivlendi", output)
+        self.assertIn("satır/sn", output)
+        self.assertIn(f"{Order._meta.db_table}: 1 → 0 satır (-1)", output)
+        self.assertIn(f"{ArchivedOrder._meta.db_table}: 0 → 1 satır (+1)", output)
+
+    def test_cutoff_clamps_month_end(self):
+        now = timezone.make_aware(datetime(2024, 3, 31, 12, 0))
+        self.assertEqual(archive.cutoff(1, now).date().isoformat(), "2024-02-29")
+        self.assertEqual(archive.cutoff(14, now).date().isoformat(), "2023-01-31")
@@ -5,6 +5,7 @@ from django.core import mail
 from decimal import Decimal
 from shop.models import Product, Category, Order, OrderItem
 from shop.cart import Cart
+from shop import outbox
 import sys
 import logging
 
@@ -43,7 +44,8 @@ class OrderCreationTestCase(TestCase):
         
     def test_order_creation_flow(self):
         """Sipariş oluşturma akışını test et"""
-        # E-posta kutusunu temizle
+        # E-posta kutusunu temizle (girişte kuyruğa alınan bildirim dahil)
+        outbox.drain()
         mail.outbox.clear()
         # Ürünü sepete ekle
         response = self.client.post(reverse('shop:add_to_cart', kwargs={'product_id': self.product.id}), {
@@ -106,7 +108,8 @@ class OrderCreationTestCase(TestCase):
         self.product.refresh_from_db()
         self.assertEqual(self.product.stock, 4)
         
-        # E-posta kontrolü (sipariş onayı + durum bildirimi)
+        # E-posta kontrolü (sipariş onayı + durum bildirimi); kuyruk run_mailer ile boşalır
+        outbox.drain()
         self.assertEqual(len(mail.outbox), 2)
         email = mail.outbox[0]
         self.assertIn('Ödemeniz onaylandı', email.subject)
@@ -114,7 +117,8 @@ class OrderCreationTestCase(TestCase):
         
     def test_insufficient_stock(self):
         """Yetersiz stok durumunu test et"""
-        # E-posta kutusunu temizle
+        # E-posta kutusunu temizle (girişte kuyruğa alınan bildirim dahil)
+        outbox.drain()
         mail.outbox.clear()
         # Stoku 0 yap
         self.product.stock = 0
@@ -147,4 +151,5 @@ class OrderCreationTestCase(TestCase):
         self.assertEqual(OrderItem.objects.count(), 0)
         
         # E-posta gönderilmemiş olmalı
+        outbox.drain()
         self.assertEqual(len(mail.outbox), 0)
\ No newline at end of file
@@ -0,0 +1,67 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from shop.models import Category, Order, OrderItem, Product
+
+
+@override_settings(ORDER_HISTORY_PAGE_SIZE=5)
+class OrderHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("ali", password="Gizli-Parola-42")
+        self.other = User.objects.create_user("veli", password="Gizli-Parola-42")
+        category = Category.objects.create(name="Vazo")
+        self.products = [Product.objects.create(name=f"Ürün {i}", price=10, stock=100, category=category) for i in range(3)]
+        self.client.force_login(self.user)
+
+    def _orders(self, count, user=None, lines=2):
+        orders = []
+        for _ in range(count):
+            order = Order.objects.create(
+                user=user or self.user, email="ali@example.com", fullname="Ali", phone="1", address="x", city="y", total=30,
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=product, quantity=i + 1, unit_price=10, line_total=10 * (i + 1))
+                for i, product in enumerate(self.products[:lines])
+            ])
+            orders.append(order)
+        return orders
+
+    def _get(self, query=""):
+        response = self.client.get(reverse("shop:my_orders") + query)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_pages_follow_cursor_newest_first(self):
+        orders = self._orders(12)
+        self._orders(2, user=self.other)
+        seen = []
+        page = self._get().context["page_obj"]
+        while True:
+            seen.extend(order.pk for order in page)
+            if not page.has_next():
+                break
+            page = self._get("?" + page.next_query).context["page_obj"]
+        self.assertEqual(seen, [order.pk for order in reversed(orders)])
+
+    def test_listing_is_annotated(self):
+        self._orders(1, lines=3)
+        order = self._get().context["page_obj"][0]
+        self.assertEqual((order.item_count, order.item_units, order.first_item_name), (3, 6, "Ürün 0"))
+
+    def test_query_count_does_not_grow_with_orders_or_items(self):
+        self._orders(1, lines=1)
+        with CaptureQueriesContext(connection) as small:
+            self._get()
+        self._orders(10, lines=3)
+        with CaptureQueriesContext(connection) as large:
+            self._get()
+        self.assertEqual(len(small), len(large))
+
+    def test_detail_loads_items(self):
+        order = self._orders(1, lines=2)[0]
+        response = self.client.get(reverse("shop:order_detail", args=[order.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["order_items"]), 2)
@@ -0,0 +1,110 @@
+import io
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from shop import orders, pricing, reservations
+from shop.cart import Cart
+from shop.models import Category, Order, OrderItem, Product, ProductSalesRank, StockReservation
+
+CHECKOUT_DATA = {
+    "email": "ali@example.com", "fullname": "Ali Veli", "phone": "05550000000",
+    "address": "Adres", "city": "İstanbul", "shipping_method": "standard",
+}
+
+
+class OrderPlacementTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("ali", password="Gizli-Parola-42")
+        self.category = Category.objects.create(name="Vazo")
+
+    def tearDown(self):
+        cache.clear()
+
+    def _cart(self, lines, stock=5):
+        request = RequestFactory().get("/")
+        request.session = SessionStore()
+        cart = Cart(request)
+        for i in range(lines):
+            product = Product.objects.create(name=f"Ürün {i}", price=10 + i, stock=stock, category=self.category)
+            cart.add(product, 2)
+        return cart
+
+    def _place(self, cart, status="paid", key="hold"):
+        self.assertEqual(reservations.reserve(key, cart.lines()), [])
+        breakdown = pricing.price(list(cart), "standard")
+        with transaction.atomic():
+            return orders.place(self.user, CHECKOUT_DATA, breakdown, key, status=status)
+
+    def test_query_count_is_independent_of_line_count(self):
+        counts = []
+        # Tek satırlı sepette birlikte alınan çifti yok; 2 satırdan itibaren sabit
+        for lines in (2, 10, 30):
+            Product.objects.all().delete()
+            cart = self._cart(lines)
+            self.assertEqual(reservations.reserve("hold", cart.lines()), [])
+            breakdown = pricing.price(list(cart), "standard")
+            with CaptureQueriesContext(connection) as queries:
+                with transaction.atomic():
+                    order = orders.place(self.user, CHECKOUT_DATA, breakdown, "hold", status="paid")
+            counts.append(len(queries))
+            self.assertEqual(order.items.count(), lines)
+            Order.objects.all().delete()
+        self.assertEqual(len(set(counts)), 1, counts)
+
+    def test_paid_order_decrements_stock_and_converts_holds(self):
+        cart = self._cart(3)
+        order = self._place(cart)
+        self.assertEqual(list(Product.objects.values_list("stock", "reserved").distinct()), [(3, 0)])
+        self.assertEqual(set(StockReservation.objects.values_list("status", flat=True)), {"converted"})
+        self.assertEqual(order.total, Decimal("10.00") * 2 + Decimal("11.00") * 2 + Decimal("12.00") * 2 + Decimal("49.90"))
+        # bulk_create sinyal göndermez; satış özeti yine güncellenir
+        self.assertEqual(ProductSalesRank.objects.filter(units_total=2).count(), 3)
+
+    def test_received_order_keeps_stock_for_callback(self):
+        cart = self._cart(2)
+        order = self._place(cart, status="received")
+        self.assertEqual(list(Product.objects.values_list("stock", "reserved").distinct()), [(5, 2)])
+        self.assertEqual(StockReservation.objects.filter(order=order, status="active").count(), 2)
+        self.assertEqual(reservations.convert(order), [])
+        self.assertEqual(list(Product.objects.values_list("stock", "reserved").distinct()), [(3, 0)])
+
+    def test_insufficient_line_rolls_back_everything(self):
+        cart = self._cart(3)
+        breakdown = pricing.price(list(cart), "standard")
+        short = Product.objects.order_by("pk").last()
+        Product.objects.filter(pk=short.pk).update(stock=1)
+        with self.assertRaisesMessage(orders.PlacementError, short.name):
+            with transaction.atomic():
+                orders.place(self.user, CHECKOUT_DATA, breakdown, "hold", status="paid")
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertEqual(sorted(Product.objects.values_list("stock", flat=True)), [1, 5, 5])
+
+    def test_decrement_reports_failed_lines_and_changes_nothing(self):
+        a = Product.objects.create(name="A", price=10, stock=5, category=self.category)
+        b = Product.objects.create(name="B", price=10, stock=1, category=self.category)
+        c = Product.objects.create(name="C", price=10, stock=0, category=self.category)
+        self.assertEqual(reservations.decrement({a.pk: 2, b.pk: 2, c.pk: 1}), [b.pk, c.pk])
+        self.assertEqual(list(Product.objects.order_by("pk").values_list("stock", flat=True)), [5, 1, 0])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(reservations.decrement({a.pk: 2, b.pk: 1}), [])
+        # Başarılı düşüm tek UPDATE (savepoint dışında sorgu yok)
+        self.assertEqual([q["sql"].split()[0] for q in queries if "SAVEPOINT" not in q["sql"]], ["UPDATE"])
+        self.assertEqual(list(Product.objects.order_by("pk").values_list("stock", flat=True)), [3, 0, 0])
+
+
+class BenchCheckoutCommandTests(TestCase):
+    def test_command_reports_each_cart_size(self):
+        out = io.StringIO()
+        call_command("bench_checkout", "--lines", "1", "3", "--repeat", "1", stdout=out)
+        output = out.getvalue()
+        self.assertIn("sorgu", output)
+        self.assertFalse(Order.objects.exists())
@@ -0,0 +1,95 @@
+import io
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from shop import outbox
+from shop.models import Category, Order, OutboxEmail, Product, StockAlert
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend", EMAIL_OUTBOX_MAX_ATTEMPTS=3)
+class OutboxTests(TestCase):
+    def setUp(self):
+        mail.outbox = []
+
+    def _order(self, status="received"):
+        return Order.objects.create(
+            email="ali@example.com", fullname="Ali Veli", phone="1", address="x", city="y", total=10, status=status,
+        )
+
+    def test_order_save_queues_instead_of_sending(self):
+        order = self._order()
+        self.assertEqual(mail.outbox, [])
+        row = OutboxEmail.objects.get()
+        self.assertEqual((row.renderer, row.to, row.status), ("shop.email_utils.render_order_status", ["ali@example.com"], "pending"))
+
+        self.assertEqual(outbox.deliver(), (1, 0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(f"#{order.number}", mail.outbox[0].subject)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ("sent", 1))
+        self.assertIsNotNone(row.sent_at)
+        self.assertEqual(outbox.deliver(), (0, 0, 0))
+
+    def test_batch_uses_one_connection(self):
+        for i in range(5):
+            outbox.enqueue_message(f"Konu {i}", "Metin", f"u{i}@example.com")
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.open") as opened:
+            self.assertEqual(outbox.deliver(batch_size=10), (5, 0, 0))
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual([m.subject for m in mail.outbox], [f"Konu {i}" for i in range(5)])
+
+    def test_failure_backs_off_then_dead_letters(self):
+        row = outbox.enqueue_message("Konu", "Metin", "ali@example.com")
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=OSError("smtp kapalı")):
+            self.assertEqual(outbox.deliver(), (0, 1, 0))
+            row.refresh_from_db()
+            self.assertEqual((row.status, row.attempts), ("pending", 1))
+            self.assertIn("smtp kapalı", row.last_error)
+            self.assertGreater(row.next_attempt_at, timezone.now())
+            # Bekleme dolmadan tekrar denenmez
+            self.assertEqual(outbox.deliver(), (0, 0, 0))
+
+            for expected in ((0, 1, 0), (0, 0, 1)):
+                OutboxEmail.objects.update(next_attempt_at=timezone.now())
+                self.assertEqual(outbox.deliver(), expected)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ("dead", 3))
+
+        outbox.requeue(OutboxEmail.objects.all())
+        self.assertEqual(outbox.deliver(), (1, 0, 0))
+
+    def test_failed_render_does_not_block_batch(self):
+        outbox.enqueue("shop.email_utils.render_order_status", "yok@example.com", order_id=0, status="paid")
+        outbox.enqueue_message("Konu", "Metin", "ali@example.com")
+        self.assertEqual(outbox.deliver(), (1, 1, 0))
+        self.assertIn("DoesNotExist", OutboxEmail.objects.get(status="pending").last_error)
+
+    def test_backoff_is_exponential(self):
+        self.assertEqual([outbox.backoff(n) for n in (1, 2, 3)], [60, 120, 240])
+
+    def test_login_notification_and_stock_alert_are_queued(self):
+        user = User.objects.create_user("ali", email="ali@example.com", password="Gizli-Parola-42")
+        self.client.login(username="ali", password="Gizli-Parola-42")
+        category = Category.objects.create(name="Vazo")
+        product = Product.objects.create(name="Vazo", price=10, stock=3, category=category)
+        alert = StockAlert.objects.create(user=user, product=product, email=user.email)
+        self.assertTrue(alert.send_notification())
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(set(OutboxEmail.objects.values_list("renderer", flat=True)), {
+            "security.utils.render_login_notification_email", "shop.email_utils.render_stock_alert",
+        })
+        self.assertEqual(outbox.drain(), (2, 0, 0))
+        self.assertEqual(sorted(m.subject for m in mail.outbox), ["Hesabınıza Giriş Yapıldı", "Stok Uyarısı: Vazo"])
+
+    def test_run_mailer_command(self):
+        self._order()
+        out = io.StringIO()
+        call_command("run_mailer", stdout=out)
+        self.assertIn("1 e-posta gönderildi", out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
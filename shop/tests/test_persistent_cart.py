@@ -0,0 +1,97 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from shop.cart import Cart, shell_state
+from shop.models import CartLine, Category, Product, ProductVariant
+
+
+class PersistentCartTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("ayse", password="Gizli-Parola-42")
+        category = Category.objects.create(name="Vazo")
+        self.vase = Product.objects.create(name="Beton Vazo", price=100, stock=5, category=category)
+        self.pot = Product.objects.create(name="Saksı", price=40, stock=5, category=category)
+        self.variant = ProductVariant.objects.create(product=self.pot, sku="SAKSI-K", stock=5)
+
+    def _request(self, user):
+        request = RequestFactory().get("/")
+        request.session = SessionStore()
+        request.user = user
+        return request
+
+    def test_user_cart_writes_lines_not_session(self):
+        request = self._request(self.user)
+        cart = Cart(request)
+        cart.add(self.vase, 2)
+        cart.add(self.pot, 1, variant_id=self.variant.pk)
+        self.assertNotIn("cart", request.session)
+        lines = dict(CartLine.objects.filter(user=self.user).values_list("key", "quantity"))
+        self.assertEqual(lines, {str(self.vase.pk): 2, f"{self.pot.pk}:{self.variant.pk}": 1})
+
+        cart.set(self.vase, 3)
+        cart.remove(self.pot, variant_id=self.variant.pk)
+        self.assertEqual(list(CartLine.objects.filter(user=self.user).values_list("quantity", flat=True)), [3])
+
+        # Yeni istek sepeti veritabanından okur
+        cart = Cart(self._request(self.user))
+        self.assertEqual(len(cart), 3)
+        self.assertEqual(cart.get_total_price(), 300)
+        self.assertEqual([item["product"] for item in cart], [self.vase])
+
+    def test_line_change_is_a_single_write(self):
+        cart = Cart(self._request(self.user))
+        cart.add(self.vase, 1)
+        with self.assertNumQueries(1):
+            cart.add(self.vase, 1)
+        with self.assertNumQueries(1):
+            cart.remove(self.vase)
+
+    def test_clear_deletes_lines(self):
+        cart = Cart(self._request(self.user))
+        cart.add(self.vase, 1)
+        cart.add(self.pot, 1)
+        cart.clear()
+        self.assertEqual(len(cart), 0)
+        self.assertFalse(CartLine.objects.filter(user=self.user).exists())
+
+    def test_deleted_product_is_pruned_from_stored_cart(self):
+        cart = Cart(self._request(self.user))
+        cart.add(self.vase, 1)
+        cart.add(self.pot, 1)
+        self.vase.delete()
+        self.assertEqual([item["product"] for item in Cart(self._request(self.user))], [self.pot])
+        self.assertEqual(CartLine.objects.filter(user=self.user).count(), 1)
+
+    def test_guest_cart_stays_in_session(self):
+        request = self._request(AnonymousUser())
+        Cart(request).add(self.vase, 2)
+        self.assertEqual(request.session["cart"][str(self.vase.pk)]["quantity"], 2)
+        self.assertFalse(CartLine.objects.exists())
+
+    def test_shell_state_changes_with_user_cart(self):
+        request = self._request(self.user)
+        before = shell_state(request)
+        self.assertEqual(shell_state(request), before)
+        Cart(request).add(self.vase, 1)
+        added = shell_state(request)
+        self.assertNotEqual(added, before)
+
+        # Damga veritabanından okunur; süreç önbelleği boşalsa da (başka işçi) aynıdır
+        cache.clear()
+        self.assertEqual(shell_state(self._request(self.user)), added)
+
+        Cart(self._request(self.user)).remove(self.vase)
+        self.assertNotEqual(shell_state(self._request(self.user)), added)
+
+    def test_login_merges_guest_cart(self):
+        Cart(self._request(self.user)).add(self.vase, 1)
+        self.client.post(reverse("shop:add_to_cart", args=[self.vase.pk]), {"quantity": 2})
+        self.client.post(reverse("shop:add_to_cart", args=[self.pot.pk]), {"quantity": 1})
+        self.assertTrue(self.client.login(username="ayse", password="Gizli-Parola-42"))
+
+        lines = dict(CartLine.objects.filter(user=self.user).values_list("key", "quantity"))
+        self.assertEqual(lines, {str(self.vase.pk): 3, str(self.pot.pk): 1})
+        self.assertNotIn("cart", self.client.session)
@@ -0,0 +1,200 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from shop import pricing
+from shop.cart import Cart
+from shop.models import Category, Coupon, Order, PaymentMethod, Product, ProductVariant, ShippingCompany
+
+
+class PricingEngineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vases = Category.objects.create(name="Vazo")
+        self.candles = Category.objects.create(name="Mum")
+        self.vase = Product.objects.create(name="Beton Vazo", price=Decimal("120.50"), stock=10, category=self.vases)
+        self.candle = Product.objects.create(name="Soya Mum", price=Decimal("39.99"), stock=10, category=self.candles)
+        request = RequestFactory().get("/")
+        request.session = SessionStore()
+        self.cart = Cart(request)
+
+    def tearDown(self):
+        cache.clear()
+
+    def _coupon(self, code, discount_type, value, **kwargs):
+        now = timezone.now()
+        kwargs.setdefault("usage_type", "unlimited")
+        return Coupon.objects.create(
+            code=code, name=code, discount_type=discount_type, discount_value=value,
+            valid_from=now - timedelta(days=1), valid_until=now + timedelta(days=1), **kwargs,
+        )
+
+    def _items(self):
+        return list(self.cart)
+
+    def test_money_is_integer_kurus(self):
+        self.assertEqual(pricing.to_kurus("49.90"), 4990)
+        self.assertEqual(pricing.to_kurus(49.9), 4990)
+        self.assertEqual(pricing.to_kurus(Decimal("0.005")), 1)
+        self.assertEqual(pricing.to_tl(4990), Decimal("49.90"))
+
+    def test_breakdown_is_itemized(self):
+        self.cart.add(self.vase, 2)
+        self.cart.add(self.candle, 1)
+        breakdown = pricing.price(self._items(), "express")
+        self.assertEqual([(line.quantity, line.unit_price, line.total) for line in breakdown.lines], [
+            (2, 12050, 24100), (1, 3999, 3999),
+        ])
+        self.assertEqual(breakdown.subtotal, 28099)
+        self.assertEqual(breakdown.shipping, 9990)
+        self.assertEqual(breakdown.total, 38089)
+
+    def test_free_shipping_threshold(self):
+        self.cart.add(self.vase, 5)
+        self.assertEqual(pricing.price(self._items()).shipping, 0)
+
+    def test_variant_uses_effective_price_and_weight(self):
+        variant = ProductVariant.objects.create(
+            product=self.vase, sku="VAZO-B", stock=5, price=Decimal("150.00"), weight=Decimal("2.5"),
+        )
+        ShippingCompany.objects.create(name="Kargo A", code="standard", base_price=20, price_per_kg=Decimal("4.00"))
+        self.cart.add(self.vase, 1, variant_id=variant.pk)
+        breakdown = pricing.price(self._items(), "standard")
+        self.assertEqual(breakdown.subtotal, 15000)
+        self.assertEqual(breakdown.shipping, 2000 + 1000)
+
+    def test_percentage_coupon_is_capped_and_category_limited(self):
+        coupon = self._coupon("YUZDE", "percentage", 50, max_discount_amount=Decimal("50.00"))
+        coupon.valid_categories.add(self.vases)
+        self.cart.add(self.vase, 2)
+        self.cart.add(self.candle, 1)
+        breakdown = pricing.price(self._items(), "standard", "yuzde")
+        self.assertEqual(breakdown.coupon.code, "YUZDE")
+        self.assertEqual(breakdown.discount, 5000)
+        self.assertEqual(breakdown.total, 28099 - 5000 + 4990)
+
+    def test_fixed_coupon_and_free_shipping_coupon(self):
+        self._coupon("SABIT", "fixed", 500)
+        self._coupon("KARGO", "free_shipping", 0)
+        self.cart.add(self.candle, 1)
+        self.assertEqual(pricing.price(self._items(), "standard", "SABIT").discount, 3999)
+        breakdown = pricing.price(self._items(), "express", "KARGO")
+        self.assertEqual((breakdown.discount, breakdown.shipping), (0, 0))
+
+    def test_invalid_coupon_is_ignored_with_reason(self):
+        self._coupon("ENAZ", "fixed", 10, min_order_amount=Decimal("1000"))
+        self.cart.add(self.candle, 1)
+        breakdown = pricing.price(self._items(), "standard", "ENAZ")
+        self.assertIsNone(breakdown.coupon)
+        self.assertIn("en az", breakdown.coupon_error)
+        self.assertEqual(breakdown.discount, 0)
+        self.assertEqual(pricing.price(self._items(), "standard", "YOK").coupon_error, "Geçersiz kupon kodu")
+
+    def test_payment_fee(self):
+        method = PaymentMethod.objects.create(name="Kart", payment_type="credit_card", processing_fee_percentage=Decimal("2.50"))
+        self.cart.add(self.candle, 1)
+        breakdown = pricing.price(self._items(), "standard", payment_method_id=method.pk)
+        self.assertEqual(breakdown.payment_fee, 225)  # (3999 + 4990) × %2.5 = 224.725
+        self.assertEqual(breakdown.total, 3999 + 4990 + 225)
+
+    def test_recalculation_costs_no_queries(self):
+        self._coupon("YUZDE", "percentage", 10)
+        method = PaymentMethod.objects.create(name="Kart", payment_type="credit_card", processing_fee_percentage=1)
+        self.cart.add(self.vase, 1)
+        items = self._items()
+        pricing.price(items)
+        with self.assertNumQueries(0):
+            for shipping_method in ("standard", "express"):
+                pricing.price(items, shipping_method, "YUZDE", method.pk)
+
+    def test_admin_edit_reloads_tables(self):
+        coupon = self._coupon("YUZDE", "percentage", 10)
+        self.cart.add(self.vase, 1)
+        items = self._items()
+        self.assertEqual(pricing.price(items, coupon_code="YUZDE").discount, 1205)
+        coupon.discount_value = 20
+        coupon.save()
+        self.assertEqual(pricing.price(items, coupon_code="YUZDE").discount, 2410)
+        coupon.is_active = False
+        coupon.save()
+        self.assertIsNone(pricing.price(items, coupon_code="YUZDE").coupon)
+
+    def test_redeem_respects_usage_limit(self):
+        self._coupon("TEK", "fixed", 10, usage_type="single")
+        self.cart.add(self.vase, 1)
+        breakdown = pricing.price(self._items(), coupon_code="TEK")
+        order = Order.objects.create(email="a@example.com", fullname="A", phone="1", address="x", city="y", total=0)
+        self.assertTrue(pricing.redeem(breakdown, order))
+        self.assertFalse(pricing.redeem(breakdown, order))
+        self.assertEqual(pricing.price(self._items(), coupon_code="TEK").coupon_error, "Kupon kullanım limiti dolmuş")
+
+    def test_redeem_rechecks_coupon_in_database(self):
+        # Başka bir süreçte pasifleştirilen kupon: bu süreçteki tablo henüz eski
+        coupon = self._coupon("ESKI", "fixed", 10)
+        self.cart.add(self.vase, 1)
+        breakdown = pricing.price(self._items(), coupon_code="ESKI")
+        self.assertIsNotNone(breakdown.coupon)
+        order = Order.objects.create(email="a@example.com", fullname="A", phone="1", address="x", city="y", total=0)
+        Coupon.objects.filter(pk=coupon.pk).update(is_active=False)
+        self.assertFalse(pricing.redeem(breakdown, order))
+        Coupon.objects.filter(pk=coupon.pk).update(is_active=True, valid_until=timezone.now() - timedelta(minutes=1))
+        self.assertFalse(pricing.redeem(breakdown, order))
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.used_count, 0)
+
+    @override_settings(PRICING_TABLES_TTL=0)
+    def test_tables_expire_without_stamp_change(self):
+        coupon = self._coupon("YUZDE", "percentage", 10)
+        self.cart.add(self.vase, 1)
+        items = self._items()
+        self.assertIsNotNone(pricing.price(items, coupon_code="YUZDE").coupon)
+        # Sinyalsiz değişiklik damgayı düşürmez; süre dolunca yine de görülür
+        Coupon.objects.filter(pk=coupon.pk).update(is_active=False)
+        self.assertIsNone(pricing.price(items, coupon_code="YUZDE").coupon)
+
+
+class PricingViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("ayse", password="Gizli-Parola-42")
+        self.client.force_login(self.user)
+        category = Category.objects.create(name="Vazo")
+        self.product = Product.objects.create(name="Beton Vazo", price=Decimal("100.00"), stock=10, category=category)
+        now = timezone.now()
+        Coupon.objects.create(
+            code="ON", name="On", discount_type="fixed", discount_value=10, usage_type="unlimited",
+            valid_from=now - timedelta(days=1), valid_until=now + timedelta(days=1),
+        )
+        self.client.post(reverse("shop:add_to_cart", args=[self.product.pk]), {"quantity": 1})
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_coupon_session_stores_only_code(self):
+        response = self.client.post(reverse("shop:validate_coupon"), {"coupon_code": "on"})
+        self.assertTrue(response.json()["success"])
+        self.assertEqual(self.client.session[pricing.SESSION_COUPON_KEY], "ON")
+        self.assertNotIn("discount_amount", self.client.session)
+
+        response = self.client.post(
+            reverse("shop:calculate_totals_ajax"), json.dumps({"shipping_method": "standard"}),
+            content_type="application/json",
+        )
+        data = response.json()
+        self.assertEqual(data["totals"]["discount"], 10.0)
+        self.assertEqual(data["breakdown"]["total"], 10000 - 1000 + 4990)
+
+        self.client.post(reverse("shop:remove_coupon"))
+        self.assertNotIn(pricing.SESSION_COUPON_KEY, self.client.session)
+
+    def test_unknown_coupon_is_rejected(self):
+        response = self.client.post(reverse("shop:validate_coupon"), {"coupon_code": "YOK"})
+        self.assertFalse(response.json()["success"])
+        self.assertNotIn(pricing.SESSION_COUPON_KEY, self.client.session)
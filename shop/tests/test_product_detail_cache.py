@@ -0,0 +1,101 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from shop import product_page, versions
+from shop.models import Category, Order, OrderItem, Product, StockAlert, Wishlist
+from shop.views import product_viewer_state
+
+
+class ProductDetailBodyCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Vazo")
+        self.product = Product.objects.create(name="Beton Vazo", price=100, stock=5, category=self.category)
+        self.url = reverse("shop:product_detail", kwargs={"pk": self.product.pk})
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_body_is_served_from_cache_until_product_changes(self):
+        version = versions.product_version(self.product.pk)
+        html = product_page.body(self.product, version)
+        self.assertIn("Beton Vazo", html)
+        self.assertIn('data-csrf', html)
+        with self.assertNumQueries(0):
+            self.assertEqual(product_page.body(self.product, versions.product_version(self.product.pk)), html)
+
+        self.product.name = "Mermer Vazo"
+        self.product.save()
+        new_version = versions.product_version(self.product.pk)
+        self.assertNotEqual(new_version, version)
+        self.assertIn("Mermer Vazo", product_page.body(self.product, new_version))
+
+    def test_category_rename_invalidates_product_bodies(self):
+        version = versions.product_version(self.product.pk)
+        self.category.name = "Saksı"
+        self.category.save()
+        self.assertNotEqual(versions.product_version(self.product.pk), version)
+
+    @mock.patch("shop.views.product.render", side_effect=lambda *args, **kwargs: HttpResponse())
+    def test_matching_etag_returns_304_without_rendering(self, render):
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(render.call_count, 1)
+
+        self.product.price = 120
+        self.product.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        context = render.call_args.args[2]
+        self.assertNotIn("is_in_wishlist", context)
+
+
+class ProductViewerStateTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(username="ayse", password="x")
+        self.category = Category.objects.create(name="Vazo")
+        self.product = Product.objects.create(name="Beton Vazo", price=100, stock=0, category=self.category)
+
+    def _get(self, user, pk=None):
+        request = self.factory.get("/")
+        request.user = user
+        return product_viewer_state(request, pk or self.product.pk)
+
+    def test_flags_are_answered_with_one_query(self):
+        order = Order.objects.create(
+            user=self.user, fullname="Ayşe", email="a@example.com", phone="555",
+            address="Adres", city="İstanbul", total=100, status="paid",
+        )
+        OrderItem.objects.create(order=order, product=self.product, quantity=1, unit_price=100, line_total=100)
+        Wishlist.objects.create(user=self.user, product=self.product)
+        StockAlert.objects.create(user=self.user, product=self.product, email="a@example.com")
+
+        with self.assertNumQueries(1):
+            response = self._get(self.user)
+        state = json.loads(response.content)
+        self.assertTrue(state["has_purchased"])
+        self.assertTrue(state["can_review"])
+        self.assertTrue(state["is_in_wishlist"])
+        self.assertTrue(state["has_active_stock_alert"])
+        self.assertIsNone(state["user_review"])
+        self.assertIn("no-store", response["Cache-Control"])
+
+    def test_anonymous_user_needs_no_queries(self):
+        from django.contrib.auth.models import AnonymousUser
+
+        with self.assertNumQueries(0):
+            response = self._get(AnonymousUser())
+        self.assertEqual(json.loads(response.content), {"authenticated": False})
@@ -0,0 +1,90 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from shop.models import Category, Product, Review
+from shop.ratings import set_reviews_approval
+
+
+class ProductRatingSummaryTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.users = [User.objects.create_user(username=f"u{i}", password="pw") for i in range(3)]
+        self.category = Category.objects.create(name="Kategori")
+        self.product = Product.objects.create(name="P", price=10, stock=5, category=self.category)
+
+    def _review(self, user, rating, **kwargs):
+        return Review.objects.create(product=self.product, user=user, rating=rating, comment="ok", **kwargs)
+
+    def _summary(self):
+        self.product.refresh_from_db()
+        return self.product.rating_count, self.product.average_rating, self.product.rating_distribution
+
+    def test_create_edit_delete_updates_summary(self):
+        r1 = self._review(self.users[0], 5)
+        self._review(self.users[1], 3)
+        count, avg, dist = self._summary()
+        self.assertEqual(count, 2)
+        self.assertAlmostEqual(avg, 4.0)
+        self.assertEqual(dist, {1: 0, 2: 0, 3: 1, 4: 0, 5: 1})
+
+        r1.rating = 1
+        r1.save()
+        count, avg, dist = self._summary()
+        self.assertEqual(count, 2)
+        self.assertAlmostEqual(avg, 2.0)
+        self.assertEqual(dist[5], 0)
+        self.assertEqual(dist[1], 1)
+
+        r1.delete()
+        count, avg, dist = self._summary()
+        self.assertEqual(count, 1)
+        self.assertAlmostEqual(avg, 3.0)
+
+    def test_unapproved_reviews_are_ignored(self):
+        review = self._review(self.users[0], 4, is_approved=False)
+        self.assertEqual(self._summary()[0], 0)
+
+        review.is_approved = True
+        review.save()
+        count, avg, _ = self._summary()
+        self.assertEqual(count, 1)
+        self.assertAlmostEqual(avg, 4.0)
+
+    def test_bulk_approval_actions(self):
+        self._review(self.users[0], 5, is_approved=False)
+        self._review(self.users[1], 2, is_approved=False)
+
+        self.assertEqual(set_reviews_approval(Review.objects.all(), True), 2)
+        # İkinci çağrı durumu değişmeyenleri tekrar saymaz
+        self.assertEqual(set_reviews_approval(Review.objects.all(), True), 0)
+        count, avg, _ = self._summary()
+        self.assertEqual(count, 2)
+        self.assertAlmostEqual(avg, 3.5)
+
+        set_reviews_approval(Review.objects.filter(rating=5), False)
+        count, avg, dist = self._summary()
+        self.assertEqual(count, 1)
+        self.assertAlmostEqual(avg, 2.0)
+        self.assertEqual(dist[5], 0)
+
+    def test_recompute_ratings_command_backfills(self):
+        self._review(self.users[0], 5)
+        self._review(self.users[1], 4)
+        Product.objects.filter(pk=self.product.pk).update(rating_avg=0, rating_count=0, rating_sum=0, rating_4=0, rating_5=0)
+
+        call_command("recompute_ratings", stdout=StringIO())
+        count, avg, dist = self._summary()
+        self.assertEqual(count, 2)
+        self.assertAlmostEqual(avg, 4.5)
+        self.assertEqual(dist[4], 1)
+
+    def test_summary_properties_do_not_query(self):
+        self._review(self.users[0], 5)
+        product = Product.objects.get(pk=self.product.pk)
+        with self.assertNumQueries(0):
+            product.average_rating
+            product.review_count
+            product.rating_distribution
@@ -0,0 +1,108 @@
+import gzip
+import hashlib
+import io
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from shop import receipts
+from shop.models import Category, Order, OrderItem, OrderReceipt, Product
+
+
+class ReceiptTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("ali", password="Gizli-Parola-42")
+        self.client.force_login(self.user)
+        category = Category.objects.create(name="Vazo")
+        self.product = Product.objects.create(name="Beton Vazo", price=100, stock=10, category=category)
+        self.order = Order.objects.create(
+            user=self.user, email="ali@example.com", fullname="Ali Veli", phone="1", address="Adres", city="İstanbul",
+            total=149.90, shipping_fee=49.90,
+        )
+        OrderItem.objects.create(order=self.order, product=self.product, quantity=1, unit_price=100, line_total=100)
+
+    def _pay(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.status = "paid"
+            self.order.save()
+        return OrderReceipt.objects.get(order=self.order)
+
+    def _get(self, query="", **headers):
+        return self.client.get(reverse("shop:order_receipt", args=[self.order.pk]) + query, **headers)
+
+    def test_rendered_once_when_paid(self):
+        self.assertFalse(OrderReceipt.objects.exists())
+        receipt = self._pay()
+        html = gzip.decompress(bytes(receipt.content))
+        self.assertIn("Beton Vazo".encode(), html)
+        self.assertEqual(receipt.digest, hashlib.sha256(html).hexdigest())
+        self.assertEqual((receipt.status, receipt.size), ("paid", len(html)))
+
+    def test_served_compressed_with_strong_etag(self):
+        receipt = self._pay()
+        with self.assertTemplateNotUsed("shop/order_receipt.html"):
+            response = self._get(HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["ETag"], f'"{receipt.digest}"')
+        self.assertEqual(response.content, bytes(receipt.content))
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        plain = self._get()
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertContains(plain, "Beton Vazo")
+        self.assertEqual(plain["ETag"], f'"{receipt.digest}-id"')
+
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH=f'"{receipt.digest}"', HTTP_ACCEPT_ENCODING="gzip").status_code, 304)
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH=f'"{receipt.digest}-id"').status_code, 304)
+        # Gzip temsilinin etiketi açık gövdeyi doğrulamaz
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH=f'"{receipt.digest}"').status_code, 200)
+
+    def test_versioned_link_is_cached_long(self):
+        receipt = self._pay()
+        url = receipts.link(self.order)
+        self.assertTrue(url.endswith(f"?v={receipt.digest[:16]}"))
+        response = self.client.get(url)
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("max-age=31536000", response["Cache-Control"])
+
+    def test_rerendered_only_when_order_changes(self):
+        receipt = self._pay()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.save()
+        self.assertEqual(OrderReceipt.objects.get(order=self.order).rendered_at, receipt.rendered_at)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.status = "cancelled"
+            self.order.save()
+        cancelled = OrderReceipt.objects.get(order=self.order)
+        self.assertEqual(cancelled.status, "cancelled")
+        self.assertNotEqual(cancelled.digest, receipt.digest)
+
+    def test_missing_receipt_is_rendered_on_first_view(self):
+        Order.objects.filter(pk=self.order.pk).update(status="paid")
+        self.assertEqual(self._get().status_code, 200)
+        self.assertTrue(OrderReceipt.objects.filter(order=self.order).exists())
+
+    @override_settings(DEBUG=False)
+    def test_unpaid_order_has_no_receipt(self):
+        # templates/404.html üretimdeki gibi işlenir
+        self.assertEqual(self._get().status_code, 404)
+
+    def test_other_user_is_forbidden(self):
+        self._pay()
+        self.client.force_login(User.objects.create_user("veli", password="Gizli-Parola-42"))
+        self.assertEqual(self._get().status_code, 403)
+
+    def test_backfill_command(self):
+        Order.objects.filter(pk=self.order.pk).update(status="shipped")
+        for workers in ("0", "1"):
+            out = io.StringIO()
+            call_command("render_receipts", "--force", "--workers", workers, stdout=out)
+            self.assertIn("fiş işlendi", out.getvalue())
+        receipt = OrderReceipt.objects.get(order=self.order)
+        self.assertEqual(receipt.status, "shipped")
+        out = io.StringIO()
+        call_command("render_receipts", "--workers", "0", stdout=out)
+        self.assertIn("0 fiş işlendi", out.getvalue())
@@ -0,0 +1,67 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from shop import recommendations
+from shop.models import Category, Order, OrderItem, Product, RelatedProduct
+
+
+@override_settings(RELATED_PRODUCTS_TOP_N=2, HOMEPAGE_BLOCK_ASYNC=False)
+class RelatedProductsTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Kategori")
+        other = Category.objects.create(name="Diğer")
+        self.a, self.b, self.c, self.d = [
+            Product.objects.create(name=name, price=10, stock=100, category=self.category) for name in "ABCD"
+        ]
+        self.x = Product.objects.create(name="X", price=10, stock=100, category=other)
+
+    def _order(self, products, status="received"):
+        order = Order.objects.create(
+            email="a@example.com", fullname="Ad Soyad", phone="555", address="Adres", city="İstanbul",
+            total=Decimal("0"), status=status,
+        )
+        for product in products:
+            OrderItem.objects.create(order=order, product=product, quantity=1, unit_price=10, line_total=10)
+        return order
+
+    def _related(self, product):
+        return [p.pk for p in recommendations.related_products(product)]
+
+    def test_batch_build_keeps_top_n_by_cosine_score(self):
+        for _ in range(3):
+            self._order([self.a, self.b], status="paid")
+        self._order([self.a, self.c], status="paid")
+        self._order([self.a, self.d, self.x], status="paid")
+        self._order([self.a, self.x])  # ödenmemiş: sayılmaz
+
+        out = StringIO()
+        call_command("build_related_products", stdout=out)
+        self.assertIn("öneri yazıldı", out.getvalue())
+        self.assertEqual(self._related(self.a)[0], self.b.pk)
+        self.assertEqual(RelatedProduct.objects.filter(product=self.a).count(), 2)
+        # D ve X sadece birlikte alındı: kosinüs skoru 1
+        self.assertEqual(self._related(self.x)[0], self.d.pk)
+
+    def test_incremental_updates_match_batch_for_small_baskets(self):
+        self._order([self.a, self.b, self.c], status="paid")  # kalemler ödenmiş siparişe eklenir
+        order = self._order([self.a, self.b])
+        order.status = "paid"
+        order.save()
+        incremental = {
+            (r.product_id, r.related_id): (r.co_count, round(r.score, 6)) for r in RelatedProduct.objects.all()
+        }
+
+        recommendations.rebuild()
+        batch = {(r.product_id, r.related_id): (r.co_count, round(r.score, 6)) for r in RelatedProduct.objects.all()}
+        self.assertEqual(incremental[(self.a.pk, self.b.pk)], (2, 1.0))
+        self.assertEqual(incremental, batch)
+
+    def test_detail_uses_one_lookup_and_falls_back_to_category(self):
+        self._order([self.a, self.x], status="paid")
+        with self.assertNumQueries(1):
+            self.assertEqual(self._related(self.a), [self.x.pk])
+        # Öneri yoksa aynı kategori
+        self.assertEqual(set(self._related(self.b)), {self.a.pk, self.c.pk, self.d.pk})
@@ -0,0 +1,116 @@
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from shop import rollups
+from shop.models import Category, Order, OrderItem, Product, RollupWatermark, SalesDay, SalesProductDay
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.vazo = Category.objects.create(name="Vazo")
+        self.mum = Category.objects.create(name="Mum")
+        self.p1 = Product.objects.create(name="Beton Vazo", price=100, stock=50, category=self.vazo)
+        self.p2 = Product.objects.create(name="Soya Mum", price=40, stock=50, category=self.mum)
+
+    def _order(self, lines, status="paid", provider="iyzico", method="standard", days_ago=0, discount=0, shipping=0):
+        subtotal = sum(product.price * qty for product, qty in lines)
+        order = Order.objects.create(
+            email="ali@example.com", fullname="Ali Veli", phone="1", address="x", city="y", status=status,
+            payment_provider=provider, shipping_method=method, discount_amount=discount, shipping_fee=shipping,
+            total=subtotal - discount + shipping,
+        )
+        for product, qty in lines:
+            OrderItem.objects.create(
+                order=order, product=product, quantity=qty, unit_price=product.price, line_total=product.price * qty,
+            )
+        if days_ago:
+            Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return order
+
+    def _age_orders(self):
+        # Değişiklikler okuma aralığının (filigran - ROLLUP_OVERLAP) dışında kalsın
+        Order.objects.update(updated_at=timezone.now() - timedelta(days=1))
+
+    def test_rollup_measures(self):
+        self._order([(self.p1, 2), (self.p2, 1)], discount=20, shipping=30)
+        self._order([(self.p1, 1)], provider="paytr", method="express", shipping=50)
+        self._order([(self.p1, 5)], status="cancelled")
+        self._order([(self.p2, 3)], status="received")
+
+        stats = rollups.run()
+        self.assertIsNone(stats["since"])
+        day = timezone.localdate()
+        iyzico = SalesDay.objects.get(day=day, payment_provider="iyzico", shipping_method="standard")
+        self.assertEqual((iyzico.orders, iyzico.units), (1, 3))
+        self.assertEqual((iyzico.revenue, iyzico.discount, iyzico.shipping), (Decimal("250"), Decimal("20"), Decimal("30")))
+        self.assertEqual(SalesDay.objects.count(), 2)
+
+        report = rollups.report(day, day)
+        self.assertEqual(report["totals"]["orders"], 2)
+        self.assertEqual(report["totals"]["revenue"], Decimal("400"))
+        self.assertEqual(report["totals"]["aov"], Decimal("200"))
+
+        vazo = SalesProductDay.objects.filter(product=self.p1)
+        self.assertEqual(sorted(vazo.values_list("payment_provider", "units", "orders")), [("iyzico", 2, 1), ("paytr", 1, 1)])
+        self.assertEqual(SalesProductDay.objects.get(product=self.p2).category, self.mum)
+
+    def test_incremental_run_only_recomputes_changed_days(self):
+        self._order([(self.p1, 1)], days_ago=10)
+        today = self._order([(self.p2, 1)])
+        self._age_orders()
+        rollups.run()
+
+        stats = rollups.run()
+        self.assertEqual((stats["days"], stats["rows"]), (0, 0))
+
+        today.status = "cancelled"
+        today.save()
+        stats = rollups.run()
+        self.assertEqual(stats["days"], 1)
+        self.assertFalse(SalesDay.objects.filter(day=timezone.localdate()).exists())
+        self.assertTrue(SalesDay.objects.filter(day=timezone.localdate() - timedelta(days=10)).exists())
+
+    def test_reprocessing_is_idempotent(self):
+        self._order([(self.p1, 2)])
+        rollups.run()
+        first = list(SalesDay.objects.values_list("day", "orders", "units", "revenue"))
+        rollups.run()
+        rollups.run(full=True)
+        self.assertEqual(list(SalesDay.objects.values_list("day", "orders", "units", "revenue")), first)
+        self.assertEqual(SalesProductDay.objects.get().units, 2)
+
+    def test_command_reports_progress(self):
+        self._order([(self.p1, 1)])
+        out = io.StringIO()
+        call_command("rollup_sales", stdout=out)
+        self.assertIn("1 gün yeniden hesaplandı", out.getvalue())
+        self.assertIsNotNone(RollupWatermark.objects.get(name=rollups.WATERMARK).value)
+
+    def test_dashboard_is_staff_only_and_reads_rollups(self):
+        self._order([(self.p1, 2)])
+        rollups.run()
+        url = reverse("shop:sales_dashboard")
+
+        user = User.objects.create_user("ali", password="Gizli-Parola-42")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        user.is_staff = True
+        user.save()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"days": 30})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["totals"]["units"], 2)
+        self.assertContains(response, "Beton Vazo")
+        tables = " ".join(query["sql"] for query in queries.captured_queries)
+        self.assertNotIn('"shop_orderitem"', tables)
+        self.assertNotIn('FROM "shop_order"', tables)
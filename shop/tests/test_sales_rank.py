@@ -0,0 +1,96 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from shop import homepage, pagination, sales_rank
+from shop.models import Category, Order, OrderItem, Product, ProductSalesRank
+
+
+def _rank(product):
+    row = ProductSalesRank.objects.filter(product=product).first()
+    if row is None:
+        return None
+    return (row.units_7d, row.units_30d, row.units_total, row.revenue_total)
+
+
+@override_settings(HOMEPAGE_BLOCK_ASYNC=False)
+class SalesRankTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Kategori")
+        self.a = Product.objects.create(name="A", price=10, stock=50, category=category)
+        self.b = Product.objects.create(name="B", price=20, stock=50, category=category)
+        self.c = Product.objects.create(name="C", price=30, stock=50, category=category)
+
+    def tearDown(self):
+        cache.clear()
+
+    def _order(self, lines, status="received", **extra):
+        order = Order.objects.create(
+            email="a@example.com", fullname="Ad Soyad", phone="555", address="Adres", city="İstanbul",
+            total=Decimal("0"), status=status, **extra,
+        )
+        for product, quantity in lines:
+            OrderItem.objects.create(
+                order=order, product=product, quantity=quantity,
+                unit_price=product.price, line_total=product.price * quantity,
+            )
+        return order
+
+    def test_paid_and_cancelled_transitions_update_rank(self):
+        order = self._order([(self.a, 2), (self.b, 1)])
+        self.assertIsNone(_rank(self.a))
+
+        order.status = "paid"
+        order.save()
+        self.assertEqual(_rank(self.a), (2, 2, 2, Decimal("20")))
+        order.status = "shipped"
+        order.save()
+        self.assertEqual(_rank(self.a), (2, 2, 2, Decimal("20")))
+
+        order.status = "cancelled"
+        order.save()
+        self.assertEqual(_rank(self.a), (0, 0, 0, Decimal("0")))
+        self.assertEqual(_rank(self.b), (0, 0, 0, Decimal("0")))
+
+    def test_items_of_order_created_as_paid_are_counted(self):
+        self._order([(self.c, 3)], status="paid")
+        self.assertEqual(_rank(self.c), (3, 3, 3, Decimal("90")))
+
+    def test_windows_follow_sale_day_and_expire(self):
+        order = self._order([(self.a, 4)], paid_at=timezone.now() - timedelta(days=10))
+        order.status = "paid"
+        order.save()
+        self.assertEqual(_rank(self.a)[:3], (0, 4, 4))
+
+        sales_rank.refresh_windows(today=timezone.localdate() + timedelta(days=25))
+        self.assertEqual(_rank(self.a)[:3], (0, 0, 4))
+        self.assertFalse(self.a.sales_days.exists())
+
+    def test_rebuild_matches_incremental_updates(self):
+        self._order([(self.a, 1), (self.b, 5)], status="paid")
+        cancelled = self._order([(self.a, 7)], status="paid")
+        cancelled.status = "cancelled"
+        cancelled.save()
+        self._order([(self.c, 9)])  # ödenmemiş
+        incremental = {p.pk: _rank(p) for p in (self.a, self.b, self.c)}
+
+        sales_rank.rebuild()
+        self.assertEqual(incremental[self.a.pk], _rank(self.a))
+        self.assertEqual(incremental[self.b.pk], _rank(self.b))
+        self.assertIsNone(_rank(self.c))
+
+    def test_bestseller_block_and_sort_read_rank(self):
+        self._order([(self.b, 5), (self.a, 1)], status="paid")
+        self._order([(self.c, 100)])  # ödenmemiş sipariş sayılmaz
+        self.assertEqual(homepage.get_block_ids("bestsellers"), [self.b.pk, self.a.pk])
+
+        request = RequestFactory().get("/", {"sort": "bestseller"})
+        page = pagination.paginate(request, sales_rank.order_by_bestseller(Product.objects.all()), "bestseller", per_page=2)
+        self.assertEqual([p.pk for p in page], [self.b.pk, self.a.pk])
+        request = RequestFactory().get("/", {"sort": "bestseller", "cursor": page.next_cursor})
+        page = pagination.paginate(request, sales_rank.order_by_bestseller(Product.objects.all()), "bestseller", per_page=2)
+        self.assertEqual([p.pk for p in page], [self.c.pk])
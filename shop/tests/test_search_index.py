@@ -0,0 +1,72 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from shop import autocomplete, search
+from shop.models import Category, Product
+
+
+class SearchNormalizationTests(TestCase):
+    def test_turkish_case_folding(self):
+        self.assertEqual(search.normalize_text("IŞIK"), "isik")
+        self.assertEqual(search.normalize_text("İĞNE"), "igne")
+        self.assertEqual(search.tokenize("Gömlek, ÇORAP"), ["gomlek", "corap"])
+
+
+class ProductSearchIndexTests(TestCase):
+    def setUp(self):
+        self.giyim = Category.objects.create(name="Giyim")
+        self.ev = Category.objects.create(name="Ev")
+        self.gomlek = Product.objects.create(
+            name="Mavi Gömlek", description="Pamuklu", price=100, stock=5, category=self.giyim
+        )
+        self.lamba = Product.objects.create(
+            name="Masa Lambası", description="Işık açısı ayarlanabilir, gömlek cebine sığmaz", price=50, stock=5,
+            category=self.ev,
+        )
+
+    def test_name_match_ranks_above_description_match(self):
+        self.assertEqual(search.product_ids("gömlek"), [self.gomlek.pk, self.lamba.pk])
+
+    def test_turkish_dotted_and_dotless_i(self):
+        self.assertEqual(search.product_ids("IŞIK"), [self.lamba.pk])
+        self.assertEqual(search.product_ids("isik"), [self.lamba.pk])
+
+    def test_prefix_and_multi_token_match(self):
+        self.assertEqual(search.product_ids("mav gom"), [self.gomlek.pk])
+        self.assertEqual(search.product_ids("giy"), [self.gomlek.pk])
+
+    def test_incremental_maintenance(self):
+        self.gomlek.name = "Kırmızı Kazak"
+        self.gomlek.save()
+        self.assertEqual(search.product_ids("kazak"), [self.gomlek.pk])
+        self.assertNotIn(self.gomlek.pk, search.product_ids("mavi"))
+
+        self.ev.name = "Aydınlatma"
+        self.ev.save()
+        self.assertEqual(search.product_ids("aydinlatma"), [self.lamba.pk])
+
+        lamba_pk = self.lamba.pk
+        self.lamba.delete()
+        self.assertEqual(search.product_ids("masa"), [])
+        self.assertNotIn(lamba_pk, search.product_ids("isik"))
+
+    def test_rebuild_index(self):
+        search.get_backend().clear()
+        self.assertEqual(search.product_ids("gomlek"), [])
+        self.assertEqual(search.rebuild_index(), 2)
+        self.assertEqual(search.product_ids("gomlek"), [self.gomlek.pk, self.lamba.pk])
+
+    @override_settings(SEARCH_RESULT_LIMIT=1)
+    def test_listing_is_ranked_and_not_truncated(self):
+        products = search.filter_products(Product.objects.select_related("category"), "gömlek")
+        self.assertEqual(list(products), [self.gomlek, self.lamba])
+        self.assertEqual(products.count(), 2)
+
+        response = self.client.get(reverse("shop:product_list"), {"q": "gomlek"})
+        self.assertEqual(list(response.context["page_obj"]), [self.gomlek, self.lamba])
+
+    def test_autocomplete_matches_normalized_name_prefix(self):
+        autocomplete.engine.build()
+        response = self.client.get(reverse("shop:search_autocomplete"), {"q": "GÖML"})
+        names = [s["name"] for s in response.json()["suggestions"] if s["type"] == "product"]
+        self.assertEqual(names, ["Mavi Gömlek"])
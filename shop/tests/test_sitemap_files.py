@@ -0,0 +1,68 @@
+import gzip
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from shop import sitemaps
+from shop.models import Category, Product
+
+NS = {"ns": sitemaps.XMLNS}
+
+
+class SitemapFilesTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.override = override_settings(SITEMAP_ROOT=self.root)
+        self.override.enable()
+        self.category = Category.objects.create(name="Vazo")
+        self.products = [
+            Product.objects.create(name=f"Ürün {i}", price=Decimal("10"), stock=5, category=self.category)
+            for i in range(3)
+        ]
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _shard_locs(self, name):
+        with gzip.open(sitemaps.shard_path(name), "rt", encoding="utf-8") as f:
+            root = ET.fromstring(f.read())
+        return [url.find("ns:loc", NS).text for url in root.findall("ns:url", NS)]
+
+    def test_build_writes_shards_and_index(self):
+        stats = sitemaps.build()
+        self.assertEqual(sorted(stats["written"]), ["categories-0.xml.gz", "products-0.xml.gz"])
+
+        locs = self._shard_locs("products-0.xml.gz")
+        self.assertEqual(len(locs), 3)
+        self.assertTrue(locs[0].endswith(f"/shop/product/{self.products[0].pk}/"))
+
+        response = self.client.get("/sitemap.xml")
+        self.assertEqual(response.status_code, 200)
+        index = ET.fromstring(b"".join(response.streaming_content))
+        self.assertEqual(index.tag, f"{{{sitemaps.XMLNS}}}sitemapindex")
+        shard_locs = [s.find("ns:loc", NS).text for s in index.findall("ns:sitemap", NS)]
+        self.assertTrue(any(loc.endswith("/sitemaps/products-0.xml.gz") for loc in shard_locs))
+
+        response = self.client.get("/sitemaps/products-0.xml.gz", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_only_dirty_shards_are_rewritten(self):
+        sitemaps.build()
+        stats = sitemaps.build()
+        self.assertEqual(stats["written"], [])
+
+        # Stoktan çıkan ürün ürün parçasını ve kategori parçasını kirletmez/kirletir
+        product = self.products[1]
+        product.stock = 0
+        product.save()
+        stats = sitemaps.build()
+        self.assertIn("products-0.xml.gz", stats["written"])
+        self.assertNotIn(f"/shop/product/{product.pk}/", " ".join(self._shard_locs("products-0.xml.gz")))
+
+    @override_settings(DEBUG=False)
+    def test_shard_view_rejects_unknown_names(self):
+        self.assertEqual(self.client.get("/sitemaps/manifest.json").status_code, 404)
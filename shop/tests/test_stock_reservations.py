@@ -0,0 +1,172 @@
+import hashlib
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from shop import reservations
+from shop.models import Category, Order, OrderItem, Product, StockReservation
+
+
+class StockReservationTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Vazo")
+        self.product = Product.objects.create(name="Beton Vazo", price=100, stock=3, category=self.category)
+
+    def _order(self, quantity):
+        order = Order.objects.create(
+            email="a@example.com", fullname="Ali", phone="05550000000", address="Adres", city="İstanbul",
+            total=Decimal("100.00"), status="received",
+        )
+        OrderItem.objects.create(
+            order=order, product=self.product, quantity=quantity,
+            unit_price=Decimal("100.00"), line_total=Decimal("100.00") * quantity,
+        )
+        return order
+
+    def _reserved(self):
+        return Product.objects.values_list("reserved", flat=True).get(pk=self.product.pk)
+
+    def test_conditional_hold_prevents_overselling(self):
+        self.assertEqual(reservations.reserve("a", [(self.product.pk, None, 2)]), [])
+        self.assertEqual(reservations.reserve("b", [(self.product.pk, None, 2)]), [self.product.pk])
+        self.assertEqual(self._reserved(), 2)
+        self.assertEqual(reservations.available_stock([self.product.pk]), {self.product.pk: 1})
+        self.assertEqual(reservations.available_stock([self.product.pk], exclude_key="a"), {self.product.pk: 3})
+
+        # Aynı anahtarla yeniden ayırma öncekinin yerine geçer
+        self.assertEqual(reservations.reserve("a", [(self.product.pk, None, 3)]), [])
+        self.assertEqual(self._reserved(), 3)
+        self.assertEqual(StockReservation.objects.filter(status="active").count(), 1)
+
+    def test_expired_holds_are_reclaimed(self):
+        reservations.reserve("a", [(self.product.pk, None, 3)])
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(reservations.available_stock([self.product.pk]), {self.product.pk: 3})
+
+        # Süpürülmemiş süresi dolmuş tutma ayırmayı engellemez
+        self.assertEqual(reservations.reserve("b", [(self.product.pk, None, 2)]), [])
+        self.assertEqual(self._reserved(), 2)
+        self.assertEqual(StockReservation.objects.get(hold_key="a").status, "released")
+
+        StockReservation.objects.filter(hold_key="b").update(expires_at=timezone.now() - timedelta(seconds=1))
+        out = io.StringIO()
+        call_command("sweep_reservations", stdout=out)
+        self.assertIn("1 tutma", out.getvalue())
+        self.assertEqual(self._reserved(), 0)
+
+    def test_convert_decrements_stock_and_protects_other_holds(self):
+        reservations.reserve("a", [(self.product.pk, None, 2)])
+        order = self._order(2)
+        reservations.attach("a", order)
+        self.assertEqual(reservations.convert(order), [])
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.reserved), (1, 0))
+        self.assertEqual(StockReservation.objects.get().status, "converted")
+
+        # Tutması olmayan sipariş başkasının tutmasını yiyemez
+        reservations.reserve("b", [(self.product.pk, None, 1)])
+        self.assertEqual(reservations.convert(self._order(1)), [self.product.pk])
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.reserved), (1, 1))
+
+    def test_release_keeps_holds_attached_to_pending_order(self):
+        reservations.reserve("a", [(self.product.pk, None, 1)])
+        order = self._order(1)
+        reservations.attach("a", order)
+        reservations.reserve("a", [(self.product.pk, None, 1)])
+        self.assertEqual(self._reserved(), 2)
+
+        reservations.release(order=order)
+        self.assertEqual(self._reserved(), 1)
+
+
+@override_settings(PAYMENT_PROVIDER="mock")
+class CheckoutReservationTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Vazo")
+        self.product = Product.objects.create(name="Beton Vazo", price=100, stock=2, category=category)
+        self.client.force_login(User.objects.create_user("ali", "a@example.com", "parola-123"))
+        self.client.post(reverse("shop:add_to_cart", kwargs={"product_id": self.product.pk}), {"quantity": 2})
+        session = self.client.session
+        session["checkout_data"] = {
+            "fullname": "Ali", "email": "a@example.com", "phone": "05550000000",
+            "address": "Adres", "city": "İstanbul", "district": "Kadıköy", "postal_code": "34000",
+        }
+        session.save()
+
+    def test_paid_checkout_converts_hold(self):
+        response = self.client.post(reverse("shop:checkout_pay"))
+        self.assertTrue(response.url.endswith(reverse("shop:checkout_success")))
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.reserved), (0, 0))
+        self.assertEqual(StockReservation.objects.get().status, "converted")
+
+    def test_rival_hold_blocks_checkout(self):
+        reservations.reserve("rakip", [(self.product.pk, None, 1)])
+        response = self.client.post(reverse("shop:checkout_pay"))
+        self.assertTrue(response.url.endswith(reverse("shop:checkout")))
+        self.assertFalse(Order.objects.exists())
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.reserved), (2, 1))
+
+
+@override_settings(PAYTR_MERCHANT_ID="m", PAYTR_MERCHANT_KEY="k", PAYTR_MERCHANT_SALT="tuz", PAYMENT_PROVIDER="paytr")
+class PendingOrderReleaseTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Vazo")
+        self.product = Product.objects.create(name="Beton Vazo", price=100, stock=2, category=category)
+        self.user = User.objects.create_user("ali", "a@example.com", "parola-123")
+        self.order = Order.objects.create(
+            user=self.user, email="a@example.com", fullname="Ali", phone="05550000000", address="Adres",
+            city="İstanbul", total=Decimal("200.00"), status="received",
+        )
+        OrderItem.objects.create(
+            order=self.order, product=self.product, quantity=2, unit_price=Decimal("100.00"), line_total=Decimal("200.00"),
+        )
+        reservations.reserve("a", [(self.product.pk, None, 2)])
+        reservations.attach("a", self.order)
+
+    def _callback(self, status, salt="tuz"):
+        oid = str(self.order.pk)
+        digest = hashlib.md5(f"{oid}{salt}{status}200.00".encode()).hexdigest()
+        return self.client.post(
+            reverse("paytr_callback"), {"merchant_oid": oid, "status": status, "total_amount": "200.00", "hash": digest},
+        )
+
+    def _assert_released(self):
+        self.assertEqual(Product.objects.get(pk=self.product.pk).reserved, 0)
+        self.assertEqual(StockReservation.objects.get().status, "released")
+
+    def test_signed_decline_releases_order_holds(self):
+        self.assertEqual(self._callback("failed", salt="sahte").content, b"FAIL")
+        self.assertEqual(Product.objects.get(pk=self.product.pk).reserved, 2)
+
+        self.assertEqual(self._callback("failed").content, b"FAIL")
+        self._assert_released()
+
+    def test_checkout_fail_page_releases_pending_order(self):
+        session = self.client.session
+        session[reservations.PENDING_ORDER_KEY] = self.order.pk
+        session.save()
+        self.client.get(reverse("shop:checkout_fail"))
+        self._assert_released()
+        self.assertNotIn(reservations.PENDING_ORDER_KEY, self.client.session)
+
+    def test_paid_order_is_not_released(self):
+        Order.objects.filter(pk=self.order.pk).update(status="paid")
+        self.assertEqual(reservations.release_unpaid(self.order.pk), {})
+        self.assertEqual(Product.objects.get(pk=self.product.pk).reserved, 2)
+
+    def test_cancel_releases_order_holds(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse("order_cancel", args=[self.order.pk]))
+        self._assert_released()
+        # Ödeme bekleyen siparişin stoğu hiç düşülmemişti; iptal stok eklemez
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 2)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, "cancelled")
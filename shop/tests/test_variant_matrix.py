@@ -0,0 +1,77 @@
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from shop import variants
+from shop.models import (
+    Category, Product, ProductAttribute, ProductAttributeValue, ProductVariant, ProductVariantAttribute,
+)
+
+
+class VariantMatrixTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Vazo")
+        self.product = Product.objects.create(name="Vazo", price=Decimal("100"), stock=5, category=category)
+        color = ProductAttribute.objects.create(name="color", display_name="Renk")
+        size = ProductAttribute.objects.create(name="size", display_name="Boyut")
+        self.red = ProductAttributeValue.objects.create(attribute=color, value="red", display_value="Kırmızı", sort_order=1)
+        self.grey = ProductAttributeValue.objects.create(attribute=color, value="grey", display_value="Gri", sort_order=0)
+        self.small = ProductAttributeValue.objects.create(attribute=size, value="S", display_value="Küçük")
+        self.v1 = ProductVariant.objects.create(product=self.product, sku="V-RED-S", stock=3)
+        self.v2 = ProductVariant.objects.create(product=self.product, sku="V-GREY-S", price=Decimal("120"), stock=0)
+        for variant, color_value in ((self.v1, self.red), (self.v2, self.grey)):
+            ProductVariantAttribute.objects.create(variant=variant, attribute_value=color_value)
+            ProductVariantAttribute.objects.create(variant=variant, attribute_value=self.small)
+        self.url = reverse("shop:get_product_variants", kwargs={"product_id": self.product.pk})
+
+    def tearDown(self):
+        cache.clear()
+
+    def _get(self, **headers):
+        return self.client.get(self.url, **headers)
+
+    def test_matrix_has_axes_values_and_combinations(self):
+        data = json.loads(self._get().content)
+        self.assertTrue(data["success"])
+        self.assertEqual([a["name"] for a in data["axes"]], ["color", "size"])
+        self.assertEqual([v["value"] for v in data["axes"][0]["values"]], ["grey", "red"])
+        red_small = data["combinations"][variants.combination_key([self.red.pk, self.small.pk])]
+        self.assertEqual(red_small["variant_id"], self.v1.pk)
+        self.assertEqual(red_small["price"], 100.0)
+        grey_small = data["combinations"][variants.combination_key([self.grey.pk, self.small.pk])]
+        self.assertEqual(grey_small["price"], 120.0)
+        self.assertFalse(grey_small["is_available"])
+
+    def test_cached_matrix_serves_304_without_queries(self):
+        etag = self._get()["ETag"]
+        with self.assertNumQueries(0):
+            response = variants.get_entry(self.product.pk)
+        self.assertEqual(response["etag"], etag)
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_stock_only_change_patches_cached_matrix(self):
+        etag = self._get()["ETag"]
+        self.v2.stock = 7
+        self.v2.save()
+        with self.assertNumQueries(0):
+            entry = variants.get_entry(self.product.pk)
+        combo = entry["matrix"]["combinations"][variants.combination_key([self.grey.pk, self.small.pk])]
+        self.assertEqual(combo["stock"], 7)
+        self.assertTrue(combo["is_available"])
+        self.assertNotEqual(entry["etag"], etag)
+
+    def test_attribute_value_edit_rebuilds_matrix(self):
+        self._get()
+        self.red.display_value = "Bordo"
+        self.red.save()
+        data = json.loads(self._get().content)
+        self.assertIn("Bordo", [v["display_value"] for v in data["axes"][0]["values"]])
+
+    def test_unknown_product_returns_404(self):
+        response = self.client.get(reverse("shop:get_product_variants", kwargs={"product_id": 999999}))
+        self.assertEqual(response.status_code, 404)
@@ -1,8 +1,9 @@
 from django.urls import path
 from django.shortcuts import redirect
 from . import views
-from .views.cart import checkout_fail, calculate_totals_ajax
+from .views.cart import checkout_fail, calculate_totals_ajax, validate_coupon, remove_coupon
 from .views import order as order_views
+from .views import reports as report_views
 
 app_name = 'shop'
 
@@ -17,6 +18,7 @@ urlpatterns = [
     # Kanonik URL'ler
     path('products/', views.product_list, name='product_list'),
     path('product/<int:pk>/', views.product_detail, name='product_detail'),
+    path('product/<int:pk>/viewer-state/', views.product_viewer_state, name='product_viewer_state'),
     
     # Ana sayfa redirect (geçici - daha sonra home şablonu eklenecek)
     path('', redirect_to_products),
@@ -36,13 +38,20 @@ urlpatterns = [
     path('checkout/success/', views.checkout_success, name='checkout_success'),
     path('checkout/fail/', checkout_fail, name='checkout_fail'),
     path('ajax/calculate-totals/', calculate_totals_ajax, name='calculate_totals_ajax'),
+    path('coupon/apply/', validate_coupon, name='validate_coupon'),
+    path('coupon/remove/', remove_coupon, name='remove_coupon'),
     
     # Kargo takip
     path('track-order/', views.track_order, name='track_order'),
     
     # Siparişler
     path('my-orders/', views.my_orders, name='my_orders'),
+    path('order/<int:order_id>/', views.order_detail, name='order_detail'),
     path('order/<int:pk>/receipt/', order_views.order_receipt, name='order_receipt'),
+
+    # Raporlar (yalnız personel)
+    path('reports/sales/', report_views.sales_dashboard, name='sales_dashboard'),
+
     # Ürün arama
     path('search/autocomplete/', views.search_autocomplete, name='search_autocomplete'),
     path('search/advanced/', views.advanced_search, name='advanced_search'),
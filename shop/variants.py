@@ -0,0 +1,159 @@
+"""
+get_product_variants için ön hesaplanmış varyant matrisi.
+
+Matris ürün başına bir kez kurulur ve JSON olarak serileştirilmiş haliyle
+önbellekte tutulur:
+- axes: öznitelik eksenleri (ad sırasıyla) ve her eksenin değer listesi
+  (sort_order, değer sırasıyla)
+- combinations: eksen sırasıyla değer ID'lerinden oluşan anahtar
+  ("3-7") → varyant ID'si, SKU, fiyat, stok
+
+Anahtar ürünün sürüm damgasını taşır (bkz. shop.versions); ProductVariant,
+ProductVariantAttribute, ProductAttributeValue ve ProductAttribute
+değişiklikleri damgayı düşürür (shop/signals.py). Katalog düzenlemelerinden
+çok daha sık olan yalnız-stok değişiklikleri matrisi yeniden kurmaz,
+önbellekteki girdiyi yerinde yamalar.
+
+ETag serileştirilmiş gövdenin özetidir; yama gövdeyle birlikte ETag'i de
+yeniler.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import versions
+
+
+def _timeout():
+    return getattr(settings, 'VARIANT_MATRIX_CACHE_TIMEOUT', 86400)
+
+
+def _key(product_id, version):
+    return f'variants:matrix:{product_id}:{version}'
+
+
+def _lock_key(product_id):
+    return f'variants:matrix:{product_id}:lock'
+
+
+def combination_key(value_ids):
+    return '-'.join(str(pk) for pk in value_ids)
+
+
+def build(product_id):
+    """Matris sözlüğü; ürün yoksa None. Üç sorgu: ürün fiyatı, varyantlar, öznitelik bağları."""
+    from .models import Product, ProductVariant, ProductVariantAttribute
+
+    base_price = Product.objects.filter(pk=product_id).values_list('price', flat=True).first()
+    if base_price is None:
+        return None
+    variant_rows = (
+        ProductVariant.objects.filter(product_id=product_id, is_active=True)
+        .order_by('sku')
+        .values_list('id', 'sku', 'price', 'stock')
+    )
+    links = (
+        ProductVariantAttribute.objects.filter(
+            variant__product_id=product_id, variant__is_active=True, attribute_value__is_active=True
+        )
+        .values_list(
+            'variant_id', 'attribute_value_id', 'attribute_value__value', 'attribute_value__display_value',
+            'attribute_value__color_code', 'attribute_value__sort_order', 'attribute_value__attribute_id',
+            'attribute_value__attribute__name', 'attribute_value__attribute__display_name',
+        )
+    )
+
+    axes = {}
+    values_of = {}
+    for variant_id, value_id, value, display_value, color_code, sort_order, attr_id, attr_name, attr_display in links:
+        axis = axes.setdefault(attr_id, {
+            'id': attr_id,
+            'name': attr_name,
+            'display_name': attr_display or attr_name,
+            'values': {},
+        })
+        axis['values'][value_id] = {
+            'id': value_id,
+            'value': value,
+            'display_value': display_value or value,
+            'color_code': color_code,
+            'sort_order': sort_order,
+        }
+        values_of.setdefault(variant_id, {})[attr_id] = value_id
+
+    ordered_axes = sorted(axes.values(), key=lambda a: (a['name'], a['id']))
+    for axis in ordered_axes:
+        ordered = sorted(axis['values'].values(), key=lambda v: (v.pop('sort_order'), v['value']))
+        axis['values'] = ordered
+
+    combinations = {}
+    for variant_id, sku, price, stock in variant_rows:
+        chosen = values_of.get(variant_id, {})
+        key = combination_key(chosen[axis['id']] for axis in ordered_axes if axis['id'] in chosen)
+        combinations[key] = {
+            'variant_id': variant_id,
+            'sku': sku,
+            'price': float(price if price else base_price),
+            'stock': stock,
+            'is_available': stock > 0,
+        }
+    return {'product_id': product_id, 'axes': ordered_axes, 'combinations': combinations}
+
+
+def _entry(matrix):
+    payload = json.dumps({'success': True, **matrix}, ensure_ascii=False, separators=(',', ':'))
+    return {
+        'matrix': matrix,
+        'json': payload,
+        'etag': '"%s"' % hashlib.sha1(payload.encode()).hexdigest(),
+    }
+
+
+def get_entry(product_id):
+    """
+    {'matrix', 'json', 'etag'} önbellek girdisi; ürün yoksa None. Sürüm
+    kurulumdan önce okunur: arada gelen değişiklik eski matrisi yeni
+    damgayla yazdıramaz.
+    """
+    version = versions.product_version(product_id)
+    key = _key(product_id, version)
+    entry = cache.get(key)
+    if entry is None:
+        matrix = build(product_id)
+        if matrix is None:
+            return None
+        entry = _entry(matrix)
+        cache.set(key, entry, _timeout())
+    return entry
+
+
+def stock_changed(product_id, variant_id, stock):
+    """
+    Yalnız stoğu değişen varyant için önbellekteki matrisi yamar. Aynı ürüne
+    eşzamanlı yama kilidi alınamazsa sürüm düşürülür (yeniden kurulum);
+    böylece kayıp güncelleme bayat stok bırakamaz.
+    """
+    version = versions.peek_product_version(product_id)
+    if version is None:
+        return
+    if not cache.add(_lock_key(product_id), 1, 5):
+        versions.bump_products([product_id])
+        return
+    try:
+        key = _key(product_id, version)
+        entry = cache.get(key)
+        if entry is None:
+            return
+        matrix = entry['matrix']
+        for combination in matrix['combinations'].values():
+            if combination['variant_id'] == variant_id:
+                combination['stock'] = stock
+                combination['is_available'] = stock > 0
+                break
+        else:
+            return
+        cache.set(key, _entry(matrix), _timeout())
+    finally:
+        cache.delete(_lock_key(product_id))
@@ -0,0 +1,110 @@
+"""
+Katalog önbellekleri ve koşullu GET (ETag) için sürüm damgaları.
+
+Üç düzey damga vardır:
+- Ürün damgası: ürün, varyantları, stoğu veya puanı değişince düşer.
+  Ürün detay sayfası gövdesi, varyant matrisi ve detay sayfası ETag'i bunu
+  kullanır.
+- Kategori damgası: kategori ya da içindeki herhangi bir ürün değişince
+  düşer. Listeler (faset kenar çubuğu tüm kategorileri gösterdiğinden) tüm
+  kategori damgalarının özetini kullanır.
+- Katalog dönemi (epoch): her ETag'e girer. Sinyal tetiklemeyen toplu
+  işlemler (içe aktarma, yeniden kurulum komutları) ve şablon/dağıtım
+  değişiklikleri için `bump_epoch()` ile düşürülür.
+
+Damgalar varsayılan önbellekte zaman tabanlı (time_ns) değerlerdir ve
+"düşürmek" anahtarı silmektir; bir sonraki okuma yeni bir damga üretir.
+Önbellekten düşen ya da silinen bir damga yeniden üretildiğinde eski bir
+değer asla geri gelmez.
+
+Komutlar (catalog_import, recompute_ratings, rebuild_sales_rank) ve tüm web
+worker'ları aynı damgaları görmelidir; bu yüzden önbellek süreçler arasında
+paylaşılır (üretimde REDIS_URL zorunlu, bkz. core.C001). Süreç içi LocMem'de
+bir süreçte düşürülen damgayı diğer süreçler görmez.
+"""
+import time
+
+from django.core.cache import cache
+
+_PRODUCT_KEY = 'catalog:product:{}:version'
+_CATEGORY_KEY = 'catalog:category:{}:version'
+_CATEGORY_IDS_KEY = 'catalog:category_ids'
+_EPOCH_KEY = 'catalog:epoch'
+
+
+def _stamp(key):
+    version = cache.get(key)
+    if version is None:
+        # Eşzamanlı üretimde ilk yazan kazanır
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def product_version(pk):
+    """Ürünün geçerli sürüm damgası (yoksa üretir)."""
+    return _stamp(_PRODUCT_KEY.format(pk))
+
+
+def peek_product_version(pk):
+    """Damga varsa döndürür, yoksa üretmez (önbellekte girdi olup olamayacağını bilmek için)."""
+    return cache.get(_PRODUCT_KEY.format(pk))
+
+
+def category_version(pk):
+    return _stamp(_CATEGORY_KEY.format(pk))
+
+
+def catalog_epoch():
+    return _stamp(_EPOCH_KEY)
+
+
+def bump_products(pks):
+    """Ürünlerin damgalarını düşürür; bağlı önbellek girdileri geçersizleşir."""
+    keys = [_PRODUCT_KEY.format(pk) for pk in pks]
+    if keys:
+        cache.delete_many(keys)
+
+
+def bump_categories(pks):
+    keys = [_CATEGORY_KEY.format(pk) for pk in pks if pk is not None]
+    if keys:
+        cache.delete_many(keys)
+
+
+def forget_category_ids():
+    """Kategori eklendi/silindi: katalog özetinin kategori listesi yeniden okunur."""
+    cache.delete(_CATEGORY_IDS_KEY)
+
+
+def bump_epoch():
+    cache.delete(_EPOCH_KEY)
+
+
+def product_changed(product_id, category_ids):
+    """Sinyalsiz ürün güncellemeleri (stok düşümü, puan) için ürün ve kategori damgaları."""
+    bump_products([product_id])
+    bump_categories(category_ids)
+
+
+def category_ids():
+    """Tüm kategori ID'leri (önbellekte; eksikse tek sorgu)."""
+    ids = cache.get(_CATEGORY_IDS_KEY)
+    if ids is None:
+        from .models import Category
+
+        ids = sorted(Category.objects.values_list('pk', flat=True))
+        cache.set(_CATEGORY_IDS_KEY, ids, None)
+    return ids
+
+
+def catalog_version():
+    """
+    Tüm kataloğun damgası: dönem ve kategori damgaları (tek get_many).
+    Herhangi bir ürün ya da kategori değişince değişir.
+    """
+    ids = category_ids()
+    keys = [_CATEGORY_KEY.format(pk) for pk in ids]
+    found = cache.get_many(keys)
+    stamps = [found[key] if key in found else _stamp(key) for key in keys]
+    return (catalog_epoch(), tuple(ids), tuple(stamps))
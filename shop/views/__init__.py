@@ -4,6 +4,7 @@
 from .product import (
     product_list,
     product_detail,
+    product_viewer_state,
     get_product_variants,
     search_autocomplete,
     advanced_search
@@ -17,7 +18,9 @@ from .cart import (
     cart_detail,
     checkout,
     checkout_success,
-    checkout_pay
+    checkout_pay,
+    validate_coupon,
+    remove_coupon
 )
 
 # Order views
@@ -18,7 +18,8 @@ def wishlist_view(request):
         'product__category'
     ).only(
         'id', 'product__id', 'product__name', 'product__price', 
-        'product__image', 'product__category__name', 'created_at'
+        'product__image', 'product__category__name', 'product__rating_avg',
+        'product__rating_count', 'created_at'
     )
     
     return render(request, 'shop/wishlist.html', {
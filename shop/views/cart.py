@@ -1,12 +1,10 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.db import transaction
-from django.db.models import F
-from django.core.mail import send_mail, EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
 import json
@@ -15,15 +13,33 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-from ..models import Product, Order, OrderItem
+from .. import orders, pricing, reservations
+from ..models import Product, Order
 from ..cart import Cart
 from ..forms import OrderForm, BillingForm
-from ..utils import calculate_order_totals
-from ..shipping import calc_shipping, get_shipping_methods
+from ..shipping import get_shipping_methods
 from accounts.models import Address
 from payments.provider import get_provider
 
 
+def _available(request, product):
+    exclude_key = request.session.get(reservations.SESSION_KEY)
+    return reservations.available_stock([product.id], exclude_key=exclude_key).get(product.id, 0)
+
+
+def _reserve_cart(request, cart):
+    """
+    Sepeti stoktan ayırır (bkz. shop/reservations.py). Yetmeyen ürün varsa
+    mesaj ekleyip False döndürür.
+    """
+    failed = reservations.reserve(reservations.hold_key(request), cart.lines())
+    if failed:
+        names = Product.objects.filter(pk__in=failed).values_list('name', flat=True)
+        messages.error(request, f'Stok yetersiz: {", ".join(names)}')
+        return False
+    return True
+
+
 def cart_detail(request):
     cart = Cart(request)
     return render(request, 'shop/cart_detail.html', {'cart': cart})
@@ -42,8 +58,8 @@ def cart_add(request, product_id):
         messages.error(request, 'Geçersiz miktar')
         return redirect('shop:product_detail', pk=product_id)
     
-    # Stok kontrolü
-    if hasattr(product, 'stock') and product.stock < quantity:
+    # Stok kontrolü (başkalarının ödeme sırasındaki tutmaları düşülür)
+    if _available(request, product) < quantity:
         messages.error(request, 'Yetersiz stok')
         return redirect('shop:product_detail', pk=product_id)
     
@@ -73,7 +89,7 @@ def cart_update(request, product_id):
             messages.success(request, f'{product.name} sepetten çıkarıldı')
         else:
             # Stok kontrolü
-            if hasattr(product, 'stock') and product.stock < quantity:
+            if _available(request, product) < quantity:
                 messages.error(request, 'Yetersiz stok')
                 return redirect('shop:cart_detail')
             
@@ -127,6 +143,8 @@ def checkout(request):
                     checkout_data['save_new_address'] = True
             
             request.session['checkout_data'] = checkout_data
+            if not _reserve_cart(request, cart):
+                return redirect('shop:cart_detail')
             return redirect('shop:checkout_pay')
     else:
         # Kullanıcı bilgileri varsa form'u doldur
@@ -139,17 +157,12 @@ def checkout(request):
         form = OrderForm(initial=initial_data)
         billing_form = BillingForm()
     
-    cart_items = []
-    for item in cart:
-        cart_items.append({
-            'product': item['product'],
-            'quantity': item['quantity'],
-            'price': item['price'],
-            'total_price': item['total_price']
-        })
+    cart_items = list(cart)
     
-    # Toplam hesaplama
-    totals = calculate_order_totals(cart_items)
+    # Toplam hesaplama (bkz. shop/pricing.py)
+    breakdown = pricing.price_cart(request, cart_items)
+    totals = breakdown.as_tl()
+    shipping_rules = pricing.tables().shipping
     
     # Kullanıcının adresleri
     user_addresses = []
@@ -165,8 +178,16 @@ def checkout(request):
         'cart': cart,
         'cart_items': cart_items,
         'totals': totals,
+        'breakdown': breakdown,
+        'cart_total': str(totals['subtotal']),
+        'cart_total_price': totals['subtotal'],
+        'discount': totals['discount'],
+        'shipping_fee': totals['shipping_fee'],
+        'total_amount': totals['total'],
         'user_addresses': user_addresses,
         'shipping_methods': shipping_methods,
+        'shipping_standard': str(pricing.to_tl(shipping_rules['standard'].base)),
+        'shipping_express': str(pricing.to_tl(shipping_rules['express'].base)),
         'free_shipping_threshold': settings.FREE_SHIPPING_THRESHOLD
     }
     
@@ -185,188 +206,82 @@ def checkout_pay(request):
         return redirect('shop:checkout')
     
     if request.method == 'POST':
+        # Tutmalar tazelenir (süresi dolmuş ya da sepet değişmiş olabilir)
+        if not _reserve_cart(request, cart):
+            return redirect('shop:checkout')
+        key = reservations.hold_key(request)
         try:
             provider = get_provider(settings)
-            cart_items = []
-            for item in cart:
-                cart_items.append({
-                    'product': item['product'],
-                    'quantity': item['quantity'],
-                    'price': item['price'],
-                    'total_price': item['total_price']
-                })
             
-            shipping_method = checkout_data.get('shipping_method', 'standard')
-            subtotal = sum(item['total_price'] for item in cart_items)
-            shipping_fee = calc_shipping(float(subtotal), shipping_method)
-            total_amount = float(subtotal) + shipping_fee
-            
-            totals = {
-                'subtotal': subtotal,
-                'shipping_fee': shipping_fee,
-                'total': total_amount
-            }
+            breakdown = pricing.price_cart(request, cart, checkout_data.get('shipping_method', 'standard'))
+            if breakdown.coupon_error:
+                # Kupon bu arada geçersizleşti: kullanıcı yeni toplamı görsün
+                request.session.pop(pricing.SESSION_COUPON_KEY, None)
+                reservations.release(key)
+                messages.error(request, breakdown.coupon_error)
+                return redirect('shop:checkout')
+            total_amount = pricing.to_tl(breakdown.total)
             
             provider_name = getattr(settings, 'PAYMENT_PROVIDER', 'mock').lower()
             
-            billing = checkout_data.get('billing') or {}
-            want_invoice = billing.get('want_invoice')
-            invoice_update_fields = []
-            
             if provider_name == 'mock':
                 payment_result = provider.charge(
                     amount=total_amount,
                     currency='TRY',
                     order_ref=f'ORDER-{int(time.time())}'
                 )
-                if payment_result.success:
-                    with transaction.atomic():
-                        if (request.user.is_authenticated and 
-                            checkout_data.get('save_new_address') and 
-                            not checkout_data.get('selected_address_id')):
-                            Address.objects.create(
-                                user=request.user,
-                                title='Yeni Adres',
-                                fullname=checkout_data.get('fullname', ''),
-                                phone=checkout_data.get('phone', ''),
-                                address=checkout_data.get('address', ''),
-                                city=checkout_data.get('city', ''),
-                                district=checkout_data.get('district', ''),
-                                postal_code=checkout_data.get('postal_code', ''),
-                                is_default=False
-                            )
-                        order = Order.objects.create(
-                            user=request.user if request.user.is_authenticated else None,
-                            email=checkout_data.get('email', request.user.email if request.user.is_authenticated else 'test@example.com'),
-                            fullname=checkout_data.get('fullname', 'Test Kullanıcı'),
-                            phone=checkout_data.get('phone', ''),
-                            address=checkout_data.get('address', ''),
-                            city=checkout_data.get('city', ''),
-                            district=checkout_data.get('district', ''),
-                            postal_code=checkout_data.get('postal_code', ''),
-                            shipping_method=shipping_method,
-                            shipping_fee=shipping_fee,
-                            total=total_amount,
-                            status='paid',
-                        )
-                        # Fatura snapshot
-                        if want_invoice:
-                            order.invoice_type = billing.get('invoice_type') or 'bireysel'
-                            order.billing_fullname = billing.get('billing_fullname','') or order.fullname
-                            order.tckn = billing.get('tckn','')
-                            order.vkn = billing.get('vkn','')
-                            order.tax_office = billing.get('tax_office','')
-                            order.e_archive_email = billing.get('e_archive_email','')
-                            order.billing_address = billing.get('billing_address','')
-                            order.billing_city = billing.get('billing_city','')
-                            order.billing_district = billing.get('billing_district','')
-                            order.billing_postcode = billing.get('billing_postcode','')
-                            order.kvkk_approved = bool(billing.get('kvkk_approved'))
-                            invoice_update_fields = ['invoice_type','billing_fullname','tckn','vkn','tax_office','e_archive_email','billing_address','billing_city','billing_district','billing_postcode','kvkk_approved']
-                            order.save(update_fields=invoice_update_fields + ['status'])
-                        
-                        for item in cart:
-                            product = item['product']
-                            quantity = item['quantity']
-                            unit_price = item['price']
-                            line_total = item['total_price']
-                            OrderItem.objects.create(
-                                order=order,
-                                product=product,
-                                quantity=quantity,
-                                unit_price=unit_price,
-                                line_total=line_total
-                            )
-                            if hasattr(product, 'stock'):
-                                Product.objects.filter(id=product.id).update(stock=F('stock') - quantity)
-                                product.refresh_from_db()
-                                if product.stock < 0:
-                                    transaction.set_rollback(True)
-                                    messages.error(request, f'{product.name} için stok yetersiz')
-                                    return redirect('shop:checkout')
-                        cart.clear()
-                        request.session['last_order_id'] = order.id
-                        if 'checkout_data' in request.session:
-                            del request.session['checkout_data']
-                        return redirect('shop:checkout_success')
-                else:
+                if not payment_result.success:
+                    reservations.release(key)
                     messages.error(request, 'Ödeme işlemi başarısız oldu')
                     return redirect('shop:checkout')
-            else:
                 with transaction.atomic():
-                    order = Order.objects.create(
-                        user=request.user if request.user.is_authenticated else None,
-                        email=checkout_data.get('email', request.user.email if request.user.is_authenticated else 'test@example.com'),
-                        fullname=checkout_data.get('fullname', 'Test Kullanıcı'),
-                        phone=checkout_data.get('phone', ''),
-                        address=checkout_data.get('address', ''),
-                        city=checkout_data.get('city', ''),
-                        district=checkout_data.get('district', ''),
-                        postal_code=checkout_data.get('postal_code', ''),
-                        shipping_method=shipping_method,
-                        shipping_fee=shipping_fee,
-                        total=total_amount,
-                        status='received',
-                    )
-                    # Fatura snapshot
-                    if want_invoice:
-                        order.invoice_type = billing.get('invoice_type') or 'bireysel'
-                        order.billing_fullname = billing.get('billing_fullname','') or order.fullname
-                        order.tckn = billing.get('tckn','')
-                        order.vkn = billing.get('vkn','')
-                        order.tax_office = billing.get('tax_office','')
-                        order.e_archive_email = billing.get('e_archive_email','')
-                        order.billing_address = billing.get('billing_address','')
-                        order.billing_city = billing.get('billing_city','')
-                        order.billing_district = billing.get('billing_district','')
-                        order.billing_postcode = billing.get('billing_postcode','')
-                        order.kvkk_approved = bool(billing.get('kvkk_approved'))
-                        order.save(update_fields=['invoice_type','billing_fullname','tckn','vkn','tax_office','e_archive_email','billing_address','billing_city','billing_district','billing_postcode','kvkk_approved'])
-                    
-                    for item in cart:
-                        product = item['product']
-                        quantity = item['quantity']
-                        unit_price = item['price']
-                        line_total = item['total_price']
-                        OrderItem.objects.create(
-                            order=order,
-                            product=product,
-                            quantity=quantity,
-                            unit_price=unit_price,
-                            line_total=line_total
-                        )
-                    payment_result = provider.initiate(
-                        order=order,
-                        amount=total_amount,
-                        currency='TRY',
-                        request=request
-                    )
-                    if payment_result.success and payment_result.requires_redirect:
-                        cart.clear()
-                        if 'checkout_data' in request.session:
-                            del request.session['checkout_data']
-                        from django.http import HttpResponse
-                        return HttpResponse(payment_result.form_html)
-                    else:
-                        messages.error(request, payment_result.message or 'Ödeme sağlayıcı hatası')
-                        return redirect('shop:checkout')
+                    order = orders.place(request.user, checkout_data, breakdown, key, status='paid')
+                cart.clear()
+                request.session.pop(pricing.SESSION_COUPON_KEY, None)
+                request.session['last_order_id'] = order.id
+                if 'checkout_data' in request.session:
+                    del request.session['checkout_data']
+                return redirect('shop:checkout_success')
+            
+            with transaction.atomic():
+                order = orders.place(request.user, checkout_data, breakdown, key)
+                payment_result = provider.initiate(
+                    order=order,
+                    amount=total_amount,
+                    currency='TRY',
+                    request=request
+                )
+                redirected = payment_result.success and payment_result.requires_redirect
+                if not redirected:
+                    transaction.set_rollback(True)
+            if not redirected:
+                reservations.release(key)
+                messages.error(request, payment_result.message or 'Ödeme sağlayıcı hatası')
+                return redirect('shop:checkout')
+            # Tutmalar geri çağrıda stoktan düşülür; gelmezse süresi dolunca bırakılır
+            cart.clear()
+            request.session.pop(pricing.SESSION_COUPON_KEY, None)
+            if 'checkout_data' in request.session:
+                del request.session['checkout_data']
+            request.session[reservations.PENDING_ORDER_KEY] = order.id
+            return HttpResponse(payment_result.form_html)
+        except orders.PlacementError as e:
+            reservations.release(key)
+            messages.error(request, str(e))
+            return redirect('shop:checkout')
         except Exception as e:
+            reservations.release(key)
             messages.error(request, f'Bir hata oluştu: {str(e)}')
             return redirect('shop:checkout')
     
-    cart_items = []
-    for item in cart:
-        cart_items.append({
-            'product': item['product'],
-            'quantity': item['quantity'],
-            'price': item['price'],
-            'total_price': item['total_price']
-        })
-    totals = calculate_order_totals(cart_items)
+    cart_items = list(cart)
+    breakdown = pricing.price_cart(request, cart_items, checkout_data.get('shipping_method', 'standard'))
+    totals = breakdown.as_tl()
     context = {
         'cart': cart,
         'cart_items': cart_items,
         'totals': totals,
+        'breakdown': breakdown,
         'checkout_data': checkout_data
     }
     return render(request, 'shop/checkout_pay.html', context)
@@ -394,6 +309,12 @@ def checkout_success(request):
 
 def checkout_fail(request):
     """Ödeme başarısız sayfası"""
+    if request.session.get(reservations.SESSION_KEY):
+        reservations.release(request.session[reservations.SESSION_KEY])
+    # Ödeme sayfasından dönen siparişin tutmaları (ödenmemişse) beklenmeden bırakılır
+    pending = request.session.pop(reservations.PENDING_ORDER_KEY, None)
+    if pending:
+        reservations.release_unpaid(pending)
     return render(request, 'shop/checkout_fail.html')
 
 
@@ -404,33 +325,61 @@ def calculate_totals_ajax(request):
     try:
         data = json.loads(request.body)
         cart = Cart(request)
-        shipping_method = data.get('shipping_method', 'standard')
-        
-        cart_items = []
-        for item in cart:
-            cart_items.append({
-                'product': item['product'],
-                'quantity': item['quantity'],
-                'price': item['price'],
-                'total_price': item['total_price']
-            })
-        
-        # Kargo hesaplama
-        subtotal = sum(item['total_price'] for item in cart_items)
-        shipping_fee = calc_shipping(float(subtotal), shipping_method)
-        total = float(subtotal) + shipping_fee
+        breakdown = pricing.price_cart(
+            request, cart, data.get('shipping_method', 'standard'), data.get('payment_method_id'),
+        )
+        totals = breakdown.as_tl()
         
         return JsonResponse({
             'success': True,
             'totals': {
-                'subtotal': float(subtotal),
-                'shipping_fee': float(shipping_fee),
-                'total': float(total)
-            }
+                'subtotal': float(totals['subtotal']),
+                'discount': float(totals['discount']),
+                'shipping_fee': float(totals['shipping_fee']),
+                'payment_fee': float(totals['payment_fee']),
+                'total': float(totals['total'])
+            },
+            # Kuruş cinsinden kalem kalem döküm (yuvarlama farkı olmadan)
+            'breakdown': breakdown.as_dict(),
         })
         
     except Exception as e:
         return JsonResponse({
             'success': False,
             'error': str(e)
-        })
\ No newline at end of file
+        })
+
+@require_POST
+def validate_coupon(request):
+    """
+    Kupon kodunu sepete uygular. Oturumda yalnızca kod tutulur; indirim her
+    toplam hesabında fiyat motorunca yeniden bulunur.
+    """
+    code = request.POST.get('coupon_code', '').strip().upper()
+    if not code:
+        return JsonResponse({'success': False, 'message': 'Kupon kodu giriniz.'})
+    
+    breakdown = pricing.price(Cart(request), None, code, user=request.user)
+    if breakdown.coupon is None:
+        return JsonResponse({'success': False, 'message': breakdown.coupon_error})
+    
+    request.session[pricing.SESSION_COUPON_KEY] = code
+    discount = pricing.to_tl(breakdown.discount)
+    if breakdown.free_shipping:
+        message = 'Kupon başarıyla uygulandı! Kargo ücretsiz.'
+    else:
+        message = f'Kupon başarıyla uygulandı! {discount} TL indirim.'
+    return JsonResponse({
+        'success': True,
+        'message': message,
+        'coupon_code': code,
+        'discount_amount': float(discount),
+        'discount_type': breakdown.coupon.discount_type,
+    })
+
+
+@require_POST
+def remove_coupon(request):
+    """Uygulanan kuponu kaldırır"""
+    request.session.pop(pricing.SESSION_COUPON_KEY, None)
+    return JsonResponse({'success': True, 'message': 'Kupon kaldırıldı.'})
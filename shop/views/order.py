@@ -2,38 +2,48 @@ from django.shortcuts import render, get_object_or_404, redirect
 from ..models import Product, Order, OrderItem, Review
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
-from django.http import JsonResponse, HttpResponseForbidden
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from .. import archive, pagination, receipts
 from ..forms import ReviewForm
 from django.views.decorators.http import require_http_methods
 from django.urls import reverse_lazy
 from django.conf import settings
-import hmac, hashlib
+import gzip, hmac, hashlib
 
 # Sipariş işlemleri
 
 def my_orders(request):
-    """Kullanıcının siparişlerini listeler"""
+    """
+    Kullanıcının sipariş geçmişi: (user, -created_at) indeksinden imleçli
+    (keyset) sayfalar. Kalem sayısı, ilk kalemin görseli ve adet toplamı
+    listeleme sorgusunda hesaplanır; kalemler sipariş detayında yüklenir.
+    """
     if not request.user.is_authenticated:
         messages.info(request, 'Siparişlerinizi görmek için giriş yapın.')
         return redirect('accounts:login')
     
-    orders = Order.objects.filter(user=request.user).prefetch_related(
-        'orderitem_set__product'
-    ).only(
-        'id', 'status', 'total', 'created_at'
-    ).order_by('-created_at')
-    return render(request, 'shop/my_orders.html', {'orders': orders})
+    first_item = OrderItem.objects.filter(order=OuterRef('pk')).order_by('pk')
+    orders = Order.objects.filter(user=request.user).only(
+        'id', 'status', 'total', 'shipping_fee', 'discount_amount', 'address', 'created_at'
+    ).annotate(
+        item_count=Count('items'),
+        item_units=Sum('items__quantity'),
+        first_item_name=Subquery(first_item.values('product__name')[:1]),
+        first_item_image=Subquery(first_item.values('product__image')[:1]),
+    )
+    page_obj = pagination.paginate(
+        request, orders, 'new', per_page=getattr(settings, 'ORDER_HISTORY_PAGE_SIZE', 12), with_total=False,
+    )
+    return render(request, 'shop/my_orders.html', {'orders': page_obj, 'page_obj': page_obj})
 
 
 def order_detail(request, order_id):
-    """Sipariş detayını gösterir"""
-    order = get_object_or_404(
-        Order.objects.prefetch_related(
-            'orderitem_set__product__category'
-        ).select_related('user'), 
-        id=order_id
-    )
+    """Sipariş detayını gösterir (arşivlenmiş siparişler dahil)"""
+    order = archive.lookup(select=('user',), prefetch=('items__product__category',), id=order_id)
+    if order is None:
+        raise Http404('Sipariş bulunamadı.')
     
     # Kullanıcı kontrolü
     if request.user.is_authenticated:
@@ -46,7 +56,11 @@ def order_detail(request, order_id):
             messages.error(request, 'Bu siparişi görme yetkiniz yok.')
             return redirect('shop:product_list')
     
-    return render(request, 'shop/order_detail.html', {'order': order})
+    return render(request, 'shop/order_detail.html', {
+        'order': order,
+        'order_items': order.items.all(),
+        'receipt_url': receipts.link(order),
+    })
 
 
 def track_order(request):
@@ -60,11 +74,12 @@ def track_order(request):
         
         try:
             if order_id and email:
-                order = Order.objects.get(id=order_id, email=email)
+                # Eski siparişler arşivden okunur
+                order = archive.lookup(prefetch=('items__product',), id=order_id, email=email)
+                if order is None:
+                    error_message = 'Sipariş bulunamadı. Lütfen bilgilerinizi kontrol edin.'
             else:
                 error_message = 'Lütfen sipariş numarası ve e-posta adresinizi girin.'
-        except Order.DoesNotExist:
-            error_message = 'Sipariş bulunamadı. Lütfen bilgilerinizi kontrol edin.'
         except Exception as e:
             error_message = 'Bir hata oluştu. Lütfen tekrar deneyin.'
     
@@ -179,14 +194,14 @@ def _receipt_signature(order) -> str:
 @login_required(login_url=reverse_lazy('security:login'))
 def order_receipt(request, pk: int):
     """
-    Yazdırılabilir sipariş fişi (HTML).
+    Yazdırılabilir sipariş fişi (HTML), ödeme anında işlenmiş haliyle.
     Erişim koşulu: (1) personel ya da siparişin sahibi kullanıcı, veya
                    (2) geçerli ?sig=... imzası (opsiyonel linkler için).
+    Yanıt şablon çalıştırmadan saklanan gzip baytlarıdır (bkz. shop/receipts.py).
     """
-    order = get_object_or_404(
-        Order.objects.select_related('user').prefetch_related('orderitem_set__product'),
-        pk=pk
-    )
+    order = archive.lookup(only=('id', 'user_id', 'status', 'paid_at', 'created_at'), pk=pk)
+    if order is None:
+        raise Http404('Sipariş bulunamadı.')
     
     sig = request.GET.get("sig")
     is_owner = (getattr(order, "user_id", None) == getattr(request.user, "id", None))
@@ -195,41 +210,29 @@ def order_receipt(request, pk: int):
     if not (request.user.is_staff or is_owner or has_sig):
         return HttpResponseForbidden("Bu fişi görüntüleme izniniz yok.")
     
-    # Kalemler: order.items varsa onu, yoksa orderitem_set'i kullan
-    items_qs = getattr(order, "items", None)
-    items = items_qs.all() if items_qs is not None else order.orderitem_set.all()
-    
-    # Görsel alanlar: ürün adı, adet, birim fiyat, satır toplamı
-    items_data = []
-    for it in items:
-        product = getattr(it, "product", None)
-        name = getattr(product, "name", str(product)) if product else "Ürün"
-        qty = getattr(it, "quantity", 1)
-        unit_price = (
-            getattr(it, "unit_price", None)
-            or getattr(it, "price", None)
-            or (getattr(product, "price", 0) if product else 0)
+    receipt = receipts.current(order)
+    if receipt is None:
+        raise Http404("Bu siparişin fişi henüz yok.")
+    
+    # Güçlü ETag temsile özgüdür: gzip ve açık gövde aynı etiketi paylaşmaz
+    gzipped = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+    etag = f'"{receipt.digest}"' if gzipped else f'"{receipt.digest}-id"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        content = bytes(receipt.content)
+        if gzipped:
+            response = HttpResponse(content, content_type='text/html; charset=utf-8')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(content), content_type='text/html; charset=utf-8')
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if request.GET.get('v') == receipts.version(receipt):
+        # Sürümlü bağlantı: içerik değişince bağlantı da değişir
+        patch_cache_control(
+            response, private=True, immutable=True,
+            max_age=getattr(settings, 'RECEIPT_CACHE_SECONDS', 60 * 60 * 24 * 365),
         )
-        line_total = (
-            getattr(it, "total_price", None)
-            or getattr(it, "total", None)
-            or (unit_price * qty)
-        )
-        items_data.append({"name": name, "qty": qty, "unit_price": unit_price, "line_total": line_total})
-    
-    subtotal = sum(i["line_total"] for i in items_data)
-    shipping_fee = getattr(order, "shipping_fee", 0) or 0
-    discount = getattr(order, "discount_amount", 0) or 0
-    grand_total = getattr(order, "total", None)
-    if grand_total is None:
-        grand_total = subtotal + shipping_fee - discount
-    
-    ctx = {
-        "order": order,
-        "items": items_data,
-        "subtotal": subtotal,
-        "shipping_fee": shipping_fee,
-        "discount": discount,
-        "grand_total": grand_total,
-    }
-    return render(request, "shop/order_receipt.html", ctx)
\ No newline at end of file
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
\ No newline at end of file
@@ -5,7 +5,8 @@ from django.db import transaction
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django_ratelimit.decorators import ratelimit
-from shop.models import Order
+from shop import reservations
+from shop.models import Order, Product
 
 
 @login_required
@@ -15,8 +16,9 @@ def cancel_order(request, order_id: int):
     """
     Sadece 'received' durumundaki siparişi iptal eder.
     Sipariş sahibi veya staff kullanıcı iptal edebilir.
-    İptalde stok geri yüklenir. İdempotent: yeniden iptal denemesi
-    stokları ikinci kez arttırmaz.
+    İptalde düşülmüş stok geri yüklenir ve siparişe bağlı stok tutmaları
+    bırakılır. İdempotent: yeniden iptal denemesi stokları ikinci kez
+    arttırmaz.
     """
     order = get_object_or_404(Order.objects.select_for_update(), pk=order_id)
     
@@ -35,15 +37,18 @@ def cancel_order(request, order_id: int):
         if order.status != "received":
             return HttpResponse(status=409)  # state conflict
         
-        # Stokları geri yükle
-        for item in order.items.select_related("product").all():
-            product = item.product
-            product.stock = product.stock + item.quantity
+        # Stokları geri yükle: yalnız gerçekten düşülmüş miktar (bkz. reservations.restock_quantities)
+        restock = reservations.restock_quantities(order)
+        for product in Product.objects.filter(pk__in=list(restock)):
+            product.stock = product.stock + restock[product.pk]
             product.save(update_fields=["stock"])
         
+        # Ödeme bekleyen siparişin stok tutmaları bırakılır
+        reservations.release(order=order)
+
         # Durumu güncelle
         order.status = "cancelled"
-        order.save(update_fields=["status"])
+        order.save(update_fields=["status", "updated_at"])
         
         messages.success(request, "Siparişiniz iptal edildi.")
         return HttpResponse("OK")
\ No newline at end of file
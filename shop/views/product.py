@@ -1,55 +1,28 @@
-from django.shortcuts import render, get_object_or_404, redirect
-from ..models import Product, Category, OrderItem, Review, Wishlist, StockAlert, ProductAttribute, ProductAttributeValue, ProductVariant, ProductVariantAttribute
-from django.contrib.auth.decorators import login_required
-from django.contrib import messages
+from django.shortcuts import render, get_object_or_404
+from ..models import Product, Category
 from django.core.paginator import Paginator
-from django.db.models import Q, Avg, Count, Min, Max
-from django.http import JsonResponse
-from django.db import models
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.views.decorators.http import require_http_methods
-from decimal import Decimal
-import json
+from ..homepage import get_homepage_blocks
+from .. import autocomplete, conditional, facets, pagination, product_page, sales_rank, search, variants, versions
+from ..conditional import conditional_get
 
 # Ürün listesi
 
+@conditional_get(conditional.catalog_versions, per_user=True)
 def product_list(request):
     # Ana sayfa kontrolü
     is_homepage = not any(request.GET.get(param) for param in ['q', 'category', 'min_price', 'max_price', 'sort'])
     
     if is_homepage:
-        # Ana sayfa için özel veriler
+        # Ana sayfa blokları önbellekten (bkz. shop/homepage.py)
         try:
-            # Öne çıkan ürünler (yüksek puanlı)
-            featured_products = Product.objects.select_related('category').only(
-                'id', 'name', 'price', 'stock', 'image', 'category__name'
-            ).filter(
-                stock__gt=0
-            ).annotate(
-                avg_rating=Avg('reviews__rating', filter=Q(reviews__is_approved=True)),
-                review_count=Count('reviews', filter=Q(reviews__is_approved=True))
-            ).filter(avg_rating__gte=4.0).order_by('-avg_rating', '-review_count')[:6]
-            
-            # En çok satan ürünler
-            bestsellers = Product.objects.select_related('category').only(
-                'id', 'name', 'price', 'stock', 'image', 'category__name'
-            ).filter(
-                stock__gt=0
-            ).annotate(
-                order_count=Count('orderitem')
-            ).order_by('-order_count')[:6]
-            
-            # Yeni ürünler
-            new_products = Product.objects.select_related('category').only(
-                'id', 'name', 'price', 'stock', 'image', 'category__name'
-            ).filter(
-                stock__gt=0
-            ).order_by('-id')[:6]
-            
-            # Kategoriler (ürün sayısı ile)
-            categories_with_count = Category.objects.annotate(
-                product_count=Count('products', filter=Q(products__stock__gt=0))
-            ).filter(product_count__gt=0).order_by('-product_count')[:8]
-            
+            blocks = get_homepage_blocks()
+            featured_products = blocks['featured_products']
+            bestsellers = blocks['bestsellers']
+            new_products = blocks['new_products']
+            categories_with_count = blocks['categories_with_count']
         except Exception:
             # Hata durumunda basit veriler
             featured_products = Product.objects.filter(stock__gt=0)[:6]
@@ -68,13 +41,16 @@ def product_list(request):
     
     # Filtreleme sayfası için mevcut kod
     products = Product.objects.select_related('category').only(
-        'id', 'name', 'price', 'stock', 'image', 'category__name', 'created_at'
+        'id', 'name', 'price', 'stock', 'image', 'category__name', 'created_at', 'rating_avg', 'rating_count'
     )
     
     # Arama
     q = request.GET.get('q', '').strip()
     if q:
-        products = products.filter(Q(name__icontains=q) | Q(description__icontains=q))
+        # Açık bir sıralama seçilmediyse alaka sırası kullanılır
+        products = search.filter_products(products, q, order_by_rank=not request.GET.get('sort'))
+    # Fasetler diğer filtreleri koşullu sayımla uygular; sadece arama sonucunu alır
+    facet_base = products if q else None
     
     # Kategori filtresi
     category_id = request.GET.get('category', '').strip()
@@ -86,6 +62,7 @@ def product_list(request):
     max_price = request.GET.get('max_price', '').strip()
     
     # Min price validasyonu
+    min_price_val = max_price_val = None
     if min_price:
         try:
             min_price_val = float(min_price)
@@ -117,12 +94,16 @@ def product_list(request):
         except (ValueError, TypeError):
             pass
     
-    # Sıralama - new varsayılan
+    # Sıralama - new varsayılan (arama sorgusunda alaka sırası)
     sort_by = request.GET.get('sort', 'new')
-    if sort_by == 'price_asc':
+    if q and not request.GET.get('sort'):
+        pass  # alaka sırası (search.filter_products)
+    elif sort_by == 'price_asc':
         products = products.order_by('price')
     elif sort_by == 'price_desc':
         products = products.order_by('-price')
+    elif sort_by == 'bestseller':
+        products = sales_rank.order_by_bestseller(products)
     elif sort_by == 'new':
         # created_at varsa onu kullan, yoksa -id
         if hasattr(Product, 'created_at'):
@@ -135,18 +116,27 @@ def product_list(request):
         else:
             products = products.order_by('-id')
     
-    categories = Category.objects.all()
-    
-    # Fiyat aralığı için min/max değerleri
-    price_range = Product.objects.aggregate(
-        min_price=models.Min('price'),
-        max_price=models.Max('price')
+    # Kategori sayıları, fiyat histogramı ve aralığı (bkz. shop/facets.py)
+    facet_data = facets.get_facets(
+        facet_base,
+        category=int(category_id) if category_id.isdigit() else None,
+        min_price=min_price_val,
+        max_price=max_price_val,
     )
+    categories = facet_data['categories']
+    price_range = facet_data['price_range']
     
-    # Sayfalama
-    paginator = Paginator(products, 12)  # 12 ürün per sayfa
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Sayfalama: desteklenen sıralamalarda imleç (keyset), eski ?page= bağlantıları için Paginator
+    if q and not request.GET.get('sort'):
+        sort_key = None  # alaka sırası (arama arka ucunun puanı)
+    else:
+        sort_key = sort_by if sort_by in ('price_asc', 'price_desc', 'bestseller') else 'new'
+    if pagination.use_cursor(request, sort_key):
+        page_obj = pagination.paginate(request, products, sort_key, per_page=12)
+    else:
+        paginator = Paginator(products, 12)  # 12 ürün per sayfa
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
     
     # SEO için canonical URL ve noindex kontrolü
     has_filters = bool(q or category_id or min_price or max_price or sort_by != 'new')
@@ -163,6 +153,7 @@ def product_list(request):
         'max_price': max_price,
         'sort_by': sort_by,
         'price_range': price_range,
+        'facets': facet_data,
         'has_filters': has_filters,
         'canonical_url': canonical_url,
     }
@@ -170,126 +161,45 @@ def product_list(request):
 
 # Ürün detayı
 
+@conditional_get(conditional.product_versions, per_user=True)
 def product_detail(request, pk):
-    product = get_object_or_404(
-        Product.objects.select_related('category').prefetch_related(
-            'reviews__user',
-            'variants__attributes__attribute',
-            'stock_alerts'
-        ), 
-        pk=pk
-    )
-    reviews = product.reviews.filter(is_approved=True).select_related('user')
-    
-    # Kullanıcının bu ürün için yorumu var mı kontrol et
-    user_review = None
-    can_review = False
-    has_purchased = False
-    is_in_wishlist = False
-    
-    if request.user.is_authenticated:
-        user_review = reviews.filter(user=request.user).first()
-        # Kullanıcının bu ürünü satın alıp almadığını kontrol et
-        has_purchased = OrderItem.objects.filter(
-            order__user=request.user,
-            product=product,
-            order__status='paid'
-        ).exists()
-        can_review = has_purchased and not user_review
-        
-        # Kullanıcının istek listesinde olup olmadığını kontrol et
-        is_in_wishlist = Wishlist.objects.filter(
-            user=request.user,
-            product=product
-        ).exists()
-        
-        # Kullanıcının bu ürün için aktif stok uyarısı var mı kontrol et
-        has_active_stock_alert = StockAlert.objects.filter(
-            user=request.user,
-            product=product,
-            status='active'
-        ).exists()
-    else:
-        has_active_stock_alert = False
-    
-    # İlgili ürünler (aynı kategori, 4 adet)
-    related = Product.objects.filter(category=product.category)\
-               .exclude(pk=pk).select_related('category')[:4]
-    
+    # Sürüm ürün yüklenmeden önce okunur (bkz. product_page.body)
+    version = versions.product_version(pk)
+    product = get_object_or_404(Product.objects.select_related('category'), pk=pk)
     context = {
         'product': product,
-        'reviews': reviews,
-        'user_review': user_review,
-        'can_review': can_review,
-        'has_purchased': has_purchased,
-        'is_in_wishlist': is_in_wishlist,
-        'has_active_stock_alert': has_active_stock_alert,
-        'related_products': related,
+        'product_body': product_page.body(product, version),
     }
     return render(request, 'shop/product_detail.html', context)
 
+@require_http_methods(["GET"])
+def product_viewer_state(request, pk):
+    """Ürün detayındaki kullanıcıya özel bayraklar (sayfa yüklendikten sonra istenir)"""
+    if not request.user.is_authenticated:
+        state = {'authenticated': False}
+    else:
+        state = product_page.viewer_state(pk, request.user)
+        if state is None:
+            raise Http404
+    response = JsonResponse(state)
+    patch_cache_control(response, private=True, no_store=True)
+    return response
+
 @require_http_methods(["GET"])
 def get_product_variants(request, product_id):
-    """Ürün varyantlarını JSON olarak döndür"""
-    try:
-        product = get_object_or_404(Product, id=product_id)
-        variants = product.variants.prefetch_related('attributes__attribute').all()
-        
-        # Varyant verilerini hazırla
-        variant_data = []
-        for variant in variants:
-            attributes = {}
-            for attr in variant.attributes.all():
-                attributes[attr.attribute.name] = {
-                    'value': attr.value,
-                    'display_value': attr.display_value or attr.value,
-                    'color_code': attr.color_code
-                }
-            
-            variant_data.append({
-                'id': variant.id,
-                'sku': variant.sku,
-                'price': float(variant.price),
-                'stock': variant.stock,
-                'attributes': attributes,
-                'is_available': variant.stock > 0
-            })
-        
-        # Mevcut öznitelikleri grupla
-        attributes = {}
-        for variant in variants:
-            for attr in variant.attributes.all():
-                attr_name = attr.attribute.name
-                if attr_name not in attributes:
-                    attributes[attr_name] = {
-                        'display_name': attr.attribute.display_name or attr_name,
-                        'values': []
-                    }
-                
-                value_data = {
-                    'id': attr.id,
-                    'value': attr.value,
-                    'display_value': attr.display_value or attr.value,
-                    'color_code': attr.color_code
-                }
-                
-                # Aynı değeri tekrar ekleme
-                if not any(v['value'] == value_data['value'] for v in attributes[attr_name]['values']):
-                    attributes[attr_name]['values'].append(value_data)
-        
-        return JsonResponse({
-            'success': True,
-            'variants': variant_data,
-            'attributes': attributes
-        })
-    
-    except Exception as e:
-        return JsonResponse({
-            'success': False,
-            'error': str(e)
-        })
+    """Ürünün varyant matrisini JSON olarak döndür (önbellekten, bkz. shop/variants.py)"""
+    entry = variants.get_entry(product_id)
+    if entry is None:
+        return JsonResponse({'success': False, 'error': 'Ürün bulunamadı'}, status=404)
+    response = get_conditional_response(request, etag=entry['etag'])
+    if response is None:
+        response = HttpResponse(entry['json'], content_type='application/json')
+    response['ETag'] = entry['etag']
+    patch_cache_control(response, no_cache=True)
+    return response
 
 @require_http_methods(["GET"])
+@conditional_get(conditional.autocomplete_versions)
 def search_autocomplete(request):
     """Arama önerileri için AJAX endpoint"""
     query = request.GET.get('q', '').strip()
@@ -297,37 +207,8 @@ def search_autocomplete(request):
     if len(query) < 2:
         return JsonResponse({'suggestions': []})
     
-    # Ürün önerileri
-    products = Product.objects.filter(
-        Q(name__icontains=query) | Q(description__icontains=query)
-    ).only('id', 'name', 'price', 'image').order_by('name')[:8]
-    
-    # Kategori önerileri
-    categories = Category.objects.filter(
-        name__icontains=query
-    ).only('id', 'name')[:5]
-    
-    suggestions = []
-    
-    # Ürün önerilerini ekle
-    for product in products:
-        suggestions.append({
-            'type': 'product',
-            'id': product.id,
-            'name': product.name,
-            'price': float(product.price),
-            'image': product.image.url if product.image else None,
-            'url': f'/shop/product/{product.id}/'
-        })
-    
-    # Kategori önerilerini ekle
-    for category in categories:
-        suggestions.append({
-            'type': 'category',
-            'id': category.id,
-            'name': category.name,
-            'url': f'/shop/products/?category={category.id}'
-        })
+    # Süreç içi önek motoru (veritabanına gitmez, bkz. shop/autocomplete.py)
+    suggestions = autocomplete.engine.suggest(query)
     
     return JsonResponse({'suggestions': suggestions})
 
@@ -335,7 +216,6 @@ def search_autocomplete(request):
 def advanced_search(request):
     """Gelişmiş arama sayfası"""
     products = Product.objects.select_related('category').all()
-    categories = Category.objects.all()
     
     # Arama parametreleri
     q = request.GET.get('q', '').strip()
@@ -348,39 +228,42 @@ def advanced_search(request):
     
     # Filtreleme
     if q:
-        products = products.filter(
-            Q(name__icontains=q) | 
-            Q(description__icontains=q) |
-            Q(category__name__icontains=q)
-        )
+        # Açık bir sıralama seçilmediyse alaka sırası kullanılır
+        products = search.filter_products(products, q, order_by_rank=not request.GET.get('sort'))
+    # Fasetler diğer filtreleri koşullu sayımla uygular; sadece arama sonucunu alır
+    facet_filters = {'queryset': products if q else None}
     
     if category_id.isdigit():
         products = products.filter(category_id=int(category_id))
+        facet_filters['category'] = int(category_id)
     
     if min_price:
         try:
             products = products.filter(price__gte=float(min_price))
+            facet_filters['min_price'] = float(min_price)
         except ValueError:
             pass
     
     if max_price:
         try:
             products = products.filter(price__lte=float(max_price))
+            facet_filters['max_price'] = float(max_price)
         except ValueError:
             pass
     
     if in_stock == 'true':
         products = products.filter(stock__gt=0)
+        facet_filters['in_stock'] = True
     elif in_stock == 'false':
         products = products.filter(stock=0)
+        facet_filters['in_stock'] = False
     
     if min_rating:
         try:
             rating = int(min_rating)
             if 1 <= rating <= 5:
-                products = products.annotate(
-                    avg_rating=Avg('reviews__rating', filter=Q(reviews__is_approved=True))
-                ).filter(avg_rating__gte=rating)
+                products = products.filter(rating_count__gt=0, rating_avg__gte=rating)
+                facet_filters['min_rating'] = rating
         except ValueError:
             pass
     
@@ -390,30 +273,36 @@ def advanced_search(request):
     elif sort_by == 'price_desc':
         products = products.order_by('-price')
     elif sort_by == 'rating':
-        products = products.annotate(
-            avg_rating=Avg('reviews__rating', filter=Q(reviews__is_approved=True))
-        ).order_by('-avg_rating', 'name')
+        products = products.order_by('-rating_avg', 'name')
+    elif sort_by == 'bestseller':
+        products = sales_rank.order_by_bestseller(products)
     elif sort_by == 'newest':
         products = products.order_by('-id')
     elif sort_by == 'oldest':
         products = products.order_by('id')
+    elif q and not request.GET.get('sort'):
+        pass  # alaka sırası (search.filter_products)
     else:  # name (default)
         products = products.order_by('name')
     
-    # Sayfalama
-    paginator = Paginator(products, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Sayfalama: desteklenen sıralamalarda imleç (keyset), eski ?page= bağlantıları için Paginator
+    if q and not request.GET.get('sort'):
+        sort_key = None  # alaka sırası (arama arka ucunun puanı)
+    else:
+        sort_key = sort_by if sort_by in ('price_asc', 'price_desc', 'rating', 'newest', 'oldest', 'bestseller') else 'name'
+    if pagination.use_cursor(request, sort_key):
+        page_obj = pagination.paginate(request, products, sort_key, per_page=12)
+    else:
+        paginator = Paginator(products, 12)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
     
-    # Fiyat aralığı
-    price_range = Product.objects.aggregate(
-        min_price=models.Min('price'),
-        max_price=models.Max('price')
-    )
+    # Kategori sayıları, fiyat/puan/stok kovaları ve fiyat aralığı (bkz. shop/facets.py)
+    facet_data = facets.get_facets(**facet_filters)
     
     context = {
         'products': page_obj,
-        'categories': categories,
+        'categories': facet_data['categories'],
         'query': q,
         'selected_category': int(category_id) if category_id.isdigit() else '',
         'min_price': min_price,
@@ -421,7 +310,8 @@ def advanced_search(request):
         'in_stock': in_stock,
         'min_rating': min_rating,
         'sort_by': sort_by,
-        'price_range': price_range,
+        'price_range': facet_data['price_range'],
+        'facets': facet_data,
         'page_obj': page_obj,
     }
     return render(request, 'shop/advanced_search.html', context)
\ No newline at end of file
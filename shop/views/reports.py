@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import render
+from django.utils import timezone
+
+from .. import rollups
+from ..models import RollupWatermark
+
+# Raporlar (yalnız özet tabloları okunur; bkz. shop/rollups.py)
+
+REPORT_DAYS = (7, 30, 90, 365)
+
+
+@staff_member_required
+def sales_dashboard(request):
+    """Son N günün satış panosu; Order/OrderItem tablolarına sorgu atmaz."""
+    try:
+        days = int(request.GET.get('days', 90))
+    except (TypeError, ValueError):
+        days = 90
+    if days not in REPORT_DAYS:
+        days = 90
+    end = timezone.localdate()
+    data = rollups.report(end - timedelta(days=days - 1), end)
+    data.update({
+        'days': days,
+        'report_days': REPORT_DAYS,
+        'watermark': RollupWatermark.objects.filter(name=rollups.WATERMARK).values_list('value', flat=True).first(),
+    })
+    return render(request, 'shop/sales_dashboard.html', data)